@@ -31,6 +31,7 @@ STATE_DEMO = "demo_mode"
 
 TERM_ACTIVE = "active"
 TERM_INACTIVE = "inactive"
+TERM_OTHER_COMBINATIONS = "other combinations"
 TERM_QOP = "quantity_operation"
 TERM_INIT = "init"
 TERM_INITIAL_ILVL = "initial_item_levels"
@@ -108,15 +109,35 @@ TERM_ITEM_ASSOCIATION = "Item Association"
 ILVL_AVAILABLE = "Available"
 ILVL_REQUIRED = "Required"
 
+TERM_STOCK_OUTS = "Stock-outs"
+TERM_STOCK_OUT_DURATION = "Stock-out Duration"
+TERM_OBSERVED_DURATION = "Observed Duration"
+TERM_TIME_WEIGHTED_MEAN = "Time-weighted Mean"
+TERM_FIRST_STOCK_OUT = "First Stock-out"
+TERM_LAST_STOCK_OUT = "Last Stock-out"
+TERM_TIME_WEIGHTED_STD = "Time-weighted Std"
+TERM_STOCK_OUT_SHARE = "Stock-out Share"
+TERM_DURATION = "Duration"
+TERM_SHARE = "Share"
+TERM_MINIMUM = "Minimum"
+TERM_MAXIMUM = "Maximum"
+TERM_LAST = "Last"
+
 QOP_ID = "qop_id"
 QOP_COUNT = "qop_count"
 TERM_EVENT_DATA = "event_data"
 TERM_OBJECT_DATA = "object_data"
+TERM_EVENT_OBJECT_INDEX = "event_object_index"
+TERM_FILTER_PLAN = "filter_plan"
+TERM_ITEM_LEVEL_INDEX = "item_level_index"
+TERM_TABLE_INDEX = "table_index"
 TERM_OBJECT_TYPE_COMBINATION = "object type combinations"
 TERM_OBJECT_TYPE_COMBINATION_FREQUENCY = "object type combination frequency"
 TERM_SUBLOG = "Sublog"
 TERM_COUNT = "Count"
+TERM_HOURLY = "Hourly"
 TERM_DAILY = "Daily"
+TERM_WEEKLY = "Weekly"
 TERM_MONTHLY = "Monthly"
 TERM_QUP_TYPE = "Quantity Update Type"
 
@@ -0,0 +1,135 @@
+import functools
+from typing import Iterable
+
+import pandas as pd
+
+from qrpm.GLOBAL import TERM_EVENT, TERM_OBJECT, TERM_ACTIVITY, TERM_OBJECT_TYPE, TERM_COLLECTION
+
+ENCODED_COLUMNS = [TERM_EVENT, TERM_OBJECT, TERM_ACTIVITY, TERM_OBJECT_TYPE, TERM_COLLECTION]
+
+
+def create_log_categories(tables: Iterable[pd.DataFrame]) -> dict[str, pd.CategoricalDtype]:
+    """
+    Create one dictionary encoding per identifier column (events, objects, activities, object types, collection points)
+    for all tables of a log, so that the encoded columns of different tables share their categories.
+    :param tables: tables of the log
+    :return: categorical dtype for every identifier column found in the tables
+    """
+
+    tables = [table for table in tables if table is not None]
+    values = {column: [] for column in ENCODED_COLUMNS}
+    categories = dict()
+
+    # tables encoded before already share their categories
+    for column in ENCODED_COLUMNS:
+        dtypes = [table[column].dtype for table in tables if column in table.columns]
+        if dtypes and all(isinstance(dtype, pd.CategoricalDtype) and dtype == dtypes[0] for dtype in dtypes):
+            categories[column] = dtypes[0]
+        else:
+            pass
+
+    for table in tables:
+        for column in ENCODED_COLUMNS:
+            if column in categories:
+                pass
+            elif column in table.columns:
+                if isinstance(table[column].dtype, pd.CategoricalDtype):
+                    values[column].append(pd.Series(table[column].cat.categories, dtype=object))
+                else:
+                    values[column].append(pd.Series(table[column].dropna().unique(), dtype=object))
+            else:
+                pass
+
+    for column, column_values in values.items():
+        if column_values:
+            unique_values = pd.concat(column_values, ignore_index=True).astype(str).unique()
+            categories[column] = pd.CategoricalDtype(categories=sorted(unique_values), ordered=False)
+        else:
+            pass
+
+    return categories
+
+
+def encode_categoricals(df: pd.DataFrame, categories: dict[str, pd.CategoricalDtype]) -> pd.DataFrame:
+    """
+    Encode the identifier columns of a table using the categories of the log (identifiers are compared by their text,
+    missing identifiers stay missing).
+    :param df: table
+    :param categories: categorical dtypes as created by create_log_categories
+    :return: table with categorical identifier columns
+    """
+
+    if df is None:
+        return None
+    else:
+        pass
+
+    columns = [column for column in categories if column in df.columns and df[column].dtype != categories[column]]
+
+    if columns:
+        df = df.copy()
+        for column in columns:
+            df[column] = df[column].astype(str).where(df[column].notna()).astype(categories[column])
+    else:
+        pass
+
+    return df
+
+
+def decode_categoricals(df: pd.DataFrame, columns: Iterable[str] = None) -> pd.DataFrame:
+    """
+    Replace categorical columns by columns of their values (used for display and external libraries). Only the decoded
+    columns are copied, all other columns are shared with the passed table.
+    :param df: table
+    :param columns: columns to be decoded, all categorical columns if None
+    :return: table with decoded columns
+    """
+
+    if df is None:
+        return None
+    else:
+        pass
+
+    columns = df.columns if columns is None else [column for column in columns if column in df.columns]
+    columns = [column for column in columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+
+    if columns:
+        df = df.copy(deep=False)
+        for column in columns:
+            df[column] = df[column].astype(df[column].cat.categories.dtype)
+    else:
+        pass
+
+    return df
+
+
+def encode_log_tables(tables: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+    """Encode all tables of a log with shared categories."""
+
+    categories = create_log_categories(tables.values())
+
+    return {name: encode_categoricals(df, categories) for name, df in tables.items()}
+
+
+def decode_categorical_arguments(func=None, columns: Iterable[str] = None):
+    """
+    Decorator passing data frames with decoded identifier columns to the decorated (display) function. Used without
+    arguments, all categorical columns are decoded, otherwise only the passed columns the function displays, e.g.,
+    @decode_categorical_arguments(columns=[TERM_ACTIVITY]).
+    :param func: decorated function
+    :param columns: columns to be decoded, all categorical columns if None
+    """
+
+    if func is None:
+        return functools.partial(decode_categorical_arguments, columns=columns)
+    else:
+        pass
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        args = [decode_categoricals(arg, columns) if isinstance(arg, pd.DataFrame) else arg for arg in args]
+        kwargs = {key: decode_categoricals(value, columns) if isinstance(value, pd.DataFrame) else value
+                  for key, value in kwargs.items()}
+        return func(*args, **kwargs)
+
+    return wrapper
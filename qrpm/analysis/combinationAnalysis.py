@@ -0,0 +1,146 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from qrpm.GLOBAL import TERM_OTHER_COMBINATIONS
+
+MAX_DISPLAYED_COMBINATIONS = 50
+
+
+#### BITSETS ####
+def factorize_instances(instance_ids: Iterable) -> (np.ndarray, int, np.ndarray):
+    """
+    Encode the instance of every row as integer code.
+    :param instance_ids: instance id of every row
+    :return: code of every row, number of instances, first row of every instance
+    """
+
+    codes, instances = pd.factorize(np.asarray(instance_ids))
+    first_rows = np.unique(codes, return_index=True)[1]
+
+    return codes, len(instances), first_rows
+
+def empty_bitsets(number_of_instances: int, number_of_members: int) -> np.ndarray:
+    """Bitsets without any member for the passed number of instances (one row of bytes per instance)."""
+    return np.zeros((number_of_instances, max(1, -(-number_of_members // 8))), dtype=np.uint8)
+
+def add_members(bitsets: np.ndarray, instance_codes: np.ndarray, member_code: int):
+    """Add a member to the bitsets of the passed instances (in place, bit order as in np.packbits)."""
+    bitsets[instance_codes, member_code // 8] |= np.uint8(128 >> (member_code % 8))
+
+def create_bitsets(instance_codes: np.ndarray, member_codes: np.ndarray, number_of_instances: int,
+                   number_of_members: int) -> np.ndarray:
+    """
+    Pack the members of all instances into bitsets.
+    :param instance_codes: instance of every (instance, member) pair
+    :param member_codes: member of every (instance, member) pair
+    :param number_of_instances: number of instances (rows of the bitsets)
+    :param number_of_members: number of distinct members
+    :return: bitsets of all instances
+    """
+
+    bitsets = empty_bitsets(number_of_instances, number_of_members)
+    member_codes = np.asarray(member_codes, dtype=np.int64)
+    np.bitwise_or.at(bitsets, (instance_codes, member_codes // 8), (128 >> (member_codes % 8)).astype(np.uint8))
+
+    return bitsets
+
+def item_type_bitsets(qty: pd.DataFrame, item_types: list[str], instance_codes: np.ndarray,
+                      number_of_instances: int) -> np.ndarray:
+    """
+    Bitsets of the item types with non-zero quantities (missing quantities are ignored) per instance.
+    :param qty: table of counters (dense or sparse item type columns)
+    :param item_types: item types, their position is the member code
+    :param instance_codes: instance of every row of the table
+    :param number_of_instances: number of instances
+    :return: bitsets of all instances
+    """
+
+    bitsets = empty_bitsets(number_of_instances, len(item_types))
+
+    for member_code, item_type in enumerate(item_types):
+        column = qty[item_type]
+        if isinstance(column.dtype, pd.SparseDtype) and column.array.fill_value == 0:
+            values = np.asarray(column.array.sp_values, dtype=float)
+            rows = column.array.sp_index.indices[(values != 0) & ~np.isnan(values)]
+        else:
+            values = column.to_numpy(dtype=float, na_value=0)
+            rows = np.flatnonzero((values != 0) & ~np.isnan(values))
+        add_members(bitsets, instance_codes[rows], member_code)
+
+    return bitsets
+
+
+#### COMBINATIONS ####
+def decode_combination(bitset: np.ndarray, members: list[str]) -> list[str]:
+    """Get the members of a single bitset."""
+    return [members[i] for i in np.flatnonzero(np.unpackbits(bitset, count=len(members)))]
+
+def combination_frequencies(bitsets: np.ndarray, members: list[str], groups: Iterable, group_column: str,
+                            combination_column: str, frequency_column: str, empty_label: str = "",
+                            max_combinations: int = MAX_DISPLAYED_COMBINATIONS,
+                            other_label: str = TERM_OTHER_COMBINATIONS) -> pd.DataFrame:
+    """
+    Count the combinations of members of all instances per group.
+    Combinations are counted on the bitsets, only the max_combinations most frequent combinations (over all groups)
+    are decoded to labels. The instances of all other combinations are counted together per group under the other
+    label (with the number of combinations counted together), so that no instance is dropped.
+    :param bitsets: bitsets of all instances
+    :param members: names of the members in the order of their member codes
+    :param groups: group of every instance (e.g. the activity of an event)
+    :param group_column: name of the column holding the group
+    :param combination_column: name of the column holding the label of the combination
+    :param frequency_column: name of the column holding the number of instances
+    :param empty_label: label of instances without any member
+    :param max_combinations: number of combinations displayed separately (all if None)
+    :param other_label: label of the other combinations
+    :return: frequency of the combinations per group (the other combinations last)
+    """
+
+    # instances without group are not counted
+    group_codes, group_names = pd.factorize(np.asarray(groups), sort=True)
+    bitsets = bitsets[group_codes >= 0]
+    group_codes = group_codes[group_codes >= 0]
+
+    if len(bitsets) == 0:
+        return pd.DataFrame(columns=[group_column, combination_column, frequency_column])
+    else:
+        pass
+
+    rows = np.ascontiguousarray(bitsets).view(np.dtype((np.void, bitsets.shape[1]))).ravel()
+    combinations, combination_codes = np.unique(rows, return_inverse=True)
+    combination_codes = combination_codes.ravel()
+
+    totals = np.bincount(combination_codes, minlength=len(combinations))
+    if max_combinations is None or max_combinations >= len(combinations):
+        displayed = np.arange(len(combinations))
+    else:
+        displayed = np.sort(np.argsort(-totals, kind="stable")[:max_combinations])
+
+    keys, frequencies = np.unique(group_codes.astype(np.int64) * len(combinations) + combination_codes,
+                                  return_counts=True)
+    key_groups, key_combinations = np.divmod(keys, len(combinations))
+    kept = np.isin(key_combinations, displayed)
+
+    labels = {code: ", ".join(decode_combination(np.frombuffer(combinations[code], dtype=np.uint8), members))
+              for code in displayed}
+    labels = {code: label if label else empty_label for code, label in labels.items()}
+
+    frequency = pd.DataFrame({group_column: group_names[key_groups[kept]],
+                              combination_column: [labels[code] for code in key_combinations[kept]],
+                              frequency_column: frequencies[kept]})
+    frequency = frequency.sort_values([group_column, combination_column])
+
+    if kept.all():
+        return frequency.reset_index(drop=True)
+    else:
+        pass
+
+    other_frequencies = np.bincount(key_groups[~kept], weights=frequencies[~kept], minlength=len(group_names))
+    other_groups = np.flatnonzero(other_frequencies)
+    other = pd.DataFrame({group_column: group_names[other_groups],
+                          combination_column: f"{other_label} ({len(combinations) - len(displayed)})",
+                          frequency_column: other_frequencies[other_groups].astype(frequencies.dtype)})
+
+    return pd.concat([frequency, other], ignore_index=True)
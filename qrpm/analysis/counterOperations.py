@@ -7,16 +7,177 @@ from qrpm.analysis.generalDataOperations import split_instance_and_variable_entr
 from qrpm.GLOBAL import TERM_ACTIVE, TERM_INACTIVE, TERM_ALL, TERM_COLLECTION, TERM_EVENT, \
     TERM_INSTANCE_COUNT, TERM_AGG_CP, TERM_AGG_ITEM_TYPES, TERM_ITEM_TYPES, TERM_VALUE
 
+#### SPARSE ITEM TYPE COLUMNS ####
+def to_sparse_counters(qty: pd.DataFrame, fill_value: float = 0) -> pd.DataFrame:
+    """
+    Store the item type columns of a counter table as sparse columns (only entries different from the fill value are
+    kept). All counter operations accept sparse item type columns.
+    :param qty: table of counters
+    :param fill_value: value not stored explicitly
+    :return: table of counters with sparse item type columns
+    """
+
+    non_item_types, item_types = split_instance_and_variable_entries(set(qty.columns))
+
+    sparse_qty = qty.copy()
+    for item_type in item_types:
+        if isinstance(sparse_qty[item_type].dtype, pd.SparseDtype):
+            pass
+        else:
+            values = sparse_qty[item_type].astype(float).to_numpy(dtype=float, na_value=np.nan)
+            sparse_qty[item_type] = pd.arrays.SparseArray(values, fill_value=fill_value)
+
+    return sparse_qty
+
+def to_dense_counters(qty: pd.DataFrame) -> pd.DataFrame:
+    """Store sparse item type columns of a counter table as dense columns."""
+
+    sparse_columns = [col for col in qty.columns if isinstance(qty[col].dtype, pd.SparseDtype)]
+
+    if sparse_columns:
+        qty = qty.copy()
+        for col in sparse_columns:
+            qty[col] = qty[col].sparse.to_dense()
+    else:
+        pass
+
+    return qty
+
+def has_sparse_item_types(qty: pd.DataFrame, item_types: Iterable[str]) -> bool:
+    """Check if any of the item type columns is sparse."""
+    return any(isinstance(qty[item_type].dtype, pd.SparseDtype) for item_type in item_types)
+
+def nonzero_entries(column: pd.Series) -> np.ndarray:
+    """
+    Boolean mask of all entries of an item type column that are not zero. For sparse columns only the stored values are
+    evaluated.
+    """
+
+    if isinstance(column.dtype, pd.SparseDtype):
+        values = column.array
+        mask = np.full(len(values), not values.fill_value == 0)
+        mask[values.sp_index.indices] = ~(values.sp_values == 0)
+        return mask
+    else:
+        return (column != 0).to_numpy(dtype=bool, na_value=True)
+
+def active_entries(qty: pd.DataFrame, item_types: Iterable[str]) -> np.ndarray:
+    """Boolean mask of all instances with at least one non-zero item type (sparse columns are evaluated natively)."""
+
+    active = np.zeros(len(qty), dtype=bool)
+
+    for item_type in item_types:
+        column = qty[item_type]
+        if isinstance(column.dtype, pd.SparseDtype) and column.array.fill_value == 0:
+            values = column.array
+            active[values.sp_index.indices[~(values.sp_values == 0)]] = True
+        else:
+            active |= nonzero_entries(column)
+
+    return active
+
+def mask_item_type(column: pd.Series, mask: np.ndarray) -> pd.Series:
+    """
+    Set the entries of an item type column to NaN where the mask is True. Sparse columns stay sparse (only the column
+    itself is densified temporarily).
+    """
+
+    values = column.to_numpy(dtype=float, na_value=np.nan)
+    values[mask] = np.nan
+
+    if isinstance(column.dtype, pd.SparseDtype):
+        return pd.Series(pd.arrays.SparseArray(values, fill_value=column.array.fill_value), index=column.index)
+    else:
+        return pd.Series(values, index=column.index)
+
+def apply_to_item_types(qty: pd.DataFrame, item_types: Iterable[str], func) -> pd.DataFrame:
+    """Apply an elementwise numpy function to item type columns (to the stored values only for sparse columns)."""
+
+    qty = qty.copy()
+
+    for item_type in item_types:
+        column = qty[item_type]
+        if isinstance(column.dtype, pd.SparseDtype):
+            values = column.array
+            fill_value = func(np.array([values.fill_value], dtype=float))[0]
+            qty[item_type] = pd.arrays.SparseArray(func(values.sp_values), sparse_index=values.sp_index,
+                                                   fill_value=fill_value)
+        else:
+            qty[item_type] = func(column.to_numpy(dtype=float, na_value=np.nan))
+
+    return qty
+
+#### CLASSIFICATION OF INSTANCES ####
+INSTANCE_ADDING = 1
+INSTANCE_REMOVING = 2
+INSTANCE_ACTIVE = 4
+INSTANCE_ITEM_TYPE_SHIFT = 3
+
+def classify_instances(qty: pd.DataFrame, item_types: Iterable[str] = None) -> np.ndarray:
+    """
+    Classify all instances of a counter table in a single pass over its item type columns.
+    Every instance is encoded in a bitmask: INSTANCE_ADDING if any item quantity is positive, INSTANCE_REMOVING if any
+    item quantity is negative, INSTANCE_ACTIVE if any item quantity is non-zero, and the number of non-zero item
+    quantities in the bits from INSTANCE_ITEM_TYPE_SHIFT on.
+    :param qty: table of counters (dense or sparse item type columns)
+    :param item_types: item types to be considered, all item types if None
+    :return: bitmask per instance (uint32)
+    """
+
+    if item_types is None:
+        non_item_types, item_types = split_instance_and_variable_entries(set(qty.columns))
+    else:
+        pass
+
+    adding = np.zeros(len(qty), dtype=bool)
+    removing = np.zeros(len(qty), dtype=bool)
+    nonzero_count = np.zeros(len(qty), dtype=np.uint32)
+
+    for item_type in item_types:
+        column = qty[item_type]
+        if isinstance(column.dtype, pd.SparseDtype) and column.array.fill_value == 0:
+            rows = column.array.sp_index.indices
+            values = np.asarray(column.array.sp_values, dtype=float)
+            adding[rows[values > 0]] = True
+            removing[rows[values < 0]] = True
+            nonzero_count[rows[~(values == 0)]] += 1
+        else:
+            values = column.to_numpy(dtype=float, na_value=np.nan)
+            adding |= values > 0
+            removing |= values < 0
+            nonzero_count += ~(values == 0)
+
+    classification = nonzero_count << INSTANCE_ITEM_TYPE_SHIFT
+    classification[adding] |= INSTANCE_ADDING
+    classification[removing] |= INSTANCE_REMOVING
+    classification[nonzero_count > 0] |= INSTANCE_ACTIVE
+
+    return classification
+
+def classified_active(classification: np.ndarray) -> np.ndarray:
+    """Boolean mask of all active instances of a classification."""
+    return (classification & INSTANCE_ACTIVE) > 0
+
+def classified_item_type_count(classification: np.ndarray) -> np.ndarray:
+    """Number of non-zero item quantities per instance of a classification."""
+    return classification >> INSTANCE_ITEM_TYPE_SHIFT
+
 #### ITEM QUANTITY PER INSTANCE ####
 def create_item_quantities(counters: pd.DataFrame) -> pd.DataFrame:
     """
     Pass a table of counters and get an item quantity table.
+    For sparse item type columns only the stored (non-zero) item quantities are returned.
     :param qop: Quantity operations table.
     :return: quantity update table
     """
 
     non_item_types, item_types = split_instance_and_variable_entries(set(counters.columns))
 
+    if len(item_types) > 0 and has_sparse_item_types(counters, item_types):
+        return create_item_quantities_sparse(counters, non_item_types, item_types)
+    else:
+        pass
+
     if len(item_types) == 1:
         counters.loc[:, TERM_ITEM_TYPES] = item_types[0]
         item_quantities = counters.rename(columns={item_types[0]: TERM_VALUE})
@@ -30,6 +191,33 @@ def create_item_quantities(counters: pd.DataFrame) -> pd.DataFrame:
 
     return item_quantities
 
+def create_item_quantities_sparse(counters: pd.DataFrame, non_item_types: list[str], item_types: list[str]) -> pd.DataFrame:
+    """Long-form item quantity table of counters with sparse item type columns (one row per stored value)."""
+
+    instances = counters[non_item_types].reset_index(drop=True)
+
+    rows = []
+    values = []
+    names = []
+    for item_type in item_types:
+        column = counters[item_type]
+        if isinstance(column.dtype, pd.SparseDtype) and column.array.fill_value == 0:
+            positions = column.array.sp_index.indices
+            column_values = column.array.sp_values
+        else:
+            positions = np.flatnonzero(nonzero_entries(column))
+            column_values = column.to_numpy(dtype=float, na_value=np.nan)[positions]
+        rows.append(positions)
+        values.append(column_values)
+        names.append(np.full(len(positions), item_type, dtype=object))
+
+    rows = np.concatenate(rows)
+    item_quantities = instances.take(rows).reset_index(drop=True)
+    item_quantities[TERM_ITEM_TYPES] = np.concatenate(names)
+    item_quantities[TERM_VALUE] = np.concatenate(values)
+
+    return item_quantities
+
 ##### INFORMATION #####
 def get_enhanced_quantity_instances(qty: pd.DataFrame) -> pd.DataFrame:
     """Pass dataframe and for every instance get the active status of the instance."""
@@ -37,8 +225,8 @@ def get_enhanced_quantity_instances(qty: pd.DataFrame) -> pd.DataFrame:
     non_item_types, item_types = split_instance_and_variable_entries(set(qty.columns))
 
     active_enhanced = qty.copy()
-    active_enhanced[TERM_ACTIVE] = active_enhanced[item_types].apply(lambda row: all(val == 0 for val in row), axis=1)
-    active_enhanced[TERM_ACTIVE] = active_enhanced[TERM_ACTIVE].replace({True: TERM_INACTIVE, False: TERM_ACTIVE})
+    classification = classify_instances(qty, item_types)
+    active_enhanced[TERM_ACTIVE] = np.where(classified_active(classification), TERM_ACTIVE, TERM_INACTIVE)
 
     return active_enhanced
 
@@ -47,6 +235,11 @@ def get_active_item_types(qop: pd.DataFrame):
 
     non_item_types, item_types = split_instance_and_variable_entries(set(qop.columns))
 
+    if has_sparse_item_types(qop, item_types):
+        return {item_type for item_type in item_types if nonzero_entries(qop[item_type]).any()}
+    else:
+        pass
+
     item_types = set(qop.loc[:, item_types].columns[(qop.loc[:, item_types] != 0).any()])
 
     return item_types
@@ -80,7 +273,14 @@ def projection_generic_function(data: pd.DataFrame,
     else:
         pass
 
-    if len(joint_item_types) > 0:
+    if len(joint_item_types) > 0 and has_sparse_item_types(data_projected, joint_item_types):
+        # sparse columns do not support assignment by a mask, the item types are masked column by column
+        projection_function = projection_function_data.set_index(identifying_columns)
+        projection_function = projection_function[joint_item_types].reindex(data_projected.index)
+        for item_type in joint_item_types:
+            inactive = ~nonzero_entries(projection_function[item_type]) | projection_function[item_type].isna().to_numpy()
+            data_projected[item_type] = mask_item_type(data_projected[item_type], inactive)
+    elif len(joint_item_types) > 0:
         projection_function = projection_function_data.set_index(identifying_columns)
 
         projection_function.loc[:, joint_item_types] = projection_function[joint_item_types].replace(0, np.nan)
@@ -173,6 +373,11 @@ def get_active_instances(qty: pd.DataFrame) -> pd.DataFrame:
     else:
         pass
 
+    if has_sparse_item_types(qty, item_types):
+        return qty[active_entries(qty, item_types)]
+    else:
+        pass
+
     # remove entries with zero on all item types
     qty_new = qty[~(qty[item_types] == 0).all(axis=1)]
 
@@ -210,7 +415,7 @@ def cp_active_instances_all_cps(qty: pd.DataFrame, cps: Iterable[str] = None, in
     active_qops = cp_active_instances_any_cp(qty, cps)
 
     qty_tmp = active_qops.loc[:, [instance_type, TERM_COLLECTION]]
-    qty_tmp = qty_tmp.groupby([TERM_EVENT]).size().reset_index(name=TERM_INSTANCE_COUNT)
+    qty_tmp = qty_tmp.groupby([TERM_EVENT], observed=True).size().reset_index(name=TERM_INSTANCE_COUNT)
     active_instances = qty_tmp.loc[qty_tmp[TERM_INSTANCE_COUNT] == len(cps), instance_type]
 
     qty_filtered = qty.loc[qty[instance_type].isin(active_instances), :]
@@ -232,6 +437,14 @@ def it_active_instances_all_item_types(qty: pd.DataFrame, item_types: Iterable[s
 
     item_types = list(item_types.intersection(set(cols_item_types)))
 
+    if has_sparse_item_types(qty, item_types):
+        all_active = np.ones(len(qty), dtype=bool)
+        for item_type in item_types:
+            all_active &= nonzero_entries(qty[item_type])
+        return qty[all_active]
+    else:
+        pass
+
     # drop all columns with at least one 0 on the considered item types
     qty_new = qty[~(qty[item_types] == 0).any(axis=1)]
 
@@ -251,6 +464,11 @@ def it_active_instances_any_item_type(qty: pd.DataFrame, item_types: Iterable[st
 
     item_types = list(item_types.intersection(set(cols_item_types)))
 
+    if has_sparse_item_types(qty, item_types):
+        return qty[active_entries(qty, item_types)]
+    else:
+        pass
+
     # remove entries with zero on all item types
     active_qty = qty[~(qty[item_types] == 0).all(axis=1)]
 
@@ -262,6 +480,11 @@ def it_active_instances_any_item_type(qty: pd.DataFrame, item_types: Iterable[st
 def positive_item_quantities(qty: pd.DataFrame) -> pd.DataFrame:
     non_item_types, item_types = split_instance_and_variable_entries(qty.columns)
 
+    if has_sparse_item_types(qty, item_types):
+        return apply_to_item_types(qty, item_types, lambda values: np.where(values > 0, values, 0))
+    else:
+        pass
+
     only_positive = qty.set_index(non_item_types)
 
     only_positive = only_positive.where(only_positive[item_types] > 0)
@@ -273,6 +496,11 @@ def positive_item_quantities(qty: pd.DataFrame) -> pd.DataFrame:
 def negative_item_quantities(qty: pd.DataFrame) -> pd.DataFrame:
     non_item_types, item_types = split_instance_and_variable_entries(qty.columns)
 
+    if has_sparse_item_types(qty, item_types):
+        return apply_to_item_types(qty, item_types, lambda values: np.where(values < 0, values, 0))
+    else:
+        pass
+
     only_negative = qty.set_index(non_item_types)
 
     only_negative = only_negative.where(only_negative[item_types] < 0)
@@ -293,6 +521,12 @@ def joint_counters(qty: pd.DataFrame, instance_type=TERM_EVENT) -> pd.DataFrame:
                                        name_aggregation=TERM_COLLECTION,
                                        entry_aggregation_col=TERM_AGG_CP)
 
+    # the aggregation is dense, joint counters of sparse counters are sparse again
+    if has_sparse_item_types(qty, item_types):
+        qty_aggregated = to_sparse_counters(qty_aggregated)
+    else:
+        pass
+
     return qty_aggregated
 
 def total_item_quantities(qty: pd.DataFrame, item_types: set | list = None) -> pd.DataFrame:
@@ -320,8 +554,26 @@ def total_item_quantities(qty: pd.DataFrame, item_types: set | list = None) -> p
         total_qty = qty
         item_types = item_type_cols
 
-    total_qty[TERM_AGG_ITEM_TYPES] = qty[item_types].sum(axis=1)
+    if has_sparse_item_types(qty, item_types):
+        total_qty = total_qty.copy()
+        total_qty[TERM_AGG_ITEM_TYPES] = pd.Series(sparse_row_sums(qty, item_types), index=qty.index)
+    else:
+        total_qty[TERM_AGG_ITEM_TYPES] = qty[list(item_types)].sum(axis=1)
 
-    total_qty = total_qty.drop(columns=item_types)
+    total_qty = total_qty.drop(columns=list(item_types))
 
     return total_qty
+
+def sparse_row_sums(qty: pd.DataFrame, item_types: Iterable[str]) -> np.ndarray:
+    """Sum of the item type columns per instance, adding only the stored values of sparse columns."""
+
+    totals = np.zeros(len(qty), dtype=float)
+
+    for item_type in item_types:
+        column = qty[item_type]
+        if isinstance(column.dtype, pd.SparseDtype) and column.array.fill_value == 0:
+            np.add.at(totals, column.array.sp_index.indices, np.nan_to_num(column.array.sp_values, nan=0.0))
+        else:
+            totals += np.nan_to_num(column.to_numpy(dtype=float, na_value=np.nan), nan=0.0)
+
+    return totals
@@ -1,4 +1,6 @@
+import os
 import sqlite3
+import urllib.parse
 
 import pandas as pd
 
@@ -6,9 +8,16 @@ from qel_simulation import QuantityEventLog
 from qrpm.GLOBAL import *
 
 
+DEFAULT_CHUNKSIZE = 100000
+
 # TODO: Paramerize the names of the tables and columns so that data not using the standard's names can be imported
 
 class ImporterQEL:
+    """
+    Read a quantity event log from a sqlite file through one read-only connection. The tables are read on first access
+    of their property and kept; creating the QuantityEventLog (as done when loading a log in the app) reads all tables,
+    so deferring reads only saves work when single tables of the importer are used directly.
+    """
 
     def __init__(self, path_to_sqlite_file, **kwargs):
 
@@ -42,99 +51,203 @@ class ImporterQEL:
         self.eqty_table = TABLE_EQTY
         self.object_table = TABLE_OBJECT
 
+        self.table_columns = dict()
+        self.chunksize = DEFAULT_CHUNKSIZE
+
         for key, value in kwargs.items():
             setattr(self, key, value)
 
         self._path_to_sqlite_file = path_to_sqlite_file
-        self.create_types_table_frame()
-        self.get_mapping_tables()
-        self.create_event_dict()
-        self.create_object_dict()
-        self.get_event_to_object_table()
-        self.get_object_to_object_table()
-        self.get_eqty_table()
-        self.get_oqty_table()
-
+        self._connection = None
+        self._table_names = None
+        self._types_tables = None
+        self._object_mapping = None
+        self._event_mapping = None
+        self._events = None
+        self._objects = None
+        self._e2o_table = None
+        self._o2o_table = None
+        self._eqty_table = None
+        self._oqty_table = None
+        self._eqty_loaded = False
+        self._oqty_loaded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     @property
     def file(self):
         return self._path_to_sqlite_file
 
+    @property
+    def connection(self):
+        """Read-only connection to the sqlite file, shared by all queries of the importer."""
+        if self._connection is None:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.file))}?mode=ro"
+            self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            self._connection.execute("PRAGMA query_only = 1")
+        else:
+            pass
+        return self._connection
+
+    @property
+    def table_names(self):
+        if self._table_names is None:
+            self._table_names = self.get_table_names_from_sqlite()
+        else:
+            pass
+        return self._table_names
+
     @property
     def type_table(self):
+        if self._types_tables is None:
+            self.create_types_table_frame()
+        else:
+            pass
         return self._types_tables
 
     @property
     def object_mapping(self):
+        if self._object_mapping is None:
+            self.get_mapping_tables()
+        else:
+            pass
         return self._object_mapping
 
     @property
     def event_mapping(self):
+        if self._event_mapping is None:
+            self.get_mapping_tables()
+        else:
+            pass
         return self._event_mapping
 
     @property
     def events(self):
+        if self._events is None:
+            self.create_event_dict()
+        else:
+            pass
         return self._events
 
     @property
     def objects(self):
+        if self._objects is None:
+            self.create_object_dict()
+        else:
+            pass
         return self._objects
 
     @property
     def o2o(self):
+        if self._o2o_table is None:
+            self.get_object_to_object_table()
+        else:
+            pass
         return self._o2o_table
 
     @property
     def e2o(self):
+        if self._e2o_table is None:
+            self.get_event_to_object_table()
+        else:
+            pass
         return self._e2o_table
 
     @property
     def eqty(self):
+        if self._eqty_loaded:
+            pass
+        else:
+            self.get_eqty_table()
         return self._eqty_table
 
     @property
     def oqty(self):
+        if self._oqty_loaded:
+            pass
+        else:
+            self.get_oqty_table()
         return self._oqty_table
 
+    def close(self):
+        """Close the connection to the sqlite file (tables that are not loaded yet reopen it)."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        else:
+            pass
+
     def get_mapping_tables(self):
 
         self._object_mapping = self.get_table_from_sqlite(self.object_map_table)
         self._event_mapping = self.get_table_from_sqlite(self.event_map_table)
 
     def get_table_names_from_sqlite(self):
-        # Connect to your SQLite database
-        conn = sqlite3.connect(self.file)
-
-        # Create a cursor object to execute SQL queries
-        cursor = conn.cursor()
 
         # Query the sqlite_master table to get table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-
-        # Fetch all table names as a list
-        table_names = cursor.fetchall()
-
-        # Close the cursor and the connection
+        cursor = self.connection.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        table_names = [table[0] for table in cursor.fetchall()]
         cursor.close()
-        conn.close()
-
-        table_names = [table[0] for table in table_names]
 
         return table_names
 
-    def get_table_from_sqlite(self, table_name):
+    def get_numeric_columns(self, table_name) -> set[str]:
+        """Columns of a table declared as integer or real columns (type affinity of sqlite)."""
 
-        # Connect to the SQLite database
-        conn = sqlite3.connect(self.file)
+        cursor = self.connection.execute(f'PRAGMA table_info("{table_name}")')
+        declared_types = [(column[1], (column[2] or "").upper()) for column in cursor.fetchall()]
+        cursor.close()
+
+        return {column for column, declared in declared_types
+                if any(name in declared for name in ["INT", "REAL", "FLOA", "DOUB"])}
 
-        # Define your SQL query
-        sql_query = f"SELECT * FROM {table_name}"
+    def get_table_from_sqlite(self, table_name, columns: list[str] = None):
+        """
+        Read a table of the sqlite file in chunks.
+        :param table_name: name of the table
+        :param columns: columns to read (projection), defaults to the columns set for the table in table_columns or all
+        columns
+        :return: table as data frame
+        """
 
-        # Use pandas.read_sql_query() to fetch the data into a DataFrame
-        df = pd.read_sql_query(sql_query, conn)
+        if columns is None:
+            columns = self.table_columns.get(table_name)
+        else:
+            pass
 
-        # Close the database connection
-        conn.close()
+        if columns:
+            selection = ", ".join(f'"{column}"' for column in columns)
+        else:
+            selection = "*"
+
+        sql_query = f'SELECT {selection} FROM "{table_name}"'
+        numeric_columns = self.get_numeric_columns(table_name)
+
+        # read in chunks so that only the typed columns of the frame and not all fetched rows are kept in memory
+        chunks = []
+        for chunk in pd.read_sql_query(sql_query, self.connection, chunksize=self.chunksize):
+            # a chunk without values in a numeric column has object dtype, which would make the column of all chunks an
+            # object column
+            for column in numeric_columns.intersection(chunk.columns):
+                if chunk[column].dtype == object and chunk[column].isna().all():
+                    chunk[column] = chunk[column].astype("float64")
+                else:
+                    pass
+            chunks.append(chunk)
+
+        if len(chunks) == 0:
+            cursor = self.connection.execute(f"{sql_query} LIMIT 0")
+            df = pd.DataFrame(columns=[description[0] for description in cursor.description])
+            cursor.close()
+        elif len(chunks) == 1:
+            df = chunks[0]
+        else:
+            df = pd.concat(chunks, ignore_index=True)
+        del chunks
 
         if "index" in df.columns:
             df = df.set_index("index")
@@ -232,31 +345,32 @@ class ImporterQEL:
 
     def get_eqty_table(self):
 
-        table_names = self.get_table_names_from_sqlite()
-
-        if TABLE_EQTY in table_names:
+        if TABLE_EQTY in self.table_names:
             eqty = self.get_table_from_sqlite(TABLE_EQTY)
             self._eqty_table = eqty
         else:
             self._eqty_table = None
 
-    def get_oqty_table(self):
+        self._eqty_loaded = True
 
-        table_names = self.get_table_names_from_sqlite()
+    def get_oqty_table(self):
 
-        if TABLE_OBJECT_QTY in table_names:
+        if TABLE_OBJECT_QTY in self.table_names:
             oqty = self.get_table_from_sqlite(TABLE_OBJECT_QTY)
             self._oqty_table = oqty
         else:
             self._oqty_table = None
 
+        self._oqty_loaded = True
+
     def create_quantity_event_log(self):
+        # the log is created from all tables, tables not loaded yet are read here
         qel = QuantityEventLog(event_data=self.events, object_data=self.objects, e2o=self.e2o, o2o=self.o2o, eqty=self.eqty,
                          object_quantities=self.oqty, object_map_type=self.object_mapping,
                          event_map_type=self.event_mapping)
 
         return qel
 def load_qel_from_file(file_path: str, **kwargs) -> QuantityEventLog:
-    imp = ImporterQEL(path_to_sqlite_file=file_path, **kwargs)
-    qel = imp.create_quantity_event_log()
+    with ImporterQEL(path_to_sqlite_file=file_path, **kwargs) as imp:
+        qel = imp.create_quantity_event_log()
     return qel
@@ -9,20 +9,24 @@ import plotly.graph_objects as go
 import plotly.subplots as sp
 
 import qrpm.analysis.quantityState as ilvvl
+import qrpm.analysis.combinationAnalysis as combi
 from qrpm.analysis.ocelOperations import get_total_count_of_objects, event_object_type_count, \
     get_execution_number, filter_events_for_time, add_time_since_last_instance
 from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries, convert_numeric_columns, convert_to_timestamp
 from qrpm.analysis.generalDataOperations import remove_empty_columns
+from qrpm.analysis.derivedDataCache import memoize_derived_data
+from qrpm.analysis.downsampling import downsample_series, bin_bars, BINNING_SUM, BINNING_LAST
+from qrpm.analysis.categoricalEncoding import decode_categorical_arguments
 from qrpm.analysis.quantityOperations import create_quantity_updates, get_direction_quantity_instances
 from qrpm.analysis.counterOperations import get_enhanced_quantity_instances, get_active_instances, \
-    create_item_quantities, cp_projection, item_type_projection
+    create_item_quantities, cp_projection, item_type_projection, active_entries
 from qrpm.GLOBAL import CHART_COLOURS, TERM_ITEM_TYPES, TERM_ITEM_QUANTITY, TERM_ITEM_LEVELS, TERM_TIME, TERM_EVENT, \
     TERM_ACTIVITY, TERM_COLLECTION, TERM_EVENTS, \
     TERM_OBJECT, TERM_OBJECT_TYPE, \
     TERM_OBJECT_COUNT, TERM_OBJECT_TYPE_COUNT, TERM_EXECUTION_COUNT, TERM_ACTIVE, TERM_INACTIVE, TERM_CP_ACTIVE, \
     EVENT_COUNT, TERM_ITEM_TYPE_ACTIVE, TERM_ALL, TERM_VALUE, TERM_DIRECTION, \
     TERM_INSTANCE_COUNT, QOP_ID, QOP_COUNT, TERM_OBJECT_TYPE_COMBINATION, TERM_OBJECT_TYPE_COMBINATION_FREQUENCY, \
-    TERM_REMOVING, TERM_COUNT, TERM_DAILY, TERM_MONTHLY, TERM_QUP_TYPE, TERM_TIME_SINCE_LAST_EXECUTION, TERM_ADDING
+    TERM_REMOVING, TERM_COUNT, TERM_DAILY, TERM_MONTHLY, TERM_MINIMUM, TERM_MAXIMUM, TERM_TIME_WEIGHTED_MEAN, TERM_QUP_TYPE, TERM_TIME_SINCE_LAST_EXECUTION, TERM_ADDING
 import datetime
 
 
@@ -52,6 +56,8 @@ def get_mondays(data: pd.DataFrame) -> (pd.DatetimeIndex, pd.Series):
 
     return mondays, mondays_str
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def item_level_development_single_cp(ilvl: pd.DataFrame, cp: str, post_ilvl: bool = False) -> go.Figure:
 
     if isinstance(cp, str):
@@ -86,6 +92,8 @@ def item_level_development_single_cp(ilvl: pd.DataFrame, cp: str, post_ilvl: boo
     # Generate the dates for each Monday
     mondays, mondays_str = get_mondays(ilvl)
 
+    ilvl = downsample_series(ilvl, x=TERM_TIME, y=TERM_ITEM_LEVELS, series=[TERM_ITEM_TYPES])
+
     if post_ilvl:
         line_shape = "hv"
     else:
@@ -123,6 +131,8 @@ def item_level_development_single_cp(ilvl: pd.DataFrame, cp: str, post_ilvl: boo
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_COLLECTION])
 def item_level_development_multiple_cps(ilvl: pd.DataFrame, cps: Iterable[str] = None, post_ilvl: bool = False) -> go.Figure:
 
     if cps:
@@ -157,6 +167,7 @@ def item_level_development_multiple_cps(ilvl: pd.DataFrame, cps: Iterable[str] =
         line_shape = "vh"
 
     ilvl = ilvl.melt(id_vars=non_item_types, var_name=TERM_ITEM_TYPES, value_name=TERM_ITEM_LEVELS)
+    ilvl_chart = downsample_series(ilvl, x=TERM_TIME, y=TERM_ITEM_LEVELS, series=[TERM_COLLECTION, TERM_ITEM_TYPES])
 
     item_type_colours = dict()
     for i, cp in enumerate(cps):
@@ -165,7 +176,7 @@ def item_level_development_multiple_cps(ilvl: pd.DataFrame, cps: Iterable[str] =
         else:
             raise ValueError("Collection points must be strings.")
 
-        ilvl_cp = ilvl.loc[ilvl[TERM_COLLECTION] == cp, :]
+        ilvl_cp = ilvl_chart.loc[ilvl_chart[TERM_COLLECTION] == cp, :]
 
         for item_type in ilvl_cp[TERM_ITEM_TYPES].unique():
 
@@ -196,6 +207,8 @@ def item_level_development_multiple_cps(ilvl: pd.DataFrame, cps: Iterable[str] =
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def multiple_item_levels_single_chart(ilvl: pd.DataFrame, post_ilvl: bool = False, events: Iterable[str]=None) -> go.Figure:
 
     ilvl = remove_empty_columns(ilvl, keep_zeros=False)
@@ -211,6 +224,13 @@ def multiple_item_levels_single_chart(ilvl: pd.DataFrame, post_ilvl: bool = Fals
     # Generate the dates for each Monday
     mondays, mondays_str = get_mondays(ilvl)
 
+    if events is not None and len(events) > 0:
+        event_ilvls = ilvl.loc[ilvl[TERM_EVENT].isin(events), :].drop_duplicates(subset=[TERM_EVENT])
+    else:
+        event_ilvls = None
+
+    ilvl = downsample_series(ilvl, x=TERM_TIME, y=TERM_ITEM_LEVELS, series=[TERM_COLLECTION, TERM_ITEM_TYPES])
+
     if post_ilvl:
         line_shape = "hv"
     else:
@@ -261,7 +281,6 @@ def multiple_item_levels_single_chart(ilvl: pd.DataFrame, post_ilvl: bool = Fals
 
         fig.update_yaxes(title_text='Item Level', row=2, col=1)
 
-        event_ilvls = ilvl.loc[ilvl[TERM_EVENT].isin(events), :]
         activities = event_ilvls[TERM_ACTIVITY].unique()
         for activity in activities:
             activity_data = event_ilvls.loc[event_ilvls[TERM_ACTIVITY] == activity, :]
@@ -303,6 +322,8 @@ def multiple_item_levels_single_chart(ilvl: pd.DataFrame, post_ilvl: bool = Fals
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def item_level_development_activity_executions(ilvl: pd.DataFrame, events: Iterable[str] = None, cps: Iterable[str] = None,
                                                item_types: Iterable[str]=None, post_ilvl: bool = False, joint_display: bool = False) -> go.Figure:
 
@@ -409,6 +430,14 @@ def item_level_development_activity_executions(ilvl: pd.DataFrame, events: Itera
 
     ilvl_filtered = ilvl_filtered.melt(id_vars=non_item_types, var_name=TERM_ITEM_TYPES, value_name=TERM_ITEM_LEVELS)
 
+    if len(events) > 0:
+        event_ilvls = ilvl_filtered.loc[ilvl_filtered[TERM_EVENT].isin(events), :].drop_duplicates(subset=[TERM_EVENT])
+    else:
+        event_ilvls = None
+
+    ilvl_filtered = downsample_series(ilvl_filtered, x=TERM_TIME, y=TERM_ITEM_LEVELS,
+                                      series=[TERM_COLLECTION, TERM_ITEM_TYPES])
+
     item_type_colours = dict()
     for i, cp in enumerate(cps):
         if isinstance(cp, str):
@@ -441,7 +470,6 @@ def item_level_development_activity_executions(ilvl: pd.DataFrame, events: Itera
             fig.update_yaxes(title_text=f"{cp}", row=fig_number, col=1)
 
     if len(events) > 0:
-        event_ilvls = ilvl_filtered.loc[ilvl_filtered[TERM_EVENT].isin(events), :]
         activities = event_ilvls[TERM_ACTIVITY].unique()
         for activity in activities:
             activity_data = event_ilvls.loc[event_ilvls[TERM_ACTIVITY] == activity, :]
@@ -483,6 +511,88 @@ def item_level_development_activity_executions(ilvl: pd.DataFrame, events: Itera
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_COLLECTION])
+def resampled_item_level_development(resampled: pd.DataFrame, granularity: str, joint_display: bool = False) -> go.Figure:
+    """
+    Step chart of resampled item levels (see itemLevelResampling.resample_item_levels): the time-weighted mean item
+    level of every period as line and the range between minimum and maximum item level as band.
+    :param resampled: resampled item levels
+    :param granularity: granularity of the resampled item levels (shown in the axis title)
+    :param joint_display: whether all collection points are displayed in a single chart
+    :return: figure with one chart per collection point (or a single chart)
+    """
+
+    resampled = resampled.dropna(subset=[TERM_TIME_WEIGHTED_MEAN, TERM_MINIMUM, TERM_MAXIMUM], how="all")
+    cps = list(pd.unique(resampled[TERM_COLLECTION]))
+
+    if len(cps) == 0:
+        return plotly.graph_objects.Figure()
+    else:
+        pass
+
+    number_sub_plots = 1 if joint_display else len(cps)
+    fig = sp.make_subplots(rows=number_sub_plots, cols=1, shared_xaxes=True, vertical_spacing=0.02)
+
+    item_type_colours = dict()
+    for i, cp in enumerate(cps):
+        row = 1 if joint_display else i + 1
+        resampled_cp = resampled.loc[resampled[TERM_COLLECTION] == cp, :]
+
+        for item_type, resampled_it in resampled_cp.groupby(TERM_ITEM_TYPES, sort=False):
+
+            if item_type in item_type_colours.keys():
+                colour = item_type_colours[item_type]
+                show_legend = False
+            else:
+                colour = CHART_COLOURS[len(item_type_colours) % len(CHART_COLOURS)]
+                item_type_colours[item_type] = colour
+                show_legend = True
+
+            name = f"{item_type}, {cp}" if joint_display else item_type
+            band_colour = "rgba({}, {}, {}, 0.2)".format(*plotly.colors.hex_to_rgb(colour))
+
+            fig.add_trace(go.Scatter(x=resampled_it[TERM_TIME], y=resampled_it[TERM_MAXIMUM], mode="lines",
+                                     line=dict(shape="hv", width=0), hoverinfo="skip", showlegend=False,
+                                     legendgroup=item_type), row=row, col=1)
+            fig.add_trace(go.Scatter(x=resampled_it[TERM_TIME], y=resampled_it[TERM_MINIMUM], mode="lines",
+                                     line=dict(shape="hv", width=0), fill="tonexty", fillcolor=band_colour,
+                                     hoverinfo="skip", showlegend=False, legendgroup=item_type), row=row, col=1)
+            fig.add_trace(go.Scatter(x=resampled_it[TERM_TIME], y=resampled_it[TERM_TIME_WEIGHTED_MEAN], mode="lines",
+                                     name=name, line=dict(shape="hv", color=colour),
+                                     customdata=resampled_it[[TERM_MINIMUM, TERM_MAXIMUM]],
+                                     hovertemplate="%{y:.2f} (%{customdata[0]} - %{customdata[1]})",
+                                     showlegend=show_legend or joint_display, legendgroup=item_type), row=row, col=1)
+
+        if joint_display:
+            fig.update_yaxes(title_text="Item Level", row=row, col=1)
+        else:
+            fig.update_yaxes(title_text=f"{cp}", row=row, col=1)
+
+    fig.update_layout(xaxis=dict(tickangle=45),
+                      title=None,
+                      font=dict(
+                          size=14,
+                      ),
+                      legend=dict(
+                          orientation="h",
+                          font=dict(
+                              size=12,
+                          ),
+                          y=1.01,
+                          xanchor="left",
+                          x=0,
+                          yanchor="bottom",
+                          title=None,
+                      ),
+                      height=700)
+    fig.update_xaxes(title_text=f"Time ({granularity} time-weighted mean, minimum - maximum)", row=number_sub_plots,
+                     col=1)
+
+    return fig
+
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def plot_activity_distribution(data: pd.DataFrame):
     """
     Pass event data and plot the distribution of the activities of the involved events.
@@ -515,6 +625,8 @@ def plot_activity_distribution(data: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_OBJECT, TERM_OBJECT_TYPE])
 def plot_involved_objects_per_type(data: pd.DataFrame):
     """
     Pass e2o data and plot the distribution of the object types of the involved objects.
@@ -541,6 +653,8 @@ def plot_involved_objects_per_type(data: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def plot_number_of_involved_objects(e2o: pd.DataFrame, events: pd.DataFrame):
     """
     Pass e2o data and get the number of objects involved in each event.
@@ -575,6 +689,8 @@ def plot_number_of_involved_objects(e2o: pd.DataFrame, events: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_OBJECT_TYPE])
 def plot_objects_per_object_type_in_events(e2o: pd.DataFrame):
     """
     Pass e2o data and get the number of objects involved in each event.
@@ -598,6 +714,8 @@ def plot_objects_per_object_type_in_events(e2o: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_OBJECT_TYPE])
 def plot_activity_executions_for_object_of_object_type(e2o: pd.DataFrame, events: pd.DataFrame, object_type: str):
     """
     Pass e2o data and get the number of objects involved in each event.
@@ -613,7 +731,7 @@ def plot_activity_executions_for_object_of_object_type(e2o: pd.DataFrame, events
 
     object_executions = get_execution_number(e2o, events, object_type=object_type)
     object_executions = object_executions.dropna(subset=[TERM_EXECUTION_COUNT])
-    chart_data = object_executions.groupby([TERM_ACTIVITY, TERM_EXECUTION_COUNT]).size().reset_index(name=TERM_COUNT)
+    chart_data = object_executions.groupby([TERM_ACTIVITY, TERM_EXECUTION_COUNT], observed=True).size().reset_index(name=TERM_COUNT)
     chart_data[TERM_EXECUTION_COUNT] = chart_data[TERM_EXECUTION_COUNT].astype(str)
 
     fig = px.bar(chart_data, x=TERM_ACTIVITY, y=TERM_COUNT, color=TERM_EXECUTION_COUNT, color_discrete_sequence=CHART_COLOURS)
@@ -634,6 +752,8 @@ def plot_activity_executions_for_object_of_object_type(e2o: pd.DataFrame, events
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def show_active_events(qop: pd.DataFrame):
 
     qop_active = get_active_instances(qop)
@@ -664,27 +784,23 @@ def truncate_label(label):
     return ', '.join(result)
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def show_active_collection_point_combinations(qop: pd.DataFrame):
-    qop_new = qop.copy()
-    qop_new[QOP_ID] = qop_new[TERM_EVENT] + ":" + qop_new[TERM_COLLECTION]
+    non_item_types, item_types = split_instance_and_variable_entries(set(qop.columns))
 
-    # mark active qops
-    qop_enhanced = get_active_instances(qop_new)
-    qop_new.loc[qop_new[QOP_ID].isin(qop_enhanced[QOP_ID]), TERM_ACTIVE] = TERM_ACTIVE
-    qop_new[TERM_ACTIVE] = qop_new[TERM_ACTIVE].replace("nan", TERM_INACTIVE)
-
-    # mark active events as such
-    cp_active = qop_new.loc[:, [TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION, TERM_ACTIVE]]
-
-    # change shape
-    cp_active = cp_active.pivot(index=[TERM_EVENT, TERM_ACTIVITY], columns=TERM_COLLECTION, values=TERM_ACTIVE)
-    cp_active[TERM_CP_ACTIVE] = cp_active.apply(
-        lambda row: ', '.join([f'{col}' for col in cp_active.columns if row[col] == "active"]), axis=1)
-
-    cp_active[TERM_CP_ACTIVE] = cp_active[TERM_CP_ACTIVE].replace("", TERM_INACTIVE)
+    # bitset of the collection points with active quantity operations per event
+    event_codes, number_of_events, first_rows = combi.factorize_instances(qop[TERM_EVENT])
+    collection_points = sorted(qop[TERM_COLLECTION].unique())
+    cp_codes = pd.Categorical(qop[TERM_COLLECTION], categories=collection_points).codes
+    active = active_entries(qop, item_types)
+    cp_active = combi.create_bitsets(event_codes[active], cp_codes[active], number_of_events, len(collection_points))
 
     # get numbers for chart
-    cp_active_combinations = cp_active.groupby([TERM_ACTIVITY, TERM_CP_ACTIVE]).size().reset_index(name=EVENT_COUNT)
+    cp_active_combinations = combi.combination_frequencies(cp_active, collection_points,
+                                                           groups=qop[TERM_ACTIVITY].to_numpy()[first_rows],
+                                                           group_column=TERM_ACTIVITY, combination_column=TERM_CP_ACTIVE,
+                                                           frequency_column=EVENT_COUNT, empty_label=TERM_INACTIVE)
 
     cp_active_combinations["Collection Points (abbrev.)"] = cp_active_combinations[TERM_CP_ACTIVE].apply(truncate_label)
 
@@ -716,6 +832,8 @@ def show_active_collection_point_combinations(qop: pd.DataFrame):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_OBJECT, TERM_ACTIVITY, TERM_OBJECT_TYPE])
 def objects_activity_execution_frequency(e2o: pd.DataFrame, events: pd.DataFrame, object_type: str):
     """
     Pass e2o data and get the number of objects involved in each event.
@@ -730,7 +848,7 @@ def objects_activity_execution_frequency(e2o: pd.DataFrame, events: pd.DataFrame
 
     extended_e2o = e2o.merge(events[[TERM_EVENT, TERM_ACTIVITY]], on=TERM_EVENT, how="left")
     e2o_filtered = extended_e2o.loc[extended_e2o[TERM_OBJECT_TYPE] == object_type, :]
-    object_executions = e2o_filtered.groupby([TERM_OBJECT, TERM_ACTIVITY]).size().reset_index(name=TERM_EXECUTION_COUNT)
+    object_executions = e2o_filtered.groupby([TERM_OBJECT, TERM_ACTIVITY], observed=True).size().reset_index(name=TERM_EXECUTION_COUNT)
 
     fig = px.sunburst(object_executions, path=[TERM_ACTIVITY, TERM_EXECUTION_COUNT], color=TERM_ACTIVITY,
                       color_discrete_sequence=CHART_COLOURS)
@@ -739,12 +857,14 @@ def objects_activity_execution_frequency(e2o: pd.DataFrame, events: pd.DataFrame
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def show_active_collection_point_distribution_event(qop: pd.DataFrame):
 
     active_qop = get_active_instances(qop)
 
     active_qop = active_qop.loc[:, [TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION]]
-    counts = active_qop.groupby([TERM_COLLECTION, TERM_ACTIVITY]).size().reset_index(name=TERM_CP_ACTIVE)
+    counts = active_qop.groupby([TERM_COLLECTION, TERM_ACTIVITY], observed=True).size().reset_index(name=TERM_CP_ACTIVE)
 
     # wierd dash plotly bug - no other solution found, this seems consensus of 'the internet'
     try:
@@ -769,15 +889,23 @@ def show_active_collection_point_distribution_event(qop: pd.DataFrame):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_OBJECT_TYPE])
 def show_object_type_combination_for_events(events: pd.DataFrame, e2o: pd.DataFrame):
 
-    object_count = event_object_type_count(e2o)
-    object_count = object_count.set_index(TERM_EVENT)
-    object_count[TERM_OBJECT_TYPE_COMBINATION] = object_count.apply(
-        lambda row: ', '.join([f'{col}' for col in object_count.columns if row[col] == True]), axis=1)
-    object_count = object_count.merge(events[[TERM_EVENT, TERM_ACTIVITY]], on=TERM_EVENT, how="left")
-    object_combinations = object_count.groupby([TERM_OBJECT_TYPE_COMBINATION, TERM_ACTIVITY]).size().reset_index(
-        name=TERM_OBJECT_TYPE_COMBINATION_FREQUENCY)
+    # bitset of the object types of the objects involved per event
+    event_codes, number_of_events, first_rows = combi.factorize_instances(e2o[TERM_EVENT])
+    object_types = sorted(e2o[TERM_OBJECT_TYPE].unique())
+    object_type_codes = pd.Categorical(e2o[TERM_OBJECT_TYPE], categories=object_types).codes
+    object_type_combinations = combi.create_bitsets(event_codes, object_type_codes, number_of_events, len(object_types))
+
+    activities = events.drop_duplicates(subset=TERM_EVENT).set_index(TERM_EVENT)[TERM_ACTIVITY]
+    activities = activities.reindex(e2o[TERM_EVENT].to_numpy()[first_rows])
+
+    object_combinations = combi.combination_frequencies(object_type_combinations, object_types,
+                                                        groups=activities.to_numpy(), group_column=TERM_ACTIVITY,
+                                                        combination_column=TERM_OBJECT_TYPE_COMBINATION,
+                                                        frequency_column=TERM_OBJECT_TYPE_COMBINATION_FREQUENCY)
 
     object_combinations["Object Types (abbrev.)"] = object_combinations[TERM_OBJECT_TYPE_COMBINATION].apply(truncate_label)
 
@@ -809,20 +937,23 @@ def show_object_type_combination_for_events(events: pd.DataFrame, e2o: pd.DataFr
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def show_active_item_type_combinations_and_frequencies_per_event(qop: pd.DataFrame):
     non_item_type, item_types = split_instance_and_variable_entries(set(qop.columns))
 
-    it_active = qop.loc[:, [TERM_EVENT] + item_types]
-    it_active = it_active.groupby(TERM_EVENT).any()
-    it_active[TERM_ITEM_TYPE_ACTIVE] = it_active[item_types].apply(
-        lambda row: ', '.join([f'{col}' for col in it_active.columns if row[col] == True]), axis=1)
+    item_types = sorted(item_types)
 
-    it_active[TERM_ITEM_TYPE_ACTIVE] = it_active[TERM_ITEM_TYPE_ACTIVE].replace("", TERM_INACTIVE)
+    # bitset of the item types with non-zero quantities per event
+    event_codes, number_of_events, first_rows = combi.factorize_instances(qop[TERM_EVENT])
+    it_active = combi.item_type_bitsets(qop, item_types, event_codes, number_of_events)
 
     # get numbers for chart
-    it_active_combinations = it_active.merge(qop[[TERM_EVENT, TERM_ACTIVITY]].drop_duplicates(), on=TERM_EVENT, how="left")
-    it_active_combinations = it_active_combinations.groupby([TERM_ACTIVITY, TERM_ITEM_TYPE_ACTIVE]).size().reset_index(
-        name=EVENT_COUNT)
+    it_active_combinations = combi.combination_frequencies(it_active, item_types,
+                                                           groups=qop[TERM_ACTIVITY].to_numpy()[first_rows],
+                                                           group_column=TERM_ACTIVITY,
+                                                           combination_column=TERM_ITEM_TYPE_ACTIVE,
+                                                           frequency_column=EVENT_COUNT, empty_label=TERM_INACTIVE)
 
     it_active_combinations["Item types (abbrev.)"] = it_active_combinations[TERM_ITEM_TYPE_ACTIVE].apply(truncate_label)
 
@@ -847,6 +978,8 @@ def show_active_item_type_combinations_and_frequencies_per_event(qop: pd.DataFra
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_COLLECTION])
 def show_active_item_type_combinations_and_frequencies_qop(qop: pd.DataFrame, cp: str = None):
 
     if cp:
@@ -854,18 +987,17 @@ def show_active_item_type_combinations_and_frequencies_qop(qop: pd.DataFrame, cp
     else:
         pass
 
-    qop = qop.fillna(0)
-
     non_item_type, item_types = split_instance_and_variable_entries(set(qop.columns))
-    it_active = qop.copy()
-    it_active[TERM_ITEM_TYPE_ACTIVE] = it_active[item_types].apply(
-        lambda row: ', '.join([f'{col}' for col in it_active[item_types].columns if row[col] != 0]), axis=1)
+    item_types = sorted(item_types)
 
-    it_active[TERM_ITEM_TYPE_ACTIVE] = it_active[TERM_ITEM_TYPE_ACTIVE].replace("", TERM_INACTIVE)
+    # bitset of the item types with non-zero quantities per quantity operation
+    it_active = combi.item_type_bitsets(qop, item_types, np.arange(len(qop)), len(qop))
 
     # get numbers for chart
-    it_active_combinations = it_active.groupby([TERM_ACTIVITY, TERM_ITEM_TYPE_ACTIVE]).size().reset_index(
-        name=QOP_COUNT)
+    it_active_combinations = combi.combination_frequencies(it_active, item_types, groups=qop[TERM_ACTIVITY].to_numpy(),
+                                                           group_column=TERM_ACTIVITY,
+                                                           combination_column=TERM_ITEM_TYPE_ACTIVE,
+                                                           frequency_column=QOP_COUNT, empty_label=TERM_INACTIVE)
 
     it_active_combinations["Item types (abbrev.)"] = it_active_combinations[TERM_ITEM_TYPE_ACTIVE].apply(truncate_label)
 
@@ -889,6 +1021,8 @@ def show_active_item_type_combinations_and_frequencies_qop(qop: pd.DataFrame, cp
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def show_active_item_type_distribution_per_qop(qop: pd.DataFrame, cp: str = None):
 
     if cp:
@@ -905,11 +1039,11 @@ def show_active_item_type_distribution_per_qop(qop: pd.DataFrame, cp: str = None
     it_active.loc[it_active[TERM_VALUE] == 0, TERM_ITEM_TYPES] = TERM_INACTIVE
 
     it_active = it_active[[TERM_EVENT, TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE]].groupby(
-        [TERM_EVENT, TERM_ITEM_TYPES, TERM_COLLECTION]).any()
+        [TERM_EVENT, TERM_ITEM_TYPES, TERM_COLLECTION], observed=True).any()
     it_active = it_active.reset_index()
     it_active = it_active.merge(qop[[TERM_EVENT, TERM_ACTIVITY]].drop_duplicates(), on=TERM_EVENT, how="left")
 
-    counts = it_active.groupby([TERM_ITEM_TYPES, TERM_ACTIVITY, TERM_COLLECTION]).size().reset_index(
+    counts = it_active.groupby([TERM_ITEM_TYPES, TERM_ACTIVITY, TERM_COLLECTION], observed=True).size().reset_index(
         name=TERM_ITEM_TYPE_ACTIVE)
 
     fig = px.bar(counts, x=TERM_ITEM_TYPE_ACTIVE, y=TERM_ITEM_TYPES, color=TERM_ACTIVITY, pattern_shape=TERM_COLLECTION,
@@ -963,6 +1097,8 @@ def show_active_item_type_distribution_per_qop(qop: pd.DataFrame, cp: str = None
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY])
 def show_active_item_type_distribution_per_event(qop: pd.DataFrame):
     non_item_type, item_types = split_instance_and_variable_entries(set(qop.columns))
 
@@ -975,12 +1111,12 @@ def show_active_item_type_distribution_per_event(qop: pd.DataFrame):
 
     it_active.loc[it_active[TERM_VALUE] == 0, TERM_ITEM_TYPES] = TERM_INACTIVE
 
-    it_active = it_active[[TERM_EVENT, TERM_ITEM_TYPES, TERM_VALUE]].groupby([TERM_EVENT, TERM_ITEM_TYPES]).any()
+    it_active = it_active[[TERM_EVENT, TERM_ITEM_TYPES, TERM_VALUE]].groupby([TERM_EVENT, TERM_ITEM_TYPES], observed=True).any()
     it_active = it_active.reset_index()
     it_active = it_active.merge(qop[[TERM_EVENT, TERM_ACTIVITY]].drop_duplicates(), on=TERM_EVENT, how="left")
     # it_active = it_active.reset_index()
     #
-    counts = it_active.groupby([TERM_ITEM_TYPES, TERM_ACTIVITY]).size().reset_index(name=TERM_ITEM_TYPE_ACTIVE)
+    counts = it_active.groupby([TERM_ITEM_TYPES, TERM_ACTIVITY], observed=True).size().reset_index(name=TERM_ITEM_TYPE_ACTIVE)
     #
     fig = px.bar(counts, x=TERM_ITEM_TYPE_ACTIVE, y=TERM_ITEM_TYPES, color=TERM_ACTIVITY, orientation="h",
                  color_discrete_sequence=CHART_COLOURS)
@@ -1001,6 +1137,8 @@ def show_active_item_type_distribution_per_event(qop: pd.DataFrame):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments
 def show_active_qops(qop: pd.DataFrame):
     qop = qop.fillna(0)
     qop_enhanced = get_enhanced_quantity_instances(qop)
@@ -1010,6 +1148,8 @@ def show_active_qops(qop: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_COLLECTION])
 def show_instance_directions(qop: pd.DataFrame):
     qop_enhanced = get_direction_quantity_instances(qop)
 
@@ -1018,6 +1158,8 @@ def show_instance_directions(qop: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_COLLECTION])
 def boxplots_of_distribution(data: pd.DataFrame, view: str = None, display_points: bool = False) -> go.Figure:
 
     if view in [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY]:
@@ -1100,6 +1242,8 @@ def boxplots_of_distribution(data: pd.DataFrame, view: str = None, display_point
 #
 #     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments
 def boxplots_per_item_level(data: pd.DataFrame, title: str = None) -> go.Figure:
 
     non_item_types, item_types = split_instance_and_variable_entries(set(data.columns))
@@ -1127,6 +1271,8 @@ def boxplots_per_item_level(data: pd.DataFrame, title: str = None) -> go.Figure:
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_COLLECTION])
 def histogram_distribution_quantity_changes(data: pd.DataFrame, view: str = None) -> go.Figure:
 
     if view in [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY]:
@@ -1155,6 +1301,8 @@ def histogram_distribution_quantity_changes(data: pd.DataFrame, view: str = None
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments
 def boxplots_for_single_columns(data: pd.DataFrame, column_names: Iterable, title: str = None, y_axis: str = None) -> go.Figure:
 
     if isinstance(column_names, str):
@@ -1190,6 +1338,8 @@ def boxplots_for_single_columns(data: pd.DataFrame, column_names: Iterable, titl
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments
 def show_event_attribute_values(events: pd.DataFrame, attribute: str):
     # try:
     if attribute:
@@ -1216,6 +1366,8 @@ def show_event_attribute_values(events: pd.DataFrame, attribute: str):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_OBJECT_TYPE])
 def show_object_attribute_values(objects: pd.DataFrame, attribute: str):
     """ If object attribute value of the same attribute changes, it appears multiple times"""
     # try:
@@ -1241,6 +1393,8 @@ def show_object_attribute_values(objects: pd.DataFrame, attribute: str):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def plot_quantity_data_over_time(qop, start_time, end_time):
 
     if start_time and end_time:
@@ -1264,6 +1418,8 @@ def plot_quantity_data_over_time(qop, start_time, end_time):
     qop_filtered = qop_filtered.loc[:, [TERM_EVENT, TERM_TIME, TERM_ACTIVITY, TERM_COLLECTION] + list(item_types)]
     qop_melted = qop_filtered.melt(id_vars=[TERM_EVENT, TERM_TIME, TERM_ACTIVITY,TERM_COLLECTION], var_name=TERM_ITEM_TYPES, value_name=TERM_VALUE)
     qop_melted = qop_melted.loc[qop_melted[TERM_VALUE] != 0, :]
+    qop_melted = bin_bars(qop_melted, x=TERM_TIME, y=TERM_VALUE, series=[TERM_COLLECTION, TERM_ITEM_TYPES],
+                          aggregation=BINNING_SUM)
 
     fig = px.bar(qop_melted, x=TERM_TIME, y=TERM_VALUE, color=TERM_ITEM_TYPES,
                  hover_data=[TERM_EVENT, TERM_TIME, TERM_ACTIVITY, TERM_ITEM_TYPES, TERM_VALUE],
@@ -1285,6 +1441,8 @@ def plot_quantity_data_over_time(qop, start_time, end_time):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments
 def collection_point_interaction_overview(qop, collection_point=None, item_type=None):
     if item_type:
         pass
@@ -1300,7 +1458,7 @@ def collection_point_interaction_overview(qop, collection_point=None, item_type=
 
     qop = qop.drop(columns=list(set(item_types) - {item_type}))
 
-    activity_removal = qop[[TERM_ACTIVITY, item_type]].groupby(TERM_ACTIVITY).count()
+    activity_removal = qop[[TERM_ACTIVITY, item_type]].groupby(TERM_ACTIVITY, observed=True).count()
     activities_to_remove = activity_removal.loc[activity_removal[item_type] == 0, :].index
 
     qop = qop.loc[~qop[TERM_ACTIVITY].isin(activities_to_remove), :]
@@ -1326,6 +1484,8 @@ def collection_point_interaction_overview(qop, collection_point=None, item_type=
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def quantity_state_activity_execution_over_time(ilvl):
 
     # sort by time
@@ -1335,6 +1495,8 @@ def quantity_state_activity_execution_over_time(ilvl):
     # create chart
     ilvl_melted = ilvl.melt(id_vars=[TERM_EVENT, TERM_TIME, TERM_ACTIVITY, TERM_COLLECTION], var_name=TERM_ITEM_TYPES,
                                      value_name=TERM_ITEM_LEVELS)
+    ilvl_melted = bin_bars(ilvl_melted, x=TERM_TIME, y=TERM_ITEM_LEVELS, series=[TERM_COLLECTION, TERM_ITEM_TYPES],
+                           aggregation=BINNING_LAST)
 
     fig = px.bar(ilvl_melted, x=TERM_TIME, y=TERM_ITEM_LEVELS, color=TERM_ITEM_TYPES, pattern_shape=TERM_COLLECTION,
                  hover_data=[TERM_EVENT, TERM_TIME, TERM_COLLECTION, TERM_ACTIVITY, TERM_ITEM_LEVELS],
@@ -1384,6 +1546,8 @@ def quantity_state_activity_execution_over_time(ilvl):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def quantity_state_activity_execution_bar_chart(ilvl):
 
     ilvl = ilvl.drop(columns=[TERM_TIME])
@@ -1447,6 +1611,8 @@ def quantity_state_activity_execution_bar_chart(ilvl):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def quantity_state_activity_execution_histogram(ilvl):
 
     ilvl = remove_empty_columns(ilvl, keep_zeros=False)
@@ -1482,6 +1648,8 @@ def quantity_state_activity_execution_histogram(ilvl):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def activity_cp_item_type_impact(qop, number_quantity_operations: bool = True):
 
     # get active quantity updates
@@ -1492,10 +1660,10 @@ def activity_cp_item_type_impact(qop, number_quantity_operations: bool = True):
 
     if number_quantity_operations:
         aggregated_data = qop_qup.groupby(
-            [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, qop_qup[TERM_VALUE] > 0]).size().reset_index(
+            [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, qop_qup[TERM_VALUE] > 0], observed=True).size().reset_index(
             name=TERM_COUNT)
     else: # sum of quantity updates
-        aggregated_data = qop_qup.groupby([TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, qop_qup[TERM_VALUE] > 0]).sum().abs()
+        aggregated_data = qop_qup.groupby([TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, qop_qup[TERM_VALUE] > 0], observed=True).sum().abs()
         aggregated_data = aggregated_data.rename(columns={TERM_VALUE: TERM_COUNT}).reset_index()
 
     aggregated_data[TERM_VALUE] = aggregated_data[TERM_VALUE].apply(lambda x: TERM_ADDING if x else TERM_REMOVING)
@@ -1556,6 +1724,8 @@ def activity_cp_item_type_impact(qop, number_quantity_operations: bool = True):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_OBJECT_TYPE])
 def activities_object_type_involvement(e2o: pd.DataFrame, events: pd.DataFrame, object_type: str) -> go.Figure:
 
     all_activities = pd.Series(0, index=events[TERM_ACTIVITY].unique())
@@ -1590,6 +1760,8 @@ def activities_object_type_involvement(e2o: pd.DataFrame, events: pd.DataFrame,
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT])
 def average_adding_removing_quantity_updates_per_time_unit(qop, time_unit):
 
     if TERM_VALUE in qop.columns:
@@ -1609,9 +1781,9 @@ def average_adding_removing_quantity_updates_per_time_unit(qop, time_unit):
 
     if time_unit in {"day", "D", TERM_DAILY}:
         # Resample and aggregate data separately for positive and negative updates
-        positive_resampled = plot_data.groupby(TERM_ITEM_TYPES).resample("D", origin="start_day", label="left")[
+        positive_resampled = plot_data.groupby(TERM_ITEM_TYPES, observed=True).resample("D", origin="start_day", label="left")[
             TERM_ADDING].sum().reset_index()
-        negative_resampled = plot_data.groupby(TERM_ITEM_TYPES).resample("D", origin="start_day", label="left")[
+        negative_resampled = plot_data.groupby(TERM_ITEM_TYPES, observed=True).resample("D", origin="start_day", label="left")[
             TERM_REMOVING].sum().reset_index()
         positive_resampled = positive_resampled.set_index([TERM_ITEM_TYPES, TERM_TIME])
         negative_resampled = negative_resampled.set_index([TERM_ITEM_TYPES, TERM_TIME])
@@ -1625,9 +1797,9 @@ def average_adding_removing_quantity_updates_per_time_unit(qop, time_unit):
         title = "Average Quantity Updates per Day"
     elif time_unit in {"month", "M", TERM_MONTHLY}:
         # Resample and aggregate data separately for positive and negative updates
-        positive_resampled = plot_data.groupby(TERM_ITEM_TYPES).resample("MS", label="left")[
+        positive_resampled = plot_data.groupby(TERM_ITEM_TYPES, observed=True).resample("MS", label="left")[
             TERM_ADDING].sum().reset_index()
-        negative_resampled = plot_data.groupby(TERM_ITEM_TYPES).resample("MS", label="left")[
+        negative_resampled = plot_data.groupby(TERM_ITEM_TYPES, observed=True).resample("MS", label="left")[
             TERM_REMOVING].sum().reset_index()
         positive_resampled = positive_resampled.set_index([TERM_ITEM_TYPES, TERM_TIME])
         negative_resampled = negative_resampled.set_index([TERM_ITEM_TYPES, TERM_TIME])
@@ -1654,8 +1826,8 @@ def average_adding_removing_quantity_updates_per_time_unit(qop, time_unit):
         title = "Average Quantity Updates per Addition/Removal"
 
     # Group by Item type and calculate the mean for positive and negative updates
-    positive_grouped = positive_resampled.groupby(TERM_ITEM_TYPES)[TERM_ADDING].mean()
-    negative_grouped = negative_resampled.groupby(TERM_ITEM_TYPES)[TERM_REMOVING].mean()
+    positive_grouped = positive_resampled.groupby(TERM_ITEM_TYPES, observed=True)[TERM_ADDING].mean()
+    negative_grouped = negative_resampled.groupby(TERM_ITEM_TYPES, observed=True)[TERM_REMOVING].mean()
     joint_item_types = list(set(positive_grouped.index).union(set(negative_grouped.index)))
     positive_grouped = positive_grouped.reindex(joint_item_types).reset_index()
     negative_grouped = negative_grouped.reindex(joint_item_types).reset_index()
@@ -1693,6 +1865,8 @@ def average_adding_removing_quantity_updates_per_time_unit(qop, time_unit):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments
 def average_time_between_typed_qups_per_item_type(qop: pd.DataFrame):
     if TERM_VALUE in qop.columns:
         pass
@@ -1715,7 +1889,7 @@ def average_time_between_typed_qups_per_item_type(qop: pd.DataFrame):
     qop_enhanced = qop_enhanced.dropna(subset=[TERM_TIME_SINCE_LAST_EXECUTION])
     qop_enhanced["Average Timedelta [Days]"] = qop_enhanced[TERM_TIME_SINCE_LAST_EXECUTION] / datetime.timedelta(days=1)
     plot_data = qop_enhanced.loc[:, [TERM_QUP_TYPE, TERM_ITEM_TYPES, "Average Timedelta [Days]", TERM_VALUE]]
-    plot_data = plot_data.groupby([TERM_QUP_TYPE, TERM_ITEM_TYPES]).mean().reset_index()
+    plot_data = plot_data.groupby([TERM_QUP_TYPE, TERM_ITEM_TYPES], observed=True).mean().reset_index()
 
     fig = px.bar(plot_data,
                  x="Average Timedelta [Days]",
@@ -1741,6 +1915,8 @@ def average_time_between_typed_qups_per_item_type(qop: pd.DataFrame):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_ACTIVITY, TERM_COLLECTION])
 def time_between_it_active_qups_distribution(qop: pd.DataFrame, view: str, item_type: str = None):
 
     if isinstance(item_type, list):
@@ -1796,6 +1972,8 @@ def time_between_it_active_qups_distribution(qop: pd.DataFrame, view: str, item_
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def time_between_qups_item_type(qop: pd.DataFrame, item_type: str):
 
     if isinstance(item_type, list):
@@ -1874,6 +2052,8 @@ def time_between_qups_item_type(qop: pd.DataFrame, item_type: str):
     return fig
 
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def qups_for_item_type(qop: pd.DataFrame, item_type: str | Iterable):
 
     if isinstance(item_type, list):
@@ -1944,6 +2124,8 @@ def qups_for_item_type(qop: pd.DataFrame, item_type: str | Iterable):
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def quantity_state_pre_post_activity_execution_bar_chart(ilvl, qop, activity=None, cp=None, item_types=None):
 
     if cp:
@@ -2043,6 +2225,8 @@ def quantity_state_pre_post_activity_execution_bar_chart(ilvl, qop, activity=Non
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
 def quantity_state_pre_post_activity_execution_boxplots(ilvl, qop, activity=None, cp=None, item_types=None):
 
     if cp:
@@ -2102,6 +2286,8 @@ def quantity_state_pre_post_activity_execution_boxplots(ilvl, qop, activity=None
 
     return fig
 
+@memoize_derived_data
+@decode_categorical_arguments
 def object_qty_impact(oqty, number_objects: bool = True):
 
     # get active quantity updates
@@ -2111,10 +2297,10 @@ def object_qty_impact(oqty, number_objects: bool = True):
 
     if number_objects:
         aggregated_data = object_item_quantities.groupby(
-            [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, object_item_quantities[TERM_VALUE] > 0]).size().reset_index(
+            [TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, object_item_quantities[TERM_VALUE] > 0], observed=True).size().reset_index(
             name=TERM_COUNT)
     else: # sum of quantity updates
-        aggregated_data = object_item_quantities.groupby([TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, object_item_quantities[TERM_VALUE] > 0]).sum().abs()
+        aggregated_data = object_item_quantities.groupby([TERM_ITEM_TYPES, TERM_COLLECTION, TERM_ACTIVITY, object_item_quantities[TERM_VALUE] > 0], observed=True).sum().abs()
         aggregated_data = aggregated_data.rename(columns={TERM_VALUE: TERM_COUNT}).reset_index()
 
     aggregated_data[TERM_VALUE] = aggregated_data[TERM_VALUE].apply(lambda x: TERM_ADDING if x else TERM_REMOVING)
@@ -0,0 +1,250 @@
+import copy
+import functools
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+
+# keys of data frames whose content is identified without hashing it (see register_frame_key)
+_frame_keys = dict()
+_frame_keys_lock = threading.Lock()
+
+
+def frame_signature(df: pd.DataFrame) -> tuple:
+    """Shape, column names and dtypes of a data frame."""
+    return df.shape, tuple(map(str, df.columns)), tuple(map(str, df.dtypes))
+
+
+def register_frame_key(df: pd.DataFrame, key: str):
+    """
+    Register a key identifying the content of a data frame, e.g. the handle of the session store it was loaded from,
+    so that it is used instead of hashing the content of the data frame when it is passed to a memoized function. The
+    key is valid as long as the data frame exists and its columns are not changed (data frames with a key must not be
+    changed in place).
+    :param df: data frame
+    :param key: key unique for the content of the data frame
+    """
+
+    frame_id = id(df)
+
+    def forget(reference):
+        with _frame_keys_lock:
+            if _frame_keys.get(frame_id, (None,))[0] is reference:
+                del _frame_keys[frame_id]
+            else:
+                pass
+
+    with _frame_keys_lock:
+        _frame_keys[frame_id] = (weakref.ref(df, forget), key, frame_signature(df))
+
+
+def registered_frame_key(df: pd.DataFrame) -> str | None:
+    """Key registered for a data frame (None if there is none or its columns were changed)."""
+
+    with _frame_keys_lock:
+        reference, key, signature = _frame_keys.get(id(df), (None, None, None))
+
+    if reference is not None and reference() is df and frame_signature(df) == signature:
+        return key
+    else:
+        return None
+
+
+def dataframe_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Content hash of a data frame (values, index, column names and dtypes).
+    :param df: data frame
+    :return: hex digest identifying the content of the data frame
+    """
+
+    digest = hashlib.sha1()
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+
+    return digest.hexdigest()
+
+
+def argument_fingerprint(value) -> str:
+    """
+    Hashable representation of an argument of a memoized function.
+    :param value: argument value
+    :return: string identifying the argument
+    """
+
+    if value is None:
+        return "None"
+    elif isinstance(value, pd.DataFrame):
+        key = registered_frame_key(value)
+        return f"key:{key}" if key is not None else f"df:{dataframe_fingerprint(value)}"
+    elif isinstance(value, pd.Series):
+        return f"series:{dataframe_fingerprint(value.to_frame())}"
+    elif isinstance(value, (np.ndarray, pd.Index, pd.api.extensions.ExtensionArray)) and np.ndim(value) == 1:
+        return f"array:{dataframe_fingerprint(pd.Series(value).to_frame())}"
+    elif isinstance(value, (set, frozenset)):
+        return "set:" + repr(sorted(argument_fingerprint(item) for item in value))
+    elif isinstance(value, (list, tuple)):
+        return "list:" + repr([argument_fingerprint(item) for item in value])
+    elif isinstance(value, dict):
+        return "dict:" + repr(sorted((str(key), argument_fingerprint(item)) for key, item in value.items()))
+    elif isinstance(value, (str, int, float, bool, np.generic, pd.Timestamp)):
+        return f"{type(value).__name__}:{value!r}"
+    else:
+        raise TypeError(f"Argument of type {type(value)} can not be fingerprinted.")
+
+
+def copy_result(result):
+    """Copy cached results so that callers can not change the cached object."""
+
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy()
+    elif isinstance(result, BaseFigure):
+        # the properties of a figure are already validated, rebuilding it without validation is much cheaper than a
+        # deep copy of the figure (which validates all properties again)
+        return type(result)(result.to_dict(), _validate=False)
+    elif isinstance(result, tuple):
+        return tuple(copy_result(item) for item in result)
+    else:
+        return copy.deepcopy(result)
+
+
+def value_size(value) -> int:
+    """Approximate memory consumption of (nested) figure properties, i.e., arrays, lists, dictionaries and scalars."""
+
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return sum(value_size(item) for item in value.ravel())
+        else:
+            return int(value.nbytes)
+    elif isinstance(value, str):
+        return len(value)
+    elif isinstance(value, (list, tuple)):
+        return sum(value_size(item) for item in value)
+    elif isinstance(value, dict):
+        return sum(len(str(key)) + value_size(item) for key, item in value.items())
+    else:
+        return 8
+
+
+def result_size(result) -> int:
+    """Approximate memory consumption of a cached result (data frames, series and figures are taken into account)."""
+
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(index=True).sum())
+    elif isinstance(result, pd.Series):
+        return int(result.memory_usage(index=True))
+    elif isinstance(result, BaseFigure):
+        return value_size(result.to_dict())
+    elif isinstance(result, tuple):
+        return sum(result_size(item) for item in result)
+    else:
+        return 0
+
+
+class DerivedDataCache:
+    """
+    Content-addressed LRU cache of data derived from (sub)logs, e.g., projected item levels or figures.
+    Entries are keyed by the function and the fingerprints of its arguments, so re-requesting the same view of the same
+    data returns the cached result instead of recomputing it. Data frames are identified by their registered key (see
+    register_frame_key) and only hashed if they have none.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, key: str):
+        """
+        Get a cached result.
+        :param key: key of the cached result
+        :return: tuple of found-flag and copy of the cached result
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                result, size = self._entries[key]
+            else:
+                self.misses += 1
+                return False, None
+
+        return True, copy_result(result)
+
+    def put(self, key: str, result):
+        """Add a result to the cache and evict the least recently used entries if the cache is full."""
+
+        size = result_size(result)
+
+        if size > self._max_bytes:
+            return
+        else:
+            pass
+
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            else:
+                pass
+            self._entries[key] = (copy_result(result), size)
+            self._size += size
+
+            while len(self._entries) > self._max_entries or self._size > self._max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+DERIVED_DATA_CACHE = DerivedDataCache()
+
+
+def memoize_derived_data(func):
+    """
+    Decorator caching the results of functions computing data or figures from data frames in the DERIVED_DATA_CACHE.
+    Calls with arguments that can not be fingerprinted are computed without caching.
+    """
+
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+
+        try:
+            key = name + "|" + argument_fingerprint(list(args)) + "|" + argument_fingerprint(kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        found, result = DERIVED_DATA_CACHE.get(key)
+
+        if found:
+            return result
+        else:
+            result = func(*args, **kwargs)
+            DERIVED_DATA_CACHE.put(key, result)
+            return result
+
+    return wrapper
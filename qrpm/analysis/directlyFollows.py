@@ -0,0 +1,180 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_TIME, TERM_OBJECT, TERM_OBJECT_TYPE
+
+# an activity has variable arcs of an object type if less than this share of all its events refer to a single object of
+# the type (as in the object-centric Petri net discovery of pm4py)
+DOUBLE_ARC_THRESHOLD = 0.8
+
+DFG_ACTIVITIES = "activities"
+DFG_START_ACTIVITIES = "start_activities"
+DFG_END_ACTIVITIES = "end_activities"
+DFG_EDGES = "dfg"
+DFG_DOUBLE_ARCS = "double_arcs"
+
+
+def count_keys(keys: np.ndarray) -> (np.ndarray, np.ndarray):
+    """Distinct integer keys and their number of occurrences."""
+    return np.unique(keys, return_counts=True)
+
+def object_traces(events: pd.DataFrame, e2o: pd.DataFrame, objects: pd.DataFrame = None) -> tuple:
+    """
+    Event to object relations ordered by object type, object and time (events at the same time in the order of the
+    event table) as integer codes, so that the relations of every object form its trace.
+    :param events: event table (event, activity, time)
+    :param e2o: event to object relations (event, object and, if objects are not passed, object type)
+    :param objects: object table (object, object type), needed if the relations have no object type
+    :return: activities, object types, activity code per event, per ordered relation the position of its event in the
+    event table, the object type code and the activity code, and the mask of relations that start a trace
+    """
+
+    events = events.drop_duplicates(subset=[TERM_EVENT])
+    if TERM_OBJECT_TYPE in e2o.columns:
+        relations = e2o[[TERM_EVENT, TERM_OBJECT, TERM_OBJECT_TYPE]]
+    elif objects is not None:
+        object_types = objects[[TERM_OBJECT, TERM_OBJECT_TYPE]].drop_duplicates(subset=[TERM_OBJECT], keep="last")
+        relations = e2o[[TERM_EVENT, TERM_OBJECT]].merge(object_types, on=TERM_OBJECT, how="inner")
+    else:
+        raise ValueError("The object types of the objects must be passed with the relations or the objects.")
+
+    # position of the event of every relation in the time-ordered event table
+    event_order = np.argsort(pd.to_datetime(events[TERM_TIME]).to_numpy(), kind="stable")
+    event_rank = np.empty(len(events), dtype=np.int64)
+    event_rank[event_order] = np.arange(len(events))
+    event_position = pd.Index(events[TERM_EVENT]).get_indexer(relations[TERM_EVENT])
+    known = event_position >= 0
+    event_position = event_position[known]
+
+    activity_codes, activities = pd.factorize(events[TERM_ACTIVITY], sort=True)
+    type_codes, object_types = pd.factorize(relations[TERM_OBJECT_TYPE].to_numpy()[known], sort=True)
+    object_codes, _ = pd.factorize(relations[TERM_OBJECT].to_numpy()[known])
+
+    # relations ordered by object type, object and time
+    order = np.lexsort((event_rank[event_position], object_codes, type_codes))
+    event_sorted = event_position[order]
+    type_sorted = type_codes[order].astype(np.int64)
+    object_sorted = object_codes[order]
+    activity_sorted = activity_codes[event_sorted].astype(np.int64)
+
+    first = np.ones(len(event_sorted), dtype=bool)
+    first[1:] = (object_sorted[1:] != object_sorted[:-1]) | (type_sorted[1:] != type_sorted[:-1])
+
+    return activities, object_types, activity_codes, event_sorted, type_sorted, activity_sorted, first
+
+def directly_follows_graphs(events: pd.DataFrame, e2o: pd.DataFrame, objects: pd.DataFrame = None,
+                            double_arc_threshold: float = DOUBLE_ARC_THRESHOLD) -> dict[str, dict]:
+    """
+    Directly-follows graphs of all object types of an object-centric event log. Consecutive events of the trace of an
+    object (see object_traces) are a directly-follows relation of its object type. Everything is computed on integer
+    codes of the event to object relations, only the (small) graphs are converted to dictionaries.
+    :param events: event table (event, activity, time)
+    :param e2o: event to object relations (event, object and, if objects are not passed, object type)
+    :param objects: object table (object, object type), needed if the relations have no object type
+    :param double_arc_threshold: threshold of variable arcs (see DOUBLE_ARC_THRESHOLD)
+    :return: per object type the number of events per activity, start and end activities (number of objects), the
+    directly-follows relations with their frequency and per activity whether its arcs are variable
+    """
+
+    activities, object_types, activity_codes, event_sorted, type_sorted, activity_sorted, first = \
+        object_traces(events=events, e2o=e2o, objects=objects)
+    n_activities = max(len(activities), 1)
+    n_events = max(len(activity_codes), 1)
+
+    same_object = ~first[1:]
+    last = np.roll(first, -1)
+
+    type_activity = type_sorted * n_activities + activity_sorted
+    edge_keys = type_activity[:-1][same_object] * n_activities + activity_sorted[1:][same_object]
+    edges, edge_counts = count_keys(edge_keys)
+    starts, start_counts = count_keys(type_activity[first])
+    ends, end_counts = count_keys(type_activity[last])
+
+    # events and events with a single object per object type and activity (for the variable arcs)
+    event_keys, objects_per_event = count_keys(type_sorted * n_events + event_sorted)
+    event_activities = (event_keys // n_events) * n_activities + activity_codes[event_keys % n_events]
+    ev_activities, ev_inverse, ev_counts = np.unique(event_activities, return_inverse=True, return_counts=True)
+    single_counts = np.bincount(ev_inverse, weights=objects_per_event == 1, minlength=len(ev_activities))
+    activity_counts = np.bincount(activity_codes, minlength=n_activities)
+
+    dfgs = {object_type: {DFG_ACTIVITIES: dict(), DFG_START_ACTIVITIES: dict(), DFG_END_ACTIVITIES: dict(),
+                          DFG_EDGES: dict(), DFG_DOUBLE_ARCS: dict()} for object_type in object_types}
+
+    for key, events_count, single_count in zip(ev_activities, ev_counts, single_counts):
+        dfg = dfgs[object_types[key // n_activities]]
+        activity = activities[key % n_activities]
+        dfg[DFG_ACTIVITIES][activity] = int(events_count)
+        dfg[DFG_DOUBLE_ARCS][activity] = bool(single_count / activity_counts[key % n_activities] < double_arc_threshold)
+    for keys, counts, name in [(starts, start_counts, DFG_START_ACTIVITIES), (ends, end_counts, DFG_END_ACTIVITIES)]:
+        for key, count in zip(keys, counts):
+            dfgs[object_types[key // n_activities]][name][activities[key % n_activities]] = int(count)
+    for key, count in zip(edges, edge_counts):
+        type_activity_key, target = divmod(int(key), n_activities)
+        object_type, source = divmod(type_activity_key, n_activities)
+        dfgs[object_types[object_type]][DFG_EDGES][(activities[source], activities[target])] = int(count)
+
+    return dfgs
+
+def control_flow_fingerprint(dfgs: dict[str, dict]) -> str:
+    """
+    Fingerprint of the control-flow footprint of directly-follows graphs (see directly_follows_graphs): per object
+    type the activities, start and end activities and directly-follows relations, without their frequencies.
+    :param dfgs: directly-follows graphs per object type
+    :return: hex digest identifying the footprint
+    """
+
+    footprint = [(str(object_type),
+                  sorted(map(str, dfg[DFG_ACTIVITIES])),
+                  sorted(map(str, dfg[DFG_START_ACTIVITIES])),
+                  sorted(map(str, dfg[DFG_END_ACTIVITIES])),
+                  sorted((str(source), str(target)) for source, target in dfg[DFG_EDGES]))
+                 for object_type, dfg in sorted(dfgs.items(), key=lambda item: str(item[0]))]
+
+    return hashlib.sha1(repr(footprint).encode()).hexdigest()
+
+def trace_variants(events: pd.DataFrame, e2o: pd.DataFrame, objects: pd.DataFrame = None) -> dict[str, list[tuple]]:
+    """
+    Distinct traces (sequences of activities) of the objects of every object type (see object_traces). Traces are
+    compared by two polynomial hashes of their activity codes and their length, so that only one trace per variant is
+    converted to a tuple.
+    :return: per object type the sorted list of its trace variants
+    """
+
+    activities, object_types, activity_codes, event_sorted, type_sorted, activity_sorted, first = \
+        object_traces(events=events, e2o=e2o, objects=objects)
+
+    if len(event_sorted) == 0:
+        return {object_type: [] for object_type in object_types}
+    else:
+        pass
+
+    starts = np.flatnonzero(first)
+    lengths = np.diff(np.r_[starts, len(event_sorted)])
+    positions = np.arange(len(event_sorted)) - np.repeat(starts, lengths)
+
+    hashes = []
+    with np.errstate(over="ignore"):
+        for base in [np.uint64(1000003), np.uint64(2654435761)]:
+            powers = np.cumprod(np.r_[np.uint64(1), np.full(lengths.max() - 1, base, dtype=np.uint64)], dtype=np.uint64)
+            terms = (activity_sorted.astype(np.uint64) + np.uint64(1)) * powers[positions]
+            hashes.append(np.add.reduceat(terms, starts))
+
+    traces = pd.DataFrame({"type": type_sorted[starts], "length": lengths, "first": hashes[0], "second": hashes[1],
+                           "start": starts})
+    representatives = traces.drop_duplicates(subset=["type", "length", "first", "second"])
+
+    variants = {object_type: [] for object_type in object_types}
+    for object_type, start, length in representatives[["type", "start", "length"]].itertuples(index=False, name=None):
+        variants[object_types[object_type]].append(tuple(activities[activity_sorted[start:start + length]]))
+
+    return {object_type: sorted(traces_of_type) for object_type, traces_of_type in variants.items()}
+
+def variants_fingerprint(variants: dict[str, list[tuple]]) -> str:
+    """Fingerprint of the trace variants of object types (see trace_variants)."""
+
+    footprint = [(str(object_type), [tuple(map(str, trace)) for trace in traces])
+                 for object_type, traces in sorted(variants.items(), key=lambda item: str(item[0]))]
+
+    return hashlib.sha1(repr(footprint).encode()).hexdigest()
@@ -0,0 +1,220 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLING_LTTB = "LTTB"
+DOWNSAMPLING_MIN_MAX = "Min-Max"
+BINNING_SUM = "sum"
+BINNING_LAST = "last"
+MAX_CHART_POINTS = 50000
+
+
+def bucket_bounds(length: int, buckets: int) -> np.ndarray:
+    """Bounds of buckets of (almost) equal size covering the positions 0 to length."""
+    return np.linspace(0, length, buckets + 1).astype(np.int64)
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-triangle-three-buckets downsampling: the first and last point are kept and from every bucket in between
+    the point spanning the largest triangle with the point selected from the preceding bucket and the mean of the
+    succeeding bucket.
+    :param x: x values in ascending order
+    :param y: y values
+    :param threshold: number of points to be selected
+    :return: positions of the selected points in ascending order
+    """
+
+    length = len(x)
+
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+    else:
+        pass
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # buckets between the first and the last point
+    bounds = bucket_bounds(length - 2, threshold - 2) + 1
+    sums_x = np.add.reduceat(x[1:-1], bounds[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:-1], bounds[:-1] - 1)
+    sizes = np.diff(bounds)
+    means_x = np.append(sums_x / sizes, x[-1])
+    means_y = np.append(sums_y / sizes, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        area = np.abs((x[previous] - means_x[bucket + 1]) * (y[start:end] - y[previous]) -
+                      (x[previous] - x[start:end]) * (means_y[bucket + 1] - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+def min_max_envelope(y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min-max downsampling: the first and last point and the points with the minimal and maximal y value of every
+    bucket are kept, so that peaks and stock-outs (minimal item levels) remain visible.
+    :param y: y values (in the order of the x values)
+    :param threshold: maximal number of points to be selected
+    :return: positions of the selected points in ascending order
+    """
+
+    length = len(y)
+
+    if threshold >= length or threshold < 4:
+        return np.arange(length)
+    else:
+        pass
+
+    y = np.asarray(y, dtype=float)
+    bounds = bucket_bounds(length, (threshold - 2) // 2)
+    buckets = np.repeat(np.arange(len(bounds) - 1), np.diff(bounds))
+
+    # position of the minimum and maximum of every bucket (sorting by bucket and value)
+    order = np.lexsort((y, buckets))
+    minima = order[bounds[:-1]]
+    maxima = order[bounds[1:] - 1]
+
+    return np.unique(np.concatenate([[0, length - 1], minima, maxima]))
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, threshold: int, method: str = DOWNSAMPLING_MIN_MAX) -> np.ndarray:
+    """
+    Positions of the points of a series kept by downsampling (missing y values are dropped if the series is
+    downsampled).
+    :param x: x values in ascending order
+    :param y: y values
+    :param threshold: maximal number of points
+    :param method: DOWNSAMPLING_LTTB or DOWNSAMPLING_MIN_MAX
+    :return: positions of the selected points in ascending order
+    """
+
+    if len(x) <= threshold:
+        return np.arange(len(x))
+    else:
+        pass
+
+    observed = np.flatnonzero(~np.isnan(np.asarray(y, dtype=float)))
+
+    if len(observed) <= threshold:
+        return observed
+    elif threshold < 4:
+        # too few points for the shape of the series, evenly spaced points are kept
+        return observed[np.unique(np.linspace(0, len(observed) - 1, threshold).astype(np.int64))]
+    elif method == DOWNSAMPLING_LTTB:
+        return observed[lttb(np.asarray(x)[observed], np.asarray(y)[observed], threshold)]
+    elif method == DOWNSAMPLING_MIN_MAX:
+        return observed[min_max_envelope(np.asarray(y)[observed], threshold)]
+    else:
+        raise ValueError(f"Downsampling method must be {DOWNSAMPLING_LTTB} or {DOWNSAMPLING_MIN_MAX}.")
+
+def downsample_series(data: pd.DataFrame, x: str, y: str, series: Iterable[str] = None, method: str = DOWNSAMPLING_MIN_MAX,
+                      max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Downsample the series of a (long format) chart table before the figure is created, so that the chart does not
+    contain more than the maximum number of points. The budget is split between the series, budget not needed by
+    short series goes to the longer ones. With more series than points, the longest series are left out.
+    :param data: chart data with one row per point
+    :param x: column of x values (timestamps or numbers)
+    :param y: column of y values
+    :param series: columns identifying a series (e.g., collection point and item type)
+    :param method: DOWNSAMPLING_LTTB or DOWNSAMPLING_MIN_MAX
+    :param max_points: maximum number of points of the chart
+    :return: rows of the data kept in the order of their x values per series
+    """
+
+    if len(data) <= max_points:
+        return data
+    else:
+        pass
+
+    series = list(series) if series else []
+    x_values = data[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x_values = pd.DatetimeIndex(x_values).asi8
+    else:
+        x_values = x_values.to_numpy(dtype=float)
+    y_values = data[y].to_numpy(dtype=float, na_value=np.nan)
+
+    if series:
+        groups = list(data.groupby(series, sort=False, observed=True, dropna=False).indices.values())
+    else:
+        groups = [np.arange(len(data))]
+
+    # shortest series first, so that budget they do not need is split between the remaining series
+    budget = max_points
+    selected = [None] * len(groups)
+    for number, position in enumerate(np.argsort([len(rows) for rows in groups], kind="stable")):
+        rows = groups[position]
+        threshold = budget // (len(groups) - number)
+        rows = rows[np.argsort(x_values[rows], kind="stable")]
+        selected[position] = rows[downsample_indices(x_values[rows], y_values[rows], threshold, method=method)]
+        budget -= len(selected[position])
+
+    return data.iloc[np.concatenate(selected)]
+
+def bin_bars(data: pd.DataFrame, x: str, y: str, series: Iterable[str] = None, aggregation: str = BINNING_SUM,
+             max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Aggregate the bars of a (long format) bar chart table to bins of equal width on the x axis, so that the chart does
+    not contain more than the maximum number of bars (but at least one bar per series) without leaving out any bar.
+    The bars of a series within a bin are combined into one bar at the start of the bin, other columns keep their value
+    if it is the same for all combined bars and show the number of different values otherwise.
+    :param data: chart data with one row per bar
+    :param x: column of x values (timestamps or numbers)
+    :param y: column of y values
+    :param series: columns identifying a series (e.g., collection point and item type)
+    :param aggregation: BINNING_SUM (e.g., quantity operations) or BINNING_LAST (e.g., item levels at the end of a bin)
+    :param max_points: maximum number of bars of the chart
+    :return: bars of the chart
+    """
+
+    if len(data) <= max_points:
+        return data
+    elif aggregation in {BINNING_SUM, BINNING_LAST}:
+        pass
+    else:
+        raise ValueError(f"Binning aggregation must be {BINNING_SUM} or {BINNING_LAST}.")
+
+    series = list(series) if series else []
+    number_of_series = data.groupby(series, sort=False, observed=True, dropna=False).ngroups if series else 1
+    number_of_bins = max(max_points // max(number_of_series, 1), 1)
+
+    if pd.api.types.is_numeric_dtype(data[x]):
+        pass
+    else:
+        data = data.assign(**{x: pd.to_datetime(data[x])})
+    is_datetime = pd.api.types.is_datetime64_any_dtype(data[x])
+    x_values = pd.DatetimeIndex(data[x]).asi8 if is_datetime else data[x].to_numpy(dtype=float)
+    low, high = x_values.min(), x_values.max()
+    if is_datetime:
+        # whole nanoseconds, so that the bins start at exact timestamps
+        width = max(-(-(high - low + 1) // number_of_bins), 1)
+        bins = (x_values - low) // width
+    else:
+        width = (high - low) / number_of_bins if high > low else 1
+        bins = np.minimum(np.floor((x_values - low) / width), number_of_bins - 1).astype(np.int64)
+
+    data = data.assign(bin=bins).sort_values(by=x, kind="stable")
+    others = [column for column in data.columns if column not in set(series + [x, y, "bin"])]
+    grouped = data.groupby(["bin"] + series, sort=True, observed=True, dropna=False)
+
+    bars = grouped[y].agg(aggregation).reset_index()
+    for column in others:
+        first, different = grouped[column].first().to_numpy(), grouped[column].nunique().to_numpy()
+        bars[column] = np.where(different <= 1, first.astype(object), [f"{n} different" for n in different])
+
+    starts = low + bars["bin"].to_numpy() * width
+    bars[x] = pd.to_datetime(starts) if is_datetime else starts
+    if is_datetime and data[x].dt.tz is not None:
+        bars[x] = bars[x].dt.tz_localize("UTC").dt.tz_convert(data[x].dt.tz)
+    else:
+        pass
+
+    return bars[list(data.columns.drop("bin"))]
@@ -0,0 +1,263 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.categoricalEncoding import create_log_categories
+from qrpm.GLOBAL import TERM_EVENT, TERM_OBJECT, TERM_ACTIVITY, TERM_OBJECT_TYPE
+
+
+def identifier_codes(column: pd.Series, categories: pd.CategoricalDtype) -> np.ndarray:
+    """Integer ids of the identifiers of a column (-1 for missing or unknown identifiers)."""
+
+    if column.dtype == categories:
+        return column.cat.codes.to_numpy(dtype=np.int64)
+    else:
+        return categories.categories.get_indexer(column.astype(str)).astype(np.int64)
+
+
+def compressed_order(keys: np.ndarray) -> np.ndarray:
+    """Positions of all entries with a valid key (>= 0), stably sorted by their key."""
+
+    valid = np.flatnonzero(keys >= 0)
+    # sorting narrow keys is considerably faster
+    sort_keys = keys[valid].astype(np.min_scalar_type(keys.max(initial=0)))
+    return valid[np.argsort(sort_keys, kind="stable")]
+
+
+def compressed_pointers(keys: np.ndarray, number_of_keys: int) -> np.ndarray:
+    """Offsets of the entries of every key in the sorted order (CSR row pointers)."""
+
+    pointers = np.zeros(number_of_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys[keys >= 0], minlength=number_of_keys), out=pointers[1:])
+    return pointers
+
+
+def gather(pointers: np.ndarray, order: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Get the entries of all passed keys from a CSR structure."""
+
+    keys = np.asarray(keys, dtype=np.int64)
+    starts = pointers[keys]
+    lengths = pointers[keys + 1] - starts
+    total = int(lengths.sum())
+
+    if total == 0:
+        return np.empty(0, dtype=order.dtype)
+    else:
+        pass
+
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+
+    return order[offsets]
+
+
+def sorted_unique(values: np.ndarray, size: int) -> np.ndarray:
+    """Sorted unique values of an array of ids in [0, size) (a lookup table is used instead of sorting large arrays)."""
+
+    if len(values) * 16 < size:
+        return np.unique(values)
+    else:
+        mask = np.zeros(size, dtype=bool)
+        mask[values] = True
+        return np.flatnonzero(mask)
+
+
+def restrict_order(order: np.ndarray, positions: np.ndarray, size: int) -> np.ndarray:
+    """Sorted order of a subset of the entries (given by their positions) derived from the order of all entries."""
+
+    new_positions = np.full(size, -1, dtype=np.int64)
+    new_positions[positions] = np.arange(len(positions))
+    restricted = new_positions[order]
+
+    return restricted[restricted >= 0]
+
+
+class EventObjectIndex:
+    """
+    Bidirectional index of the event to object relations of a log (or sublog).
+    Events, objects, activities and object types are referred to by integer ids (the codes of the shared categories of
+    the log). The index keeps CSR structures for event -> e2o relations, object -> e2o relations, activity -> events and
+    object type -> objects, so that sublogs can be determined by gathering and intersecting integer arrays instead of
+    scanning the tables.
+    Positions refer to the rows of the events, e2o and objects tables the index was created for.
+    """
+
+    def __init__(self, categories: dict[str, pd.CategoricalDtype], event_ids: np.ndarray, activity_ids: np.ndarray,
+                 object_ids: np.ndarray, object_types: np.ndarray, e2o_event_ids: np.ndarray,
+                 e2o_object_ids: np.ndarray, e2o_event_order: np.ndarray = None,
+                 e2o_object_order: np.ndarray = None, object_type_order: np.ndarray = None):
+        """
+        :param categories: categories of the identifier columns
+        :param event_ids: event id per row of the events table
+        :param activity_ids: activity id per row of the events table
+        :param object_ids: object id per row of the objects table
+        :param object_types: object type id per object id
+        :param e2o_event_ids: event id per row of the e2o table
+        :param e2o_object_ids: object id per row of the e2o table
+        :param e2o_event_order: e2o rows sorted by event (determined if not passed)
+        :param e2o_object_order: e2o rows sorted by object (determined if not passed)
+        :param object_type_order: object ids sorted by object type (determined if not passed)
+        """
+
+        self._categories = categories
+        self._event_ids = event_ids
+        self._activity_ids = activity_ids
+        self._object_ids = object_ids
+        self._object_types = object_types
+        self._e2o_event_ids = e2o_event_ids
+        self._e2o_object_ids = e2o_object_ids
+
+        self._e2o_event_order = compressed_order(e2o_event_ids) if e2o_event_order is None else e2o_event_order
+        self._e2o_event_pointers = compressed_pointers(e2o_event_ids, self.number_of_ids(TERM_EVENT))
+        self._e2o_object_order = compressed_order(e2o_object_ids) if e2o_object_order is None else e2o_object_order
+        self._e2o_object_pointers = compressed_pointers(e2o_object_ids, self.number_of_ids(TERM_OBJECT))
+
+        self._activity_order = compressed_order(activity_ids)
+        self._activity_pointers = compressed_pointers(activity_ids, self.number_of_ids(TERM_ACTIVITY))
+        self._object_type_order = compressed_order(object_types) if object_type_order is None else object_type_order
+        self._object_type_pointers = compressed_pointers(object_types, self.number_of_ids(TERM_OBJECT_TYPE))
+
+    @classmethod
+    def from_tables(cls, events: pd.DataFrame, e2o: pd.DataFrame, objects: pd.DataFrame):
+        """Create the index of a log. Identifier columns should be encoded with the categories of the log."""
+
+        categories = create_log_categories([events, e2o, objects])
+        for column in [TERM_EVENT, TERM_OBJECT, TERM_ACTIVITY, TERM_OBJECT_TYPE]:
+            if column in categories:
+                pass
+            else:
+                categories[column] = pd.CategoricalDtype(categories=[], ordered=False)
+
+        # object types of all objects referred to in the e2o relations or the objects table
+        object_types = np.full(len(categories[TERM_OBJECT].categories), -1, dtype=np.int64)
+        for table in [e2o, objects]:
+            object_ids = identifier_codes(table[TERM_OBJECT], categories[TERM_OBJECT])
+            object_type_ids = identifier_codes(table[TERM_OBJECT_TYPE], categories[TERM_OBJECT_TYPE])
+            object_types[object_ids[object_ids >= 0]] = object_type_ids[object_ids >= 0]
+
+        return cls(categories=categories,
+                   event_ids=identifier_codes(events[TERM_EVENT], categories[TERM_EVENT]),
+                   activity_ids=identifier_codes(events[TERM_ACTIVITY], categories[TERM_ACTIVITY]),
+                   object_ids=identifier_codes(objects[TERM_OBJECT], categories[TERM_OBJECT]),
+                   object_types=object_types,
+                   e2o_event_ids=identifier_codes(e2o[TERM_EVENT], categories[TERM_EVENT]),
+                   e2o_object_ids=identifier_codes(e2o[TERM_OBJECT], categories[TERM_OBJECT]))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.__dict__.values() if isinstance(array, np.ndarray))
+
+    @property
+    def number_of_e2o_rows(self) -> int:
+        return len(self._e2o_event_ids)
+
+    def number_of_ids(self, column: str) -> int:
+        return len(self._categories[column].categories)
+
+    def ids(self, column: str, values: Iterable) -> np.ndarray:
+        """Get the integer ids of the passed identifiers (unknown identifiers are dropped)."""
+
+        if isinstance(values, pd.Series) and values.dtype == self._categories[column]:
+            ids = values.cat.codes.to_numpy(dtype=np.int64)
+            return np.unique(ids[ids >= 0])
+        elif isinstance(values, pd.Series):
+            values = values.unique()
+        elif isinstance(values, str):
+            values = [values]
+        else:
+            pass
+
+        ids = self._categories[column].categories.get_indexer(pd.Index(values).astype(str))
+
+        return np.unique(ids[ids >= 0])
+
+    def mask(self, column: str, ids: np.ndarray) -> np.ndarray:
+        """Boolean lookup table of the passed ids."""
+
+        mask = np.zeros(self.number_of_ids(column), dtype=bool)
+        mask[ids] = True
+        return mask
+
+    #### e2o ####
+    def e2o_rows_of_events(self, event_ids: np.ndarray) -> np.ndarray:
+        """Rows of the e2o table referring to the passed events."""
+        return sorted_unique(gather(self._e2o_event_pointers, self._e2o_event_order, event_ids),
+                             self.number_of_e2o_rows)
+
+    def e2o_rows_of_objects(self, object_ids: np.ndarray) -> np.ndarray:
+        """Rows of the e2o table referring to the passed objects."""
+        return sorted_unique(gather(self._e2o_object_pointers, self._e2o_object_order, object_ids),
+                             self.number_of_e2o_rows)
+
+    def events_of_e2o_rows(self, rows: np.ndarray) -> np.ndarray:
+        event_ids = self._e2o_event_ids[rows]
+        return sorted_unique(event_ids[event_ids >= 0], self.number_of_ids(TERM_EVENT))
+
+    def objects_of_e2o_rows(self, rows: np.ndarray) -> np.ndarray:
+        object_ids = self._e2o_object_ids[rows]
+        return sorted_unique(object_ids[object_ids >= 0], self.number_of_ids(TERM_OBJECT))
+
+    def object_counts(self, rows: np.ndarray) -> np.ndarray:
+        """Number of the passed e2o rows per object id."""
+        object_ids = self._e2o_object_ids[rows]
+        return np.bincount(object_ids[object_ids >= 0], minlength=self.number_of_ids(TERM_OBJECT))
+
+    def events_of_objects(self, object_ids: np.ndarray) -> np.ndarray:
+        """Events referring to any of the passed objects."""
+        return self.events_of_e2o_rows(gather(self._e2o_object_pointers, self._e2o_object_order, object_ids))
+
+    def objects_of_events(self, event_ids: np.ndarray) -> np.ndarray:
+        """Objects referred to by any of the passed events."""
+        return self.objects_of_e2o_rows(gather(self._e2o_event_pointers, self._e2o_event_order, event_ids))
+
+    def e2o_rows_of_events_and_objects(self, event_ids: np.ndarray, object_ids: np.ndarray) -> np.ndarray:
+        """Rows of the e2o table referring to any of the passed events and any of the passed objects."""
+
+        rows = self.e2o_rows_of_objects(object_ids)
+        return rows[self.mask(TERM_EVENT, event_ids)[self._e2o_event_ids[rows]]]
+
+    #### events and objects ####
+    def events_of_activities(self, activities: Iterable[str]) -> np.ndarray:
+        """Events of the passed activities."""
+
+        rows = gather(self._activity_pointers, self._activity_order, self.ids(TERM_ACTIVITY, activities))
+        event_ids = self._event_ids[rows]
+        return sorted_unique(event_ids[event_ids >= 0], self.number_of_ids(TERM_EVENT))
+
+    def objects_of_object_types(self, object_types: Iterable[str]) -> np.ndarray:
+        """Objects of the passed object types (not only the objects of the sublog)."""
+
+        return np.sort(gather(self._object_type_pointers, self._object_type_order,
+                              self.ids(TERM_OBJECT_TYPE, object_types)))
+
+    def event_rows(self, event_ids: np.ndarray) -> np.ndarray:
+        """Rows of the events table of the passed events."""
+        return np.flatnonzero(self.mask(TERM_EVENT, event_ids)[self._event_ids])
+
+    def object_rows(self, object_ids: np.ndarray) -> np.ndarray:
+        """Rows of the objects table of the passed objects."""
+        return np.flatnonzero(self.mask(TERM_OBJECT, object_ids)[self._object_ids])
+
+    def object_ids_of_rows(self, object_rows: np.ndarray) -> np.ndarray:
+        """Object ids of the passed rows of the objects table."""
+        return self._object_ids[object_rows]
+
+    #### sublogs ####
+    def subset(self, event_rows: np.ndarray, e2o_rows: np.ndarray, object_rows: np.ndarray):
+        """
+        Index of a sublog consisting of the passed (sorted) rows of the events, e2o and objects tables. The orders of the
+        e2o relations are restricted from this index, so the relations do not have to be sorted again.
+        """
+
+        e2o_size = len(self._e2o_event_ids)
+
+        return EventObjectIndex(categories=self._categories,
+                                event_ids=self._event_ids[event_rows],
+                                activity_ids=self._activity_ids[event_rows],
+                                object_ids=self._object_ids[object_rows],
+                                object_types=self._object_types,
+                                object_type_order=self._object_type_order,
+                                e2o_event_ids=self._e2o_event_ids[e2o_rows],
+                                e2o_object_ids=self._e2o_object_ids[e2o_rows],
+                                e2o_event_order=restrict_order(self._e2o_event_order, e2o_rows, e2o_size),
+                                e2o_object_order=restrict_order(self._e2o_object_order, e2o_rows, e2o_size))
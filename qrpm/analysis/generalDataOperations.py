@@ -76,44 +76,74 @@ def split_instance_and_variable_entries(column_names: set) -> (list[str], list[s
     return cols_non_item_types, cols_item_types
 
 
+def group_codes(data: pd.DataFrame, columns: list[str]) -> (np.ndarray, int, list[tuple[np.ndarray, pd.Index]]):
+    """
+    Integer code of the combination of values of the columns for every row. Codes are assigned in the sorted order of
+    the combinations (as by groupby), rows with missing values get code -1.
+    :param data: data
+    :param columns: columns identifying a group
+    :return: code per row, number of groups, per column the code of its value per group and its unique values
+    """
+
+    codes = np.zeros(len(data), dtype=np.int64)
+    column_codes = []
+    for column in columns:
+        value_codes, uniques = pd.factorize(data[column], sort=True)
+        column_codes.append((value_codes, uniques))
+        # combine with the codes of the preceding columns, re-coding keeps the codes small for many columns
+        valid = (codes >= 0) & (value_codes >= 0)
+        combined = codes[valid] * len(uniques) + value_codes[valid]
+        codes = np.full(len(data), -1, dtype=np.int64)
+        codes[valid] = pd.factorize(combined, sort=True)[0]
+
+    number_of_groups = int(codes.max()) + 1 if len(codes) > 0 else 0
+
+    # first row of every group to determine the values of the group
+    first_rows = np.zeros(number_of_groups, dtype=np.int64)
+    grouped = np.flatnonzero(codes >= 0)
+    first_rows[codes[grouped][::-1]] = grouped[::-1]
+
+    return codes, number_of_groups, [(value_codes[first_rows], uniques) for value_codes, uniques in column_codes]
+
 def combine_instances(data: pd.DataFrame, combine_instances: Iterable[str] = None, columns_to_keep: Iterable[str] = None,
                       name_aggregation: str = None, entry_aggregation_col: str = None,
                       combination_count: bool = False) -> pd.DataFrame:
     """
     Combine instances in a data set referring to the values for a subset of columns.
+    The instances are integer-coded by their values (see group_codes), so that sums, first values and labels are all
+    determined from the same codes in one pass.
     :param data: Dataframe with counters - required: data to be aggregated has to be identifiable by column separation
     :param combine_instances: list of columns describing what instances to combine if they have the same values for all columns in the list/set
     :param columns_to_keep: list of columns that would be removed but should be kept - always keeps the first instance (sorted by time, if data contains a time column)
-    :param aggregation_type: type of aggregation - sum or absolute values
     :param name_aggregation: name of the column with the new identifier
+    :param entry_aggregation_col: entry of the column with the new identifier (joined values of combine_instances if None)
+    :param combination_count: whether to add a column with the number of combined instances
     """
 
     non_item_type_cols, item_type_cols = split_instance_and_variable_entries(set(data.columns))
 
     if combine_instances:
         if isinstance(combine_instances, str):
-            combine_instances = {combine_instances}
+            combine_instances = [combine_instances]
         elif isinstance(combine_instances, set):
-            pass
+            combine_instances = list(combine_instances)
         elif isinstance(combine_instances, Iterable):
-            combine_instances = set(combine_instances)
+            combine_instances = list(dict.fromkeys(combine_instances))
         else:
             raise ValueError("Aggregate by must be a string or an iterable of strings.")
 
-        if combine_instances.issubset(set(data.columns)):
+        if set(combine_instances).issubset(set(data.columns)):
             pass
         else:
             raise ValueError("Not all columns in combine_instances are in the data.")
 
     else:
         if TERM_EVENT in data.columns:
-            combine_instances = {TERM_EVENT}
+            combine_instances = [TERM_EVENT]
         else:
             return data
 
-    keep = set(item_type_cols).union(combine_instances)
-    columns_to_drop = set(data.columns).difference(keep)
-    combine_instances = list(combine_instances)
+    columns_to_drop = set(data.columns).difference(set(item_type_cols).union(combine_instances))
 
     if columns_to_keep:
         if isinstance(columns_to_keep, str):
@@ -130,38 +160,48 @@ def combine_instances(data: pd.DataFrame, combine_instances: Iterable[str] = Non
         else:
             raise ValueError("Not all columns in columns_to_keep are in the data.")
 
-        columns_to_keep = columns_to_keep.intersection(columns_to_drop)
-
-        if columns_to_keep:
-            columns_to_keep = list(columns_to_keep)
-            merge_columns = combine_instances + columns_to_keep
-            keep_data = data.copy()
-            if TERM_TIME in data.columns:
-                keep_data[TERM_TIME] = pd.to_datetime(keep_data[TERM_TIME])
-                keep_data = keep_data.sort_values(by=TERM_TIME, ascending=True)
-                keep_data = keep_data.loc[:, merge_columns]
-                keep_data = keep_data.drop_duplicates(subset=combine_instances, keep='first')
-            else:
-                keep_data = keep_data.loc[:, merge_columns]
-                keep_data = keep_data.drop_duplicates(subset=combine_instances, keep='first')
-        else:
-            keep_data = None
+        columns_to_keep = [col for col in data.columns if col in columns_to_keep.intersection(columns_to_drop)]
     else:
-        keep_data = None
-
-    # drop all no longer required columns
-    aggregated_data = data.drop(columns=list(columns_to_drop))
+        columns_to_keep = []
+
+    codes, number_of_groups, keys = group_codes(data, combine_instances)
+    grouped = np.flatnonzero(codes >= 0)
+    codes = codes[grouped]
+    # rows with missing values in combine_instances are dropped (as by groupby)
+    complete = len(grouped) == len(data)
+
+    aggregated_data = pd.DataFrame({col: uniques.take(key_codes) for col, (key_codes, uniques)
+                                    in zip(combine_instances, keys)})
+
+    # sum of every item type (missing quantities count as zero)
+    for col in [col for col in data.columns if col in set(item_type_cols)]:
+        values = data[col] if complete else data[col].iloc[grouped]
+        sums = np.bincount(codes, weights=values.to_numpy(dtype=float, na_value=0.0), minlength=number_of_groups)
+        if pd.api.types.is_integer_dtype(values.dtype):
+            aggregated_data[col] = pd.Series(sums.round().astype(np.int64)).astype(values.dtype)
+        else:
+            aggregated_data[col] = sums
 
     if combination_count:
-        aggregated_data.loc[:, TERM_COMBINED_INSTANCES] = 1
+        aggregated_data[TERM_COMBINED_INSTANCES] = np.bincount(codes, minlength=number_of_groups)
     else:
         pass
 
-    aggregated_data = aggregated_data.groupby(combine_instances).sum().reset_index()
+    # values of the first instance of every combination (earliest instance, if data contains a time column)
+    if columns_to_keep:
+        if TERM_TIME in data.columns:
+            times = pd.to_datetime(data[TERM_TIME].iloc[grouped]).reset_index(drop=True)
+            order = times.sort_values(kind="stable").index.to_numpy()
+        else:
+            order = np.arange(len(grouped))
+        first_rows = np.zeros(number_of_groups, dtype=np.int64)
+        first_rows[codes[order][::-1]] = grouped[order][::-1]
 
-    # add the kept data back to the aggregated data
-    if keep_data is not None:
-        aggregated_data = aggregated_data.merge(keep_data, on=combine_instances, how='left')
+        for col in columns_to_keep:
+            if col == TERM_TIME:
+                aggregated_data[col] = pd.to_datetime(data[col]).iloc[first_rows].to_numpy()
+            else:
+                aggregated_data[col] = data[col].iloc[first_rows].to_numpy()
     else:
         pass
 
@@ -170,7 +210,11 @@ def combine_instances(data: pd.DataFrame, combine_instances: Iterable[str] = Non
         if entry_aggregation_col:
             aggregated_data[name_aggregation] = entry_aggregation_col
         else:
-            aggregated_data[name_aggregation] = aggregated_data[combine_instances].apply(lambda x: '-'.join(x.astype(str)), axis=1)
+            labels = None
+            for key_codes, uniques in keys:
+                values = pd.Series(uniques.astype(str)).take(key_codes).reset_index(drop=True)
+                labels = values if labels is None else labels.str.cat(values, sep="-")
+            aggregated_data[name_aggregation] = labels
     else:
         pass
 
@@ -0,0 +1,199 @@
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.itemLevelResampling import resample_item_levels, period_codes, period_starts, GRANULARITIES
+from qrpm.GLOBAL import TERM_COLLECTION, TERM_EVENT, TERM_TIME
+
+# number of resampled item levels (collection point, granularity and time window) kept with an index
+RESAMPLED_CACHE_ENTRIES = 32
+
+
+class ItemLevelIndex:
+    """
+    Index of the item levels of a quantity state (one row per event and collection point).
+    The rows of every collection point are kept in time order. For every pair of collection point and item type, the
+    rows are additionally sorted by item level on first use, so that all events with an item level in a range are
+    found by binary search (O(log n + k)) instead of scanning the table. Resampled item levels are created per
+    collection point, granularity, item level type and time window on first use; the most recently used ones are kept
+    with the index.
+    """
+
+    def __init__(self, ilvl: pd.DataFrame):
+        """
+        :param ilvl: item levels with columns for event, collection point, timestamp and one column per item type
+        """
+
+        self._ilvl = ilvl
+        self._lock = threading.Lock()
+        self._levels = dict()
+        self._resampled = OrderedDict()
+
+        self._event_codes, self._events = pd.factorize(np.asarray(ilvl[TERM_EVENT]))
+        cp_codes, collection_points = pd.factorize(np.asarray(ilvl[TERM_COLLECTION]))
+        self._collection_points = pd.Index(collection_points)
+        self._times = pd.DatetimeIndex(pd.to_datetime(ilvl[TERM_TIME]))
+
+        # rows per collection point in time order
+        self._cp_order = np.lexsort((self._times.asi8, cp_codes))
+        self._cp_pointers = np.zeros(len(self._collection_points) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cp_codes[cp_codes >= 0], minlength=len(self._collection_points)),
+                  out=self._cp_pointers[1:])
+        self._cp_order = self._cp_order[len(self._cp_order) - self._cp_pointers[-1]:]
+
+    @property
+    def nbytes(self) -> int:
+        arrays = [self._event_codes, self._cp_order, self._cp_pointers, self._times.asi8]
+        arrays += [array for entry in self._levels.values() for array in entry]
+        resampled = sum(frame.memory_usage(index=True).sum() for frame in self._resampled.values())
+        return int(sum(array.nbytes for array in arrays) + self._ilvl.memory_usage(index=True).sum() + resampled)
+
+    @property
+    def collection_points(self) -> list[str]:
+        return list(self._collection_points)
+
+    def rows_of_collection_point(self, collection_point: str) -> np.ndarray:
+        """Rows of the item level table belonging to the collection point in time order."""
+
+        code = self._collection_points.get_indexer([collection_point])[0]
+
+        if code < 0:
+            return np.array([], dtype=np.int64)
+        else:
+            return self._cp_order[self._cp_pointers[code]:self._cp_pointers[code + 1]]
+
+    def rows_in_period(self, collection_point: str, start: pd.Timestamp | None = None,
+                       end: pd.Timestamp | None = None) -> np.ndarray:
+        """Rows of the item level table belonging to the collection point with a timestamp within [start, end] (no
+        bound if None) in time order."""
+
+        rows, first, last = self._period_bounds(collection_point, start, end)
+
+        return rows[first:max(first, last)]
+
+    def _period_bounds(self, collection_point: str, start: pd.Timestamp | None = None,
+                       end: pd.Timestamp | None = None) -> (np.ndarray, int, int):
+        """Rows of the collection point in time order and the positions of the first row within [start, end] and
+        after the last one."""
+
+        rows = self.rows_of_collection_point(collection_point)
+        times = self._times[rows]
+
+        first = 0 if start is None else times.searchsorted(self._timestamp(start), side="left")
+        last = len(rows) if end is None else times.searchsorted(self._timestamp(end), side="right")
+
+        return rows, first, last
+
+    def _timestamp(self, time) -> pd.Timestamp:
+        """Timestamp comparable to the timestamps of the index (naive timestamps are in the time zone of the index)."""
+
+        time = pd.Timestamp(time)
+
+        if self._times.tz is None:
+            return time.tz_localize(None) if time.tz is not None else time
+        else:
+            return time.tz_localize(self._times.tz) if time.tz is None else time
+
+    def resampled_item_levels(self, collection_point: str, granularity: str, post_event: bool = False,
+                              start: pd.Timestamp | None = None, end: pd.Timestamp | None = None) -> pd.DataFrame:
+        """
+        Item levels of all item types at a collection point resampled to the granularity (see resample_item_levels),
+        created on first use. With a time window, only the rows within the periods covering the window and the
+        adjacent rows (holding the item levels at the bounds of the window) are resampled.
+        :param start: start of the time window (wall clock time, no bound if None)
+        :param end: end of the time window (wall clock time, no bound if None)
+        :return: one row per period and item type with minimum, maximum, last and time-weighted mean item level (the
+        periods at the bounds of a time window are complete, periods outside of it may be incomplete)
+        """
+
+        # windows are extended to complete periods, so that zooming within a period reuses the resampled item levels
+        width = GRANULARITIES[granularity][0]
+        start = None if start is None else pd.Timestamp(period_starts(period_codes(
+            np.int64(pd.Timestamp(start).tz_localize(None).value), granularity), granularity))
+        end = None if end is None else pd.Timestamp(period_starts(period_codes(
+            np.int64(pd.Timestamp(end).tz_localize(None).value), granularity), granularity) + width - 1)
+        key = (collection_point, granularity, post_event, start, end)
+
+        with self._lock:
+            if key in self._resampled:
+                self._resampled.move_to_end(key)
+                return self._resampled[key]
+            else:
+                pass
+
+        rows, first, last = self._period_bounds(collection_point, start, end)
+        resampled = resample_item_levels(self._ilvl.iloc[rows[max(first - 1, 0):last + 1]], granularity=granularity,
+                                         post_event=post_event)
+
+        with self._lock:
+            self._resampled[key] = resampled
+            while len(self._resampled) > RESAMPLED_CACHE_ENTRIES:
+                self._resampled.popitem(last=False)
+
+        return resampled
+
+    def sorted_item_levels(self, collection_point: str, item_type: str) -> (np.ndarray, np.ndarray):
+        """
+        Item levels of an item type at a collection point sorted by level (missing levels last), created on first use.
+        :return: sorted item levels, rows of the item level table in the same order
+        """
+
+        key = (collection_point, item_type)
+
+        with self._lock:
+            if key in self._levels:
+                return self._levels[key]
+            else:
+                pass
+
+        rows = self.rows_of_collection_point(collection_point)
+        if item_type in self._ilvl.columns:
+            levels = self._ilvl[item_type].to_numpy(dtype=float, na_value=np.nan)[rows]
+        else:
+            levels = np.full(len(rows), np.nan)
+
+        order = np.argsort(levels, kind="stable")
+        entry = (levels[order], rows[order])
+
+        with self._lock:
+            self._levels[key] = entry
+
+        return entry
+
+    def rows_in_range(self, collection_point: str, item_type: str, minimum: float | None = None,
+                      maximum: float | None = None) -> np.ndarray:
+        """Rows of the item level table where the item level of the item type at the collection point is within
+        [minimum, maximum] (no bound if None)."""
+
+        if minimum is None and maximum is None:
+            return self.rows_of_collection_point(collection_point)
+        else:
+            pass
+
+        levels, rows = self.sorted_item_levels(collection_point, item_type)
+        valid = len(levels) - np.count_nonzero(np.isnan(levels))
+
+        start = 0 if minimum is None else np.searchsorted(levels[:valid], minimum, side="left")
+        end = valid if maximum is None else np.searchsorted(levels[:valid], maximum, side="right")
+
+        return rows[start:max(start, end)]
+
+    def events_in_range(self, collection_point: str, item_types: Iterable[str] | str, minimum: float | None = None,
+                        maximum: float | None = None) -> np.ndarray:
+        """All events where the item level of any of the item types at the collection point is within [minimum,
+        maximum] (no bound if None)."""
+
+        if isinstance(item_types, str):
+            item_types = [item_types]
+        elif item_types is None:
+            item_types = []
+        else:
+            pass
+
+        rows = [self.rows_in_range(collection_point, item_type, minimum, maximum) for item_type in item_types]
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+
+        return self._events[np.unique(self._event_codes[rows])]
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.downsampling import MAX_CHART_POINTS
+from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries
+from qrpm.analysis.stockOutAnalysis import item_level_blocks
+from qrpm.GLOBAL import TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES, TERM_HOURLY, TERM_DAILY, TERM_WEEKLY, \
+    TERM_MINIMUM, TERM_MAXIMUM, TERM_LAST, TERM_TIME_WEIGHTED_MEAN
+
+# granularities from fine to coarse: width of a period (ns) and start of the first period (ns since epoch)
+HOUR_NS = 3600 * 10 ** 9
+DAY_NS = 24 * HOUR_NS
+GRANULARITIES = {TERM_HOURLY: (HOUR_NS, 0),
+                 TERM_DAILY: (DAY_NS, 0),
+                 TERM_WEEKLY: (7 * DAY_NS, 4 * DAY_NS)}  # 1970-01-05 is a Monday
+RESAMPLING_AGGREGATIONS = [TERM_MINIMUM, TERM_MAXIMUM, TERM_LAST, TERM_TIME_WEIGHTED_MEAN]
+
+
+def period_codes(times: np.ndarray, granularity: str) -> np.ndarray:
+    """Number of the period (of the granularity) every timestamp (ns) falls into."""
+
+    if granularity in GRANULARITIES:
+        width, origin = GRANULARITIES[granularity]
+    else:
+        raise ValueError(f"Granularity must be one of {list(GRANULARITIES)}.")
+
+    return np.floor_divide(times - origin, width)
+
+def period_starts(codes: np.ndarray, granularity: str) -> np.ndarray:
+    """Start (ns) of the periods with the given numbers."""
+
+    width, origin = GRANULARITIES[granularity]
+    return codes * width + origin
+
+def select_granularity(start: int, end: int, number_of_series: int = 1, max_points: int = MAX_CHART_POINTS) -> str:
+    """
+    Finest granularity for which a chart of the period between start and end (ns) stays within the maximum number of
+    points (the coarsest granularity if none does).
+    :param start: start of the displayed period (ns)
+    :param end: end of the displayed period (ns)
+    :param number_of_series: number of lines in the chart
+    :param max_points: maximum number of points in the chart
+    :return: granularity
+    """
+
+    for granularity in GRANULARITIES:
+        number_of_periods = int(period_codes(np.int64(end), granularity) - period_codes(np.int64(start), granularity)) + 1
+        if number_of_periods * max(number_of_series, 1) <= max_points:
+            return granularity
+        else:
+            pass
+
+    return list(GRANULARITIES)[-1]
+
+def resample_block(times: np.ndarray, levels: np.ndarray, granularity: str, post_event: bool = False) -> (np.ndarray, dict):
+    """
+    Resample the item level step function of a collection point to periods of the granularity.
+    Pre-event item levels hold from the preceding row until the event, post-event item levels from the event until the
+    succeeding row. Every period is described by the minimum, maximum and time-weighted mean of the item levels held
+    within the period and the item level held at its end.
+    :param times: timestamps (ns) in time order
+    :param levels: item levels (rows x item types) in time order
+    :param granularity: granularity of the periods
+    :param post_event: whether the item levels are post-event item levels
+    :return: start (ns) of every period, per aggregation a periods x item types matrix
+    """
+
+    if post_event:
+        starts, ends = times, np.append(times[1:], times[-1:])
+    else:
+        starts, ends = np.insert(times[:-1], 0, times[:1]), times
+
+    # every row holds in all periods from the start until the end (exclusive) of its interval
+    first = period_codes(starts, granularity)
+    last = np.maximum(first, period_codes(np.maximum(ends - 1, starts), granularity))
+
+    counts = last - first + 1
+    rows = np.repeat(np.arange(len(times)), counts)
+    offsets = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    codes = first[rows] + offsets
+
+    period_bounds = np.flatnonzero(np.concatenate([[True], codes[1:] != codes[:-1]]))
+    period_ends = np.append(period_bounds[1:], len(codes)) - 1
+    codes = codes[period_bounds]
+
+    # time each row holds within each period
+    width, origin = GRANULARITIES[granularity]
+    pair_starts = first[rows] * width + origin + offsets * width
+    overlap = np.clip(np.minimum(ends[rows], pair_starts + width) - np.maximum(starts[rows], pair_starts), 0, None)
+    overlap = overlap.astype(float)
+
+    # item types x rows, so that every item type is reduced over contiguous memory
+    pair_levels = np.ascontiguousarray(levels.T)[:, rows]
+    observed = ~np.isnan(pair_levels)
+    weights = np.add.reduceat(overlap * observed, period_bounds, axis=1)
+    last_levels = pair_levels[:, period_ends]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.add.reduceat(overlap * np.where(observed, pair_levels, 0.0), period_bounds, axis=1) / weights
+    mean = np.where(weights > 0, mean, last_levels)
+
+    with np.errstate(invalid="ignore"):
+        aggregations = {TERM_MINIMUM: np.fmin.reduceat(pair_levels, period_bounds, axis=1).T,
+                        TERM_MAXIMUM: np.fmax.reduceat(pair_levels, period_bounds, axis=1).T,
+                        TERM_LAST: last_levels.T,
+                        TERM_TIME_WEIGHTED_MEAN: mean.T}
+
+    return period_starts(codes, granularity), aggregations
+
+def resample_item_levels(ilvl: pd.DataFrame, granularity: str, item_types: list[str] = None,
+                         post_event: bool = False) -> pd.DataFrame:
+    """
+    Resample the item levels of all collection points to periods of the granularity (hours and days start at
+    midnight, weeks on Mondays, in the time zone of the timestamps), see resample_block.
+    :param ilvl: item levels (one row per event and collection point)
+    :param granularity: TERM_HOURLY, TERM_DAILY or TERM_WEEKLY
+    :param item_types: item types to be resampled, all item types of the table if None
+    :param post_event: whether the item levels are post-event item levels
+    :return: one row per collection point, period (start as TERM_TIME) and item type with minimum, maximum, last and
+    time-weighted mean item level
+    """
+
+    if granularity in GRANULARITIES:
+        pass
+    else:
+        raise ValueError(f"Granularity must be one of {list(GRANULARITIES)}.")
+
+    if item_types is None:
+        non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+        item_types = sorted(item_types)
+    else:
+        pass
+
+    # periods are aligned to the wall clock of the timestamps
+    times = pd.DatetimeIndex(pd.to_datetime(ilvl[TERM_TIME]))
+    timezone = times.tz
+    if timezone is not None:
+        ilvl = ilvl.assign(**{TERM_TIME: times.tz_localize(None)})
+    else:
+        pass
+
+    resampled = []
+    for cp, rows, block_times, levels in item_level_blocks(ilvl, item_types):
+        starts, aggregations = resample_block(block_times, levels, granularity, post_event=post_event)
+        block = pd.DataFrame({TERM_COLLECTION: cp,
+                              TERM_TIME: np.repeat(starts, len(item_types)).astype("datetime64[ns]"),
+                              TERM_ITEM_TYPES: np.tile(item_types, len(starts))})
+        for aggregation in RESAMPLING_AGGREGATIONS:
+            block[aggregation] = aggregations[aggregation].ravel()
+        resampled.append(block)
+
+    if resampled:
+        resampled = pd.concat(resampled, ignore_index=True)
+    else:
+        return pd.DataFrame(columns=[TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES] + RESAMPLING_AGGREGATIONS)
+
+    if timezone is not None:
+        resampled[TERM_TIME] = pd.DatetimeIndex(resampled[TERM_TIME]).tz_localize(timezone, ambiguous="NaT",
+                                                                                  nonexistent="shift_forward")
+    else:
+        pass
+
+    return resampled
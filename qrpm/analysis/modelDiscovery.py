@@ -1,13 +1,31 @@
+import threading
+from collections import OrderedDict
+
 import pandas as pd
 import pm4py
+from pm4py.algo.discovery.inductive import algorithm as inductive_miner
+from pm4py.objects.conversion.process_tree import converter as process_tree_converter
+from pm4py.objects.dfg.obj import DFG
 
 from qrpm.analysis.counterOperations import get_active_instances
-from qrpm.analysis.pm4py_interface.interface_pm4py import create_ocel_from_qel, transform_ocpn_to_qnet, \
-    create_ocel_from_data_tables
+from qrpm.analysis.pm4py_interface.interface_pm4py import create_ocel_from_qel, transform_ocpn_to_qnet
 from qrpm.analysis.generalDataOperations import remove_empty_columns, split_instance_and_variable_entries
+from qrpm.analysis.directlyFollows import directly_follows_graphs, control_flow_fingerprint, trace_variants, \
+    variants_fingerprint, DFG_DOUBLE_ARCS, DFG_EDGES, DFG_START_ACTIVITIES, DFG_END_ACTIVITIES
 from qel_simulation import QuantityEventLog, QuantityNet
 from qrpm.GLOBAL import TERM_COLLECTION, TERM_ACTIVITY
 
+# variant of the inductive miner mining the Petri net of every object type: "im" mines the trace variants of the
+# objects of the type (as pm4py.discover_oc_petri_net by default), "imd" mines their directly-follows graph
+INDUCTIVE_MINER_VARIANT = "im"
+# parameters of the inductive miner in the object-centric Petri net discovery of pm4py
+INDUCTIVE_MINER_PARAMETERS = {"disable_fallthroughs": True, "disable_strict_sequence_cut": True}
+# number of Petri nets of object types kept for object types with the same trace variants (directly-follows graph)
+PETRI_NET_CACHE_ENTRIES = 64
+
+_petri_net_cache = OrderedDict()
+_petri_net_cache_lock = threading.Lock()
+
 
 def mine_basic_qnet_from_qel(qel: QuantityEventLog) -> QuantityNet:
     """Transforms passed QEL to OCEL, mines OCPN using pm4py, transforms OCPN to QNet and adds collections and quantity
@@ -39,17 +57,82 @@ def mine_basic_qnet_from_qel(qel: QuantityEventLog) -> QuantityNet:
 
     return qnet
 
-def mine_basic_qnet_from_qel_data_tables(events: pd.DataFrame, objects: pd.DataFrame, e2o: pd.DataFrame, qop: pd.DataFrame = None) -> QuantityNet:
-    """Transforms passed QEL to OCEL, mines OCPN using pm4py, transforms OCPN to QNet and adds collections and quantity
-    relations."""
+def mine_petri_net_of_variants(variants: list[tuple]) -> tuple:
+    """Petri net (with initial and final marking) of trace variants mined by the inductive miner. The inductive miner
+    does not take the frequencies of traces into account, so a log of one case per variant results in the net of the
+    complete log."""
+
+    log = pd.DataFrame([(str(case), activity, pd.Timestamp(position, unit="s"))
+                        for case, trace in enumerate(variants) for position, activity in enumerate(trace)],
+                       columns=["case:concept:name", "concept:name", "time:timestamp"])
+    process_tree = inductive_miner.apply(log, variant=inductive_miner.Variants.IM,
+                                         parameters=INDUCTIVE_MINER_PARAMETERS)
+
+    return process_tree_converter.apply(process_tree)
+
+def mine_petri_net_of_dfg(dfg: dict) -> tuple:
+    """Petri net (with initial and final marking) of a directly-follows graph (see directly_follows_graphs) mined by
+    the directly-follows based inductive miner."""
+
+    process_tree = inductive_miner.apply(DFG(graph=dfg[DFG_EDGES], start_activities=dfg[DFG_START_ACTIVITIES],
+                                             end_activities=dfg[DFG_END_ACTIVITIES]),
+                                         variant=inductive_miner.Variants.IMd, parameters=INDUCTIVE_MINER_PARAMETERS)
+
+    return process_tree_converter.apply(process_tree)
+
+def cached_petri_net(key: str, mine) -> tuple:
+    """Get the cached Petri net of the key or mine and cache it (least recently used nets are dropped first)."""
+
+    with _petri_net_cache_lock:
+        petri_net = _petri_net_cache.get(key)
+        if petri_net is not None:
+            _petri_net_cache.move_to_end(key)
+            return petri_net
+        else:
+            pass
+
+    petri_net = mine()
+
+    with _petri_net_cache_lock:
+        _petri_net_cache[key] = petri_net
+        while len(_petri_net_cache) > PETRI_NET_CACHE_ENTRIES:
+            _petri_net_cache.popitem(last=False)
+
+    return petri_net
+
+def discover_ocpn_from_data_tables(events: pd.DataFrame, objects: pd.DataFrame, e2o: pd.DataFrame,
+                                   inductive_miner_variant: str = INDUCTIVE_MINER_VARIANT) -> dict:
+    """
+    Object-centric Petri net of the data tables, discovered without converting them to a pm4py OCEL: the traces,
+    directly-follows graphs and variable arcs of all object types are computed on the integer-coded relations and the
+    Petri net of every object type is mined from its trace variants ("im") or its directly-follows graph ("imd"). The
+    nets are cached by the trace variants (directly-follows graph) they are mined from, as the miner discovers the same
+    net for them, so that object types whose control flow is not changed by a filter reuse the net discovered before.
+    :param inductive_miner_variant: variant of the inductive miner (see INDUCTIVE_MINER_VARIANT)
+    :return: ocpn with the Petri nets per object type and the variable arcs per object type and activity (in the
+    format of pm4py, see transform_ocpn_to_qnet)
+    """
+
+    dfgs = directly_follows_graphs(events=events, e2o=e2o, objects=objects)
+
+    if inductive_miner_variant == "im":
+        variants = trace_variants(events=events, e2o=e2o, objects=objects)
+        petri_nets = {object_type: cached_petri_net(f"im-{variants_fingerprint({object_type: traces})}",
+                                                    lambda traces=traces: mine_petri_net_of_variants(traces))
+                      for object_type, traces in variants.items()}
+    elif inductive_miner_variant == "imd":
+        petri_nets = {object_type: cached_petri_net(f"imd-{control_flow_fingerprint({object_type: dfg})}",
+                                                    lambda dfg=dfg: mine_petri_net_of_dfg(dfg))
+                      for object_type, dfg in dfgs.items()}
+    else:
+        raise ValueError("Inductive miner variant must be im or imd.")
 
-    # get ocpn using pm4py
-    ocel = create_ocel_from_data_tables(events=events, objects=objects, e2o=e2o)
+    return {"petri_nets": petri_nets,
+            "double_arcs_on_activity": {object_type: dfg[DFG_DOUBLE_ARCS] for object_type, dfg in dfgs.items()}}
 
-    ocpn = pm4py.discover_oc_petri_net(ocel)
-
-    # create qnet from ocpn
-    qnet = transform_ocpn_to_qnet(ocpn)
+def add_quantity_relations(qnet: QuantityNet, qop: pd.DataFrame = None) -> QuantityNet:
+    """Add the collection points of the quantity operations with their item types and the quantity arcs of all
+    activities operating on them to a quantity net."""
 
     if qop is None or len(qop) == 0:
         return qnet
@@ -73,3 +156,14 @@ def mine_basic_qnet_from_qel_data_tables(events: pd.DataFrame, objects: pd.DataF
         qnet.create_and_add_qarc(qcon[0], qcon[1])
 
     return qnet
+
+def mine_basic_qnet_from_qel_data_tables(events: pd.DataFrame, objects: pd.DataFrame, e2o: pd.DataFrame, qop: pd.DataFrame = None) -> QuantityNet:
+    """Mines the OCPN of the data tables from the directly-follows graphs of the object types, transforms it to a QNet
+    and adds collections and quantity relations."""
+
+    ocpn = discover_ocpn_from_data_tables(events=events, objects=objects, e2o=e2o)
+
+    # create qnet from ocpn
+    qnet = transform_ocpn_to_qnet(ocpn)
+
+    return add_quantity_relations(qnet, qop)
@@ -1,18 +1,94 @@
-from qrpm.analysis.generalDataOperations import combine_instances
-from qrpm.GLOBAL import TERM_OBJECT, TERM_ACTIVITY, TERM_COLLECTION, TERM_EVENT, TERM_OBJECT_TYPE, TERM_ALL
+from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries
+from qrpm.analysis.parallelProcessing import get_executor, share_arrays, attach_arrays, release_arrays
+from qrpm.GLOBAL import TERM_OBJECT, TERM_ACTIVITY, TERM_COLLECTION, TERM_EVENT, TERM_OBJECT_TYPE, TERM_ALL, \
+    TERM_COMBINED_INSTANCES
+import numpy as np
 import pandas as pd
 from typing import Iterable
 
+# maximal number of event-object-quantity operation combinations aggregated at once
+DEFAULT_CHUNK_SIZE = 2000000
 
-def determine_object_quantity(qop: pd.DataFrame, e2o: pd.DataFrame, object_types: Iterable[str]=None) -> pd.DataFrame:
+
+def object_chunks(objects: np.ndarray, fan_out: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list[np.ndarray]:
+    """
+    Partition event to object relations (sorted by object) into chunks of complete objects with at most chunk_size
+    combinations of relations and quantity operations (objects exceeding the size form a chunk on their own).
+    :param objects: object code of every relation (sorted)
+    :param fan_out: number of quantity operations of the event of every relation
+    :param chunk_size: maximal number of combinations per chunk
+    :return: per chunk the bounds (start, end) of its relations
+    """
+
+    object_bounds = np.concatenate([[0], np.flatnonzero(np.diff(objects)) + 1, [len(objects)]])
+    combinations = np.concatenate([[0], np.cumsum(fan_out)])[object_bounds]
+
+    bounds = [0]
+    while bounds[-1] < len(object_bounds) - 1:
+        end = np.searchsorted(combinations, combinations[bounds[-1]] + chunk_size, side="right") - 1
+        bounds.append(max(end, bounds[-1] + 1))
+
+    return [object_bounds[[start, end]] for start, end in zip(bounds[:-1], bounds[1:])]
+
+def aggregate_object_chunk(arrays: dict[str, np.ndarray], relation_objects: np.ndarray,
+                           relation_events: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Aggregate the quantity operations of the events of a chunk of objects per object, collection point and activity.
+    The combinations of relations and quantity operations are only created as row numbers, the quantity operations are
+    summed item type by item type.
+    :param arrays: quantity operations (item types x rows) "quantities", collection point "cps" and activity
+    "activities" codes of the rows, rows sorted by event "rows" and their bounds per event code "pointers"
+    :param relation_objects: object code of every relation of the chunk
+    :param relation_events: event code of every relation of the chunk
+    :return: key of every combination of object, collection point and activity, number of combined quantity
+    operations, aggregated quantity operations (combinations x item types)
+    """
+
+    pointers, rows = arrays["pointers"], arrays["rows"]
+    starts, ends = pointers[relation_events], pointers[relation_events + 1]
+    counts = ends - starts
+
+    # row numbers of the quantity operations of the event of every relation
+    relation = np.repeat(np.arange(len(starts)), counts)
+    qop_rows = rows[starts[relation] + np.arange(len(relation)) - np.repeat(np.cumsum(counts) - counts, counts)]
+
+    number_cps, number_activities = int(arrays["shape"][0]), int(arrays["shape"][1])
+    keys = (relation_objects[relation].astype(np.int64) * number_cps + arrays["cps"][qop_rows]) * number_activities \
+           + arrays["activities"][qop_rows]
+    keys, groups = np.unique(keys, return_inverse=True)
+    groups = groups.ravel()
+
+    quantities = arrays["quantities"]
+    sums = np.empty((len(keys), len(quantities)))
+    for i, item_type_quantities in enumerate(quantities):
+        sums[:, i] = np.bincount(groups, weights=item_type_quantities[qop_rows], minlength=len(keys))
+
+    return keys, np.bincount(groups, minlength=len(keys)), sums
+
+def aggregate_object_chunk_worker(specification: dict[str, tuple], relation_objects: np.ndarray,
+                                  relation_events: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+    """Aggregate a chunk of objects with the quantity operations in shared memory (see aggregate_object_chunk)."""
+
+    memories, arrays = attach_arrays(specification)
+    try:
+        return aggregate_object_chunk(arrays, relation_objects, relation_events)
+    finally:
+        del arrays
+        release_arrays(memories)
+
+def determine_object_quantity(qop: pd.DataFrame, e2o: pd.DataFrame, object_types: Iterable[str]=None,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = None) -> pd.DataFrame:
     """
     For every object of the specified object types: Get the overall quantity operations/item movements for all events of the same activity involving the same object.
+    The event to object relations are processed in chunks of objects, so that the combinations of relations and
+    quantity operations are never materialised as a table. Chunks can be aggregated by a pool of processes.
     :param qop: Quantity operations
     :param e2o: Event to object relations
     :param object_types: Object types
-    :param aggregation_type: Aggregation type
+    :param chunk_size: maximal number of combinations of relations and quantity operations aggregated at once
+    :param workers: number of processes the chunks are distributed to (serial if None or 1)
     :return: Quantity table with object-activity combinations as instances, describing the overall quantity operation/item Movement.
-    Contains a column naming the first event id of the passed combination.
+    Contains a column with the number of combined quantity operations.
     """
 
     if object_types is None:
@@ -29,19 +105,118 @@ def determine_object_quantity(qop: pd.DataFrame, e2o: pd.DataFrame, object_types
             raise ValueError("Object types must be a set.")
         e2o_filtered = e2o.loc[e2o[TERM_OBJECT_TYPE].isin(object_types), :]
 
-    events = list(e2o_filtered[TERM_EVENT].unique())
+    non_item_types, item_types = split_instance_and_variable_entries(set(qop.columns))
+    item_types = [col for col in qop.columns if col in set(item_types)]
+    combination = [TERM_OBJECT, TERM_ACTIVITY, TERM_COLLECTION]
+
+    # common event codes of quantity operations and relations
+    event_codes, events = pd.factorize(pd.concat([pd.Series(np.asarray(qop[TERM_EVENT], dtype=object)),
+                                                  pd.Series(np.asarray(e2o_filtered[TERM_EVENT], dtype=object))],
+                                                 ignore_index=True))
+    qop_events, relation_events = event_codes[:len(qop)], event_codes[len(qop):]
+    cp_codes, cps = pd.factorize(qop[TERM_COLLECTION])
+    activity_codes, activities = pd.factorize(qop[TERM_ACTIVITY])
+    object_codes, objects = pd.factorize(e2o_filtered[TERM_OBJECT])
 
-    qop_filtered = qop.loc[qop[TERM_EVENT].isin(events), :]
+    # quantity operations of every event (missing events, collection points and activities are coded -1 and, as in a
+    # grouping, not aggregated)
+    valid = np.flatnonzero((qop_events >= 0) & (cp_codes >= 0) & (activity_codes >= 0))
+    rows = valid[np.argsort(qop_events[valid], kind="stable")]
+    pointers = np.zeros(len(events) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(qop_events[valid], minlength=len(events)), out=pointers[1:])
 
-    # extend qop data by objects
-    qop_extended = qop_filtered.merge(e2o_filtered, on=TERM_EVENT, how="inner")
+    relations = np.flatnonzero((object_codes >= 0) & (relation_events >= 0))
+    relations = relations[np.argsort(object_codes[relations], kind="stable")]
+    relation_objects, relation_events = object_codes[relations], relation_events[relations]
+    fan_out = pointers[relation_events + 1] - pointers[relation_events]
 
-    qop_aggregated = combine_instances(data=qop_extended,
-                                       combine_instances=[TERM_OBJECT, TERM_COLLECTION, TERM_ACTIVITY],
-                                       combination_count=True)
+    arrays = {"quantities": np.nan_to_num(qop.reindex(columns=item_types).to_numpy(dtype=float, na_value=0.0).T.copy()),
+              "cps": cp_codes.astype(np.int64), "activities": activity_codes.astype(np.int64),
+              "rows": rows.astype(np.int64), "pointers": pointers,
+              "shape": np.array([max(len(cps), 1), max(len(activities), 1)], dtype=np.int64)}
+    chunks = object_chunks(relation_objects, fan_out, chunk_size=chunk_size) if len(relations) > 0 else []
+
+    if workers is not None and workers > 1 and len(chunks) > 1:
+        memories, specification = share_arrays(arrays)
+        try:
+            executor = get_executor(workers)
+            futures = [executor.submit(aggregate_object_chunk_worker, specification, relation_objects[start:end],
+                                       relation_events[start:end]) for start, end in chunks]
+            aggregates = [future.result() for future in futures]
+        finally:
+            release_arrays(memories, unlink=True)
+    else:
+        aggregates = [aggregate_object_chunk(arrays, relation_objects[start:end], relation_events[start:end])
+                      for start, end in chunks]
+
+    # chunks contain complete objects, so the partial aggregates only have to be concatenated
+    if aggregates:
+        keys = np.concatenate([chunk_keys for chunk_keys, chunk_counts, chunk_sums in aggregates])
+        counts = np.concatenate([chunk_counts for chunk_keys, chunk_counts, chunk_sums in aggregates])
+        sums = np.concatenate([chunk_sums for chunk_keys, chunk_counts, chunk_sums in aggregates])
+    else:
+        keys, counts, sums = np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.empty((0, len(item_types)))
+
+    number_cps, number_activities = arrays["shape"]
+    qop_aggregated = pd.DataFrame({TERM_OBJECT: objects.take(keys // (number_cps * number_activities)),
+                                   TERM_ACTIVITY: activities.take(keys % number_activities),
+                                   TERM_COLLECTION: cps.take(keys // number_activities % number_cps)})
+    sums = pd.DataFrame(sums, columns=item_types)
+    for item_type in item_types:
+        if pd.api.types.is_integer_dtype(qop[item_type]):
+            # keep the (nullable) integer dtype of the quantity operations
+            sums[item_type] = sums[item_type].astype(qop[item_type].dtype)
+        else:
+            pass
+    qop_aggregated = pd.concat([qop_aggregated, sums], axis=1)
+    qop_aggregated[TERM_COMBINED_INSTANCES] = counts.astype(np.int64)
+
+    qop_aggregated = qop_aggregated.sort_values(by=combination, kind="stable").reset_index(drop=True)
 
     return qop_aggregated
 
+def append_object_quantity(oqty: pd.DataFrame, qop_new: pd.DataFrame, e2o_new: pd.DataFrame,
+                           object_types: Iterable[str]=None) -> pd.DataFrame:
+    """
+    Update the object quantities by the quantity operations of newly appended events without recomputing the known events.
+    :param oqty: object quantities of the known events (as determined by determine_object_quantity)
+    :param qop_new: quantity operations of the appended events
+    :param e2o_new: event to object relations of the appended events
+    :param object_types: Object types
+    :return: object quantities of known and appended events
+    """
+
+    if qop_new is None or len(qop_new) == 0:
+        return oqty
+    else:
+        pass
+
+    oqty_new = determine_object_quantity(qop=qop_new, e2o=e2o_new, object_types=object_types)
+
+    if oqty is None or len(oqty) == 0:
+        return oqty_new
+    elif len(oqty_new) == 0:
+        return oqty
+    else:
+        pass
+
+    combination = [TERM_OBJECT, TERM_ACTIVITY, TERM_COLLECTION]
+
+    # only the object-activity combinations of the appended events have to be aggregated again
+    keys = pd.MultiIndex.from_frame(oqty[combination])
+    keys_new = pd.MultiIndex.from_frame(oqty_new[combination])
+    affected = keys.isin(keys_new)
+
+    oqty_updated = pd.concat([oqty.loc[affected, :], oqty_new], ignore_index=True)
+    oqty_updated = oqty_updated.groupby(combination, observed=True).sum().reset_index()
+
+    oqty = pd.concat([oqty.loc[~affected, :], oqty_updated], ignore_index=True)
+    non_item_types, item_types = split_instance_and_variable_entries(set(oqty.columns))
+    oqty[item_types] = oqty[item_types].fillna(0)
+    oqty = oqty.sort_values(by=combination).reset_index(drop=True)
+
+    return oqty
+
 # def filter_qop_data_for_oqty(qop, e2o, object_types=None, activity=None, active_item_types=None):
 #     if object_types is None:
 #         e2o_filtered = e2o
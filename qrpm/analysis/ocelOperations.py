@@ -46,7 +46,7 @@ def add_time_since_last_instance(data: pd.DataFrame, instance_identification: It
     unique_entries = unique_entries.drop_duplicates()
     unique_entries = unique_entries.sort_values(by=TERM_TIME, ascending=True)
 
-    unique_entries[TERM_TIME_SINCE_LAST_EXECUTION] = unique_entries.groupby(instance_identification)[TERM_TIME].diff()
+    unique_entries[TERM_TIME_SINCE_LAST_EXECUTION] = unique_entries.groupby(instance_identification, observed=True)[TERM_TIME].diff()
     extended_data = data.merge(unique_entries, on=instance_identification + [TERM_EVENT, TERM_TIME], how='left')
 
     return extended_data
@@ -56,6 +56,71 @@ def event_selection(event_data: pd.DataFrame, event_ids: Iterable) -> pd.DataFra
 
     return event_data.loc[event_data[TERM_EVENT].isin(event_ids), :]
 
+def period_start(start_time: datetime | date | str) -> datetime:
+    """Get the first point in time of a period start (passed as datetime or as string in format %Y-%m-%d-%H-%M-%S-%f or a
+    shorter variety of it)."""
+
+    if isinstance(start_time, datetime):
+        pass
+    elif isinstance(start_time, str):
+        if len(start_time) > 19:
+            start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M-%S-%f")
+        elif len(start_time) > 16:
+            start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M-%S")
+        elif len(start_time) > 10:
+            start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M")
+        elif len(start_time) > 7:
+            start_time = datetime.strptime(start_time, "%Y-%m-%d")
+            start_time = datetime.combine(start_time, datetime.min.time())
+        elif len(start_time) > 4:
+            start_time = datetime.strptime(start_time, "%Y-%m")
+            start_time = datetime.combine(start_time, datetime.min.time())
+        else:
+            start_time = datetime.strptime(start_time, "%Y")
+            start_time = datetime.combine(start_time, datetime.min.time())
+    elif isinstance(start_time, date):
+        start_time = datetime.combine(start_time, datetime.min.time())
+    else:
+        raise ValueError("Start time must be a datetime object or a string in format %Y-%m-%d-%H-%M-%S-%f (or shorter variety of format).")
+
+    return start_time
+
+def period_end(end_time: datetime | date | str) -> datetime:
+    """Get the last point in time of a period end (passed as datetime or as string in format %Y-%m-%d-%H-%M-%S-%f or a
+    shorter variety of it)."""
+
+    if isinstance(end_time, datetime):
+        pass
+    elif isinstance(end_time, str):
+        if len(end_time) > 19:
+            end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M-%S-%f")
+        elif len(end_time) > 16:
+            end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M-%S")
+        elif len(end_time) > 10:
+            end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M")
+        elif len(end_time) > 7:
+            end_time = datetime.strptime(end_time, "%Y-%m-%d")
+            end_time = datetime.combine(end_time, datetime.max.time())
+        elif len(end_time) > 4:
+            end_time = datetime.strptime(end_time, "%Y-%m")
+            if end_time.month in {1,3,5,7,8,10,12}:
+                end_time = end_time.replace(day=31)
+            elif end_time.month == 2:
+                end_time = end_time.replace(day=28)
+            else:
+                end_time = end_time.replace(day=30)
+            end_time = datetime.combine(end_time, datetime.max.time())
+        else:
+            end_time = datetime.strptime(end_time, "%Y")
+            end_time = end_time.replace(month=12, day=31)
+            end_time = datetime.combine(end_time, datetime.max.time())
+    elif isinstance(end_time, date):
+        end_time = datetime.combine(end_time, datetime.max.time())
+    else:
+        raise ValueError("End time must be a datetime object or a string.")
+
+    return end_time
+
 def filter_events_for_time(data:pd.DataFrame, start_time: datetime | str = None, end_time: datetime | str = None) -> pd.DataFrame:
     """only include instances during passed time period"""
 
@@ -67,61 +132,12 @@ def filter_events_for_time(data:pd.DataFrame, start_time: datetime | str = None,
     if start_time is None:
         start_time = data[TERM_TIME].min()
     else:
-        if isinstance(start_time, datetime):
-            pass
-        elif isinstance(start_time, str):
-            if len(start_time) > 19:
-                start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M-%S-%f")
-            elif len(start_time) > 16:
-                start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M-%S")
-            elif len(start_time) > 10:
-                start_time = datetime.strptime(start_time, "%Y-%m-%d-%H-%M")
-            elif len(start_time) > 7:
-                start_time = datetime.strptime(start_time, "%Y-%m-%d")
-                start_time = datetime.combine(start_time, datetime.min.time())
-            elif len(start_time) > 4:
-                start_time = datetime.strptime(start_time, "%Y-%m")
-                start_time = datetime.combine(start_time, datetime.min.time())
-            else:
-                start_time = datetime.strptime(start_time, "%Y")
-                start_time = datetime.combine(start_time, datetime.min.time())
-        elif isinstance(start_time, date):
-            start_time = datetime.combine(start_time, datetime.min.time())
-        else:
-            raise ValueError("Start time must be a datetime object or a string in format %Y-%m-%d-%H-%M-%S-%f (or shorter variety of format).")
+        start_time = period_start(start_time)
 
     if end_time is None:
         end_time = data[TERM_TIME].max()
     else:
-        if isinstance(end_time, datetime):
-            pass
-        elif isinstance(end_time, str):
-            if len(end_time) > 19:
-                end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M-%S-%f")
-            elif len(end_time) > 16:
-                end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M-%S")
-            elif len(end_time) > 10:
-                end_time = datetime.strptime(end_time, "%Y-%m-%d-%H-%M")
-            elif len(end_time) > 7:
-                end_time = datetime.strptime(end_time, "%Y-%m-%d")
-                end_time = datetime.combine(end_time, datetime.max.time())
-            elif len(end_time) > 4:
-                end_time = datetime.strptime(end_time, "%Y-%m")
-                if end_time.month in {1,3,5,7,8,10,12}:
-                    end_time = end_time.replace(day=31)
-                elif end_time.month == 2:
-                    end_time = end_time.replace(day=28)
-                else:
-                    end_time = end_time.replace(day=30)
-                end_time = datetime.combine(end_time, datetime.max.time())
-            else:
-                end_time = datetime.strptime(end_time, "%Y")
-                end_time = end_time.replace(month=12, day=31)
-                end_time = datetime.combine(end_time, datetime.max.time())
-        elif isinstance(end_time, date):
-            end_time = datetime.combine(end_time, datetime.max.time())
-        else:
-            raise ValueError("End time must be a datetime object or a string.")
+        end_time = period_end(end_time)
 
     filtered_data = data.loc[(data[TERM_TIME] >= start_time) & (data[TERM_TIME] <= end_time), :]
 
@@ -317,10 +333,10 @@ def event_object_type_count(e2o: pd.DataFrame) -> pd.DataFrame:
     e2o_simple = e2o.loc[:, [TERM_EVENT, TERM_OBJECT, TERM_OBJECT_TYPE]]
 
     # Count the number of objects for each event and object type
-    e2o_grouped = e2o_simple.groupby([TERM_EVENT, TERM_OBJECT_TYPE]).size().reset_index(name=TERM_OBJECT_TYPE_COUNT)
+    e2o_grouped = e2o_simple.groupby([TERM_EVENT, TERM_OBJECT_TYPE], observed=True).size().reset_index(name=TERM_OBJECT_TYPE_COUNT)
 
     # Change layout DF
-    e2o_obj_count = e2o_grouped.pivot_table(index=TERM_EVENT, columns=TERM_OBJECT_TYPE, values=TERM_OBJECT_TYPE_COUNT, aggfunc='sum')
+    e2o_obj_count = e2o_grouped.pivot_table(index=TERM_EVENT, columns=TERM_OBJECT_TYPE, values=TERM_OBJECT_TYPE_COUNT, aggfunc='sum', observed=True)
 
     e2o_obj_count = e2o_obj_count.fillna(0)
 
@@ -330,7 +346,7 @@ def event_object_type_count(e2o: pd.DataFrame) -> pd.DataFrame:
 
 def get_total_count_of_objects(e2o: pd.DataFrame) -> pd.DataFrame:
 
-    e2o_count = e2o.groupby(TERM_EVENT).size().reset_index(name=TERM_OBJECT_COUNT)
+    e2o_count = e2o.groupby(TERM_EVENT, observed=True).size().reset_index(name=TERM_OBJECT_COUNT)
 
     return e2o_count
 
@@ -355,7 +371,7 @@ def get_execution_number(e2o:pd.DataFrame, events: pd.DataFrame, object_type: st
     e2o_filtered = e2o_filtered.drop_duplicates(subset=[TERM_EVENT, TERM_OBJECT])
 
     # count number of objects
-    e2o_grouped = e2o_filtered.groupby([TERM_EVENT, TERM_ACTIVITY, TERM_TIME]).size().reset_index(
+    e2o_grouped = e2o_filtered.groupby([TERM_EVENT, TERM_ACTIVITY, TERM_TIME], observed=True).size().reset_index(
         name=TERM_OBJECT_TYPE_COUNT)
 
     # only 1 object of object type
@@ -368,7 +384,7 @@ def get_execution_number(e2o:pd.DataFrame, events: pd.DataFrame, object_type: st
     e2o_sorted_events = e2o_sorted_events.merge(e2o_filtered[[TERM_EVENT, TERM_OBJECT]], on=TERM_EVENT, how='left')
 
     # Calculate the cumulative count of events for each activity-object combination
-    e2o_sorted_events[TERM_EXECUTION_COUNT] = e2o_sorted_events.groupby([TERM_ACTIVITY, TERM_OBJECT]).cumcount() + 1
+    e2o_sorted_events[TERM_EXECUTION_COUNT] = e2o_sorted_events.groupby([TERM_ACTIVITY, TERM_OBJECT], observed=True).cumcount() + 1
 
     original_df = extended_e2o[[TERM_EVENT, TERM_ACTIVITY, TERM_TIME]].drop_duplicates()
 
@@ -442,7 +458,7 @@ def e2o_object_type_with_looped_activity_selection(e2o: pd.DataFrame, events: pd
     e2o_filtered = extended_e2o.loc[extended_e2o[TERM_OBJECT_TYPE] == object_type, :]
     e2o_filtered = e2o_filtered.loc[e2o_filtered[TERM_ACTIVITY] == activity, :]
 
-    relevant_objects_data = e2o_filtered.groupby([TERM_OBJECT, TERM_ACTIVITY]).size().reset_index(name=TERM_EXECUTION_COUNT)
+    relevant_objects_data = e2o_filtered.groupby([TERM_OBJECT, TERM_ACTIVITY], observed=True).size().reset_index(name=TERM_EXECUTION_COUNT)
     relevant_objects = relevant_objects_data.loc[relevant_objects_data[TERM_EXECUTION_COUNT] == restriction, TERM_OBJECT].unique()
 
     relevant_events = e2o.loc[e2o[TERM_OBJECT].isin(relevant_objects), TERM_EVENT].unique()
@@ -0,0 +1,76 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+_executors = dict()
+_executors_lock = threading.Lock()
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """Process pool with the number of workers, created on first use and shared by all calls."""
+
+    with _executors_lock:
+        if workers not in _executors:
+            _executors[workers] = ProcessPoolExecutor(max_workers=workers)
+        else:
+            pass
+
+        return _executors[workers]
+
+def partition_blocks(bounds: np.ndarray, workers: int) -> list[np.ndarray]:
+    """
+    Distribute consecutive blocks of rows (e.g., the rows of a collection point) to shards of about the same number of
+    rows. Blocks are never split.
+    :param bounds: bounds of the blocks (start of every block and end of the last block)
+    :param workers: number of shards
+    :return: per shard the (start, end) pairs of its blocks
+    """
+
+    blocks = np.column_stack([bounds[:-1], bounds[1:]])
+    targets = np.linspace(0, bounds[-1], workers + 1)[1:-1]
+    splits = np.searchsorted(bounds[1:-1], targets, side="right")
+
+    return [shard for shard in np.split(blocks, np.unique(splits)) if len(shard) > 0]
+
+def share_arrays(arrays: dict[str, np.ndarray]) -> (list[SharedMemory], dict[str, tuple]):
+    """
+    Copy arrays to shared memory, so that they can be passed to the processes of a pool without pickling them.
+    :param arrays: arrays by name
+    :return: shared memory blocks (to be released by the caller), description of the shared arrays by name
+    """
+
+    memories, specification = [], dict()
+    try:
+        for name, array in arrays.items():
+            memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+            memories.append(memory)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[...] = array
+            specification[name] = (memory.name, array.shape, array.dtype.str)
+    except BaseException:
+        release_arrays(memories, unlink=True)
+        raise
+
+    return memories, specification
+
+def attach_arrays(specification: dict[str, tuple]) -> (list[SharedMemory], dict[str, np.ndarray]):
+    """Attach to arrays in shared memory (see share_arrays); the arrays are valid until the memory is released."""
+
+    memories, arrays = [], dict()
+    for name, (memory_name, shape, dtype) in specification.items():
+        memory = SharedMemory(name=memory_name)
+        memories.append(memory)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+
+    return memories, arrays
+
+def release_arrays(memories: list[SharedMemory], unlink: bool = False):
+    """Close (and, by the creating process, unlink) shared memory blocks."""
+
+    for memory in memories:
+        memory.close()
+        if unlink:
+            memory.unlink()
+        else:
+            pass
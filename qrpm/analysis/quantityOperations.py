@@ -4,7 +4,8 @@ import pandas as pd
 
 from qrpm.analysis.counterOperations import get_active_instances, item_type_projection, cp_active_instances_any_cp, \
     cp_active_instances_all_cps, it_active_instances_all_item_types, it_active_instances_any_item_type, \
-    joint_counters, total_item_quantities, create_item_quantities, negative_item_quantities, positive_item_quantities
+    joint_counters, total_item_quantities, create_item_quantities, negative_item_quantities, positive_item_quantities, \
+    classify_instances, INSTANCE_ADDING, INSTANCE_REMOVING
 from qrpm.analysis.generalDataOperations import convert_numeric_columns, split_instance_and_variable_entries, combine_instances
 from qrpm.GLOBAL import TERM_EVENT, TERM_ADDING, TERM_REMOVING, TERM_DIRECTION, TERM_ADDING_REMOVING, TERM_INACTIVE
 
@@ -138,12 +139,17 @@ def get_direction_quantity_instances(qop: pd.DataFrame) -> pd.DataFrame:
 
     active_enhanced = qop.copy()
     active_enhanced[item_types] = active_enhanced[item_types].fillna(0)
-    active_enhanced[TERM_ADDING] = active_enhanced[item_types].apply(lambda row: any(val > 0 for val in row), axis=1)
-    active_enhanced[TERM_REMOVING] = active_enhanced[item_types].apply(lambda row: any(val < 0 for val in row), axis=1)
-    active_enhanced.loc[active_enhanced[TERM_ADDING] == True, TERM_DIRECTION] = TERM_ADDING
-    active_enhanced.loc[active_enhanced[TERM_REMOVING] == True, TERM_DIRECTION] = TERM_REMOVING
-    active_enhanced.loc[
-        (active_enhanced[TERM_ADDING] & active_enhanced[TERM_REMOVING]), TERM_DIRECTION] = TERM_ADDING_REMOVING
-    active_enhanced[TERM_DIRECTION] = active_enhanced[TERM_DIRECTION].replace(np.nan, TERM_INACTIVE)
+
+    classification = classify_instances(qop, item_types)
+    active_enhanced[TERM_ADDING] = (classification & INSTANCE_ADDING) > 0
+    active_enhanced[TERM_REMOVING] = (classification & INSTANCE_REMOVING) > 0
+    active_enhanced[TERM_DIRECTION] = classified_directions(classification)
 
     return active_enhanced
+
+def classified_directions(classification: np.ndarray) -> np.ndarray:
+    """Direction (adding, removing, both or inactive) of every instance of a classification."""
+
+    directions = np.array([TERM_INACTIVE, TERM_ADDING, TERM_REMOVING, TERM_ADDING_REMOVING], dtype=object)
+
+    return directions[classification & (INSTANCE_ADDING | INSTANCE_REMOVING)]
@@ -9,9 +9,16 @@ from qrpm.analysis.generalDataOperations import convert_numeric_columns, split_i
 from qrpm.analysis.counterOperations import total_item_quantities, joint_counters, \
     projection_generic_function, get_active_instances, cp_projection, item_type_projection, positive_item_quantities, \
     negative_item_quantities
+from qrpm.analysis.itemLevelIndex import ItemLevelIndex
+from qrpm.analysis.parallelProcessing import get_executor, partition_blocks, share_arrays, attach_arrays, release_arrays
+from qrpm.analysis.stockOutAnalysis import item_level_blocks, stock_out_counts
+from qrpm.analysis.timeWeightedStatistics import pooled_time_weighted_statistics, quantile_name
 from qel_simulation import QuantityEventLog
-from qrpm.GLOBAL import TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE, TERM_TIME, TERM_EVENT, TERM_ACTIVITY, TERM_INIT
+from qrpm.GLOBAL import TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE, TERM_TIME, TERM_EVENT, TERM_ACTIVITY, TERM_INIT, \
+    TERM_TIME_WEIGHTED_MEAN, TERM_STOCK_OUT_SHARE
 
+# minimal number of quantity operations for which the item levels are determined by a pool of processes
+MIN_PARALLEL_ROWS = 200000
 
 #############################################################
 ################ Determine QUANTITY STATE ###################
@@ -75,95 +82,253 @@ def determine_quantity_state_cp(qop: pd.DataFrame, cp: str, initial_item_level:
 
     return ilvl
 
-def determine_quantity_state_qel(qel: QuantityEventLog) -> pd.DataFrame:
+def item_level_worker(specification: dict[str, tuple], blocks: np.ndarray, initial_levels: np.ndarray):
+    """Determine the post- and pre-event item levels of a shard of collection points in shared memory."""
+
+    memories, arrays = attach_arrays(specification)
+    try:
+        changes, post_levels, pre_levels = arrays["changes"], arrays["post_levels"], arrays["pre_levels"]
+        for (start, end), initial in zip(blocks, initial_levels):
+            np.cumsum(changes[start:end], axis=0, out=post_levels[start:end])
+            post_levels[start:end] += initial
+            np.subtract(post_levels[start:end], changes[start:end], out=pre_levels[start:end])
+        del changes, post_levels, pre_levels, arrays
+    finally:
+        release_arrays(memories)
+
+def parallel_item_levels(changes: np.ndarray, bounds: np.ndarray, initial_levels: np.ndarray,
+                         workers: int) -> (np.ndarray, np.ndarray):
     """
-    Get the item level development for a quantity event log.
-    :param qel: quantity event log
-    :return: item level development
+    Pre- and post-event item levels of all collection points, computed by a pool of processes. The quantity operations
+    are passed to the processes in shared memory instead of being pickled and every process writes the item levels of
+    a shard of collection points to shared result matrices.
+    :param changes: quantity operations (rows x item types) ordered by collection point and time
+    :param bounds: bounds of the rows of the collection points (start of every collection point and end of the last)
+    :param initial_levels: initial item levels (collection points x item types) in the order of the collection points
+    :param workers: number of processes
+    :return: pre-event item levels, post-event item levels (rows x item types)
     """
 
-    item_levels = pd.DataFrame()
-
-    qop = qel.get_quantity_operations()
+    changes = np.ascontiguousarray(changes, dtype=np.float64)
+    initial_levels = np.asarray(initial_levels, dtype=np.float64)
+
+    memories, specification = share_arrays({"changes": changes, "post_levels": np.empty_like(changes),
+                                            "pre_levels": np.empty_like(changes)})
+    try:
+        executor = get_executor(workers)
+        futures = []
+        for shard in partition_blocks(bounds, workers):
+            block_numbers = np.searchsorted(bounds, shard[:, 0])
+            futures.append(executor.submit(item_level_worker, specification, shard, initial_levels[block_numbers]))
+        for future in futures:
+            future.result()
+
+        memories_results, arrays = attach_arrays({name: specification[name] for name in ["pre_levels", "post_levels"]})
+        pre_levels, post_levels = arrays["pre_levels"].copy(), arrays["post_levels"].copy()
+        del arrays
+        release_arrays(memories_results)
+    finally:
+        release_arrays(memories, unlink=True)
+
+    return pre_levels, post_levels
+
+def determine_quantity_states(qop: pd.DataFrame, initial_item_level: dict[str: dict],
+                              workers: int = None) -> (pd.DataFrame, pd.DataFrame):
+    """
+    Determine the pre- and post-event item levels of all collection points in a single pass.
+    The quantity operations are sorted once by collection point and time, the item levels are determined using a
+    grouped accumulated sum and the initial item levels are added as offsets per collection point.
+    :param qop: quantity operations of events (one row per event and collection point)
+    :param initial_item_level: initial item levels for each collection point (as dict)
+    :param workers: number of processes the collection points are distributed to (serial if None or 1, logs with
+    several collection points and at least MIN_PARALLEL_ROWS quantity operations only)
+    :return: pre-event item levels, post-event item levels (both sorted by time)
+    """
 
     if len(qop) == 0:
-        return item_levels
+        return pd.DataFrame(), pd.DataFrame()
     else:
         pass
 
-    for cp in qel.collection_points:
-        initial_item_level = qel.get_initial_item_level_cp(cp=cp)
-        ilvl = determine_quantity_state_cp(qop=qop,
-                                           cp=cp,
-                                           initial_item_level=initial_item_level,
-                                           post_event=False)
-        item_levels = pd.concat([item_levels, ilvl])
+    non_item_types, item_types = split_instance_and_variable_entries(set(qop.columns))
+
+    # keep column order of the quantity operations and add item types only known from the initial item levels
+    item_types = [col for col in qop.columns if col in set(item_types)]
+    initial_item_types = {item_type for cp_levels in initial_item_level.values() for item_type in cp_levels}
+    item_types = item_types + sorted(initial_item_types.difference(item_types).difference(non_item_types))
+    id_columns = [col for col in [TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION, TERM_TIME] if col in non_item_types]
+    id_columns = id_columns + [col for col in qop.columns if col in set(non_item_types).difference(id_columns)]
+
+    # sort once by collection point and time
+    timestamps = pd.to_datetime(qop[TERM_TIME])
+    cp_codes, cps = pd.factorize(qop[TERM_COLLECTION])
+    order = np.lexsort((timestamps.to_numpy(), cp_codes))
+    cp_codes = cp_codes[order]
+
+    changes = qop.reindex(columns=item_types).to_numpy(dtype=float, na_value=0.0)[order]
+    changes = np.nan_to_num(changes, nan=0.0)
+
+    # initial item levels as offsets per collection point
+    initial_levels = pd.DataFrame([dict(Counter(initial_item_level.get(cp, {}))) for cp in cps], columns=item_types)
+    initial_levels = initial_levels.to_numpy(dtype=float, na_value=0.0)
+    initial_levels = np.nan_to_num(initial_levels, nan=0.0)
+
+    # apply accumulated sum per collection point so that item levels are determined
+    cp_bounds = np.concatenate([[0], np.flatnonzero(np.diff(cp_codes)) + 1, [len(cp_codes)]])
+    if workers is not None and workers > 1 and len(cp_bounds) > 2 and len(changes) >= MIN_PARALLEL_ROWS:
+        pre_levels, post_levels = parallel_item_levels(changes, cp_bounds, initial_levels[cp_codes[cp_bounds[:-1]]],
+                                                       workers=workers)
+    else:
+        post_levels = pd.DataFrame(changes).groupby(cp_codes, sort=False).cumsum().to_numpy()
+        post_levels = post_levels + initial_levels[cp_codes]
+        pre_levels = post_levels - changes
 
-    # sort according to timestamps
-    item_levels[TERM_TIME] = pd.to_datetime(item_levels[TERM_TIME])
-    item_levels = item_levels.sort_values(by=TERM_TIME, ascending=True)
+    instances = qop[id_columns].iloc[order].reset_index(drop=True)
+    instances[TERM_TIME] = timestamps.iloc[order].to_numpy()
 
-    item_levels = item_levels.reset_index(drop=True)
+    item_levels = []
+    for levels in [pre_levels, post_levels]:
+        ilvl = pd.concat([instances, pd.DataFrame(levels, columns=item_types)], axis=1)
 
-    return item_levels
+        # sort according to timestamps
+        ilvl = ilvl.sort_values(by=TERM_TIME, ascending=True, kind="stable")
+        ilvl = ilvl.reset_index(drop=True)
+        item_levels.append(ilvl)
 
-def determine_quantity_state_qop(qop: pd.DataFrame, initial_item_level: dict[str: dict]) -> pd.DataFrame:
+    return item_levels[0], item_levels[1]
+
+def determine_quantity_state_qel(qel: QuantityEventLog, post_event: bool = False) -> pd.DataFrame:
+    """
+    Get the item level development for a quantity event log.
+    :param qel: quantity event log
+    :param post_event: boolean telling if pre- or post-event item levels should be returned.
+    :return: item level development
+    """
+
+    qop = qel.get_quantity_operations()
+    initial_item_level = {cp: qel.get_initial_item_level_cp(cp=cp) for cp in qel.collection_points}
+
+    return determine_quantity_state_qop(qop=qop, initial_item_level=initial_item_level, post_event=post_event)
+
+def determine_quantity_state_qop(qop: pd.DataFrame, initial_item_level: dict[str: dict], post_event: bool = False,
+                                 workers: int = None) -> pd.DataFrame:
     """
     Get the item level development for a quantity event log.
     :param qop: quantity operations of events
     :param initial_item_level: initial item levels for each collection point (as dict)
+    :param post_event: boolean telling if pre- or post-event item levels should be returned.
+    :param workers: number of processes the collection points are distributed to (serial if None)
     :return: item level development
     """
 
-    item_levels = pd.DataFrame()
+    pre_event_ilvl, post_event_ilvl = determine_quantity_states(qop=qop, initial_item_level=initial_item_level,
+                                                                workers=workers)
 
-    if len(qop) == 0:
-        return item_levels
+    if post_event:
+        return post_event_ilvl
+    else:
+        return pre_event_ilvl
+
+def determine_final_item_levels(ilvl: pd.DataFrame, qop: pd.DataFrame, initial_item_level: dict[str: dict]) -> dict[str: dict]:
+    """
+    Determine the item levels of all collection points after the last event, using only the last pre-event item level
+    and the last quantity operation of every collection point.
+    :param ilvl: pre-event item levels (as determined by determine_quantity_state_qop)
+    :param qop: quantity operations the item levels were determined for
+    :param initial_item_level: initial item levels for each collection point (as dict), used for collection points
+    without any events
+    :return: final item levels for each collection point (as dict)
+    """
+
+    final_item_levels = {cp: dict(levels) for cp, levels in initial_item_level.items()}
+
+    if ilvl is None or len(ilvl) == 0:
+        return final_item_levels
     else:
         pass
 
-    for cp in qop[TERM_COLLECTION].unique():
-        initial_item_level_cp = Counter(initial_item_level[cp])
-        ilvl = determine_quantity_state_cp(qop=qop,
-                                           cp=cp,
-                                           initial_item_level=initial_item_level_cp,
-                                           post_event=False)
-        item_levels = pd.concat([item_levels, ilvl])
+    non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
 
-    # sort according to timestamps
-    item_levels[TERM_TIME] = pd.to_datetime(item_levels[TERM_TIME])
-    item_levels = item_levels.sort_values(by=TERM_TIME, ascending=True)
+    # the item levels are sorted by time (stable), so the last entry of a collection point refers to its last event
+    last_ilvl = ilvl.drop_duplicates(subset=[TERM_COLLECTION], keep="last")
+    last_ilvl = last_ilvl.set_index([TERM_EVENT, TERM_COLLECTION])[item_types]
 
-    item_levels = item_levels.reset_index(drop=True)
+    last_qop = qop.set_index([TERM_EVENT, TERM_COLLECTION]).reindex(index=last_ilvl.index, columns=item_types)
+    last_qop = last_qop.astype(float).fillna(0)
 
-    return item_levels
+    final_levels = last_ilvl.astype(float).fillna(0) + last_qop
 
-#############################################################
-################### SUBLOG CREATION #########################
-#############################################################
+    for (event, cp), levels in final_levels.iterrows():
+        final_item_levels[cp] = {item_type: level for item_type, level in levels.items() if level != 0}
 
-def events_at_qstate(ilvl: pd.DataFrame, collection_point: str, item_types: Iterable[str], min: int | None, max: int | None):
-    """return all event ids where the item level is in the specified area."""
+    return final_item_levels
 
-    relevant_item_levels = ilvl.loc[ilvl[TERM_COLLECTION] == collection_point, :]
+def append_quantity_states(ilvl: pd.DataFrame, qop: pd.DataFrame, qop_new: pd.DataFrame,
+                           initial_item_level: dict[str: dict]) -> pd.DataFrame:
+    """
+    Extend the pre-event item levels by the item levels of newly appended quantity operations. The item levels of the new
+    events continue from the final item levels of the known events, the known events are not recomputed.
+    :param ilvl: pre-event item levels of the known events
+    :param qop: quantity operations of the known events
+    :param qop_new: quantity operations of the appended events (not earlier than the known events)
+    :param initial_item_level: initial item levels for each collection point (as dict)
+    :return: pre-event item levels of known and appended events
+    """
 
-    if min is not None:
-        if len(item_types) > 1:
-            relevant_item_levels = relevant_item_levels.loc[(relevant_item_levels[item_types] >= min), :]
-        else:
-            relevant_item_levels = relevant_item_levels.loc[(relevant_item_levels[item_types] >= min).any(axis=1), :]
+    if qop_new is None or len(qop_new) == 0:
+        return ilvl
+    elif ilvl is None or len(ilvl) == 0:
+        return determine_quantity_state_qop(qop=qop_new, initial_item_level=initial_item_level)
     else:
         pass
 
-    if max is not None:
-        if len(item_types) > 1:
-            relevant_item_levels = relevant_item_levels.loc[(relevant_item_levels[item_types] <= max), :]
-        else:
-            relevant_item_levels = relevant_item_levels.loc[(relevant_item_levels[item_types] <= max).any(axis=1), :]
+    new_timestamps = pd.to_datetime(qop_new[TERM_TIME])
+    last_timestamps = pd.to_datetime(ilvl[TERM_TIME]).groupby(ilvl[TERM_COLLECTION], observed=True).max()
+    earliest_new = new_timestamps.groupby(qop_new[TERM_COLLECTION], observed=True).min()
+    overlapping = earliest_new.index.intersection(last_timestamps.index)
+
+    if (earliest_new[overlapping] < last_timestamps[overlapping]).any():
+        raise ValueError("Appended quantity operations must not be earlier than the known events of the same collection point.")
+    else:
+        pass
+
+    final_item_levels = determine_final_item_levels(ilvl=ilvl, qop=qop, initial_item_level=initial_item_level)
+    ilvl_new = determine_quantity_state_qop(qop=qop_new, initial_item_level=final_item_levels)
+
+    ilvl = pd.concat([ilvl, ilvl_new], ignore_index=True)
+
+    # item types only known from one of the parts
+    non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+    ilvl[item_types] = ilvl[item_types].fillna(0)
+
+    ilvl = ilvl.sort_values(by=TERM_TIME, ascending=True, kind="stable")
+    ilvl = ilvl.reset_index(drop=True)
+
+    return ilvl
+
+#############################################################
+################### SUBLOG CREATION #########################
+#############################################################
+
+def events_at_qstate(ilvl: pd.DataFrame, collection_point: str, item_types: Iterable[str], min: int | None, max: int | None,
+                     index: ItemLevelIndex = None):
+    """
+    Return all event ids where the item level of any of the item types is in the specified area.
+    :param ilvl: item levels
+    :param collection_point: collection point of the item levels
+    :param item_types: item types of the item levels
+    :param min: lower bound of the item level (no bound if None)
+    :param max: upper bound of the item level (no bound if None)
+    :param index: index of the item levels, created if not passed
+    :return: event ids
+    """
+
+    if index is None:
+        index = ItemLevelIndex(ilvl)
     else:
         pass
 
-    return relevant_item_levels[TERM_EVENT].unique()
+    return index.events_in_range(collection_point=collection_point, item_types=item_types, minimum=min, maximum=max)
 
 ###########################################################################
 ######################## PREPARE Q-STATE ##################################
@@ -269,63 +434,63 @@ def transform_to_item_associations(ilvl: pd.DataFrame):
 
 
 ##### INFORMATION ######
-def get_descriptive_statistics_for_qstate(data: pd.DataFrame) -> pd.DataFrame | None:
+def get_descriptive_statistics_for_qstate(data: pd.DataFrame, durations: np.ndarray = None) -> pd.DataFrame | None:
     """
     Get descriptive statistics of values in selected columns
     :param data: data
+    :param durations: duration for which the item levels of every row hold (see row_durations), time-weighted
+    statistics are added if passed
     :return: descriptive statistics overview of the data
     """
 
-    stats = pd.DataFrame(columns=list(data[TERM_COLLECTION].unique()))
-
-    for cp in data[TERM_COLLECTION].unique():
+    non_item_types, item_types = split_instance_and_variable_entries(set(data.columns))
+    item_types = np.array([col for col in data.columns if col in set(item_types)], dtype=object)
 
-        df = data.loc[data[TERM_COLLECTION] == cp]
-        df = remove_empty_columns(df, keep_zeros=False)
-        non_item_types, item_types = split_instance_and_variable_entries(set(df.columns))
+    stats = pd.DataFrame(columns=list(data[TERM_COLLECTION].unique()))
 
-        # stock out periods
-        out_of_stock_counts = count_stock_out_periods(df)
+    # item levels of all item types per collection point in a single matrix
+    for cp, rows, times, levels in item_level_blocks(data, list(item_types)):
 
-        df = df.melt(id_vars=non_item_types, var_name=TERM_ITEM_TYPES, value_name=TERM_VALUE)
-        df = df.reset_index()
+        # remove item types without item levels
+        relevant = (levels != 0).any(axis=0) & (~np.isnan(levels)).any(axis=0)
+        levels = levels[:, relevant]
+        cp_item_types = item_types[relevant]
 
-        stats.loc["item types", cp] = len(item_types)
-        stats.loc["item balances", cp] = len(df)
+        stats.loc["item types", cp] = len(cp_item_types)
+        stats.loc["item balances", cp] = levels.size
 
         # counts of item balances
-        stats.loc["positive", cp] = len(df.loc[df[TERM_VALUE] > 0])
-        stats.loc["empty", cp] = len(df.loc[df[TERM_VALUE] == 0])
-        stats.loc["negative", cp] = len(df.loc[df[TERM_VALUE] < 0])
-        unavailable_item_types = list(df.loc[df[TERM_VALUE] <= 0, TERM_ITEM_TYPES].unique())
-        stats.loc["unav. types",  cp] = len(unavailable_item_types)
-        stats.loc["unav. periods", cp] = sum(out_of_stock_counts.values())
+        stats.loc["positive", cp] = np.count_nonzero(levels > 0)
+        stats.loc["empty", cp] = np.count_nonzero(levels == 0)
+        stats.loc["negative", cp] = np.count_nonzero(levels < 0)
+        stats.loc["unav. types",  cp] = np.count_nonzero((levels <= 0).any(axis=0))
+        stats.loc["unav. periods", cp] = stock_out_counts(levels).sum()
 
         # range
-        minimum = df[TERM_VALUE].min()
-        maximum = df[TERM_VALUE].max()
-        min_item_types = list(df.loc[df[TERM_VALUE] == minimum, TERM_ITEM_TYPES].unique())
-        max_item_types = list(df.loc[df[TERM_VALUE] == maximum, TERM_ITEM_TYPES].unique())
+        minimum = np.nanmin(levels) if levels.size > 0 else np.nan
+        maximum = np.nanmax(levels) if levels.size > 0 else np.nan
         stats.loc["min", cp] = minimum
-        stats.loc["min types", cp] = ", ".join(min_item_types)
+        stats.loc["min types", cp] = ", ".join(cp_item_types[(levels == minimum).any(axis=0)])
         stats.loc["max", cp] = maximum
-        stats.loc["max types", cp] = ", ".join(max_item_types)
+        stats.loc["max types", cp] = ", ".join(cp_item_types[(levels == maximum).any(axis=0)])
+
+        # time-weighted
+        if durations is None:
+            pass
+        else:
+            time_weighted = pooled_time_weighted_statistics(levels, durations[rows])
+            stats.loc["tw. mean", cp] = round(time_weighted[TERM_TIME_WEIGHTED_MEAN], 3)
+            stats.loc["tw. median", cp] = time_weighted[quantile_name(0.5)]
+            stats.loc["unav. time", cp] = round(time_weighted[TERM_STOCK_OUT_SHARE], 3)
 
     return stats
 
 def count_stock_out_periods(ilvl: pd.DataFrame) -> dict:
+    """Number of times every item type runs out of stock (item levels in the order of the table)."""
 
     non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
-    out_of_stock_counts = {}
-
-    for item_type in item_types:
-
-        out_of_stock = ilvl[item_type] <= 0
-
-        transitions = np.diff(out_of_stock.astype(int))
-
-        out_of_stock_count = np.sum(transitions == 1)
 
-        out_of_stock_counts[item_type] = out_of_stock_count
+    levels = ilvl[item_types].to_numpy(dtype=float, na_value=np.nan)
+    out_of_stock_counts = stock_out_counts(levels)
 
-    return out_of_stock_counts
+    return dict(zip(item_types, out_of_stock_counts))
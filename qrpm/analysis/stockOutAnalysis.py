@@ -0,0 +1,149 @@
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries
+from qrpm.GLOBAL import TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES, TERM_STOCK_OUTS, TERM_STOCK_OUT_DURATION, \
+    TERM_OBSERVED_DURATION, TERM_TIME_WEIGHTED_MEAN, TERM_FIRST_STOCK_OUT, TERM_LAST_STOCK_OUT
+
+
+#### ITEM LEVEL MATRICES ####
+def timestamps_ns(timestamps) -> np.ndarray:
+    """Timestamps as nanoseconds since epoch (int64, NaT as the smallest int64)."""
+    return pd.DatetimeIndex(pd.to_datetime(timestamps)).asi8
+
+def item_level_blocks(ilvl: pd.DataFrame, item_types: list[str] = None) -> Iterator[tuple]:
+    """
+    Item levels of every collection point as a 2-D matrix in time order. The item level table is sorted and converted
+    only once.
+    :param ilvl: item levels (one row per event and collection point)
+    :param item_types: item types (columns of the matrices), all item types of the table if None
+    :return: per collection point: collection point, positions of the rows in the table, timestamps (ns, sorted), item
+    levels (rows x item types)
+    """
+
+    if item_types is None:
+        non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+    else:
+        pass
+
+    cp_codes, cps = pd.factorize(np.asarray(ilvl[TERM_COLLECTION]))
+    times = timestamps_ns(ilvl[TERM_TIME])
+    order = np.lexsort((times, cp_codes))
+    order = order[cp_codes[order] >= 0]
+
+    levels = ilvl.reindex(columns=item_types).to_numpy(dtype=float, na_value=np.nan)[order]
+    times = times[order]
+    cp_codes = cp_codes[order]
+
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(cp_codes)) + 1, [len(cp_codes)]])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if end > start:
+            yield cps[cp_codes[start]], order[start:end], times[start:end], levels[start:end]
+        else:
+            pass
+
+def level_durations(times: np.ndarray, post_event: bool = False) -> np.ndarray:
+    """
+    Duration (ns) for which the item levels of time ordered rows hold. Pre-event item levels hold from the preceding
+    row until the event, post-event item levels from the event until the succeeding row.
+    :param times: timestamps (ns) in time order
+    :param post_event: whether the item levels are post-event item levels
+    :return: duration per row (float)
+    """
+
+    gaps = np.diff(times).astype(float)
+
+    if post_event:
+        return np.append(gaps, 0.0)
+    else:
+        return np.insert(gaps, 0, 0.0)
+
+def stock_out_entries(out_of_stock: np.ndarray) -> np.ndarray:
+    """Rows (of a rows x item types matrix) at which the item types run out of stock after being available."""
+
+    entries = np.zeros_like(out_of_stock)
+    entries[1:] = out_of_stock[1:] & ~out_of_stock[:-1]
+
+    return entries
+
+
+#### STOCK-OUT ANALYTICS ####
+def stock_out_counts(levels: np.ndarray, threshold: float = 0) -> np.ndarray:
+    """Number of times every item type (column) runs out of stock, i.e., drops to or below the threshold."""
+    return np.count_nonzero(stock_out_entries(levels <= threshold), axis=0)
+
+def block_stock_out_statistics(times: np.ndarray, levels: np.ndarray, threshold: float = 0,
+                               post_event: bool = False) -> dict[str, np.ndarray]:
+    """
+    Stock-out statistics of all item types of a collection point in a single pass over its item level matrix.
+    :param times: timestamps (ns) in time order
+    :param levels: item levels (rows x item types) in time order
+    :param threshold: item types are out of stock if their item level is at most the threshold
+    :param post_event: whether the item levels are post-event item levels
+    :return: per statistic one value per item type
+    """
+
+    durations = level_durations(times, post_event=post_event)
+    observed = ~np.isnan(levels)
+    out_of_stock = levels <= threshold
+    entries = stock_out_entries(out_of_stock)
+    has_entries = entries.any(axis=0)
+
+    observed_duration = durations @ observed
+    with np.errstate(invalid="ignore", divide="ignore"):
+        time_weighted_mean = (durations @ np.where(observed, levels, 0.0)) / observed_duration
+    time_weighted_mean[observed_duration == 0] = np.nan
+
+    # pre-event item levels describe the stock after the preceding row
+    start_times = times if post_event else np.concatenate([[times[0]], times[:-1]])
+    first_entry = np.argmax(entries, axis=0)
+    last_entry = len(entries) - 1 - np.argmax(entries[::-1], axis=0)
+    first_stock_out = np.where(has_entries, start_times[first_entry], np.iinfo(np.int64).min)
+    last_stock_out = np.where(has_entries, start_times[last_entry], np.iinfo(np.int64).min)
+
+    return {TERM_STOCK_OUTS: np.count_nonzero(entries, axis=0),
+            TERM_STOCK_OUT_DURATION: durations @ out_of_stock,
+            TERM_OBSERVED_DURATION: observed_duration,
+            TERM_TIME_WEIGHTED_MEAN: time_weighted_mean,
+            TERM_FIRST_STOCK_OUT: first_stock_out,
+            TERM_LAST_STOCK_OUT: last_stock_out}
+
+def stock_out_statistics(ilvl: pd.DataFrame, threshold: float = 0, post_event: bool = False) -> pd.DataFrame:
+    """
+    Stock-out statistics of all item types at all collection points: number of stock-outs, total stock-out duration,
+    observed duration, time-weighted mean item level and the times of the first and last stock-out. The item levels
+    are treated as step function over time (see level_durations).
+    :param ilvl: item levels (one row per event and collection point)
+    :param threshold: item types are out of stock if their item level is at most the threshold
+    :param post_event: whether the item levels are post-event item levels
+    :return: one row per collection point and item type
+    """
+
+    non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+    item_types = sorted(item_types)
+
+    statistics = []
+    for cp, rows, times, levels in item_level_blocks(ilvl, item_types):
+        block = pd.DataFrame(block_stock_out_statistics(times, levels, threshold=threshold, post_event=post_event))
+        block.insert(0, TERM_ITEM_TYPES, item_types)
+        block.insert(0, TERM_COLLECTION, cp)
+        statistics.append(block)
+
+    if statistics:
+        statistics = pd.concat(statistics, ignore_index=True)
+    else:
+        return pd.DataFrame(columns=[TERM_COLLECTION, TERM_ITEM_TYPES, TERM_STOCK_OUTS, TERM_STOCK_OUT_DURATION,
+                                     TERM_OBSERVED_DURATION, TERM_TIME_WEIGHTED_MEAN, TERM_FIRST_STOCK_OUT,
+                                     TERM_LAST_STOCK_OUT])
+
+    for column in [TERM_STOCK_OUT_DURATION, TERM_OBSERVED_DURATION]:
+        statistics[column] = pd.to_timedelta(statistics[column], unit="ns")
+    # the smallest int64 is NaT
+    timezone = getattr(ilvl[TERM_TIME].dtype, "tz", None)
+    for column in [TERM_FIRST_STOCK_OUT, TERM_LAST_STOCK_OUT]:
+        stock_out_times = pd.DatetimeIndex(statistics[column].to_numpy(dtype=np.int64).astype("datetime64[ns]"))
+        statistics[column] = stock_out_times if timezone is None else stock_out_times.tz_localize("UTC").tz_convert(timezone)
+
+    return statistics
@@ -0,0 +1,261 @@
+import math
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.categoricalEncoding import decode_categoricals
+
+# number of sort orders and filter masks kept per table
+TABLE_INDEX_CACHE_ENTRIES = 16
+
+# filter expressions of the dash DataTable ("{column} operator value", parts joined by "&&")
+FILTER_PART = re.compile(r"^\{(?P<column>.+?)\}\s*(?P<operator>[si]?(?:>=|<=|!=|=|<|>|eq|ne|lt|le|gt|ge|contains|"
+                         r"datestartswith|is blank))\s*(?P<value>.*)$")
+FILTER_OPERATORS = {">=": "ge", "<=": "le", "!=": "ne", "=": "eq", "<": "lt", ">": "gt"}
+
+
+def parse_filter_query(filter_query: str | None) -> list[tuple[str, str, str, bool]]:
+    """
+    Split a filter query of the dash DataTable into its parts. Parts that cannot be parsed are ignored (as by the
+    native filtering of the table).
+    :param filter_query: filter query, e.g., '{Activity} contains "pick" && {Item A} > 5'
+    :return: per part the column, operator, value (unquoted) and whether the comparison is case-sensitive
+    """
+
+    parts = []
+
+    if filter_query:
+        pass
+    else:
+        return parts
+
+    for part in filter_query.split(" && "):
+        match = FILTER_PART.match(part.strip())
+        if match is None:
+            continue
+        else:
+            pass
+
+        operator = match.group("operator")
+        case_sensitive = not operator.startswith("i") or operator == "is blank"
+        if operator[0] in "si" and operator[1:] in set(FILTER_OPERATORS).union(FILTER_OPERATORS.values(),
+                                                                                {"contains", "datestartswith"}):
+            operator = operator[1:]
+        else:
+            pass
+        operator = FILTER_OPERATORS.get(operator, operator)
+
+        value = match.group("value").strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"`":
+            value = value[1:-1].replace("\\" + value[0], value[0])
+        else:
+            pass
+
+        parts.append((match.group("column"), operator, value, case_sensitive))
+
+    return parts
+
+def filter_mask(column: pd.Series, operator: str, value: str, case_sensitive: bool = True) -> np.ndarray:
+    """
+    Rows of a column fulfilling a filter part (see parse_filter_query). Numeric and datetime columns are compared by
+    value, all other columns by their text. Missing values only fulfil "is blank".
+    :param column: column of the table
+    :param operator: eq, ne, lt, le, gt, ge, contains, datestartswith or is blank
+    :param value: value of the filter part
+    :param case_sensitive: whether text is compared case-sensitive
+    :return: boolean mask of the rows
+    """
+
+    if operator == "is blank":
+        return np.asarray(column.isna() | (column.astype(str) == ""))
+    else:
+        pass
+
+    text = column.astype(str)
+    if not case_sensitive:
+        text, value = text.str.lower(), value.lower()
+    else:
+        pass
+
+    if operator == "contains":
+        return np.asarray(text.str.contains(value, regex=False) & column.notna())
+    elif operator == "datestartswith":
+        return np.asarray(text.str.startswith(value) & column.notna())
+    else:
+        pass
+
+    comparisons = {"eq": np.equal, "ne": np.not_equal, "lt": np.less, "le": np.less_equal, "gt": np.greater,
+                   "ge": np.greater_equal}
+    if operator in comparisons:
+        compare = comparisons[operator]
+    else:
+        raise ValueError(f"Filter operator must be one of {list(comparisons) + ['contains', 'datestartswith', 'is blank']}.")
+
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        try:
+            number = float(value)
+        except ValueError:
+            return np.zeros(len(column), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            return np.asarray(compare(column.to_numpy(dtype=float, na_value=np.nan), number) & column.notna())
+    elif pd.api.types.is_datetime64_any_dtype(column):
+        try:
+            time = pd.Timestamp(value)
+        except ValueError:
+            return np.zeros(len(column), dtype=bool)
+        if column.dt.tz is not None and time.tz is None:
+            time = time.tz_localize(column.dt.tz)
+        else:
+            pass
+        return np.asarray(compare(column, time) & column.notna())
+    else:
+        return np.asarray(compare(text, value) & column.notna())
+
+
+class TableIndex:
+    """
+    Index of a table displayed in a dash DataTable with server-side paging, sorting and filtering.
+    Only the rows of the requested page are converted to records. The row order of every sort and the rows fulfilling
+    every filter part are determined on first use and kept with the index, so that paging through a sorted and
+    filtered table does not touch the complete table again.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        :param df: table to be displayed
+        """
+
+        self._df = df.reset_index(drop=True)
+        self._lock = threading.Lock()
+        self._orders = OrderedDict()
+        self._masks = OrderedDict()
+
+    @property
+    def nbytes(self) -> int:
+        arrays = list(self._orders.values()) + list(self._masks.values())
+        return int(sum(array.nbytes for array in arrays) + self._df.memory_usage(index=True).sum())
+
+    @property
+    def columns(self) -> list[dict]:
+        """Column definitions of the DataTable (the type enables value-based filtering in the table)."""
+
+        columns = []
+        for col in self._df.columns:
+            if pd.api.types.is_numeric_dtype(self._df[col]) and not pd.api.types.is_bool_dtype(self._df[col]):
+                columns.append({"name": col, "id": col, "type": "numeric"})
+            elif pd.api.types.is_datetime64_any_dtype(self._df[col]):
+                columns.append({"name": col, "id": col, "type": "datetime"})
+            else:
+                columns.append({"name": col, "id": col})
+        return columns
+
+    def __len__(self):
+        return len(self._df)
+
+    def order(self, sort_by: list[dict] | None = None) -> np.ndarray | None:
+        """
+        Row order of the table sorted as requested by the DataTable (None if unsorted).
+        :param sort_by: list of {"column_id": column, "direction": "asc" | "desc"}
+        :return: positions of the rows in sorted order
+        """
+
+        sort_by = [(sort["column_id"], sort["direction"]) for sort in (sort_by or [])
+                   if sort.get("column_id") in self._df.columns]
+
+        if sort_by:
+            key = tuple(sort_by)
+        else:
+            return None
+
+        with self._lock:
+            if key in self._orders:
+                self._orders.move_to_end(key)
+                return self._orders[key]
+            else:
+                pass
+
+        sorted_df = self._df.sort_values(by=[column for column, direction in sort_by],
+                                         ascending=[direction == "asc" for column, direction in sort_by],
+                                         kind="stable", na_position="last")
+        order = sorted_df.index.to_numpy(dtype=np.int64)
+
+        with self._lock:
+            self._orders[key] = order
+            self._limit(self._orders)
+
+        return order
+
+    def mask(self, filter_query: str | None = None) -> np.ndarray | None:
+        """Rows fulfilling all parts of the filter query of the DataTable (None if nothing is filtered)."""
+
+        parts = [part for part in parse_filter_query(filter_query) if part[0] in self._df.columns]
+
+        if parts:
+            pass
+        else:
+            return None
+
+        mask = np.ones(len(self._df), dtype=bool)
+        for part in parts:
+            with self._lock:
+                part_mask = self._masks.get(part)
+                if part_mask is not None:
+                    self._masks.move_to_end(part)
+                else:
+                    pass
+
+            if part_mask is None:
+                column, operator, value, case_sensitive = part
+                part_mask = filter_mask(self._df[column], operator, value, case_sensitive=case_sensitive)
+                with self._lock:
+                    self._masks[part] = part_mask
+                    self._limit(self._masks)
+            else:
+                pass
+
+            mask &= part_mask
+
+        return mask
+
+    def rows(self, sort_by: list[dict] | None = None, filter_query: str | None = None) -> np.ndarray:
+        """Positions of the rows remaining after filtering in sorted order."""
+
+        order = self.order(sort_by)
+        mask = self.mask(filter_query)
+
+        if order is None:
+            return np.arange(len(self._df)) if mask is None else np.flatnonzero(mask)
+        else:
+            return order if mask is None else order[mask[order]]
+
+    def page(self, page_current: int | None, page_size: int, sort_by: list[dict] | None = None,
+             filter_query: str | None = None) -> (list[dict], int):
+        """
+        Records of a page of the sorted and filtered table.
+        :param page_current: number of the page (starting at 0, the last page if it exceeds the number of pages)
+        :param page_size: number of rows per page
+        :param sort_by: sorting of the DataTable
+        :param filter_query: filter query of the DataTable
+        :return: records of the page, number of pages
+        """
+
+        if page_size is None or page_size < 1:
+            raise ValueError("Page size must be a positive number.")
+        else:
+            pass
+
+        rows = self.rows(sort_by=sort_by, filter_query=filter_query)
+        page_count = max(math.ceil(len(rows) / page_size), 1)
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+
+        page = decode_categoricals(self._df.iloc[rows[page_current * page_size:(page_current + 1) * page_size]])
+
+        return page.to_dict("records"), page_count
+
+    @staticmethod
+    def _limit(cache: OrderedDict):
+        while len(cache) > TABLE_INDEX_CACHE_ENTRIES:
+            cache.popitem(last=False)
@@ -0,0 +1,186 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries
+from qrpm.analysis.stockOutAnalysis import item_level_blocks, level_durations
+from qrpm.GLOBAL import TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE, TERM_OBSERVED_DURATION, TERM_TIME_WEIGHTED_MEAN, \
+    TERM_TIME_WEIGHTED_STD, TERM_STOCK_OUT_SHARE, TERM_DURATION, TERM_SHARE
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def quantile_name(quantile: float) -> str:
+    return f"{quantile:.0%}-Quantile"
+
+def row_durations(ilvl: pd.DataFrame, post_event: bool = False) -> np.ndarray:
+    """
+    Duration (ns) for which the item levels of every row of an item level table hold. The durations are determined
+    per collection point on the time ordered rows (see level_durations), so they can be determined on the complete
+    item levels before rows are selected.
+    :param ilvl: item levels (one row per event and collection point)
+    :param post_event: whether the item levels are post-event item levels
+    :return: duration per row in the order of the table
+    """
+
+    durations = np.zeros(len(ilvl), dtype=float)
+
+    for cp, rows, times, levels in item_level_blocks(ilvl, item_types=[]):
+        durations[rows] = level_durations(times, post_event=post_event)
+
+    return durations
+
+
+#### WEIGHTED STATISTICS ####
+def weighted_moments(values: np.ndarray, weights: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Weighted mean and standard deviation of every column (missing values are ignored).
+    :param values: values (rows x columns)
+    :param weights: weight per row
+    :return: total weight, weighted mean and weighted standard deviation per column
+    """
+
+    observed = ~np.isnan(values)
+    total = weights @ observed
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = (weights @ np.where(observed, values, 0.0)) / total
+        variance = (weights @ np.where(observed, values - mean, 0.0) ** 2) / total
+
+    mean[total == 0] = np.nan
+    variance[total == 0] = np.nan
+
+    return total, mean, np.sqrt(variance)
+
+def weighted_quantiles(values: np.ndarray, weights: np.ndarray, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> np.ndarray:
+    """
+    Weighted quantiles of every column (smallest value whose cumulative weight reaches the quantile, missing values are
+    ignored).
+    :param values: values (rows x columns)
+    :param weights: weight per row
+    :param quantiles: quantiles in [0, 1]
+    :return: quantiles x columns
+    """
+
+    quantiles = list(quantiles)
+    result = np.full((len(quantiles), values.shape[1]), np.nan)
+
+    if len(values) == 0:
+        return result
+    else:
+        pass
+
+    # sort every column as contiguous row of the transposed values, missing values are sorted last
+    columns = np.ascontiguousarray(values.T)
+    order = np.argsort(columns, axis=1)
+    sorted_values = np.take_along_axis(columns, order, axis=1)
+    cumulative = np.cumsum(np.where(np.isnan(sorted_values), 0.0, weights[order]), axis=1)
+    totals = cumulative[:, -1]
+
+    for i, quantile in enumerate(quantiles):
+        positions = np.minimum(np.count_nonzero(cumulative < (quantile * totals)[:, np.newaxis], axis=1),
+                               len(values) - 1)
+        result[i] = np.take_along_axis(sorted_values, positions[:, np.newaxis], axis=1)[:, 0]
+
+    result[:, totals == 0] = np.nan
+
+    return result
+
+
+#### TIME-WEIGHTED ITEM LEVEL STATISTICS ####
+def time_weighted_statistics(ilvl: pd.DataFrame, durations: np.ndarray = None,
+                             quantiles: Iterable[float] = DEFAULT_QUANTILES, threshold: float = 0,
+                             post_event: bool = False) -> pd.DataFrame:
+    """
+    Time-weighted statistics of the item levels of all item types at all collection points. Every item level is
+    weighted with the duration it holds, the step function is never expanded to a regular grid.
+    :param ilvl: item levels (one row per event and collection point)
+    :param durations: duration per row (determined from the table if None, see row_durations)
+    :param quantiles: time-weighted quantiles to be determined
+    :param threshold: item types are out of stock if their item level is at most the threshold
+    :param post_event: whether the item levels are post-event item levels
+    :return: one row per collection point and item type with observed duration, time-weighted mean, standard
+    deviation and quantiles and the share of time out of stock
+    """
+
+    quantiles = list(quantiles)
+    non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+    item_types = sorted(item_types)
+
+    statistics = []
+    for cp, rows, times, levels in item_level_blocks(ilvl, item_types):
+        weights = level_durations(times, post_event=post_event) if durations is None else durations[rows]
+
+        total, mean, std = weighted_moments(levels, weights)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stock_out_share = (weights @ (levels <= threshold)) / total
+
+        block = pd.DataFrame({TERM_COLLECTION: cp, TERM_ITEM_TYPES: item_types,
+                              TERM_OBSERVED_DURATION: pd.to_timedelta(total, unit="ns"),
+                              TERM_TIME_WEIGHTED_MEAN: mean, TERM_TIME_WEIGHTED_STD: std})
+        for quantile, values in zip(quantiles, weighted_quantiles(levels, weights, quantiles)):
+            block[quantile_name(quantile)] = values
+        block[TERM_STOCK_OUT_SHARE] = np.where(total > 0, stock_out_share, np.nan)
+        statistics.append(block)
+
+    if statistics:
+        return pd.concat(statistics, ignore_index=True)
+    else:
+        return pd.DataFrame(columns=[TERM_COLLECTION, TERM_ITEM_TYPES, TERM_OBSERVED_DURATION, TERM_TIME_WEIGHTED_MEAN,
+                                     TERM_TIME_WEIGHTED_STD] + [quantile_name(q) for q in quantiles] +
+                                    [TERM_STOCK_OUT_SHARE])
+
+def pooled_time_weighted_statistics(levels: np.ndarray, durations: np.ndarray, threshold: float = 0) -> dict:
+    """
+    Time-weighted mean, median and share of time out of stock of the item levels of all item types of a collection
+    point taken together.
+    :param levels: item levels (rows x item types)
+    :param durations: duration per row
+    :param threshold: item types are out of stock if their item level is at most the threshold
+    :return: statistics by name
+    """
+
+    pooled_levels = levels.reshape(-1, 1)
+    pooled_durations = np.repeat(durations, levels.shape[1])
+
+    total, mean, std = weighted_moments(pooled_levels, pooled_durations)
+    median = weighted_quantiles(pooled_levels, pooled_durations, [0.5])[0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stock_out_share = (pooled_durations @ (pooled_levels <= threshold)) / total
+
+    return {TERM_TIME_WEIGHTED_MEAN: mean[0], quantile_name(0.5): median[0],
+            TERM_STOCK_OUT_SHARE: stock_out_share[0] if total[0] > 0 else np.nan}
+
+def time_in_state(ilvl: pd.DataFrame, collection_point: str, item_type: str, bins: int | Iterable[float] = None,
+                  durations: np.ndarray = None, post_event: bool = False) -> pd.DataFrame:
+    """
+    Time an item type spends at its item levels at a collection point.
+    :param ilvl: item levels (one row per event and collection point)
+    :param collection_point: collection point
+    :param item_type: item type
+    :param bins: number of equal-width bins or bin edges (as for np.histogram, the last bin includes its upper edge),
+    one bin per item level if None
+    :param durations: duration per row (determined from the table if None, see row_durations)
+    :param post_event: whether the item levels are post-event item levels
+    :return: duration and share of time per item level (or interval of item levels)
+    """
+
+    durations = row_durations(ilvl, post_event=post_event) if durations is None else durations
+    rows = np.flatnonzero(np.asarray(ilvl[TERM_COLLECTION] == collection_point))
+
+    levels = ilvl[item_type].to_numpy(dtype=float, na_value=np.nan)[rows]
+    weights = durations[rows][~np.isnan(levels)]
+    levels = levels[~np.isnan(levels)]
+
+    if bins is None:
+        states, codes = np.unique(levels, return_inverse=True)
+        time = np.bincount(codes.ravel(), weights=weights, minlength=len(states))
+    else:
+        time, edges = np.histogram(levels, bins=bins, weights=weights)
+        states = pd.IntervalIndex.from_breaks(edges, closed="left")
+
+    total = time.sum()
+
+    return pd.DataFrame({TERM_VALUE: states, TERM_DURATION: pd.to_timedelta(time, unit="ns"),
+                         TERM_SHARE: time / total if total > 0 else np.full(len(time), np.nan)})
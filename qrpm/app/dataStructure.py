@@ -1,18 +1,39 @@
 import numpy as np
 
 from qrpm.analysis.quantityState import determine_quantity_state_qop
+import qrpm.analysis.quantityState as ilvvl
 import qrpm.analysis.objectQuantities as oqtyy
-from qrpm.app.data_operations.log_overview import get_log_overview
+from qrpm.app.data_operations.log_overview import get_log_overview, update_log_overview
 from qel_simulation import QuantityEventLog
 from qrpm.analysis.dataImport import load_qel_from_file
 from qrpm.analysis.generalDataOperations import convert_timestamp_columns_to_string, convert_numeric_columns
+from qrpm.app.session_store import SESSION_STORE, STORE_SESSION, DEFAULT_SESSION, is_handle
+from qrpm.app.session_manager import SESSION_MANAGER
+from qrpm.app.import_cache import IMPORT_CACHE, file_hash
+from qrpm.app.job_manager import report_progress
+from qrpm.analysis.categoricalEncoding import encode_log_tables
+from qrpm.analysis.eventObjectIndex import EventObjectIndex
+from qrpm.analysis.itemLevelIndex import ItemLevelIndex
+from qrpm.analysis.tableIndex import TableIndex
 from qrpm.GLOBAL import TERM_E2O, TERM_QUANTITY_OPERATIONS, TERM_EVENT_DATA, TERM_OBJECT_DATA, TOOL_STATE_QTY, TERM_TIME, \
-    STATE_DEMO, TERM_INITIAL_ILVL, TERM_ITEM_LEVELS, TERM_OBJECT_QTY, TERM_ALL
+    STATE_DEMO, TERM_INITIAL_ILVL, TERM_ITEM_LEVELS, TERM_OBJECT_QTY, TERM_ALL, TERM_EVENT, TERM_EVENT_OBJECT_INDEX, \
+    TERM_FILTER_PLAN, TERM_ITEM_LEVEL_INDEX, TERM_TABLE_INDEX
 
 import base64
+import os
+import uuid
 import pandas as pd
 import json
 
+# number of processes the quantity state of a log is determined with (serial if None)
+QUANTITY_STATE_WORKERS = None
+# number of processes the object quantities of a log are aggregated with (serial if None)
+OBJECT_QUANTITY_WORKERS = None
+
+# demo data shipped with the app (read only), files of a session are kept in its directory (see session_manager)
+DEMO_OVERVIEW_FILE = "files/overview_data.json"
+DEMO_LOG_FILE = "files/demo_data.sqlite"
+
 def serialise_dataframe(df: pd.DataFrame):
     """Converts a DataFrame to a dictionaries that can be serialized to JSON."""
 
@@ -38,7 +59,48 @@ def transform_dict_to_json(data_dict: dict|None):
     df_json = json.dumps(data_dict)
     return df_json
 
-def prepare_data_for_storage(data):
+def store_dataframe(df: pd.DataFrame, session_id: str = None, name: str = "frame", pinned: bool = False) -> dict | None:
+    """Keeps a DataFrame in the server-side session store and returns the handle referencing it (pinned for the data
+    frames of the full log referenced by the overview store, see SessionStore)."""
+
+    if df is None or len(df) == 0:
+        return None
+    else:
+        pass
+
+    df = convert_numeric_columns(df)
+    if TERM_TIME in df.columns:
+        df[TERM_TIME] = pd.to_datetime(df[TERM_TIME])
+    else:
+        pass
+
+    return SESSION_STORE.put(df, session_id=session_id, name=name, pinned=pinned)
+
+def get_session_id(data_json) -> str | None:
+    """Get the id of the session the data frames referenced in a dcc.Store belong to."""
+
+    if data_json is None:
+        return None
+    elif isinstance(data_json, str):
+        data = json.loads(data_json)
+    else:
+        data = data_json
+
+    if is_handle(data):
+        return data[STORE_SESSION]
+    elif isinstance(data, dict):
+        for value in data.values():
+            session_id = get_session_id(value) if isinstance(value, dict) else None
+            if session_id is not None:
+                return session_id
+            else:
+                pass
+    else:
+        pass
+
+    return None
+
+def prepare_data_for_storage(data, session_id: str = None):
     """Prepare data for upload."""
 
     if data is None:
@@ -47,23 +109,31 @@ def prepare_data_for_storage(data):
         pass
 
     if isinstance(data, pd.DataFrame):
-        data = serialise_dataframe(data)
+        data = store_dataframe(data, session_id=session_id)
     elif isinstance(data, dict):
+        index = data.pop(TERM_EVENT_OBJECT_INDEX, None)
         for key, value in data.items():
             if isinstance(value, pd.DataFrame):
-                data[key] = serialise_dataframe(value)
+                data[key] = store_dataframe(value, session_id=session_id, name=key)
             else:
                 pass
+        # the index of a sublog is kept with its e2o relations
+        if index is not None and is_handle(data.get(TERM_E2O)):
+            SESSION_STORE.attach(data[TERM_E2O], TERM_EVENT_OBJECT_INDEX, index, size=index.nbytes)
+        else:
+            pass
     else:
         pass
 
     return transform_dict_to_json(data)
 
 def deserialize_dataframe(df_dict: dict | None):
-    """Converts a dictionary to a DataFrame."""
+    """Converts a dictionary (handle of the session store or "tight" dictionary) to a DataFrame."""
 
     if df_dict is None:
         return None
+    elif is_handle(df_dict):
+        return SESSION_STORE.get(df_dict)
     else:
         pass
 
@@ -77,6 +147,14 @@ def deserialize_dataframe(df_dict: dict | None):
 
     return df
 
+def load_dataframe(data) -> pd.DataFrame | None:
+    """Pass a DataFrame or a handle of the session store and get the DataFrame."""
+
+    if isinstance(data, pd.DataFrame):
+        return data
+    else:
+        return deserialize_dataframe(data)
+
 def get_raw_data(overview_json):
     overview_dict = json.loads(overview_json)
 
@@ -110,6 +188,12 @@ def get_raw_data(overview_json):
 
     return overview_dict
 
+def get_raw_quantity_operations(overview_json):
+    """Get the quantity operations of the full log without loading the other DataFrames."""
+    overview_dict = json.loads(overview_json)
+
+    return deserialize_dataframe(overview_dict[TERM_QUANTITY_OPERATIONS])
+
 def get_raw_data_dataframes(overview_json):
     overview = get_raw_data(overview_json)
     events = overview[TERM_EVENT_DATA]
@@ -124,6 +208,12 @@ def get_raw_data_dataframes(overview_json):
 def get_ocel_data(ocel_json):
     ocel_dict = json.loads(ocel_json)
 
+    if TERM_FILTER_PLAN in ocel_dict:
+        events, e2o, objects, index = get_ocel_data_and_index(ocel_json)
+        return events, e2o, objects
+    else:
+        pass
+
     e2o_dict = ocel_dict[TERM_E2O]
     e2o = deserialize_dataframe(e2o_dict)
     event_dict = ocel_dict[TERM_EVENT_DATA]
@@ -133,21 +223,130 @@ def get_ocel_data(ocel_json):
 
     return events, e2o, objects
 
+def get_ocel_data_and_index(ocel_json):
+    """Get the events, e2o relations and objects of a (sub)log together with their event to object index. Sublogs
+    defined by a filter plan are executed (or taken from the results of the plan executions). An empty sublog has the
+    columns of the full log without any rows."""
+
+    # imported here as the filter plan executes the filters of sublog_creation, which depend on this module
+    import qrpm.app.data_operations.filter_plan as fplan
+
+    ocel_dict = json.loads(ocel_json)
+
+    if TERM_FILTER_PLAN in ocel_dict:
+        plan = ocel_dict[TERM_FILTER_PLAN]
+        ocel, qop = fplan.execute_plan(plan)
+        if ocel is None:
+            events, e2o, objects, index = events_e2o_objects_index_from_ocel_dict(load_ocel(plan[fplan.PLAN_BASE]))
+            empty = np.array([], dtype=np.int64)
+            return (events.iloc[empty], e2o.iloc[empty], objects.iloc[empty],
+                    index.subset(event_rows=empty, e2o_rows=empty, object_rows=empty))
+        else:
+            events, e2o, objects, index = events_e2o_objects_index_from_ocel_dict(ocel)
+        # the results of plan executions are shared
+        return events.copy(), e2o.copy(), objects.copy(), index
+    else:
+        return events_e2o_objects_index_from_ocel_dict(load_ocel(ocel_dict))
+
+def load_ocel(ocel_dict: dict) -> dict:
+    """Load the data frames of an ocel store. The event to object index is created once per log and kept in the
+    session store with the e2o relations."""
+
+    events = deserialize_dataframe(ocel_dict[TERM_EVENT_DATA])
+    e2o = deserialize_dataframe(ocel_dict[TERM_E2O])
+    objects = deserialize_dataframe(ocel_dict[TERM_OBJECT_DATA])
+
+    e2o_handle = ocel_dict[TERM_E2O]
+    index = SESSION_STORE.get_attachment(e2o_handle, TERM_EVENT_OBJECT_INDEX) if is_handle(e2o_handle) else None
+
+    if index is None:
+        index = EventObjectIndex.from_tables(events=events, e2o=e2o, objects=objects)
+        if is_handle(e2o_handle):
+            SESSION_STORE.attach(e2o_handle, TERM_EVENT_OBJECT_INDEX, index, size=index.nbytes)
+        else:
+            pass
+    else:
+        pass
+
+    return {TERM_EVENT_DATA: events, TERM_E2O: e2o, TERM_OBJECT_DATA: objects, TERM_EVENT_OBJECT_INDEX: index}
+
+def get_item_level_index(ilvl_data) -> ItemLevelIndex | None:
+    """Get the index of stored item levels. The index is created once per log and kept in the session store with the
+    item levels."""
+
+    if ilvl_data is None:
+        return None
+    else:
+        pass
+
+    index = SESSION_STORE.get_attachment(ilvl_data, TERM_ITEM_LEVEL_INDEX) if is_handle(ilvl_data) else None
+
+    if index is None:
+        index = ItemLevelIndex(deserialize_dataframe(ilvl_data))
+        if is_handle(ilvl_data):
+            SESSION_STORE.attach(ilvl_data, TERM_ITEM_LEVEL_INDEX, index, size=index.nbytes)
+        else:
+            pass
+    else:
+        pass
+
+    return index
+
+def get_table_index(df_json) -> TableIndex | None:
+    """Get the index for server-side paging, sorting and filtering of a stored data frame. The index is created once
+    per data frame and kept in the session store with the data frame."""
+
+    if df_json is None:
+        return None
+    else:
+        pass
+
+    df_dict = json.loads(df_json)
+    index = SESSION_STORE.get_attachment(df_dict, TERM_TABLE_INDEX) if is_handle(df_dict) else None
+
+    if index is None:
+        index = TableIndex(deserialize_dataframe(df_dict))
+        if is_handle(df_dict):
+            SESSION_STORE.attach(df_dict, TERM_TABLE_INDEX, index, size=index.nbytes)
+        else:
+            pass
+    else:
+        pass
+
+    return index
+
+def events_e2o_objects_index_from_ocel_dict(ocel):
+    """Get the data frames and the event to object index of an ocel dict (the index is created if it has none)."""
+
+    events, e2o, objects = events_e2o_objects_from_ocel_dict(ocel)
+
+    if ocel is None:
+        return None, None, None, None
+    elif ocel.get(TERM_EVENT_OBJECT_INDEX) is None:
+        return events, e2o, objects, EventObjectIndex.from_tables(events=events, e2o=e2o, objects=objects)
+    else:
+        return events, e2o, objects, ocel[TERM_EVENT_OBJECT_INDEX]
+
 def events_e2o_objects_from_ocel_dict(ocel):
     if ocel is None:
         return None, None, None
     else:
         return ocel[TERM_EVENT_DATA], ocel[TERM_E2O], ocel[TERM_OBJECT_DATA]
 
-def events_e2o_objects_to_ocel_dict(events, e2o, objects):
+def events_e2o_objects_to_ocel_dict(events, e2o, objects, index: EventObjectIndex = None):
     if len(events) > 0:
-        return {TERM_EVENT_DATA: events, TERM_E2O: e2o, TERM_OBJECT_DATA: objects}
+        ocel = {TERM_EVENT_DATA: events, TERM_E2O: e2o, TERM_OBJECT_DATA: objects}
+        if index is not None:
+            ocel[TERM_EVENT_OBJECT_INDEX] = index
+        else:
+            pass
+        return ocel
     else:
         return None
 
 def qop_ilvl_oqty_to_qty_dict(qop, ilvl, oqty):
 
-    if qop is not None and len(qop) > 0:
+    if qop is not None and (is_handle(qop) or len(qop) > 0):
         return {TERM_QUANTITY_OPERATIONS: qop, TERM_ITEM_LEVELS: ilvl, TERM_OBJECT_QTY: oqty}
     else:
         if ilvl is not None and oqty is not None:
@@ -155,9 +354,34 @@ def qop_ilvl_oqty_to_qty_dict(qop, ilvl, oqty):
         else:
             return None
 
+def get_qty_handles(qty_json):
+    """Get the handles of the quantity data without loading the DataFrames (e.g., to pass on unchanged data)."""
+    qty_dict = json.loads(qty_json)
+
+    return qty_dict[TERM_QUANTITY_OPERATIONS], qty_dict[TERM_ITEM_LEVELS], qty_dict[TERM_OBJECT_QTY]
+
+def get_raw_item_level_handle(overview_json):
+    """Get the handle of the item levels of the full log as json without loading the DataFrame."""
+    overview_dict = json.loads(overview_json)
+
+    return transform_dict_to_json(overview_dict[TERM_ITEM_LEVELS])
+
 def get_qty_data(qty_json):
+    # imported here as the filter plan executes the filters of sublog_creation, which depend on this module
+    import qrpm.app.data_operations.filter_plan as fplan
+
     qty_dict = json.loads(qty_json)
 
+    if TERM_FILTER_PLAN in qty_dict:
+        plan = qty_dict[TERM_FILTER_PLAN]
+        ocel, qop = fplan.execute_plan(plan)
+        # item levels and object quantities are not changed by the filters
+        ilvl = deserialize_dataframe(plan[fplan.PLAN_BASE][TERM_ITEM_LEVELS])
+        oqty = deserialize_dataframe(plan[fplan.PLAN_BASE][TERM_OBJECT_QTY])
+        return qop.copy() if qop is not None else None, ilvl, oqty
+    else:
+        pass
+
     qop_dict = qty_dict[TERM_QUANTITY_OPERATIONS]
     qop = deserialize_dataframe(qop_dict)
     ilvl_dict = qty_dict[TERM_ITEM_LEVELS]
@@ -168,15 +392,16 @@ def get_qty_data(qty_json):
     return qop, ilvl, oqty
 
 def reset_qel(overview_json):
-    events, objects, e2o, qop, ilvl, oqty = get_raw_data_dataframes(overview_json=overview_json)
+    """Get the ocel and quantity data of the full log (as handles, the stored DataFrames are not copied)."""
+    overview_dict = json.loads(overview_json)
 
-    ocel = events_e2o_objects_to_ocel_dict(e2o=e2o,
-                                           events=events,
-                                           objects=objects)
+    ocel = {TERM_EVENT_DATA: overview_dict[TERM_EVENT_DATA],
+            TERM_E2O: overview_dict[TERM_E2O],
+            TERM_OBJECT_DATA: overview_dict[TERM_OBJECT_DATA]} if overview_dict[TERM_EVENT_DATA] is not None else None
 
-    qty = qop_ilvl_oqty_to_qty_dict(qop=qop,
-                                    ilvl=ilvl,
-                                    oqty=oqty)
+    qty = qop_ilvl_oqty_to_qty_dict(qop=overview_dict[TERM_QUANTITY_OPERATIONS],
+                                    ilvl=overview_dict.get(TERM_ITEM_LEVELS),
+                                    oqty=overview_dict.get(TERM_OBJECT_QTY))
 
     return ocel, qty
 
@@ -186,45 +411,108 @@ def get_single_dataframe(df_json):
 
     return deserialize_dataframe(df_dict)
 
-def store_single_dataframe(df: pd.DataFrame):
+def store_single_dataframe(df: pd.DataFrame, session_id: str = None):
     if df is None:
         return None
-    return json.dumps(serialise_dataframe(df))
+    return json.dumps(store_dataframe(df, session_id=session_id))
 
 
 #### one time functions ####
-def parse_demo_data() -> (QuantityEventLog, dict):
+def parse_demo_data(progress=None) -> (QuantityEventLog, dict):
     """Parse demo data and return a QuantityEventLog object."""
 
-    with open('files/overview_data.json') as f:
+    report_progress(progress, 0.1, "Loading demo data")
+
+    if os.path.isfile(DEMO_OVERVIEW_FILE):
+        pass
+    else:
+        # without a prepared overview, the demo log is imported like an upload
+        with open(DEMO_LOG_FILE, 'rb') as file:
+            return import_log(file.read(), progress=progress, demo_state=True)
+
+    with open(DEMO_OVERVIEW_FILE) as f:
         overview_data = json.load(f)
 
+    session_id = SESSION_STORE.create_session()
+    frames = {key: deserialize_dataframe(overview_data.get(key)) for key in [TERM_E2O, TERM_QUANTITY_OPERATIONS,
+                                                                             TERM_EVENT_DATA, TERM_OBJECT_DATA,
+                                                                             TERM_ITEM_LEVELS, TERM_OBJECT_QTY]}
+    for key, df in encode_log_tables(frames).items():
+        overview_data[key] = store_dataframe(df, session_id=session_id, name=key, pinned=True)
+
     qty_state = True
     demo_state = True
     state_store = create_initial_state_store(qty_state=qty_state, demo_state=demo_state)
 
     return transform_dict_to_json(overview_data), transform_dict_to_json(state_store)
 
-def parse_upload(contents, **kwargs) -> QuantityEventLog:
+def decode_upload(contents) -> bytes:
+    """Decode the contents of an uploaded file."""
+
+    content_type, content_string = contents.split(',')
+    return base64.b64decode(content_string)
+
+def parse_upload(contents, session_id: str = None, **kwargs) -> QuantityEventLog:
     """Parse uploaded file, write sqlite and read it into a QuantityEventLog object."""
 
     # Decode the uploaded file
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    decoded = decode_upload(contents)
+
+    return load_qel_from_bytes(decoded, session_id=session_id, **kwargs)
 
-    file_path = f"files/passed_file.sqlite"
+def load_qel_from_bytes(decoded: bytes, session_id: str = None, **kwargs) -> QuantityEventLog:
+    """Write the decoded sqlite file to the directory of the session and read it into a QuantityEventLog object."""
+
+    session_id = DEFAULT_SESSION if session_id is None else session_id
+    file_name = f"upload-{uuid.uuid4().hex}.sqlite"
 
     # write temporary file
-    with open(file_path, 'wb') as tmp:
-        tmp.write(decoded)
+    file_path = SESSION_MANAGER.write_bytes(session_id, file_name, decoded)
 
     # Create QEL object
-    qel = load_qel_from_file(file_path)
+    try:
+        qel = load_qel_from_file(file_path, **kwargs)
+    finally:
+        SESSION_MANAGER.remove(session_id, file_name)
 
-    # # Delete the temporary file
-    # os.unlink(tmp_path)
     return qel
 
+def parse_upload_to_stores(contents, progress=None):
+    """
+    Create the initial stores for an uploaded file (see import_log).
+    :param contents: contents of the upload component
+    :param progress: progress callback of the job importing the file (see job_manager)
+    """
+
+    report_progress(progress, 0.0, "Reading file")
+
+    return import_log(decode_upload(contents), progress=progress)
+
+def import_log(decoded: bytes, progress=None, demo_state: bool = False):
+    """
+    Create the initial stores for a log in a new session. Files that were imported before are loaded from the import
+    cache instead of parsing the sqlite file again.
+    :param decoded: content of the sqlite file
+    :param progress: progress callback of the job importing the file (see job_manager)
+    :param demo_state: whether the log is the demo log
+    """
+
+    key = file_hash(decoded)
+    session_id = SESSION_STORE.create_session()
+
+    if IMPORT_CACHE.contains(key):
+        report_progress(progress, 0.2, "Loading previously imported log")
+        frames, overview = IMPORT_CACHE.read(key)
+    else:
+        report_progress(progress, 0.05, "Parsing event log")
+        qel = load_qel_from_bytes(decoded, session_id=session_id)
+        overview, frames = determine_initial_frames(qel, progress=progress)
+        report_progress(progress, 0.8, "Caching imported log")
+        IMPORT_CACHE.write(key, frames=frames, overview=overview)
+
+    report_progress(progress, 0.9, "Preparing session")
+    return create_stores_from_frames(overview, frames, session_id=session_id, demo_state=demo_state)
+
 def create_initial_state_store(qty_state: bool, demo_state: bool):
     state = dict()
     state[TOOL_STATE_QTY] = qty_state
@@ -233,6 +521,14 @@ def create_initial_state_store(qty_state: bool, demo_state: bool):
 
 def create_initial_stores(qel: QuantityEventLog):
 
+    overview, frames = determine_initial_frames(qel)
+
+    return create_stores_from_frames(overview, frames)
+
+def determine_initial_frames(qel: QuantityEventLog, progress=None) -> (dict, dict):
+    """Get the log overview and the data frames of the full log (incl. item levels and object quantities)."""
+
+    report_progress(progress, 0.3, "Creating log overview")
     overview = get_log_overview(qel)
 
     # data frames
@@ -242,25 +538,84 @@ def create_initial_stores(qel: QuantityEventLog):
     objects = qel.get_objects()
     initial_item_levels = overview[TERM_INITIAL_ILVL]
 
-
-    overview[TERM_E2O] = serialise_dataframe(e2o)
-    overview[TERM_QUANTITY_OPERATIONS] = serialise_dataframe(qop)
-    overview[TERM_EVENT_DATA] = serialise_dataframe(events)
-    overview[TERM_OBJECT_DATA] = serialise_dataframe(objects)
+    frames = {TERM_E2O: e2o, TERM_QUANTITY_OPERATIONS: qop, TERM_EVENT_DATA: events, TERM_OBJECT_DATA: objects}
 
     if len(qop) > 0:
-        qty_state = True
-        ilvl = determine_quantity_state_qop(qop, initial_item_levels)
-        oqty = oqtyy.determine_object_quantity(qop=qop, e2o=e2o,
-                                               object_types=TERM_ALL)
-        overview[TERM_ITEM_LEVELS] = serialise_dataframe(ilvl)
-        overview[TERM_OBJECT_QTY] = serialise_dataframe(oqty)
+        report_progress(progress, 0.4, "Determining quantity state")
+        frames[TERM_ITEM_LEVELS] = determine_quantity_state_qop(qop, initial_item_levels,
+                                                               workers=QUANTITY_STATE_WORKERS)
+        report_progress(progress, 0.6, "Determining object quantities")
+        frames[TERM_OBJECT_QTY] = oqtyy.determine_object_quantity(qop=qop, e2o=e2o,
+                                                                 object_types=TERM_ALL,
+                                                                 workers=OBJECT_QUANTITY_WORKERS)
     else:
-        qty_state = False
+        pass
+
+    return overview, frames
+
+def create_stores_from_frames(overview: dict, frames: dict, session_id: str = None, demo_state: bool = False):
+    """Keep the data frames of the full log in a session (a new one if None) and create the overview and state
+    stores."""
 
-    state_store = create_initial_state_store(qty_state=qty_state, demo_state=False)
+    session_id = SESSION_STORE.create_session() if session_id is None else session_id
+    overview = dict(overview)
 
-    with open("files/overview_data.json", 'w') as file:
-        json.dump(overview, file)
+    # identifiers are dictionary encoded once for the whole log and stay encoded in all sublogs
+    frames = encode_log_tables(frames)
+
+    qty_state = frames.get(TERM_ITEM_LEVELS) is not None
+    state_store = create_initial_state_store(qty_state=qty_state, demo_state=demo_state)
+
+    for key, df in frames.items():
+        overview[key] = store_dataframe(df, session_id=session_id, name=key, pinned=True)
 
     return transform_dict_to_json(overview), transform_dict_to_json(state_store)
+
+def append_to_initial_stores(overview_json, events_new: pd.DataFrame, objects_new: pd.DataFrame,
+                             e2o_new: pd.DataFrame, qop_new: pd.DataFrame | None):
+    """
+    Append new events to a loaded log. Item levels continue from the final item levels of the known events and object
+    quantities are updated incrementally, so only the appended events have to be processed.
+    :param overview_json: overview store of the loaded log
+    :param events_new: appended events
+    :param objects_new: objects (or object changes) of the appended events
+    :param e2o_new: event to object relations of the appended events
+    :param qop_new: quantity operations of the appended events
+    :return: overview store of the extended log
+    """
+
+    overview = json.loads(overview_json)
+    session_id = get_session_id(overview)
+
+    events, objects, e2o, qop, ilvl, oqty = get_raw_data_dataframes(overview_json)
+
+    if len(set(events_new[TERM_EVENT]).intersection(set(events[TERM_EVENT]))) > 0:
+        raise ValueError("Appended events are already part of the loaded log.")
+    else:
+        pass
+
+    events = pd.concat([events, events_new], ignore_index=True)
+    objects = pd.concat([objects, objects_new], ignore_index=True).drop_duplicates()
+    e2o = pd.concat([e2o, e2o_new], ignore_index=True)
+
+    frames = {TERM_E2O: e2o, TERM_EVENT_DATA: events, TERM_OBJECT_DATA: objects}
+
+    if qop_new is not None and len(qop_new) > 0:
+        frames[TERM_ITEM_LEVELS] = ilvvl.append_quantity_states(ilvl=ilvl, qop=qop, qop_new=qop_new,
+                                                                initial_item_level=overview[TERM_INITIAL_ILVL])
+        frames[TERM_OBJECT_QTY] = oqtyy.append_object_quantity(oqty=oqty, qop_new=qop_new, e2o_new=e2o_new,
+                                                               object_types=TERM_ALL)
+        frames[TERM_QUANTITY_OPERATIONS] = pd.concat([qop, qop_new], ignore_index=True) if qop is not None else qop_new
+    elif qop is not None:
+        # unchanged, but re-encoded with the categories of the extended log below
+        frames.update({TERM_QUANTITY_OPERATIONS: qop, TERM_ITEM_LEVELS: ilvl, TERM_OBJECT_QTY: oqty})
+    else:
+        pass
+
+    overview = update_log_overview(overview, events_new=events_new, objects=objects, qop_new=qop_new)
+
+    frames = encode_log_tables(frames)
+    for key, df in frames.items():
+        overview[key] = store_dataframe(df, session_id=session_id, name=key, pinned=True)
+
+    return transform_dict_to_json(overview)
@@ -0,0 +1,336 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import qrpm.app.dataStructure as ds
+import qrpm.app.data_operations.sublog_creation as slc
+from qrpm.analysis.derivedDataCache import register_frame_key
+from qrpm.analysis.ocelOperations import period_start, period_end
+from qrpm.GLOBAL import TERM_E2O, TERM_EVENT_DATA, TERM_OBJECT_DATA, TERM_QUANTITY_OPERATIONS, TERM_ITEM_LEVELS, \
+    TERM_OBJECT_QTY, TERM_ALL, TERM_FILTER_PLAN
+
+PLAN_BASE = "base"
+PLAN_STEPS = "steps"
+STEP_FILTER = "filter"
+STEP_PARAMETERS = "parameters"
+PLAN_CACHE_MAX_ENTRIES = 8
+
+# selections of events and objects of the ocel
+FILTER_ACTIVITY = "activity"
+FILTER_EVENT_ATTRIBUTE = "event attribute"
+FILTER_EVENT_OBJECT_TYPES = "event object types"
+FILTER_OBJECT_ATTRIBUTE = "object attribute"
+FILTER_OBJECT_TYPE_NUMBER = "object type number"
+FILTER_ITERATION = "iteration"
+FILTER_TOTAL_OBJECTS = "total objects"
+FILTER_TIME_PERIOD = "time period"
+FILTER_OBJECT_ACTIVITY_EXECUTION = "object activity execution"
+FILTER_OBJECT_ACTIVITY_ITERATIONS = "object activity iterations"
+FILTER_OBJECT_TYPES = "object types"
+
+# selections of events based on their quantity operations
+FILTER_ACTIVE_EVENTS = "active events"
+FILTER_CP_ACTIVE = "cp active"
+FILTER_IT_ACTIVE = "it active"
+FILTER_ITEM_LEVEL_RANGE = "item level range"
+
+# projections of the quantity operations
+PROJECTION_COLLECTION_POINTS = "collection point projection"
+PROJECTION_ITEM_TYPES = "item type projection"
+
+OCEL_FILTERS = {FILTER_ACTIVITY: slc.filter_data_for_activity,
+                FILTER_EVENT_ATTRIBUTE: slc.filter_data_for_event_attribute,
+                FILTER_EVENT_OBJECT_TYPES: slc.filter_data_for_events_with_object_type,
+                FILTER_OBJECT_ATTRIBUTE: slc.filter_data_for_object_attribute_value,
+                FILTER_OBJECT_TYPE_NUMBER: slc.filter_data_for_object_type_number,
+                FILTER_ITERATION: slc.filter_data_for_iteration,
+                FILTER_TOTAL_OBJECTS: slc.filter_data_for_total_object_counts,
+                FILTER_TIME_PERIOD: slc.filter_data_for_time_period,
+                FILTER_OBJECT_ACTIVITY_EXECUTION: slc.filter_for_objects_with_activity_execution,
+                FILTER_OBJECT_ACTIVITY_ITERATIONS: slc.filter_objects_with_specified_iterations_of_activity,
+                FILTER_OBJECT_TYPES: slc.filter_objects_of_object_types}
+
+QOP_FILTERS = {FILTER_ACTIVE_EVENTS: slc.filter_data_for_active_event_selection,
+               FILTER_CP_ACTIVE: slc.filter_data_for_cp_active_events,
+               FILTER_IT_ACTIVE: slc.filter_data_for_it_active_events,
+               FILTER_ITEM_LEVEL_RANGE: slc.filter_data_for_events_in_ilvl}
+
+PROJECTIONS = {PROJECTION_COLLECTION_POINTS: slc.filter_data_for_selected_collection_points,
+               PROJECTION_ITEM_TYPES: slc.filter_data_for_selected_item_types}
+
+
+#### PLANS ####
+def create_plan(overview_json) -> dict:
+    """Create the (empty) filter plan of the full log."""
+
+    overview = json.loads(overview_json)
+    base = {key: overview.get(key) for key in [TERM_EVENT_DATA, TERM_E2O, TERM_OBJECT_DATA, TERM_QUANTITY_OPERATIONS,
+                                                TERM_ITEM_LEVELS, TERM_OBJECT_QTY]}
+
+    return {PLAN_BASE: base, PLAN_STEPS: []}
+
+def create_step(filter_name: str, **parameters) -> dict:
+    """Create a filter step (parameters have to be JSON serialisable)."""
+
+    if filter_name in OCEL_FILTERS or filter_name in QOP_FILTERS or filter_name in PROJECTIONS:
+        pass
+    else:
+        raise ValueError(f"Unknown filter {filter_name}.")
+
+    return {STEP_FILTER: filter_name, STEP_PARAMETERS: parameters}
+
+def add_step(plan: dict, step: dict) -> dict:
+    """Get the optimised plan with the passed step appended."""
+
+    if step[STEP_FILTER] in OCEL_FILTERS or plan[PLAN_BASE][TERM_QUANTITY_OPERATIONS] is not None:
+        pass
+    else:
+        raise ValueError("No filtering applied to ocel but also no quantity data available.")
+
+    return {PLAN_BASE: plan[PLAN_BASE], PLAN_STEPS: optimise_steps(plan[PLAN_STEPS] + [step])}
+
+def plan_to_json(plan: dict) -> str:
+    return json.dumps({TERM_FILTER_PLAN: plan})
+
+def get_plan(data_json) -> dict | None:
+    """Get the filter plan of the ocel or quantity data store."""
+
+    if data_json is None:
+        return None
+    else:
+        return json.loads(data_json).get(TERM_FILTER_PLAN)
+
+def has_quantity_data(plan: dict) -> bool:
+    return plan[PLAN_BASE][TERM_ITEM_LEVELS] is not None and plan[PLAN_BASE][TERM_OBJECT_QTY] is not None
+
+
+#### OPTIMISATION ####
+def optimise_steps(steps: list[dict]) -> list[dict]:
+    """
+    Optimise the steps of a plan without changing the resulting sublog.
+    Steps without effect are removed. Selections on the ocel commute with projections of the quantity operations, so
+    they are executed first (in between the selections depending on the quantity operations). Adjacent steps of the
+    same kind are merged into a single step.
+    """
+
+    steps = [step for step in steps if not is_identity(step)]
+
+    reordered = []
+    segment = []
+    for step in steps:
+        if step[STEP_FILTER] in QOP_FILTERS:
+            reordered += push_down_selections(segment) + [step]
+            segment = []
+        else:
+            segment.append(step)
+    reordered += push_down_selections(segment)
+
+    optimised = []
+    for step in reordered:
+        merged = merge_steps(optimised[-1], step) if optimised else None
+        if merged is None:
+            optimised.append(step)
+        else:
+            optimised[-1] = merged
+
+    return optimised
+
+def push_down_selections(steps: list[dict]) -> list[dict]:
+    """Order selections on the ocel before the projections of the quantity operations."""
+    return ([step for step in steps if step[STEP_FILTER] in OCEL_FILTERS] +
+            [step for step in steps if step[STEP_FILTER] in PROJECTIONS])
+
+def is_identity(step: dict) -> bool:
+    """Check if the step does not change the sublog (selections on the quantity operations always restrict the ocel
+    to the events with quantity operations)."""
+
+    parameters = step[STEP_PARAMETERS]
+
+    if step[STEP_FILTER] == PROJECTION_COLLECTION_POINTS:
+        return unrestricted(parameters["selected_collection_points_projection"])
+    elif step[STEP_FILTER] == PROJECTION_ITEM_TYPES:
+        return parameters["selected_item_types_projection"] == TERM_ALL
+    else:
+        return False
+
+def unrestricted(selection) -> bool:
+    return selection is None or selection == TERM_ALL
+
+def as_list(selection) -> list:
+    return [selection] if isinstance(selection, str) else list(selection or [])
+
+def intersection(first, second) -> list:
+    return [value for value in as_list(first) if value in set(as_list(second))]
+
+def union(first, second) -> list:
+    return as_list(first) + [value for value in as_list(second) if value not in set(as_list(first))]
+
+def merge_steps(first: dict, second: dict) -> dict | None:
+    """Merge two consecutive steps into a single step (None if they cannot be merged)."""
+
+    if first[STEP_FILTER] == second[STEP_FILTER]:
+        filter_name = first[STEP_FILTER]
+        p1 = first[STEP_PARAMETERS]
+        p2 = second[STEP_PARAMETERS]
+    else:
+        return None
+
+    if filter_name == FILTER_ACTIVITY:
+        return create_step(filter_name,
+                           selected_activities=intersection(p1["selected_activities"], p2["selected_activities"]))
+    elif filter_name == FILTER_TIME_PERIOD:
+        return create_step(filter_name,
+                           selected_start_date=later_date(p1["selected_start_date"], p2["selected_start_date"]),
+                           selected_end_date=earlier_date(p1["selected_end_date"], p2["selected_end_date"]))
+    elif filter_name == FILTER_EVENT_OBJECT_TYPES:
+        # events have to refer to all object types of both steps
+        return create_step(filter_name,
+                           selected_object_types=union(p1["selected_object_types"], p2["selected_object_types"]))
+    elif filter_name == FILTER_OBJECT_TYPES:
+        # no selected object type keeps all objects
+        if not p1["object_types_to_include"]:
+            return second
+        elif not p2["object_types_to_include"]:
+            return first
+        elif intersection(p1["object_types_to_include"], p2["object_types_to_include"]):
+            return create_step(filter_name, object_types_to_include=intersection(p1["object_types_to_include"],
+                                                                                 p2["object_types_to_include"]))
+        else:
+            # an empty selection would keep all objects instead of none
+            return None
+    elif filter_name == FILTER_ACTIVE_EVENTS:
+        return first if p1 == p2 else None
+    elif filter_name == PROJECTION_COLLECTION_POINTS:
+        return create_step(filter_name, selected_collection_points_projection=intersection(
+            p1["selected_collection_points_projection"], p2["selected_collection_points_projection"]))
+    elif filter_name == PROJECTION_ITEM_TYPES:
+        return create_step(filter_name, selected_item_types_projection=intersection(
+            p1["selected_item_types_projection"], p2["selected_item_types_projection"]))
+    else:
+        return None
+
+def later_date(first, second):
+    if first is None or second is None:
+        return first if second is None else second
+    else:
+        return first if period_start(first) >= period_start(second) else second
+
+def earlier_date(first, second):
+    if first is None or second is None:
+        return first if second is None else second
+    else:
+        return first if period_end(first) <= period_end(second) else second
+
+
+#### EXECUTION ####
+class PlanResults:
+    """Results of executed plans (ocel dict and quantity operations) kept in memory, least recently used first out.
+    The plan key is registered as key of their data frames, so that memoized functions do not hash their content (see
+    register_frame_key)."""
+
+    def __init__(self, max_entries: int = PLAN_CACHE_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+            else:
+                return None
+
+    def put(self, key: str, result):
+        ocel, qop = result
+        for name, df in list((ocel or dict()).items()) + [(TERM_QUANTITY_OPERATIONS, qop)]:
+            if isinstance(df, pd.DataFrame):
+                register_frame_key(df, f"plan:{key}/{name}")
+            else:
+                pass
+
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self._max_entries:
+                self._results.popitem(last=False)
+
+
+PLAN_RESULTS = PlanResults()
+
+def plan_key(base: dict, steps: list[dict]) -> str:
+    return hashlib.sha1(json.dumps({PLAN_BASE: base, PLAN_STEPS: steps}, sort_keys=True, default=str)
+                        .encode()).hexdigest()
+
+def execute_plan(plan: dict):
+    """
+    Get the sublog of a plan. Starts from the result of the longest already executed prefix of the plan; the
+    intermediate sublogs are neither serialised nor stored.
+    :param plan: filter plan
+    :return: ocel dict (None if the sublog is empty), quantity operations of the sublog
+    """
+
+    base = plan[PLAN_BASE]
+    steps = plan[PLAN_STEPS]
+
+    result = None
+    executed = len(steps)
+    while executed >= 0:
+        result = PLAN_RESULTS.get(plan_key(base, steps[:executed]))
+        if result is None:
+            executed -= 1
+        else:
+            break
+
+    if result is None:
+        ocel = ds.load_ocel(base)
+        qop = ds.deserialize_dataframe(base[TERM_QUANTITY_OPERATIONS])
+        executed = 0
+        PLAN_RESULTS.put(plan_key(base, []), (ocel, qop))
+    else:
+        ocel, qop = result
+
+    for step in steps[executed:]:
+        ocel, qop = execute_step(step, ocel=ocel, qop=qop, base=base)
+
+    if executed < len(steps):
+        PLAN_RESULTS.put(plan_key(base, steps), (ocel, qop))
+    else:
+        pass
+
+    return ocel, qop
+
+def execute_step(step: dict, ocel: dict, qop: pd.DataFrame, base: dict):
+    """Apply a single filter step to a sublog."""
+
+    filter_name = step[STEP_FILTER]
+    parameters = step[STEP_PARAMETERS]
+
+    if ocel is None:
+        return None, None
+    else:
+        pass
+
+    if filter_name in OCEL_FILTERS:
+        ocel_new = OCEL_FILTERS[filter_name](ocel=ocel, **parameters)
+        qop_new = slc.create_qop_from_ocel(ocel_new=ocel_new, qop=qop)
+        return ocel_new, qop_new
+    elif qop is None:
+        raise ValueError("Dataframe of quantity operations is empty although ocel is non-empty.")
+    else:
+        pass
+
+    if filter_name in QOP_FILTERS:
+        if filter_name == FILTER_ITEM_LEVEL_RANGE:
+            parameters = dict(parameters, item_level_index=ds.get_item_level_index(base[TERM_ITEM_LEVELS]))
+        else:
+            pass
+        qop_new = QOP_FILTERS[filter_name](qop=qop, **parameters)
+        ocel_new = slc.create_ocel_from_qop(qop_new, ocel)
+        return ocel_new, qop_new if ocel_new is not None else None
+    else:
+        qop_new = PROJECTIONS[filter_name](qop=qop, **parameters)
+        return ocel, qop_new if len(qop_new) > 0 else None
@@ -4,6 +4,7 @@ from qrpm.GLOBAL import (TERM_EVENT, TERM_QTY_EVENTS, TERM_ACTIVITY, TERM_QTY_AC
                     TERM_INITIAL_ILVL)
 from qel_simulation import QuantityEventLog
 import qrpm.analysis.quantityOperations as qopp
+from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries
 
 def get_log_overview(qel: QuantityEventLog):
     """Get an overview of the quantity event log."""
@@ -33,6 +34,45 @@ def get_log_overview(qel: QuantityEventLog):
 
     return log_overview
 
+def update_log_overview(overview: dict, events_new, objects, qop_new):
+    """
+    Update the overview of the quantity event log by appended events. Numbers requiring the quantity event log object
+    (quantity objects and object types) are kept.
+    :param overview: log overview as determined by get_log_overview
+    :param events_new: appended events
+    :param objects: objects of the extended log
+    :param qop_new: quantity operations of the appended events
+    """
+
+    overview = dict(overview)
+
+    overview[TERM_EVENT] = overview[TERM_EVENT] + len(events_new[TERM_EVENT].unique())
+    overview[TERM_ACTIVITY] = list(dict.fromkeys(overview[TERM_ACTIVITY] + list(events_new[TERM_ACTIVITY].unique())))
+    overview[TERM_OBJECT] = len(objects[TERM_OBJECT].unique())
+    overview[TERM_OBJECT_TYPE] = list(dict.fromkeys(overview[TERM_OBJECT_TYPE] + list(objects[TERM_OBJECT_TYPE].unique())))
+
+    if qop_new is None or len(qop_new) == 0:
+        return overview
+    else:
+        pass
+
+    active_qop = qopp.get_active_instances(qop_new)
+    overview[TERM_QTY_EVENTS] = overview[TERM_QTY_EVENTS] + len(qop_new[TERM_EVENT].unique())
+    overview[TERM_QTY_ACTIVITIES] = list(dict.fromkeys(overview[TERM_QTY_ACTIVITIES] + list(active_qop[TERM_ACTIVITY].unique())))
+    overview[TERM_ACTIVE_QOP] = overview[TERM_ACTIVE_QOP] + len(active_qop)
+    overview[TERM_COLLECTION] = list(dict.fromkeys(overview[TERM_COLLECTION] + list(qop_new[TERM_COLLECTION].unique())))
+
+    non_item_types, item_types = split_instance_and_variable_entries(set(qop_new.columns))
+    overview[TERM_ITEM_TYPES] = list(dict.fromkeys(overview[TERM_ITEM_TYPES] + sorted(item_types)))
+
+    known_relations = {(qr[TERM_ACTIVITY], qr[TERM_COLLECTION]) for qr in overview[TERM_QUANTITY_RELATIONS]}
+    new_relations = active_qop[[TERM_ACTIVITY, TERM_COLLECTION]].drop_duplicates()
+    overview[TERM_QUANTITY_RELATIONS] = overview[TERM_QUANTITY_RELATIONS] + [
+        {TERM_ACTIVITY: activity, TERM_COLLECTION: cp} for activity, cp in new_relations.itertuples(index=False)
+        if (activity, cp) not in known_relations]
+
+    return overview
+
 
 def update_qel_overview_numbers(overview):
 
@@ -6,10 +6,23 @@ import qrpm.analysis.quantityOperations as qopp
 from qrpm.GLOBAL import TERM_QUANTITY_CHANGES, TERM_ITEM_MOVEMENTS, TERM_ALL, TERM_ADDING, TERM_REMOVING, \
     TERM_ACTIVE_OPERATIONS, TERM_COLLECTION, TERM_ACTIVITY
 import qrpm.app.dataStructure as ds
+from qrpm.analysis.derivedDataCache import memoize_derived_data
 
 
 def process_quantity_operations(qop:pd.DataFrame, qop_type, qop_property, qop_active, qop_it_agg,
-                                qop_cp_agg, selected_item_types, selected_collection_points) -> (pd.DataFrame, pd.DataFrame):
+                                qop_cp_agg, selected_item_types, selected_collection_points,
+                                session_id=None) -> (pd.DataFrame, pd.DataFrame):
+
+    qop = project_quantity_operations(qop=qop, qop_type=qop_type, qop_property=qop_property, qop_active=qop_active,
+                                      qop_it_agg=qop_it_agg, qop_cp_agg=qop_cp_agg,
+                                      selected_item_types=selected_item_types,
+                                      selected_collection_points=selected_collection_points)
+
+    return ds.store_single_dataframe(qop, session_id=session_id)
+
+@memoize_derived_data
+def project_quantity_operations(qop:pd.DataFrame, qop_type, qop_property, qop_active, qop_it_agg,
+                                qop_cp_agg, selected_item_types, selected_collection_points) -> pd.DataFrame:
     # project to item types
     qop = item_type_projection(qty=qop, item_types=selected_item_types)
 
@@ -57,9 +70,9 @@ def process_quantity_operations(qop:pd.DataFrame, qop_type, qop_property, qop_ac
         else:
             qop = qop.replace(0, np.nan)
 
-    return ds.store_single_dataframe(qop)
+    return qop
 
-def data_quantity_relation(qop: pd.DataFrame, cp: str | None, activity: str | None):
+def data_quantity_relation(qop: pd.DataFrame, cp: str | None, activity: str | None, session_id=None):
 
     if cp:
         qop = qop.loc[qop[TERM_COLLECTION] == cp, :]
@@ -71,4 +84,4 @@ def data_quantity_relation(qop: pd.DataFrame, cp: str | None, activity: str | No
     else:
         pass
 
-    return ds.store_single_dataframe(qop)
+    return ds.store_single_dataframe(qop, session_id=session_id)
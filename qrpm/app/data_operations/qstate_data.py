@@ -1,10 +1,29 @@
 from qrpm.analysis.counterOperations import cp_projection, item_type_projection
 from qrpm.analysis.ocelOperations import event_selection, activity_selection
-from qrpm.GLOBAL import PRE_EVENT_ILVL, TERM_QUANTITY_OPERATIONS, TERM_ITEM_LEVELS, TERM_ALL, ILVL_AVAILABLE, TERM_EVENT
+from qrpm.GLOBAL import PRE_EVENT_ILVL, TERM_ITEM_LEVELS, TERM_ALL, ILVL_AVAILABLE, TERM_EVENT
 import qrpm.analysis.quantityState as ilvvl
 import qrpm.app.dataStructure as ds
+from qrpm.analysis.derivedDataCache import memoize_derived_data
 
 def process_ilvl_data_according_to_selection(ilvl, overview_json, ilvl_type, ilvl_perspective, ilvl_property,
+                                             cp_aggregation, it_aggregation, item_types_projection, cps_projection,
+                                             session_id=None):
+
+    if ilvl_type == PRE_EVENT_ILVL:
+        qop = None
+    else:
+        qop = ds.get_raw_quantity_operations(overview_json)
+
+    ilvl = project_ilvl_data_according_to_selection(ilvl=ilvl, qop=qop, ilvl_type=ilvl_type,
+                                                    ilvl_perspective=ilvl_perspective, ilvl_property=ilvl_property,
+                                                    cp_aggregation=cp_aggregation, it_aggregation=it_aggregation,
+                                                    item_types_projection=item_types_projection,
+                                                    cps_projection=cps_projection)
+
+    return ds.store_single_dataframe(ilvl, session_id=session_id)
+
+@memoize_derived_data
+def project_ilvl_data_according_to_selection(ilvl, qop, ilvl_type, ilvl_perspective, ilvl_property,
                                              cp_aggregation, it_aggregation, item_types_projection, cps_projection):
 
     ilvl = ilvvl.project_dimensions_item_level_data(ilvl=ilvl, cps=cps_projection, item_types=item_types_projection)
@@ -12,7 +31,6 @@ def process_ilvl_data_according_to_selection(ilvl, overview_json, ilvl_type, ilv
     if ilvl_type == PRE_EVENT_ILVL:
         pass
     else:
-        qop = ds.get_raw_data(overview_json)[TERM_QUANTITY_OPERATIONS]
         ilvl = ilvvl.transform_pre_event_to_post_event_qstate(ilvl=ilvl, qop=qop)
 
     if ilvl_perspective == TERM_ITEM_LEVELS:
@@ -37,8 +55,7 @@ def process_ilvl_data_according_to_selection(ilvl, overview_json, ilvl_type, ilv
     else:
         pass
 
-
-    return ds.store_single_dataframe(ilvl)
+    return ilvl
 
 def quantity_state_development(processed_qstate_json, qty_json, ilvl_display):
     ilvl = ds.get_single_dataframe(processed_qstate_json)
@@ -86,6 +103,6 @@ def ilvl_data_for_execution(processed_qstate_json, qty_json, selected_activity,
     else:
         ilvl = ilvvl.project_quantity_state_to_active_quantity_updates(ilvl=ilvl, qop=qop)
 
-    return ds.store_single_dataframe(ilvl)
+    return ds.store_single_dataframe(ilvl, session_id=ds.get_session_id(processed_qstate_json))
 
 
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+
+CACHE_DIRECTORY = "files/import_cache"
+CACHE_MAX_ENTRIES = 8
+CACHE_OVERVIEW_FILE = "overview.json"
+CACHE_TABLE_SUFFIX = ".arrow"
+
+
+def file_hash(content: bytes) -> str:
+    """Get the key of an uploaded file in the import cache."""
+    return hashlib.sha256(content).hexdigest()
+
+
+class ImportCache:
+    """
+    Cache of imported quantity event logs. The normalised tables of a log (events, objects, e2o, quantity operations and
+    the derived item levels and object quantities) are written as Arrow IPC files to a directory keyed by the hash of the
+    uploaded file. Loading a cached log memory-maps these files instead of parsing the sqlite file again, numeric columns
+    are used without copying them.
+    """
+
+    def __init__(self, directory: str = CACHE_DIRECTORY, max_entries: int = CACHE_MAX_ENTRIES):
+        self._directory = directory
+        self._max_entries = max_entries
+
+    @property
+    def directory(self):
+        return self._directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def contains(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.path(key), CACHE_OVERVIEW_FILE))
+
+    def write(self, key: str, frames: dict[str, pd.DataFrame], overview: dict) -> bool:
+        """
+        Add an imported log to the cache.
+        :param key: hash of the uploaded file
+        :param frames: tables of the log (None for tables the log does not have)
+        :param overview: log overview (JSON serialisable)
+        :return: True if the log was cached, False if a table could not be converted to Arrow
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # write to a temporary directory first so that incomplete entries are never read
+        tmp_path = os.path.join(self.directory, f".{key}.{uuid.uuid4().hex}")
+        os.makedirs(tmp_path)
+
+        try:
+            for name, df in frames.items():
+                if df is None:
+                    continue
+                else:
+                    pass
+                table = pa.Table.from_pandas(df)
+                with pa.OSFile(os.path.join(tmp_path, f"{name}{CACHE_TABLE_SUFFIX}"), "wb") as sink:
+                    with pa.ipc.new_file(sink, table.schema) as writer:
+                        writer.write_table(table)
+
+            with open(os.path.join(tmp_path, CACHE_OVERVIEW_FILE), "w") as file:
+                json.dump(overview, file)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+
+        try:
+            os.replace(tmp_path, self.path(key))
+        except OSError:
+            if self.contains(key):
+                # a concurrent import of the same file was cached first
+                pass
+            else:
+                # remains of an entry that was partially removed when pruning the cache
+                shutil.rmtree(self.path(key), ignore_errors=True)
+                os.replace(tmp_path, self.path(key))
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        self._prune()
+
+        return True
+
+    def read(self, key: str) -> (dict[str, pd.DataFrame], dict):
+        """
+        Load a cached log.
+        :param key: hash of the uploaded file
+        :return: tables of the log, log overview. Numeric and timestamp columns without missing values are read-only
+        views of the memory-mapped files, all other columns are converted.
+        """
+
+        path = self.path(key)
+
+        with open(os.path.join(path, CACHE_OVERVIEW_FILE)) as file:
+            overview = json.load(file)
+
+        frames = dict()
+        for file_name in os.listdir(path):
+            if file_name.endswith(CACHE_TABLE_SUFFIX):
+                with pa.memory_map(os.path.join(path, file_name), "r") as source:
+                    table = pa.ipc.open_file(source).read_all()
+                # one block per column, so that columns are not copied into consolidated blocks
+                frames[file_name[:-len(CACHE_TABLE_SUFFIX)]] = table.to_pandas(split_blocks=True)
+            else:
+                pass
+
+        # mark as recently used
+        os.utime(path)
+
+        return frames, overview
+
+    def _prune(self):
+        """Remove the least recently used logs if the cache holds more than max_entries logs."""
+
+        entries = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if not name.startswith(".")]
+        entries = sorted(entries, key=os.path.getmtime, reverse=True)
+
+        for path in entries[self._max_entries:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+IMPORT_CACHE = ImportCache()
@@ -0,0 +1,272 @@
+import json
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_ID = "job"
+JOB_STATE = "state"
+JOB_PROGRESS = "progress"
+JOB_MESSAGE = "message"
+JOB_RESULT = "result"
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_FINISHED = 32
+JOB_DIRECTORY = "files/jobs"
+JOB_FILE_TTL = 24 * 3600
+VALID_JOB_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobCancelled(Exception):
+    """Raised by the progress callback of a job whose cancellation was requested."""
+    pass
+
+
+def report_progress(progress: Callable | None, fraction: float, message: str = None):
+    """Report the progress of a step to the progress callback of a job (if the step runs as a job)."""
+
+    if progress is not None:
+        progress(fraction, message)
+    else:
+        pass
+
+
+class Job:
+    """State of a job of the job manager."""
+
+    def __init__(self, key: str | None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.state = JOB_QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.cancel_event = threading.Event()
+
+    def report(self, progress: float, message: str = None):
+        """Progress callback passed to the job function: update the progress and stop the job if it was cancelled."""
+
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+        else:
+            pass
+
+        self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        else:
+            pass
+
+    def status(self) -> dict:
+        return {JOB_ID: self.id, JOB_STATE: self.state, JOB_PROGRESS: self.progress, JOB_MESSAGE: self.message}
+
+
+class JobManager:
+    """
+    Local manager for long-running work of the callbacks (e.g., importing a log or discovering a quantity net).
+    Jobs run in a thread pool of the server process, so they can use the data of the session store directly and the
+    callbacks submitting them return immediately; their state is polled by the app. Jobs report progress through a
+    callback that also ends them (between steps) once their cancellation is requested. Jobs submitted with a key
+    that is queued, running or (if its result is cached) done are not started again.
+    With a directory, the state and result of every job are written to a file and cancellations are requested by a
+    file, so that jobs can be polled and cancelled by every server process. Results must then be JSON serialisable,
+    jobs with other results fail.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_finished: int = DEFAULT_MAX_FINISHED,
+                 directory: str = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qrpm-job")
+        self._max_finished = max_finished
+        self._directory = directory
+        self._jobs = OrderedDict()
+        self._keys = dict()
+        self._lock = threading.Lock()
+
+    def submit(self, function: Callable, *args, key: str = None, cache_result: bool = True, **kwargs) -> str:
+        """
+        Run a function as a job. The function is called with a progress callback (progress in [0, 1], message) as
+        keyword argument "progress".
+        :param function: function to be run
+        :param key: key of the job (e.g., a hash of its input), jobs with the same key share their execution
+        :param cache_result: whether the result is returned for later jobs with the same key
+        :return: id of the job
+        """
+
+        with self._lock:
+            if key is not None and key in self._keys:
+                job = self._jobs.get(self._keys[key])
+                if job is not None and (job.state in {JOB_QUEUED, JOB_RUNNING} or (job.state == JOB_DONE and cache_result)):
+                    self._jobs.move_to_end(job.id)
+                    return job.id
+                else:
+                    pass
+            else:
+                pass
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._keys[key] = job.id
+            else:
+                pass
+            self._prune()
+
+        self._persist(job)
+        self._executor.submit(self._run, job, function, args, kwargs, cache_result)
+
+        return job.id
+
+    def status(self, job_id: str | None) -> dict | None:
+        """State, progress and message of a job (None if the job is unknown)."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is not None:
+            return job.status()
+        else:
+            job_file = self._read(job_id)
+            return {key: value for key, value in job_file.items() if key != JOB_RESULT} if job_file else None
+
+    def result(self, job_id: str | None):
+        """Result of a finished job (None if the job is unknown or not done)."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is not None:
+            return job.result if job.state == JOB_DONE else None
+        else:
+            job_file = self._read(job_id)
+            return job_file.get(JOB_RESULT) if job_file and job_file[JOB_STATE] == JOB_DONE else None
+
+    def cancel(self, job_id: str | None):
+        """Request the cancellation of a job. Queued jobs are not started, running jobs end at their next progress
+        report."""
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+
+        if job is not None and job.state in {JOB_QUEUED, JOB_RUNNING}:
+            job.cancel_event.set()
+            job.message = "Cancelling"
+        elif job is None and self._path(job_id) is not None and os.path.isfile(self._path(job_id)):
+            # job of another server process
+            with open(self._path(job_id, ".cancel"), "w"):
+                pass
+        else:
+            pass
+
+    def _run(self, job: Job, function: Callable, args: tuple, kwargs: dict, cache_result: bool):
+
+        def report(progress: float, message: str = None):
+            if self._path(job.id, ".cancel") is not None and os.path.isfile(self._path(job.id, ".cancel")):
+                job.cancel_event.set()
+            else:
+                pass
+            job.report(progress, message)
+            self._persist(job)
+
+        try:
+            report(0.0)
+            job.state = JOB_RUNNING
+            result = function(*args, progress=report, **kwargs)
+            if self._directory is not None:
+                # other server processes read the result from the file of the job
+                try:
+                    json.dumps(result)
+                except (TypeError, ValueError):
+                    raise ValueError("Result is not JSON serialisable.")
+            else:
+                pass
+            job.result = result
+            job.progress = 1.0
+            job.state = JOB_DONE
+        except JobCancelled:
+            job.state = JOB_CANCELLED
+            job.message = "Cancelled"
+        except Exception as error:
+            traceback.print_exc()
+            job.state = JOB_FAILED
+            job.message = f"Failed: {error}"
+
+        self._persist(job)
+
+        with self._lock:
+            if job.key is not None and not (job.state == JOB_DONE and cache_result) and self._keys.get(job.key) == job.id:
+                del self._keys[job.key]
+            else:
+                pass
+
+    def _path(self, job_id: str, suffix: str = ".json") -> str | None:
+        """Path of the state (or cancellation) file of a job (None without directory or for invalid ids)."""
+
+        if self._directory is not None and isinstance(job_id, str) and VALID_JOB_ID.match(job_id):
+            return os.path.join(self._directory, f"{job_id}{suffix}")
+        else:
+            return None
+
+    def _persist(self, job: Job):
+        """Write the state of a job (with its result if it is done) to its file."""
+
+        if self._directory is None:
+            return
+        else:
+            pass
+
+        job_file = job.status()
+        content = json.dumps({**job_file, JOB_RESULT: job.result} if job.state == JOB_DONE else job_file)
+
+        os.makedirs(self._directory, exist_ok=True)
+        tmp_path = self._path(job.id, f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "w") as file:
+            file.write(content)
+        os.replace(tmp_path, self._path(job.id))
+
+    def _read(self, job_id: str) -> dict | None:
+        """State of a job written by another server process (None if there is none)."""
+
+        path = self._path(job_id)
+
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (TypeError, FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _prune(self):
+        """Drop the least recently used finished jobs exceeding the maximum number of finished jobs and the files of
+        jobs older than JOB_FILE_TTL."""
+
+        finished = [job_id for job_id, job in self._jobs.items() if job.state not in {JOB_QUEUED, JOB_RUNNING}]
+        for job_id in finished[:max(len(finished) - self._max_finished, 0)]:
+            job = self._jobs.pop(job_id)
+            if job.key is not None and self._keys.get(job.key) == job_id:
+                del self._keys[job.key]
+            else:
+                pass
+
+        if self._directory is not None and os.path.isdir(self._directory):
+            now = time.time()
+            for entry in os.scandir(self._directory):
+                if entry.is_file() and now - entry.stat().st_mtime > JOB_FILE_TTL:
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
+                else:
+                    pass
+        else:
+            pass
+
+
+JOB_MANAGER = JobManager(directory=JOB_DIRECTORY)
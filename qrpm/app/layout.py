@@ -7,6 +7,22 @@ from qrpm.GLOBAL import CHART_COLOURS, TERM_ALL, \
     TERM_ITEM_TYPE_ACTIVE, TERM_QUANTITY_CHANGES, TERM_ITEM_MOVEMENTS, TERM_ADDING, TERM_REMOVING, TERM_ACTIVE_OPERATIONS, TERM_ACTIVE_UPDATES, TERM_MONTHLY, TERM_DAILY, TERM_EVENT, TERM_ANY
 
 
+# interval (ms) in which the state of running jobs is polled
+JOB_POLL_INTERVAL = 1000
+JOB_CANCEL_BUTTON_STYLE = {"fontSize": 14, "margin": "5px", "display": "inline"}
+
+
+def create_job_component(name: str):
+    """Store of the id of a job of the job manager with an interval polling its state, its progress and a button to
+    cancel it."""
+
+    return html.Div(style={"display": "flex", "flexDirection": "row", "alignItems": "center"}, children=[
+        dcc.Store(id=f"{name}-job"),
+        dcc.Interval(id=f"{name}-job-interval", interval=JOB_POLL_INTERVAL, disabled=True),
+        html.Div(id=f"{name}-job-progress", style={"fontSize": 14, "margin": "5px"}),
+        html.Button("Cancel", id=f"cancel-{name}-job", style={"display": "none"}),
+    ])
+
 def create_boxplot_graph(id: str):
     div = html.Div(style={"display": "block", "margin": "5px", "padding": "5px", "border": "1px #bbb solid"}, children=[
         dcc.Loading(type="circle", color='#0098A1',
@@ -16,9 +32,17 @@ def create_boxplot_graph(id: str):
     ])
     return div
 
-def create_data_table(id: str):
+def create_data_table(id: str, server_side: bool = False):
+    """
+    Data table with paging, sorting and filtering.
+    :param id: id of the table
+    :param server_side: whether paging, sorting and filtering are done by a callback that only sends the visible page
+    (for large tables, the export then only contains the visible page)
+    """
+
+    action = "custom" if server_side else "native"
 
-    return dash_table.DataTable(id=id, filter_action="native", sort_action="native", page_action="native",
+    return dash_table.DataTable(id=id, filter_action=action, sort_action=action, page_action=action,
                          page_current=0, page_size=10, style_table={"marginTop": "2px", "margin": "5px"},
                              style_header={"backgroundColor": "#bbb"},
                                 export_format='xlsx',
@@ -70,6 +94,8 @@ UploadComponent = html.Div(style={'display': 'flex', 'flexDirection': 'row'}, ch
         ]),
     ])
 
+UploadJobComponent = create_job_component("upload")
+
 def create_text_list(list_of_text: list):
     return [html.Li(text) for text in list_of_text]
 
@@ -266,6 +292,7 @@ QnetComponent = html.Div(style={"display": "block"}, id="qnet-container", childr
                 html.Button("Rediscover", id="rediscover-qnet", style={"background": CHART_COLOURS[2], "color": "white", "fontSize": 14, "margin": "5px", "display": "inline"}),
                 html.Div("with filtered Sublog", style={"fontSize": 12, "margin": "5px", "display": "inline"}),
             # ]),
+            create_job_component("qnet"),
             SelectionComponent,
         ]),
         QnetDisplay
@@ -890,7 +917,7 @@ QuantityOperationComponent = html.Div(style={"margin": "5px"}, children=[
     html.Div(["Overview of the quantity operations for selected events"], style={"fontSize": 14}),
     QChangeSpecification,
     html.Details([html.Summary("View Data", style={"margin": "5px","fontSize": 16}),
-                     create_data_table("qop-data-table")], style={"margin": "5px","fontSize": 16}),
+                     create_data_table("qop-data-table", server_side=True)], style={"margin": "5px","fontSize": 16}),
     QuantityOperationDescription,
 ])
 
@@ -1082,7 +1109,9 @@ QStateDevelopment = html.Div(id="qstate-overview", style={"margin": "5px"}, chil
                 target_components={"qstate-development-graph": "figure"}, children=[
             dcc.Graph(id="qstate-development-graph", style={'height': '700px', 'width': '100%'})
         ]),
-    create_simple_data_table("cp-stats")
+    create_simple_data_table("cp-stats"),
+    html.Details([html.Summary("Stock-outs per Item Type", style={"margin": "5px", "fontSize": 16}),
+                  create_simple_data_table("stock-out-stats")], style={"margin": "5px", "fontSize": 16})
 ])
 
 
@@ -1093,7 +1122,7 @@ QuantityStateComponent = html.Div(style={"margin": "5px"}, children=[
     QStateAggregationProjection,
     ProjectionQState,
     html.Details([html.Summary("View Data", style={"margin": "5px","fontSize": 16}),
-                     create_data_table("ilvl-data-table")], style={"margin": "5px","fontSize": 16}),
+                     create_data_table("ilvl-data-table", server_side=True)], style={"margin": "5px","fontSize": 16}),
     QStateDevelopment,
     QuantityStateExecution
 ])
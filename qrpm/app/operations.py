@@ -8,13 +8,35 @@ from dash import dcc, html
 from qrpm.analysis.counterOperations import cp_projection, item_type_projection, get_active_instances
 import qrpm.analysis.dataVisualisation as viz
 import qrpm.app.data_operations.qstate_data as qstate
-from qrpm.analysis.ocelOperations import event_selection, filter_events_for_time
+from qrpm.analysis.ocelOperations import event_selection, filter_events_for_time, period_start, period_end
 from qrpm.analysis.generalDataOperations import split_instance_and_variable_entries, get_descriptive_statistics
 from qrpm.analysis.quantityState import get_descriptive_statistics_for_qstate
+from qrpm.analysis.timeWeightedStatistics import row_durations
+from qrpm.analysis.stockOutAnalysis import stock_out_statistics
+from qrpm.analysis.itemLevelIndex import ItemLevelIndex
+from qrpm.analysis.itemLevelResampling import select_granularity, GRANULARITIES
+from qrpm.analysis.downsampling import MAX_CHART_POINTS
+from qrpm.analysis.categoricalEncoding import decode_categoricals
 import qrpm.app.dataStructure as ds
+import qrpm.app.data_operations.filter_plan as fplan
+import qrpm.app.layout as layout
+from qrpm.app.job_manager import JOB_STATE, JOB_MESSAGE, JOB_PROGRESS, JOB_QUEUED, JOB_RUNNING, JOB_DONE
 import plotly
 from qrpm.GLOBAL import *
 
+def job_progress(job_status: dict | None) -> (str, dict, bool):
+    """Progress text, style of the cancel button and whether polling stops for the status of a job."""
+
+    if job_status is None:
+        return "", {"display": "none"}, True
+    elif job_status[JOB_STATE] in {JOB_QUEUED, JOB_RUNNING}:
+        return (f"{job_status[JOB_MESSAGE] or 'Waiting'} ({job_status[JOB_PROGRESS]:.0%})",
+                layout.JOB_CANCEL_BUTTON_STYLE, False)
+    elif job_status[JOB_STATE] == JOB_DONE:
+        return "", {"display": "none"}, True
+    else:
+        return job_status[JOB_MESSAGE], {"display": "none"}, True
+
 def set_filter_options_sublog(ocel_json):
 
     events, e2o, objects = ds.get_ocel_data(ocel_json)
@@ -110,7 +132,13 @@ def chart_ilvl_sublog_selection(ilvl, events, item_types, cp, selected_start_dat
         else:
             pass
 
-        fig = viz.item_level_development_single_cp(ilvl=ilvl_events, cp=cp)
+        ilvl_cp = cp_projection(qty=ilvl_events, cps={cp})
+        granularity, ilvl_cp = item_level_development_data(ilvl=ilvl_cp, index=ItemLevelIndex(ilvl_cp))
+
+        if granularity is None:
+            fig = viz.item_level_development_single_cp(ilvl=ilvl_cp, cp=cp)
+        else:
+            fig = viz.resampled_item_level_development(resampled=ilvl_cp, granularity=granularity)
 
         fig.update_layout(title=f"Item Levels of {item_types} for {cp}",
                           showlegend=False)
@@ -193,11 +221,16 @@ def charts_sublog_it_active(qop):
     ])
     return fig_comp
 
-def sublog_returns(ocel, qty):
+def sublog_returns(plan):
+    """Execute the filter plan of the selected sublog and get the store contents and the sublog statistics."""
+
+    ocel, qop = fplan.execute_plan(plan)
+    plan_json = fplan.plan_to_json(plan)
+    qty_json = plan_json if fplan.has_quantity_data(plan) else None
 
     if ocel is None:
-        if qty[TERM_QUANTITY_OPERATIONS] is None:
-            return None, ds.prepare_data_for_storage(qty), 0, 0, 0, 0, 0, 0
+        if qop is None:
+            return None, qty_json, 0, 0, 0, 0, 0, 0
         else:
             raise ValueError("OCEL is empty but qop is not.")
     else:
@@ -206,9 +239,8 @@ def sublog_returns(ocel, qty):
     events = ocel[TERM_EVENT_DATA]
     objects = ocel[TERM_OBJECT_DATA]
 
-    if qty is not None:
-        qop = qty[TERM_QUANTITY_OPERATIONS]
-        oqty = qty[TERM_OBJECT_QTY]
+    if qty_json is not None:
+        oqty = ds.deserialize_dataframe(plan[fplan.PLAN_BASE][TERM_OBJECT_QTY])
         active_oqtys = get_active_instances(oqty)
         no_qty_objects = len(active_oqtys[TERM_OBJECT].unique()) if len(active_oqtys) > 0 else 0
 
@@ -230,9 +262,73 @@ def sublog_returns(ocel, qty):
     no_events = len(events[TERM_EVENTS].unique())
     no_objects = len(objects[TERM_OBJECT].unique())
 
-    return ds.prepare_data_for_storage(ocel), ds.prepare_data_for_storage(qty), no_qty_events, no_events, no_qty_objects, no_objects, qups, qops
+    return plan_json, qty_json, no_qty_events, no_events, no_qty_objects, no_objects, qups, qops
+
+def visible_time_range(relayout_data: dict | None) -> (pd.Timestamp | None, pd.Timestamp | None):
+    """Time range displayed in a zoomed chart according to its relayout data (no bound if the chart is not zoomed)."""
+
+    if relayout_data:
+        pass
+    else:
+        return None, None
+
+    for key, value in relayout_data.items():
+        if key.startswith("xaxis") and key.endswith(".range[0]"):
+            return pd.Timestamp(value), pd.Timestamp(relayout_data[key.replace("[0]", "[1]")])
+        elif key.startswith("xaxis") and key.endswith(".range"):
+            return pd.Timestamp(value[0]), pd.Timestamp(value[1])
+        else:
+            pass
+
+    return None, None
+
+def item_level_development_data(ilvl: pd.DataFrame, index: ItemLevelIndex, start=None, end=None,
+                                post_ilvl: bool = False) -> (str | None, pd.DataFrame):
+    """
+    Item levels to be displayed in an item level development chart of the time range. If the chart of all item levels
+    in the range would exceed the maximum number of points, the item levels are resampled to the finest granularity
+    that stays within the limit (resampled item levels are kept with the index).
+    :param ilvl: item levels of the index
+    :param index: index of the item levels
+    :param start: start of the displayed time range (start of the item levels if None)
+    :param end: end of the displayed time range (end of the item levels if None)
+    :param post_ilvl: whether the item levels are post-event item levels
+    :return: granularity (None if the item levels are not resampled) and item levels (resampled item levels)
+    """
+
+    non_item_types, item_types = split_instance_and_variable_entries(set(ilvl.columns))
+    cps = index.collection_points
+    rows = [index.rows_in_period(cp, start, end) for cp in cps]
+    number_rows = sum(len(cp_rows) for cp_rows in rows)
+
+    if number_rows * len(item_types) <= MAX_CHART_POINTS:
+        rows = np.sort(np.concatenate(rows)) if rows else np.array([], dtype=np.int64)
+        return None, ilvl.iloc[rows]
+    else:
+        pass
+
+    window_start, window_end = start, end
+
+    # periods are aligned to the wall clock of the timestamps
+    times = pd.DatetimeIndex(pd.to_datetime(ilvl[TERM_TIME]))
+    times = times.tz_localize(None) if times.tz is not None else times
+    start = times.min() if start is None else pd.Timestamp(start).tz_localize(None)
+    end = times.max() if end is None else pd.Timestamp(end).tz_localize(None)
+
+    # only the displayed time range is resampled (the complete item levels if the chart is not zoomed)
+    granularity = select_granularity(start.value, end.value, number_of_series=len(cps) * len(item_types))
+    resampled = pd.concat([index.resampled_item_levels(cp, granularity, post_event=post_ilvl, start=window_start,
+                                                       end=window_end) for cp in cps],
+                          ignore_index=True)
 
-def quantity_state_development_graph(processed_qstate_json, qty_json, ilvl_type, ilvl_display, display_type):
+    period_starts = pd.DatetimeIndex(resampled[TERM_TIME])
+    period_starts = period_starts.tz_localize(None) if period_starts.tz is not None else period_starts
+    visible = (period_starts + pd.Timedelta(GRANULARITIES[granularity][0], unit="ns") > start) & (period_starts <= end)
+
+    return granularity, resampled.loc[np.asarray(visible), :]
+
+def quantity_state_development_graph(processed_qstate_json, qty_json, ilvl_type, ilvl_display, display_type,
+                                     relayout_data=None):
 
     ilvl, events = qstate.quantity_state_development(processed_qstate_json, qty_json, ilvl_display)
 
@@ -241,26 +337,70 @@ def quantity_state_development_graph(processed_qstate_json, qty_json, ilvl_type,
     else:
         post_ilvl = True
 
-    return viz.item_level_development_activity_executions(ilvl=ilvl,
-                                                          events=events,
-                                                          post_ilvl=post_ilvl, joint_display=display_type)
+    # the index of the processed item levels is kept in the session store, item levels of the sublog are indexed here
+    if ilvl_display == TERM_ALL:
+        index = ds.get_item_level_index(json.loads(processed_qstate_json))
+    else:
+        index = ItemLevelIndex(ilvl)
+
+    start, end = visible_time_range(relayout_data)
+    granularity, ilvl = item_level_development_data(ilvl=ilvl, index=index, start=start, end=end, post_ilvl=post_ilvl)
+
+    if granularity is not None:
+        fig = viz.resampled_item_level_development(resampled=ilvl, granularity=granularity,
+                                                   joint_display=display_type)
+    elif len(ilvl) == 0:
+        return plotly.graph_objects.Figure()
+    else:
+        if events is not None:
+            events = list(set(events).intersection(ilvl[TERM_EVENT]))
+        else:
+            pass
+
+        fig = viz.item_level_development_activity_executions(ilvl=ilvl,
+                                                             events=events,
+                                                             post_ilvl=post_ilvl, joint_display=display_type)
+
+    # keep the zoom of the user when the chart is updated for the displayed time range
+    fig.update_layout(uirevision=f"{ilvl_type}-{ilvl_display}-{display_type}")
+
+    return fig
 
 
 
-def create_cp_stats_quantity_state(processed_qstate_json, qty_json, ilvl_display):
+def create_cp_stats_quantity_state(processed_qstate_json, qty_json, ilvl_display, ilvl_type=PRE_EVENT_ILVL):
     ilvl = ds.get_single_dataframe(processed_qstate_json)
     qop, orig_ilvl, oqty = ds.get_qty_data(qty_json)
 
+    # durations are determined on the complete item level development
+    durations = row_durations(ilvl, post_event=ilvl_type != PRE_EVENT_ILVL)
+
     if ilvl_display == TERM_ALL:
         pass
     else:
-        ilvl = event_selection(event_data=ilvl, event_ids=qop[TERM_EVENT].unique())
+        selected = ilvl[TERM_EVENT].isin(qop[TERM_EVENT].unique()).to_numpy()
+        ilvl = ilvl.loc[selected, :]
+        durations = durations[selected]
 
-    stats = get_descriptive_statistics_for_qstate(data=ilvl)
+    stats = get_descriptive_statistics_for_qstate(data=ilvl, durations=durations)
 
     return create_data_table_elements_for_stats(stats=stats, measure=False)
 
 
+def create_stock_out_statistics(processed_qstate_json, ilvl_type=PRE_EVENT_ILVL):
+    """Records and columns of the stock-out statistics of all item types at the displayed collection points."""
+
+    ilvl = ds.get_single_dataframe(processed_qstate_json)
+
+    # statistics are determined on the complete item level development
+    stats = stock_out_statistics(ilvl, post_event=ilvl_type != PRE_EVENT_ILVL)
+
+    stats[TERM_TIME_WEIGHTED_MEAN] = stats[TERM_TIME_WEIGHTED_MEAN].astype(float).round(3)
+    for column in [TERM_STOCK_OUT_DURATION, TERM_OBSERVED_DURATION, TERM_FIRST_STOCK_OUT, TERM_LAST_STOCK_OUT]:
+        stats[column] = stats[column].astype(str).replace("NaT", "")
+
+    return create_data_table_elements(stats)
+
 def create_data_table_elements_for_stats(stats: pd.DataFrame, measure: bool = True):
 
     stats = stats.reset_index()
@@ -275,10 +415,21 @@ def create_data_table_elements_for_stats(stats: pd.DataFrame, measure: bool = Tr
 
 def create_data_table_elements(df: pd.DataFrame):
 
+    df = decode_categoricals(df)
     df_columns = ([{"name": col, "id": col} for col in df.columns])
 
     return df.to_dict("records"), df_columns
 
+def create_data_table_page(df_json, page_current: int, page_size: int, sort_by: list[dict], filter_query: str):
+    """Records and columns of the visible page of a stored data frame displayed in a server-side data table."""
+
+    index = ds.get_table_index(df_json)
+
+    data, page_count = index.page(page_current=page_current, page_size=page_size, sort_by=sort_by,
+                                  filter_query=filter_query)
+
+    return data, index.columns, page_count
+
 def update_item_level_distribution(ilvl, ilvl_view):
 
     fig = viz.boxplots_of_distribution(data=ilvl, view=ilvl_view)
@@ -305,6 +456,25 @@ def possible_selection_period_qop_filter(qty_relation):
 
     return min_date, max_date #, start_date, end_data, 0
 
+def quantity_operations_over_time_graph(qty_relation, start_date, end_date, relayout_data=None):
+
+    # only the displayed part of the selected period is requested if the chart is zoomed
+    # (a zoom outside the selected period displays the complete period)
+    start, end = visible_time_range(relayout_data)
+    if (start_date and end_date and start is not None and start <= period_end(end_date)
+            and end >= period_start(start_date)):
+        start_time = max(period_start(start_date), start)
+        end_time = min(period_end(end_date), end)
+    else:
+        start_time, end_time = start_date, end_date
+
+    fig = viz.plot_quantity_data_over_time(qop=qty_relation, start_time=start_time, end_time=end_time)
+
+    # keep the zoom of the user when the chart is updated for the displayed time range
+    fig.update_layout(uirevision=f"{start_date}-{end_date}")
+
+    return fig
+
 def quantity_update_distribution(qty_relation, qop_active, qop_view, display_points):
 
     fig = viz.boxplots_of_distribution(data=qty_relation, view=qop_view, display_points=display_points)
@@ -1,8 +1,14 @@
+import json
+
 from qrpm.analysis.counterOperations import cp_projection
 from qrpm.analysis.modelDiscovery import mine_basic_qnet_from_qel_data_tables
+from qrpm.analysis.categoricalEncoding import decode_categoricals
 from qrpm.analysis.ocelOperations import activity_selection, events_with_any_object_type, e2o_for_instances
 from qrpm.app import layout
 from qrpm.app.preparation import get_element_overview
+from qrpm.app.job_manager import report_progress
+from qrpm.app.session_manager import SESSION_MANAGER
+import qrpm.app.dataStructure as ds
 from qel_simulation import QuantityNet, QuantityGraph
 from qrpm.GLOBAL import (TERM_ACTIVITY, TERM_COLLECTION, TERM_QUANTITY_RELATIONS, TERM_OBJECT_TYPE,
                          TERM_QUANTITY_OPERATIONS, TERM_EVENT, TERM_QTY_EVENTS, TERM_QTY_ACTIVITIES, TERM_OBJECT,
@@ -13,6 +19,9 @@ from graphviz import Source
 def discover_qnet(events, objects, e2o, qop) -> (QuantityNet, dict):
     """Discovers the quantity net from the QuantityEventLog object by extending an ocpn mined using pm4py."""
 
+    # pm4py expects the identifiers as values, not as categories
+    events, objects, e2o, qop = [decode_categoricals(df) for df in [events, objects, e2o, qop]]
+
     # mine qnet
     qnet = mine_basic_qnet_from_qel_data_tables(events=events, objects=objects, e2o=e2o, qop=qop)
 
@@ -24,6 +33,71 @@ def discover_qnet(events, objects, e2o, qop) -> (QuantityNet, dict):
 
     return qnet, qnet_data
 
+# quantity net of the demo data shipped with the app (read only) and files of discovered nets in a session directory
+DEMO_QNET_DOT_FILE = "files/qnet_demo.dot"
+DEMO_QNET_DATA_FILE = "files/qnet_data.json"
+SESSION_QNET_DOT_FILE = "qnet.dot"
+SESSION_QNET_DATA_FILE = "qnet_data.json"
+
+
+def discover_qnet_graph(events, objects, e2o, qop, session_id: str = None, progress=None) -> (str, dict):
+    """
+    Discover the quantity net (see discover_qnet) and get its dot string, run as job of the job manager. The net is
+    kept in the directory of the session as well.
+    :param session_id: session of the log
+    :param progress: progress callback of the job (see job_manager)
+    :return: dot string, qnet data
+    """
+
+    report_progress(progress, 0.1, "Discovering quantity net")
+    qnet, qnet_data = discover_qnet(events=events, objects=objects, e2o=e2o, qop=qop)
+
+    report_progress(progress, 0.8, "Creating graph")
+    dot_string = get_dot_string(qnet)
+
+    if session_id is not None:
+        SESSION_MANAGER.write_json(session_id, SESSION_QNET_DATA_FILE, qnet_data)
+        SESSION_MANAGER.write_bytes(session_id, SESSION_QNET_DOT_FILE, dot_string.encode())
+    else:
+        pass
+
+    return dot_string, qnet_data
+
+def discover_qnet_of_log(overview_json, progress=None) -> (str, dict):
+    """Discover the quantity net of the full log (see discover_qnet_graph)."""
+
+    report_progress(progress, 0.0, "Loading log")
+    events, objects, e2o, qop, ilvl, oqty = ds.get_raw_data_dataframes(overview_json)
+
+    return discover_qnet_graph(events=events, objects=objects, e2o=e2o, qop=qop,
+                               session_id=ds.get_session_id(overview_json), progress=progress)
+
+def discover_qnet_of_sublog(ocel_json, qty_data_json, progress=None) -> (str, dict):
+    """Discover the quantity net of the filtered sublog (see discover_qnet_graph)."""
+
+    report_progress(progress, 0.0, "Loading sublog")
+    events, e2o, objects = ds.get_ocel_data(ocel_json)
+    if qty_data_json is not None:
+        qop, ilvl, oqty = ds.get_qty_data(qty_data_json)
+    else:
+        qop = None
+
+    return discover_qnet_graph(events=events, objects=objects, e2o=e2o, qop=qop,
+                               session_id=ds.get_session_id(ocel_json), progress=progress)
+
+def load_demo_qnet(progress=None) -> (str, dict):
+    """Get the dot string and qnet data of the quantity net of the demo data."""
+
+    report_progress(progress, 0.5, "Loading quantity net")
+
+    with open(DEMO_QNET_DOT_FILE, 'r') as file:
+        dot_string = file.read()
+
+    with open(DEMO_QNET_DATA_FILE, 'r') as f:
+        qnet_data = json.load(f)
+
+    return dot_string, qnet_data
+
 def get_dot_string(qnet: QuantityNet) -> str:
     """Get the quantity net from the QuantityEventLog object."""
 
@@ -49,10 +123,10 @@ def process_node_selection(selected_node, qnet_data):
     else:
         return None, None
 
-def export_qnet(dot_string):
-    """Export the quantity net to an .svg file."""
+def export_qnet(dot_string) -> bytes:
+    """Export the quantity net as .svg (rendered in memory, so exports of different sessions never share a file)."""
     graph = Source(dot_string)
-    graph.render(filename='files\discovered_graph', format='svg', cleanup=True)
+    return graph.pipe(format='svg')
 
 def update_element_selection_data_overview(qop, e2o, element_type: str | None, element_name: str | None):
 
@@ -16,7 +16,9 @@ from qrpm.GLOBAL import CHART_COLOURS, TERM_ALL, TERM_COLLECTION, TERM_ITEM_TYPE
 
 import qrpm.app.dataStructure as ds
 import qrpm.app.qnet_component as qdisc
-import qrpm.app.data_operations.sublog_creation as slc
+import qrpm.app.data_operations.filter_plan as fplan
+from qrpm.app.import_cache import file_hash
+from qrpm.app.job_manager import JOB_MANAGER, JOB_STATE, JOB_DONE
 
 
 external_stylesheets = ['https://codepen.io/chriddyp/pen/bWLwgP.css']
@@ -26,6 +28,7 @@ app = Dash(title=AppTitle, external_stylesheets=external_stylesheets)
 
 app.layout = html.Div(style={"padding": 15, "display": "block"}, children=[
     layout.UploadComponent,
+    layout.UploadJobComponent,
     dcc.Store(id='raw-store'), # uploaded raw data
     dcc.Store(id='ocel'), # normal ocal data
     dcc.Store(id='quantity-data'), # additional qty related data
@@ -53,12 +56,8 @@ def file_selection_button(filename):
     else:
         return "Add Event Log (.sqlite)", {"fontSize": 19, "height": "2.5cm", "width": "99%", "textAlign": "center"}
 
-@callback(
-    Output('demo-data', 'children'),
-          Output('submit-button', 'children'),
-        Output('raw-store', 'data'),
-    Output('qel-overview', 'style'),
-    Output('state', 'data'),
+@callback(Output('upload-job', 'data'),
+          Output('upload-job-interval', 'disabled'),
           Input("demo-data", "n_clicks"),
           Input('submit-button', 'n_clicks'),
           State('upload-data', 'contents'))
@@ -66,31 +65,68 @@ def upload_file(demo, n_clicks, contents):
     ctx = dash.callback_context
 
     if not ctx.triggered:
-        return "Demo Data", 'Submit', None, {"display": "none"}, None
+        return None, True
     else:
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
     if button_id == 'demo-data':
 
         # if demo button is clicked
-        overview_json, state_json = ds.parse_demo_data()
+        job_id = JOB_MANAGER.submit(ds.parse_demo_data)
 
-        return 'Demo added', "Submit", overview_json, {"display": "block"}, state_json
+        return json.dumps({"job": job_id, "source": button_id}), False
 
     elif button_id == "submit-button" and contents is not None:
 
-        # create QEL object
-        qel = ds.parse_upload(contents)
+        # create QEL object (or load it from the import cache); every upload gets its own job and session, uploads
+        # of the same file only share the parsed log through the import cache
+        job_id = JOB_MANAGER.submit(ds.parse_upload_to_stores, contents)
 
-        overview_json, state_json = ds.create_initial_stores(qel)
+        return json.dumps({"job": job_id, "source": button_id}), False
+    else:
+        return None, True
 
-        return "Demo Data", 'File added', overview_json, {"display": "block"}, state_json
+@callback(
+    Output('demo-data', 'children'),
+          Output('submit-button', 'children'),
+        Output('raw-store', 'data'),
+    Output('qel-overview', 'style'),
+    Output('state', 'data'),
+    Output('upload-job-progress', 'children'),
+    Output('cancel-upload-job', 'style'),
+    Output('upload-job-interval', 'disabled', allow_duplicate=True),
+          Input('upload-job', 'data'),
+          Input('upload-job-interval', 'n_intervals'),
+          Input('cancel-upload-job', 'n_clicks'),
+          prevent_initial_call='initial_duplicate')
+def poll_upload_job(job_json, n_intervals, cancel):
+    ctx = dash.callback_context
+    job = json.loads(job_json) if job_json else None
+
+    if job is not None and ctx.triggered and ctx.triggered[0]['prop_id'] == 'cancel-upload-job.n_clicks':
+        JOB_MANAGER.cancel(job["job"])
     else:
-        return "Demo Data", 'Submit', None, {"display": "none"}, None
+        pass
 
-@callback(Output('qnet', 'dot_source'),
-          Output('qnet', 'style'),
-          Output("qnet-data", "data"),
+    job_status = JOB_MANAGER.status(job["job"]) if job is not None else None
+    progress_text, cancel_style, stop_polling = operations.job_progress(job_status)
+
+    if job_status is not None and not stop_polling:
+        return (dash.no_update, dash.no_update, dash.no_update, dash.no_update, dash.no_update, progress_text,
+                cancel_style, stop_polling)
+    elif job_status is not None and job_status[JOB_STATE] == JOB_DONE:
+        overview_json, state_json = JOB_MANAGER.result(job["job"])
+        if job["source"] == 'demo-data':
+            return ('Demo added', "Submit", overview_json, {"display": "block"}, state_json, progress_text,
+                    cancel_style, stop_polling)
+        else:
+            return ("Demo Data", 'File added', overview_json, {"display": "block"}, state_json, progress_text,
+                    cancel_style, stop_polling)
+    else:
+        return "Demo Data", 'Submit', None, {"display": "none"}, None, progress_text, cancel_style, stop_polling
+
+@callback(Output('qnet-job', 'data'),
+          Output('qnet-job-interval', 'disabled'),
           State('state', 'data'),
           Input('raw-store', 'data'),
           State("quantity-data", "data"),
@@ -100,53 +136,60 @@ def mine_qnet(state, overview_json, qty_data_json, ocel_json, *args):
     ctx = dash.callback_context
 
     if not ctx.triggered or not overview_json:
-        return None, {'display': 'none'}, None
+        return None, True
     else:
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
+    # discoveries of the same (sub)log share their job and result
     if button_id == 'raw-store':
 
         state = json.loads(state)
         if state[STATE_DEMO]:
-
-            with open("files/qnet_demo.dot", 'r') as file:
-                dot_string = file.read()
-
-            with open("files/qnet_data.json", 'r') as f:
-                qnet_data = json.load(f)
-
-            qnet_data_json = json.dumps(qnet_data)
-
-            return (dot_string,
-                    {'display': 'block', "height": "50%", "width": "75%", "margin": "10px", "verticalAlign": "middle"},
-                    qnet_data_json)
-
+            job_id = JOB_MANAGER.submit(qdisc.load_demo_qnet)
         else:
-            events, objects, e2o, qop, ilvl, oqty = ds.get_raw_data_dataframes(overview_json)
+            job_id = JOB_MANAGER.submit(qdisc.discover_qnet_of_log, overview_json,
+                                        key=f"qnet-{file_hash(overview_json.encode())}")
 
     else:
         if ocel_json:
-            events, e2o, objects = ds.get_ocel_data(ocel_json)
-            if qty_data_json is not None:
-                qop, ilvl, oqty = ds.get_qty_data(qty_data_json)
-            else:
-                qop = None
+            job_id = JOB_MANAGER.submit(qdisc.discover_qnet_of_sublog, ocel_json, qty_data_json,
+                                        key=f"qnet-{file_hash(f'{ocel_json}{qty_data_json}'.encode())}")
         else:
-            return None, {'display': 'none'}, None
+            return None, True
 
+    return json.dumps({"job": job_id}), False
 
-    qnet, qnet_data = qdisc.discover_qnet(events=events, objects=objects, e2o=e2o, qop=qop)
-    dot_string = qdisc.get_dot_string(qnet)
-    qnet_data_json = json.dumps(qnet_data)
+@callback(Output('qnet', 'dot_source'),
+          Output('qnet', 'style'),
+          Output("qnet-data", "data"),
+          Output('qnet-job-progress', 'children'),
+          Output('cancel-qnet-job', 'style'),
+          Output('qnet-job-interval', 'disabled', allow_duplicate=True),
+          Input('qnet-job', 'data'),
+          Input('qnet-job-interval', 'n_intervals'),
+          Input('cancel-qnet-job', 'n_clicks'),
+          prevent_initial_call='initial_duplicate')
+def poll_qnet_job(job_json, n_intervals, cancel):
+    ctx = dash.callback_context
+    job = json.loads(job_json) if job_json else None
 
-    with open("files/qnet_data.json", 'w') as file:
-        json.dump(qnet_data, file)
+    if job is not None and ctx.triggered and ctx.triggered[0]['prop_id'] == 'cancel-qnet-job.n_clicks':
+        JOB_MANAGER.cancel(job["job"])
+    else:
+        pass
 
-    with open("files/qnet_demo.dot", 'w') as f:
-        f.write(dot_string)
+    job_status = JOB_MANAGER.status(job["job"]) if job is not None else None
+    progress_text, cancel_style, stop_polling = operations.job_progress(job_status)
 
-    return dot_string, {'display': 'block', "height": "50%", "width": "75%", "margin": "10px",
-                        "verticalAlign": "middle"}, qnet_data_json
+    if job_status is not None and not stop_polling:
+        return dash.no_update, dash.no_update, dash.no_update, progress_text, cancel_style, stop_polling
+    elif job_status is not None and job_status[JOB_STATE] == JOB_DONE:
+        dot_string, qnet_data = JOB_MANAGER.result(job["job"])
+        return (dot_string,
+                {'display': 'block', "height": "50%", "width": "75%", "margin": "10px", "verticalAlign": "middle"},
+                json.dumps(qnet_data), progress_text, cancel_style, stop_polling)
+    else:
+        return None, {'display': 'none'}, None, progress_text, cancel_style, stop_polling
 
 @callback(Output("loading-qel", "style"),
           Input('raw-store', 'data'))
@@ -161,8 +204,7 @@ def show_qel_overview(overview_json):
           Input("export-qnet-button", "n_clicks"),
           prevent_initial_call=True)
 def export_qnet(dot_source, *args):
-    qdisc.export_qnet(dot_source)
-    return dcc.send_file('files/discovered_graph.svg')
+    return dcc.send_bytes(qdisc.export_qnet(dot_source), "discovered_graph.svg")
 
 @callback(Output("qel-no-events", "children"),
             Output("qel-no-activities", "children"),
@@ -674,108 +716,74 @@ def create_selected_sublog(overview_json, ocel_json, qty_json,
     else:
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
 
-    #### only ocel data (completely qty independent) ######
     if button_id in {"raw-store", "event-selection-reset"}:
-        ocel_new, qty_new = ds.reset_qel(overview_json=overview_json)
-        return operations.sublog_returns(ocel_new, qty_new)
+        return operations.sublog_returns(fplan.create_plan(overview_json))
     else:
         pass
 
     if ocel_json is None:
         return None, qty_json, [None]*6
     else:
-        pass
+        plan = fplan.get_plan(ocel_json)
 
-    filtered = True
+    # filters are collected in the plan of the sublog, the plan is optimised and executed once
+    #### only ocel data (completely qty independent) ######
     if button_id == "events-activity-filter-button":
-        ocel_new = slc.filter_data_for_activity(ocel_json=ocel_json, selected_activities=selected_activities)
+        step = fplan.create_step(fplan.FILTER_ACTIVITY, selected_activities=selected_activities)
     elif button_id == "events-attribute-button":
-        ocel_new = slc.filter_data_for_event_attribute(ocel_json=ocel_json, selected_attribute=selected_attribute,
-                                                          selected_attribute_values=selected_attribute_values)
+        step = fplan.create_step(fplan.FILTER_EVENT_ATTRIBUTE, selected_attribute=selected_attribute,
+                                 selected_attribute_values=selected_attribute_values)
     elif button_id == "events-object_type-filter-button":
-        ocel_new = slc.filter_data_for_events_with_object_type(ocel_json=ocel_json, selected_object_types=selected_object_types)
+        step = fplan.create_step(fplan.FILTER_EVENT_OBJECT_TYPES, selected_object_types=selected_object_types)
     elif button_id == "events-object-attribute-button":
-        ocel_new = slc.filter_data_for_object_attribute_value(ocel_json=ocel_json, selected_attribute=selected_object_attribute,
-                                                                 selected_attribute_values=selected_object_attribute_values)
+        step = fplan.create_step(fplan.FILTER_OBJECT_ATTRIBUTE, selected_attribute=selected_object_attribute,
+                                 selected_attribute_values=selected_object_attribute_values)
     elif button_id == "events-objects-object-type-button":
-        ocel_new = slc.filter_data_for_object_type_number(ocel_json=ocel_json, selected_object_type_object_type=selected_object_type_object_type,
-                                                             selected_object_type_number=selected_object_type_number)
+        step = fplan.create_step(fplan.FILTER_OBJECT_TYPE_NUMBER,
+                                 selected_object_type_object_type=selected_object_type_object_type,
+                                 selected_object_type_number=selected_object_type_number)
     elif button_id == "events-objects-execution-button":
-        ocel_new = slc.filter_data_for_iteration(ocel_json=ocel_json, selected_object_type_iteration=selected_object_type_iteration,
-                                                    selected_iteration_number=selected_iteration_number)
+        step = fplan.create_step(fplan.FILTER_ITERATION, selected_object_type_iteration=selected_object_type_iteration,
+                                 selected_iteration_number=selected_iteration_number)
     elif button_id == "events-total-objects-button":
-        ocel_new = slc.filter_data_for_total_object_counts(ocel_json=ocel_json, total_objects=total_objects)
+        step = fplan.create_step(fplan.FILTER_TOTAL_OBJECTS, total_objects=total_objects)
     elif button_id == "events-time-period-button":
-        ocel_new = slc.filter_data_for_time_period(ocel_json=ocel_json, selected_start_date=selected_start_date,
-                                              selected_end_date=selected_end_date)
+        step = fplan.create_step(fplan.FILTER_TIME_PERIOD, selected_start_date=selected_start_date,
+                                 selected_end_date=selected_end_date)
     elif button_id == "objects-activity-execution-filter-button":
-        ocel_new = slc.filter_for_objects_with_activity_execution(ocel_json=ocel_json, object_selection_object_type=object_selection_object_type,
-                                                                  object_activity_execution_selection=object_activity_execution_selection)
+        step = fplan.create_step(fplan.FILTER_OBJECT_ACTIVITY_EXECUTION,
+                                 object_selection_object_type=object_selection_object_type,
+                                 object_activity_execution_selection=object_activity_execution_selection)
     elif button_id == "objects-activity-multi-execution-button":
-        ocel_new = slc.filter_objects_with_specified_iterations_of_activity(ocel_json=ocel_json, object_type=object_selection_object_type,
-                                                                               activity=object_selection_multi_execution_activity,
-                                                                               restriction=object_selection_iteration_no)
+        step = fplan.create_step(fplan.FILTER_OBJECT_ACTIVITY_ITERATIONS, object_type=object_selection_object_type,
+                                 activity=object_selection_multi_execution_activity,
+                                 restriction=object_selection_iteration_no)
     elif button_id == "object-type-filter-button":
-        ocel_new = slc.filter_objects_of_object_types(ocel_json=ocel_json, object_types_to_include=object_types_to_include)
-    else:
-        filtered = None
-        ocel_new = None
+        step = fplan.create_step(fplan.FILTER_OBJECT_TYPES, object_types_to_include=object_types_to_include)
 
-
-    if filtered:
-        if qty_json is None:
-            return operations.sublog_returns(ocel=ocel_new, qty=None)
-        else:
-            qop, ilvl, oqty = ds.get_qty_data(qty_json)
-            qop_new = slc.create_qop_from_ocel(ocel_new=ocel_new, qop=qop)
-            qty = ds.qop_ilvl_oqty_to_qty_dict(qop_new, ilvl, oqty)
-            return operations.sublog_returns(ocel=ocel_new, qty=qty)
-    else:
-        if qty_json is None:
-            raise ValueError("No filtering applied to ocel or reset triggered but also no quantity data available.")
-        else:
-            qop, ilvl, oqty = ds.get_qty_data(qty_json)
-
-    if qop is None:
-        raise ValueError("Dataframe of quantity operations is empty although ocel is non-empty.")
-    else:
-        pass
-
-    filtered = True
-    if button_id == "events-active-selection":
-       qop_new = slc.filter_data_for_active_event_selection(qop=qop, active_selection=active_selection)
+    #### quantity operations ######
+    elif button_id == "events-active-selection":
+        step = fplan.create_step(fplan.FILTER_ACTIVE_EVENTS, active_selection=active_selection)
     elif button_id == "events-cp-active-filter-button":
-        qop_new = slc.filter_data_for_cp_active_events(qop=qop, cp_active_selection=cp_active_selection,
-                                                       cp_any_all=cp_any_all)
+        step = fplan.create_step(fplan.FILTER_CP_ACTIVE, cp_active_selection=cp_active_selection,
+                                 cp_any_all=cp_any_all)
     elif button_id == "events-it-active-filter-button":
-        qop_new = slc.filter_data_for_it_active_events(qop=qop, it_active_selection=it_active_selection, it_any_all=it_any_all)
+        step = fplan.create_step(fplan.FILTER_IT_ACTIVE, it_active_selection=it_active_selection,
+                                 it_any_all=it_any_all)
     elif button_id == "events-ilvl-range-button":
-        qop_new = slc.filter_data_for_events_in_ilvl(qop=qop, ilvl=ilvl,
-                                                     selected_cp_item_balance=selected_cp_item_balance,
-                                                     selected_it_item_balances=selected_it_item_balances,
-                                                     selected_ilvl_range=selected_ilvl_range)
-    else:
-        filtered = False
-        qop_new = None
-
-    if filtered:
-        ocel_new = slc.create_ocel_from_qop(qop_new, ocel_json)
-        qty = ds.qop_ilvl_oqty_to_qty_dict(qop_new, ilvl, oqty)
-        return operations.sublog_returns(ocel=ocel_new, qty=qty)
-    else:
-        pass
-
-    if button_id == "qel-collection-point-projection-button":
-        qop_new = slc.filter_data_for_selected_collection_points(qop=qop, selected_collection_points_projection=selected_collection_points_projection)
+        step = fplan.create_step(fplan.FILTER_ITEM_LEVEL_RANGE, selected_cp_item_balance=selected_cp_item_balance,
+                                 selected_it_item_balances=selected_it_item_balances,
+                                 selected_ilvl_range=selected_ilvl_range)
+    elif button_id == "qel-collection-point-projection-button":
+        step = fplan.create_step(fplan.PROJECTION_COLLECTION_POINTS,
+                                 selected_collection_points_projection=selected_collection_points_projection)
     elif button_id == "qel-item-type-projection-button":
-        qop_new = slc.filter_data_for_selected_item_types(qop=qop, selected_item_types_projection=selected_item_types_projection)
+        step = fplan.create_step(fplan.PROJECTION_ITEM_TYPES,
+                                 selected_item_types_projection=selected_item_types_projection)
     else:
         raise ValueError("No filtering applied to quantity operations.")
 
-    qty = ds.qop_ilvl_oqty_to_qty_dict(qop_new, ilvl, oqty)
-    events, e2o, objects = ds.get_ocel_data(ocel_json)
-    ocel_new = ds.events_e2o_objects_to_ocel_dict(events, e2o, objects)
-    return operations.sublog_returns(ocel=ocel_new, qty=qty)
+    return operations.sublog_returns(fplan.add_step(plan, step))
 
 
 ##############################################################################
@@ -813,12 +821,8 @@ def get_relevant_ilvl_data(qty_json, overview_json,
         else:
             return None
 
-        events, objects, e2o, qop, ilvl, oqty = ds.get_raw_data_dataframes(overview_json=overview_json)
-
-        if ilvl is None:
-            return None
-        else:
-            return ds.store_single_dataframe(ilvl)
+        # the item levels of the full log are already stored, only their handle is passed on
+        return ds.get_raw_item_level_handle(overview_json)
     else:
 
         if qty_json is not None:
@@ -832,7 +836,8 @@ def get_relevant_ilvl_data(qty_json, overview_json,
                                                                cp_aggregation=cp_aggregation,
                                                                it_aggregation=it_aggregation,
                                                                item_types_projection=item_type_projection,
-                                                               cps_projection=cp_projection
+                                                               cps_projection=cp_projection,
+                                                               session_id=ds.get_session_id(qty_json)
                                                                )
 
 @callback(Output("qstate-development-graph", "figure"),
@@ -840,26 +845,36 @@ def get_relevant_ilvl_data(qty_json, overview_json,
           Input("quantity-data", "data"),
           Input("ilvl-type", "value"),
           Input("ilvl-graph-display", "value"),
-          Input("qstate-development-radio", "value")
+          Input("qstate-development-radio", "value"),
+          Input("qstate-development-graph", "relayoutData")
           )
-def update_quantity_state_development(processed_qstate_json, qty_json, ilvl_type, ilvl_display, display_type):
+def update_quantity_state_development(processed_qstate_json, qty_json, ilvl_type, ilvl_display, display_type,
+                                      relayout_data):
     if processed_qstate_json and qty_json:
         pass
     else:
         return plotly.graph_objs.Figure()
 
+    # the resolution of the chart is chosen for the displayed time range, other selections display the complete range
+    ctx = dash.callback_context
+    if ctx.triggered and ctx.triggered[0]['prop_id'] == "qstate-development-graph.relayoutData":
+        pass
+    else:
+        relayout_data = None
+
     return operations.quantity_state_development_graph(processed_qstate_json=processed_qstate_json,
                                                               qty_json=qty_json,
                                                               ilvl_type=ilvl_type, ilvl_display=ilvl_display,
-                                                              display_type=display_type)
+                                                              display_type=display_type, relayout_data=relayout_data)
 
 @callback(Output("cp-stats", "data"),
           Output("cp-stats", "columns"),
 
           Input("qstate-processed", "data"),
           Input("quantity-data", "data"),
-          Input("ilvl-graph-display", "value"),)
-def cp_stats_data_table(processed_qstate_json, qty_json, ilvl_display):
+          Input("ilvl-graph-display", "value"),
+          Input("ilvl-type", "value"))
+def cp_stats_data_table(processed_qstate_json, qty_json, ilvl_display, ilvl_type):
     if processed_qstate_json and qty_json:
         pass
     else:
@@ -867,7 +882,20 @@ def cp_stats_data_table(processed_qstate_json, qty_json, ilvl_display):
 
     return operations.create_cp_stats_quantity_state(processed_qstate_json=processed_qstate_json,
                                                      qty_json=qty_json,
-                                                     ilvl_display=ilvl_display)
+                                                     ilvl_display=ilvl_display, ilvl_type=ilvl_type)
+
+@callback(Output("stock-out-stats", "data"),
+          Output("stock-out-stats", "columns"),
+
+          Input("qstate-processed", "data"),
+          Input("ilvl-type", "value"))
+def stock_out_statistics_data_table(processed_qstate_json, ilvl_type):
+    if processed_qstate_json:
+        pass
+    else:
+        return None, []
+
+    return operations.create_stock_out_statistics(processed_qstate_json=processed_qstate_json, ilvl_type=ilvl_type)
 
 
 @callback(Output("qstate-execution-collection-point-dropdown", "options"),
@@ -922,13 +950,18 @@ def update_quantity_state_execution_data(processed_qstate_json, qty_json, select
 
 @callback(Output("ilvl-data-table", "data"),
           Output("ilvl-data-table", "columns"),
-          Input("qstate-execution", "data"))
-def creat_ilvl_data_table(execution_ilvl_json):
+          Output("ilvl-data-table", "page_count"),
+          Input("qstate-execution", "data"),
+          Input("ilvl-data-table", "page_current"),
+          Input("ilvl-data-table", "page_size"),
+          Input("ilvl-data-table", "sort_by"),
+          Input("ilvl-data-table", "filter_query"))
+def creat_ilvl_data_table(execution_ilvl_json, page_current, page_size, sort_by, filter_query):
     if execution_ilvl_json:
-        ilvl = ds.get_single_dataframe(execution_ilvl_json)
-        return operations.create_data_table_elements(df=ilvl)
+        return operations.create_data_table_page(df_json=execution_ilvl_json, page_current=page_current,
+                                                 page_size=page_size, sort_by=sort_by, filter_query=filter_query)
     else:
-        return None, []
+        return None, [], 1
 
 
 @callback(Output("ilvl-boxplots", "children"),
@@ -1046,7 +1079,8 @@ def filter_quantity_data(qty_json, qop_type, qop_property, qop_active,
             return qopo.process_quantity_operations(qop=qop, qop_type=qop_type, qop_property=qop_property,
                                                 qop_active=qop_active, qop_it_agg=qop_it_agg, qop_cp_agg=qop_cp_agg,
                                                 selected_item_types=selected_item_types,
-                                                selected_collection_points=selected_collection_points)
+                                                selected_collection_points=selected_collection_points,
+                                                session_id=ds.get_session_id(qty_json))
     else:
         pass
 
@@ -1054,13 +1088,18 @@ def filter_quantity_data(qty_json, qop_type, qop_property, qop_active,
 
 @callback(Output("qop-data-table", "data"),
           Output("qop-data-table", "columns"),
-          Input("qop-processed", "data"))
-def creat_ilvl_data_table(processed_qop_json):
+          Output("qop-data-table", "page_count"),
+          Input("qop-processed", "data"),
+          Input("qop-data-table", "page_current"),
+          Input("qop-data-table", "page_size"),
+          Input("qop-data-table", "sort_by"),
+          Input("qop-data-table", "filter_query"))
+def creat_ilvl_data_table(processed_qop_json, page_current, page_size, sort_by, filter_query):
     if processed_qop_json:
-        qop = ds.get_single_dataframe(processed_qop_json)
-        return operations.create_data_table_elements(df=qop)
+        return operations.create_data_table_page(df_json=processed_qop_json, page_current=page_current,
+                                                 page_size=page_size, sort_by=sort_by, filter_query=filter_query)
     else:
-        return None, []
+        return None, [], 1
 
 @callback(Output("activity-impact-graph", "figure"),
           Input("qop-processed", "data"),
@@ -1114,7 +1153,8 @@ def directions_qop_graph(processed_qop_json):
 def data_qops_activity_cp_quantity_relation(processed_qop_json, cp, activity):
     if processed_qop_json:
         qop = ds.get_single_dataframe(processed_qop_json)
-        return qopo.data_quantity_relation(qop=qop, cp=cp, activity=activity)
+        return qopo.data_quantity_relation(qop=qop, cp=cp, activity=activity,
+                                           session_id=ds.get_session_id(processed_qop_json))
     else:
         return None
 
@@ -1160,11 +1200,21 @@ def possible_selection_period_event_filter(qty_relation_json):
           State("qty-relation", "data"),
           State("qop-time-period", "start_date"),
           State("qop-time-period", "end_date"),
-          Input("qop-time-period-button", "n_clicks"))
-def display_qops_over_time(qty_relation_json, start_date, end_date, *args):
+          Input("qop-time-period-button", "n_clicks"),
+          Input("quantity-operation-overview-graph", "relayoutData"))
+def display_qops_over_time(qty_relation_json, start_date, end_date, n_clicks, relayout_data):
     if qty_relation_json:
         qty_relation = ds.get_single_dataframe(qty_relation_json)
-        return viz.plot_quantity_data_over_time(qop=qty_relation, start_time=start_date, end_time=end_date)
+
+        # a new period is displayed completely
+        ctx = dash.callback_context
+        if ctx.triggered and ctx.triggered[0]['prop_id'] == "quantity-operation-overview-graph.relayoutData":
+            pass
+        else:
+            relayout_data = None
+
+        return operations.quantity_operations_over_time_graph(qty_relation=qty_relation, start_date=start_date,
+                                                              end_date=end_date, relayout_data=relayout_data)
     else:
         return plotly.graph_objects.Figure()
 
@@ -0,0 +1,175 @@
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+SESSION_DIRECTORY = "files/sessions"
+DEFAULT_SESSION_TTL = 24 * 3600
+DEFAULT_SESSION_QUOTA = 2 * 1024 ** 3
+VALID_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class SessionManager:
+    """
+    Working directories of the analysis sessions. Every session (one per imported log) gets its own directory for the
+    files it creates (uploaded file, stored data frames, discovered nets), so that sessions never share paths and all
+    server processes find the files of a session. The size of a session directory is limited by a quota; sessions not
+    accessed within the time to live are removed.
+    """
+
+    def __init__(self, directory: str = SESSION_DIRECTORY, ttl: float = DEFAULT_SESSION_TTL,
+                 quota: int = DEFAULT_SESSION_QUOTA):
+        """
+        :param directory: directory containing the session directories
+        :param ttl: seconds after the last access after which a session is removed
+        :param quota: maximal size of the files of a session in bytes
+        """
+
+        self._directory = directory
+        self._ttl = ttl
+        self._quota = quota
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @property
+    def quota(self):
+        return self._quota
+
+    def create_session(self) -> str:
+        """Create a new session with its directory and return its id."""
+
+        session_id = uuid.uuid4().hex
+        os.makedirs(self.path(session_id))
+
+        return session_id
+
+    def path(self, session_id: str) -> str:
+        """Directory of a session."""
+
+        if isinstance(session_id, str) and VALID_NAME.match(session_id) and session_id not in {".", ".."}:
+            return os.path.join(self._directory, session_id)
+        else:
+            raise ValueError(f"Invalid session id {session_id}.")
+
+    def file_path(self, session_id: str, name: str, create: bool = True) -> str:
+        """Path of a file of a session (the session directory is created if it does not exist and create is set)."""
+
+        if VALID_NAME.match(name) and name not in {".", ".."}:
+            pass
+        else:
+            raise ValueError(f"Invalid file name {name}.")
+
+        if create:
+            os.makedirs(self.path(session_id), exist_ok=True)
+        else:
+            pass
+
+        return os.path.join(self.path(session_id), name)
+
+    def exists(self, session_id: str) -> bool:
+        return os.path.isdir(self.path(session_id))
+
+    def touch(self, session_id: str):
+        """Mark a session as accessed (the time to live starts again)."""
+
+        try:
+            os.utime(self.path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def size(self, session_id: str) -> int:
+        """Size of the files of a session in bytes."""
+
+        if self.exists(session_id):
+            return sum(entry.stat().st_size for entry in os.scandir(self.path(session_id)) if entry.is_file())
+        else:
+            return 0
+
+    def write_bytes(self, session_id: str, name: str, data: bytes) -> str:
+        """
+        Write a file to the directory of a session. The file is written to a temporary file first, so that other
+        processes never read incomplete files.
+        :param session_id: session
+        :param name: file name
+        :param data: content of the file
+        :return: path of the file
+        """
+
+        path = self.file_path(session_id, name)
+        replaced = os.path.getsize(path) if os.path.isfile(path) else 0
+
+        if self.size(session_id) - replaced + len(data) > self._quota:
+            raise ValueError(f"The data of the session exceeds the quota of {self._quota / 1024 ** 2:.0f} MB, please "
+                             f"upload the event log again.")
+        else:
+            pass
+
+        tmp_path = os.path.join(self.path(session_id), f".{name}.{uuid.uuid4().hex}")
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        self.touch(session_id)
+
+        return path
+
+    def write_json(self, session_id: str, name: str, data) -> str:
+        """Write JSON serialisable data to a file of a session (see write_bytes)."""
+        return self.write_bytes(session_id, name, json.dumps(data).encode())
+
+    def read_bytes(self, session_id: str, name: str) -> bytes | None:
+        """Content of a file of a session (None if the file does not exist)."""
+
+        try:
+            with open(self.file_path(session_id, name, create=False), "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        self.touch(session_id)
+
+        return data
+
+    def remove(self, session_id: str, name: str):
+        """Remove a file of a session."""
+
+        try:
+            os.remove(self.file_path(session_id, name, create=False))
+        except FileNotFoundError:
+            pass
+
+    def drop_session(self, session_id: str):
+        """Remove a session with all its files."""
+        shutil.rmtree(self.path(session_id), ignore_errors=True)
+
+    def cleanup(self, now: float = None) -> list[str]:
+        """
+        Remove all sessions that were not accessed within the time to live.
+        :param now: current time (seconds since the epoch)
+        :return: ids of the removed sessions
+        """
+
+        now = time.time() if now is None else now
+        expired = []
+
+        if os.path.isdir(self._directory):
+            for entry in os.scandir(self._directory):
+                if entry.is_dir() and now - entry.stat().st_mtime > self._ttl:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    expired.append(entry.name)
+                else:
+                    pass
+        else:
+            pass
+
+        return expired
+
+
+SESSION_MANAGER = SessionManager()
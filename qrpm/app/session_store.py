@@ -0,0 +1,309 @@
+import io
+import itertools
+import pickle
+import threading
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+
+from qrpm.analysis.derivedDataCache import register_frame_key
+from qrpm.app.session_manager import SessionManager, SESSION_MANAGER
+
+STORE_SESSION = "session"
+STORE_VERSION = "version"
+STORE_NAME = "name"
+STORE_FORMAT_ARROW = "arrow"
+STORE_FORMAT_PICKLE = "pickle"
+DEFAULT_SESSION = "default"
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+
+def is_handle(data) -> bool:
+    """Check if the passed data is a handle of a data frame kept in the session store."""
+    return isinstance(data, dict) and {STORE_SESSION, STORE_VERSION, STORE_NAME}.issubset(data.keys())
+
+
+def handle_key(handle: dict) -> str:
+    """Get the key of the stored data frame referenced by the handle."""
+    return f"{handle[STORE_SESSION]}/{handle[STORE_VERSION]}/{handle[STORE_NAME]}"
+
+
+def handle_file_name(handle: dict, buffer_format: str) -> str:
+    """Get the name of the file of the stored data frame referenced by the handle in its session directory."""
+    return f"{handle[STORE_VERSION]}.{buffer_format}"
+
+
+def dataframe_to_buffer(df: pd.DataFrame) -> (bytes, str):
+    """Serialise a data frame to an Arrow IPC stream (falls back to pickle for columns Arrow cannot represent)."""
+
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL), STORE_FORMAT_PICKLE
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue(), STORE_FORMAT_ARROW
+
+
+def buffer_to_dataframe(buffer, buffer_format: str) -> pd.DataFrame:
+    """Deserialise a data frame from a buffer created by dataframe_to_buffer."""
+
+    if buffer_format == STORE_FORMAT_ARROW:
+        with pa.ipc.open_stream(buffer) as reader:
+            table = reader.read_all()
+        return table.to_pandas()
+    elif buffer_format == STORE_FORMAT_PICKLE:
+        return pickle.load(io.BytesIO(buffer))
+    else:
+        raise ValueError(f"Unknown buffer format {buffer_format}.")
+
+
+class SessionStore:
+    """
+    Server-side store for the data frames of the analysis sessions.
+    Data frames are kept as Arrow IPC buffers keyed by session and version; dcc.Stores only hold small handles
+    referencing them. The store is bounded by size, the least recently used data frames are dropped first.
+    Objects derived from a stored data frame (e.g. indexes) can be attached to its handle and are dropped together
+    with the data frame.
+    With a session manager, data frames are also written to the directory of their session, so that the server process
+    that stored them is not the only one able to read them and data frames dropped from memory are read from there
+    again. Files are only removed with their session (dropped or expired by the session manager) and, if a session
+    exceeds its quota, for versions the process stored that are superseded by a newer version of the same name. Pinned
+    data frames (the full log the overview store references) are only superseded by newer pinned data frames.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, session_manager: SessionManager = None):
+        self._max_bytes = max_bytes
+        self._session_manager = session_manager
+        self._frames = OrderedDict()
+        self._versions = dict()
+        self._files = dict()
+        self._attachments = dict()
+        self._size = 0
+        self._lock = threading.Lock()
+        # versions are unique across server processes sharing the session directories
+        self._token = uuid.uuid4().hex[:8]
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    def create_session(self) -> str:
+        """Create a new session and return its id."""
+
+        if self._session_manager is not None:
+            session_id = self._session_manager.create_session()
+            for expired_session in self._session_manager.cleanup():
+                self.drop_session(expired_session)
+        else:
+            session_id = uuid.uuid4().hex
+
+        with self._lock:
+            self._versions[session_id] = itertools.count()
+
+        return session_id
+
+    def put(self, df: pd.DataFrame, session_id: str = None, name: str = "frame", pinned: bool = False) -> dict:
+        """
+        Store a data frame.
+        :param df: data frame to be stored
+        :param session_id: session the data frame belongs to
+        :param name: name of the data frame (a newer version of the same name supersedes it)
+        :param pinned: whether the data frame may only be superseded by a pinned data frame
+        :return: handle of the stored data frame
+        """
+
+        if session_id is None:
+            session_id = DEFAULT_SESSION
+        else:
+            pass
+
+        buffer, buffer_format = dataframe_to_buffer(df)
+
+        with self._lock:
+            versions = self._versions.setdefault(session_id, itertools.count())
+            handle = {STORE_SESSION: session_id, STORE_VERSION: f"{self._token}-{next(versions)}", STORE_NAME: name}
+
+        if self._session_manager is not None:
+            self._release_quota(session_id, len(buffer))
+            self._session_manager.write_bytes(session_id, handle_file_name(handle, buffer_format), buffer)
+            with self._lock:
+                self._files.setdefault(session_id, OrderedDict())[handle_key(handle)] = (name, pinned, buffer_format)
+        else:
+            pass
+
+        self._keep(handle_key(handle), session_id, buffer, buffer_format)
+
+        return handle
+
+    def get(self, handle: dict) -> pd.DataFrame:
+        """Get the data frame referenced by the handle. The handle is registered as key of the data frame, so that
+        memoized functions do not hash its content (see register_frame_key)."""
+
+        key = handle_key(handle)
+
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            else:
+                pass
+
+        if frame is not None:
+            session_id, buffer, buffer_format = frame
+            if self._session_manager is not None:
+                self._session_manager.touch(session_id)
+            else:
+                pass
+        else:
+            buffer, buffer_format = self._read(handle)
+
+        df = buffer_to_dataframe(buffer, buffer_format)
+        register_frame_key(df, f"store:{key}")
+
+        return df
+
+    def _read(self, handle: dict) -> (bytes, str):
+        """Read a data frame that is not kept in memory from the directory of its session."""
+
+        if self._session_manager is not None:
+            for buffer_format in [STORE_FORMAT_ARROW, STORE_FORMAT_PICKLE]:
+                buffer = self._session_manager.read_bytes(handle[STORE_SESSION], handle_file_name(handle, buffer_format))
+                if buffer is not None:
+                    self._keep(handle_key(handle), handle[STORE_SESSION], buffer, buffer_format)
+                    return buffer, buffer_format
+                else:
+                    pass
+        else:
+            pass
+
+        raise KeyError(f"Data of session {handle[STORE_SESSION]} is no longer available, please upload the "
+                       f"event log again.")
+
+    def _release_quota(self, session_id: str, required: int):
+        """Remove the oldest superseded versions this process stored for a session (see _superseded_versions) until a
+        data frame of the required size fits into the quota of the session."""
+
+        while self._session_manager.size(session_id) + required > self._session_manager.quota:
+            with self._lock:
+                keys = self._superseded_versions(session_id)
+                if keys:
+                    self._remove(session_id, keys[0])
+                else:
+                    break
+
+    def _superseded_versions(self, session_id: str) -> list[str]:
+        """Keys of the data frames this process stored for a session (oldest first) for which a newer data frame of
+        the same name and pinning was stored (the lock must be held)."""
+
+        superseded = []
+        latest = set()
+        for key, (name, pinned, _) in reversed(self._files.get(session_id, dict()).items()):
+            if (name, pinned) in latest:
+                superseded.append(key)
+            else:
+                latest.add((name, pinned))
+
+        return superseded[::-1]
+
+    def _remove(self, session_id: str, key: str):
+        """Remove the file of a data frame this process stored, together with the data frame in memory (the lock must
+        be held)."""
+
+        name, pinned, buffer_format = self._files[session_id].pop(key)
+        session, version, name = key.split("/", 2)
+        handle = {STORE_SESSION: session, STORE_VERSION: version, STORE_NAME: name}
+        self._session_manager.remove(session_id, handle_file_name(handle, buffer_format))
+
+        if key in self._frames:
+            self._drop(key)
+        else:
+            pass
+
+    def _drop(self, key: str):
+        """Drop a data frame from memory (the lock must be held). Its file is kept, so that it can be read again."""
+
+        session_id, buffer, buffer_format = self._frames.pop(key)
+        self._size -= len(buffer)
+        self._drop_attachments(key)
+
+    def _keep(self, key: str, session_id: str, buffer: bytes, buffer_format: str):
+        """Keep a data frame in memory."""
+
+        with self._lock:
+            if key in self._frames:
+                self._size -= len(self._frames[key][1])
+            else:
+                pass
+            self._frames[key] = (session_id, buffer, buffer_format)
+            self._size += len(buffer)
+            self._evict()
+
+    def attach(self, handle: dict, name: str, value, size: int = 0):
+        """
+        Attach an object derived from the data frame referenced by the handle.
+        :param handle: handle of the stored data frame
+        :param name: name of the attached object
+        :param value: attached object
+        :param size: size of the attached object in bytes (counts towards the size of the store)
+        """
+
+        key = handle_key(handle)
+
+        with self._lock:
+            if key in self._frames:
+                attachments = self._attachments.setdefault(key, dict())
+                if name in attachments:
+                    self._size -= attachments[name][1]
+                else:
+                    pass
+                attachments[name] = (value, size)
+                self._size += size
+                self._evict()
+            else:
+                pass
+
+    def get_attachment(self, handle: dict, name: str):
+        """Get an object attached to the handle (None if there is none)."""
+
+        with self._lock:
+            attachment = self._attachments.get(handle_key(handle), dict()).get(name)
+
+        return attachment[0] if attachment is not None else None
+
+    def drop_session(self, session_id: str):
+        """Remove all data frames of a session (with the directory of the session)."""
+
+        if self._session_manager is not None:
+            self._session_manager.drop_session(session_id)
+        else:
+            pass
+
+        with self._lock:
+            for key in [key for key, (session, _, _) in self._frames.items() if session == session_id]:
+                self._size -= len(self._frames.pop(key)[1])
+                self._drop_attachments(key)
+            self._versions.pop(session_id, None)
+            self._files.pop(session_id, None)
+
+    def _drop_attachments(self, key: str):
+        for value, size in self._attachments.pop(key, dict()).values():
+            self._size -= size
+
+    def _evict(self):
+        """Drop least recently used data frames until the store is within its size limit again."""
+
+        while self._size > self._max_bytes and len(self._frames) > 1:
+            self._drop(next(iter(self._frames)))
+
+
+SESSION_STORE = SessionStore(session_manager=SESSION_MANAGER)
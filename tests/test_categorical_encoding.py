@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.categoricalEncoding import encode_log_tables, decode_categoricals, decode_categorical_arguments
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_TIME, TERM_OBJECT, TERM_OBJECT_TYPE, TERM_COLLECTION
+
+
+def log_tables() -> dict[str, pd.DataFrame]:
+    rng = np.random.default_rng(0)
+    events = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(50)],
+                           TERM_ACTIVITY: rng.choice(["place", "pick", "nan", "None"], 50),
+                           TERM_TIME: pd.date_range("2024-01-01", periods=50, freq="h"),
+                           "price": rng.random(50)})
+    e2o = pd.DataFrame({TERM_EVENT: rng.choice(events[TERM_EVENT], 80),
+                        TERM_OBJECT: rng.choice(["o1", "o2", "o3", "nan"], 80),
+                        TERM_OBJECT_TYPE: rng.choice(["order", "item"], 80)})
+    qop = pd.DataFrame({TERM_EVENT: rng.choice(events[TERM_EVENT], 60),
+                        TERM_ACTIVITY: rng.choice(["place", "pick", "pack"], 60),
+                        TERM_COLLECTION: rng.choice(["cp0", "cp1"], 60),
+                        "x": rng.integers(-3, 3, 60).astype(float)})
+    # missing identifiers are not the identifiers "nan" and "None"
+    events.loc[::9, TERM_ACTIVITY] = np.nan
+    e2o.loc[::11, TERM_OBJECT_TYPE] = None
+    qop.loc[::13, TERM_COLLECTION] = np.nan
+    return {"events": events, "e2o": e2o, "qop": qop}
+
+
+def test_encoding_round_trip_is_lossless():
+    tables = log_tables()
+
+    encoded = encode_log_tables(tables)
+
+    for name, table in tables.items():
+        identifiers = [column for column in table.columns if isinstance(encoded[name][column].dtype, pd.CategoricalDtype)]
+        assert identifiers == [column for column in table.columns if column in
+                               {TERM_EVENT, TERM_ACTIVITY, TERM_OBJECT, TERM_OBJECT_TYPE, TERM_COLLECTION}]
+        pd.testing.assert_frame_equal(decode_categoricals(encoded[name]), table.fillna({c: np.nan for c in identifiers}))
+        assert encoded[name][identifiers].isna().sum().tolist() == table[identifiers].isna().sum().tolist()
+
+    # all tables share the categories of a column
+    assert encoded["events"][TERM_EVENT].dtype == encoded["e2o"][TERM_EVENT].dtype == encoded["qop"][TERM_EVENT].dtype
+    assert encoded["events"][TERM_ACTIVITY].dtype == encoded["qop"][TERM_ACTIVITY].dtype
+    assert set(encoded["qop"][TERM_ACTIVITY].cat.categories) == {"place", "pick", "pack", "nan", "None"}
+
+
+def test_encoding_already_encoded_tables_keeps_categories():
+    encoded = encode_log_tables(log_tables())
+
+    encoded_again = encode_log_tables(encoded)
+
+    for name, table in encoded.items():
+        pd.testing.assert_frame_equal(encoded_again[name], table)
+
+
+def test_decoding_selected_columns_shares_other_columns():
+    encoded = encode_log_tables(log_tables())["qop"]
+
+    decoded = decode_categoricals(encoded, columns=[TERM_ACTIVITY, "unknown"])
+
+    assert decoded[TERM_ACTIVITY].dtype == object
+    assert isinstance(decoded[TERM_EVENT].dtype, pd.CategoricalDtype)
+    assert isinstance(encoded[TERM_ACTIVITY].dtype, pd.CategoricalDtype)
+    assert np.shares_memory(decoded["x"].to_numpy(), encoded["x"].to_numpy())
+    assert decode_categoricals(encoded, columns=["x"]) is encoded
+
+
+def test_decorator_decodes_columns_of_all_frame_arguments():
+    tables = encode_log_tables(log_tables())
+    seen = dict()
+
+    @decode_categorical_arguments(columns=[TERM_EVENT])
+    def display(events: pd.DataFrame, factor: int, qop: pd.DataFrame = None):
+        seen.update(events=events.dtypes.to_dict(), qop=qop.dtypes.to_dict(), factor=factor)
+        return factor
+
+    @decode_categorical_arguments
+    def display_all(events: pd.DataFrame):
+        return events
+
+    assert display(tables["events"], 2, qop=tables["qop"]) == 2
+    assert seen["events"][TERM_EVENT] == object and seen["qop"][TERM_EVENT] == object
+    assert isinstance(seen["events"][TERM_ACTIVITY], pd.CategoricalDtype)
+    assert isinstance(seen["qop"][TERM_COLLECTION], pd.CategoricalDtype)
+    assert seen["factor"] == 2
+    assert (display_all(tables["events"]).dtypes[[TERM_EVENT, TERM_ACTIVITY]] == object).all()
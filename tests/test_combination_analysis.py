@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.combinationAnalysis import combination_frequencies, create_bitsets, factorize_instances, \
+    item_type_bitsets
+from qrpm.GLOBAL import TERM_OTHER_COMBINATIONS
+
+MEMBERS = [f"m{i}" for i in range(11)]
+
+
+@pytest.fixture
+def pairs() -> pd.DataFrame:
+    # members of 600 instances, the group of an instance is its first letter
+    rng = np.random.default_rng(0)
+    rows = 2000
+    pairs = pd.DataFrame({"instance": rng.choice([f"{g}{i}" for g in "abc" for i in range(200)], rows),
+                          "member": rng.choice(MEMBERS, rows, p=np.geomspace(1, 0.01, len(MEMBERS)) /
+                                               np.geomspace(1, 0.01, len(MEMBERS)).sum())})
+    return pairs
+
+
+def frequencies_by_groupby(pairs: pd.DataFrame) -> pd.DataFrame:
+    labels = pairs.groupby("instance")["member"].agg(
+        lambda members: ", ".join(sorted(set(members), key=MEMBERS.index)))
+    return pd.DataFrame({"group": labels.index.str[0], "combination": labels.to_numpy()}) \
+        .groupby(["group", "combination"]).size().reset_index(name="frequency")
+
+
+def frequencies_of_pairs(pairs: pd.DataFrame, max_combinations: int | None) -> pd.DataFrame:
+    instance_codes, number_of_instances, first_rows = factorize_instances(pairs["instance"])
+    member_codes = pd.Categorical(pairs["member"], categories=MEMBERS).codes
+    bitsets = create_bitsets(instance_codes, member_codes, number_of_instances, len(MEMBERS))
+    groups = pairs["instance"].str[0].to_numpy()[first_rows]
+    return combination_frequencies(bitsets, MEMBERS, groups=groups, group_column="group",
+                                   combination_column="combination", frequency_column="frequency",
+                                   max_combinations=max_combinations)
+
+
+def test_combination_frequencies_equal_groupby_count(pairs):
+    frequency = frequencies_of_pairs(pairs, max_combinations=None)
+
+    pd.testing.assert_frame_equal(frequency, frequencies_by_groupby(pairs), check_dtype=False)
+
+
+def test_combinations_beyond_maximum_are_counted_as_other(pairs):
+    expected = frequencies_by_groupby(pairs)
+    totals = expected.groupby("combination")["frequency"].sum()
+
+    frequency = frequencies_of_pairs(pairs, max_combinations=10)
+
+    other = frequency["combination"].str.startswith(TERM_OTHER_COMBINATIONS)
+    displayed = frequency.loc[~other, "combination"].unique()
+    assert len(displayed) == 10
+    assert totals[displayed].min() >= totals.drop(displayed).max()
+    assert frequency.loc[other, "combination"].unique().tolist() == [f"{TERM_OTHER_COMBINATIONS} ({len(totals) - 10})"]
+    # displayed combinations keep their frequencies, no instance is dropped
+    pd.testing.assert_frame_equal(frequency[~other], expected[expected["combination"].isin(displayed)]
+                                  .reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_series_equal(frequency.groupby("group")["frequency"].sum(),
+                                   expected.groupby("group")["frequency"].sum(), check_dtype=False)
+    assert other[other].index.min() > other[~other].index.max()
+
+
+def test_item_type_bitsets_ignore_zero_and_missing_quantities():
+    qty = pd.DataFrame({"x": [1, 0, np.nan, -2], "y": pd.arrays.SparseArray([0, 3, 0, 0], fill_value=0)})
+    instance_codes, number_of_instances, first_rows = factorize_instances(["i0", "i1", "i1", "i2"])
+
+    bitsets = item_type_bitsets(qty, ["x", "y"], instance_codes, number_of_instances)
+
+    frequency = combination_frequencies(bitsets, ["x", "y"], groups=["g", "g", "g"], group_column="group",
+                                        combination_column="combination", frequency_column="frequency",
+                                        empty_label="none")
+    assert dict(zip(frequency["combination"], frequency["frequency"])) == {"x": 2, "y": 1}
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import qrpm.analysis.counterOperations as co
+from qrpm.analysis.generalDataOperations import remove_empty_columns
+from qrpm.analysis.quantityOperations import get_direction_quantity_instances
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE, TERM_ACTIVE, \
+    TERM_INACTIVE, TERM_ADDING, TERM_REMOVING, TERM_DIRECTION, TERM_ADDING_REMOVING
+
+ITEM_TYPES = ["x", "y", "z", "unused"]
+
+
+@pytest.fixture
+def counters() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    n = 60
+    qty = pd.DataFrame({TERM_EVENT: [f"e{i // 2}" for i in range(n)],
+                        TERM_ACTIVITY: rng.choice(["a", "b"], n),
+                        TERM_COLLECTION: [f"cp{i % 2}" for i in range(n)]})
+    for item_type in ITEM_TYPES:
+        values = rng.integers(-2, 3, n).astype(float)
+        values[rng.random(n) < 0.6] = 0
+        qty[item_type] = values if item_type != "unused" else 0.0
+    return qty
+
+
+def assert_same_counters(dense: pd.DataFrame, sparse: pd.DataFrame):
+    item_types = [item_type for item_type in ITEM_TYPES if item_type in sparse.columns]
+    assert co.has_sparse_item_types(sparse, item_types)
+    sparse = co.to_dense_counters(sparse).reset_index(drop=True)
+    pd.testing.assert_frame_equal(dense.reset_index(drop=True), sparse[dense.columns], check_dtype=False)
+
+
+@pytest.mark.parametrize("operation", [
+    co.get_active_instances,
+    co.get_enhanced_quantity_instances,
+    co.positive_item_quantities,
+    co.negative_item_quantities,
+    co.joint_counters,
+    lambda qty: co.cp_projection(qty, {"cp0"}),
+    lambda qty: co.item_type_projection(qty, {"x", "y"}),
+    lambda qty: co.cp_active_instances_any_cp(qty, {"cp0"}),
+    lambda qty: co.cp_active_instances_all_cps(qty, {"cp0", "cp1"}),
+    lambda qty: co.it_active_instances_all_item_types(qty, {"x", "y"}),
+    lambda qty: co.it_active_instances_any_item_type(qty, {"x", "y"}),
+    lambda qty: remove_empty_columns(qty, keep_zeros=False),
+])
+def test_sparse_counters_give_dense_results(counters, operation):
+    dense = operation(counters.copy())
+    sparse = operation(co.to_sparse_counters(counters))
+
+    assert_same_counters(dense, sparse)
+
+
+def test_projection_of_sparse_counters(counters):
+    projection_function = counters.iloc[::2]
+    dense = co.projection_generic_function(counters, projection_function, [TERM_EVENT, TERM_COLLECTION])
+    sparse = co.projection_generic_function(co.to_sparse_counters(counters), projection_function,
+                                            [TERM_EVENT, TERM_COLLECTION])
+
+    assert_same_counters(dense, sparse)
+    assert dense[["x", "y", "z"]].isna().any().any()
+
+
+def test_total_item_quantities_of_sparse_counters(counters):
+    dense = co.total_item_quantities(counters.copy(), ["x", "y"])
+    sparse = co.total_item_quantities(co.to_sparse_counters(counters), ["x", "y"])
+
+    pd.testing.assert_frame_equal(dense, sparse[dense.columns], check_dtype=False)
+
+
+def test_active_item_types_and_classification_of_sparse_counters(counters):
+    sparse = co.to_sparse_counters(counters)
+
+    assert co.get_active_item_types(sparse) == co.get_active_item_types(counters) == {"x", "y", "z"}
+    np.testing.assert_array_equal(co.classify_instances(sparse), co.classify_instances(counters))
+
+
+def test_item_quantities_of_sparse_counters_list_stored_values(counters):
+    dense = co.create_item_quantities(counters.copy())
+    sparse = co.create_item_quantities(co.to_sparse_counters(counters))
+
+    columns = [TERM_EVENT, TERM_COLLECTION, TERM_ITEM_TYPES, TERM_VALUE]
+    expected = dense.loc[dense[TERM_VALUE] != 0, columns].sort_values(columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(sparse[columns].sort_values(columns).reset_index(drop=True), expected,
+                                  check_dtype=False)
+
+
+def directions_by_apply(qop: pd.DataFrame, item_types: list[str]) -> pd.DataFrame:
+    """Direction of every quantity operation as determined row by row before the classification."""
+
+    qop = qop.copy()
+    qop[item_types] = qop[item_types].fillna(0)
+    qop[TERM_ADDING] = qop[item_types].apply(lambda row: any(val > 0 for val in row), axis=1)
+    qop[TERM_REMOVING] = qop[item_types].apply(lambda row: any(val < 0 for val in row), axis=1)
+    qop.loc[qop[TERM_ADDING] == True, TERM_DIRECTION] = TERM_ADDING
+    qop.loc[qop[TERM_REMOVING] == True, TERM_DIRECTION] = TERM_REMOVING
+    qop.loc[(qop[TERM_ADDING] & qop[TERM_REMOVING]), TERM_DIRECTION] = TERM_ADDING_REMOVING
+    qop[TERM_DIRECTION] = qop[TERM_DIRECTION].fillna(TERM_INACTIVE)
+    return qop
+
+
+def test_classification_equals_row_wise_classification(counters):
+    counters.loc[::7, "x"] = np.nan
+
+    classification = co.classify_instances(counters)
+
+    values = counters[ITEM_TYPES]
+    expected = directions_by_apply(counters, ITEM_TYPES)
+    np.testing.assert_array_equal((classification & co.INSTANCE_ADDING) > 0, expected[TERM_ADDING])
+    np.testing.assert_array_equal((classification & co.INSTANCE_REMOVING) > 0, expected[TERM_REMOVING])
+    np.testing.assert_array_equal(co.classified_active(classification),
+                                  ~values.apply(lambda row: all(val == 0 for val in row), axis=1))
+    np.testing.assert_array_equal(co.classified_item_type_count(classification),
+                                  values.apply(lambda row: sum(val != 0 for val in row), axis=1))
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_directions_and_activity_equal_row_wise_classification(counters, sparse):
+    counters.loc[::7, "y"] = np.nan
+    expected = directions_by_apply(counters, ITEM_TYPES)
+    qop = co.to_sparse_counters(counters) if sparse else counters
+
+    directions = get_direction_quantity_instances(qop)
+    enhanced = co.get_enhanced_quantity_instances(qop)
+
+    assert directions[TERM_DIRECTION].tolist() == expected[TERM_DIRECTION].tolist()
+    assert set(directions[TERM_DIRECTION]) == {TERM_INACTIVE, TERM_ADDING, TERM_REMOVING, TERM_ADDING_REMOVING}
+    assert enhanced[TERM_ACTIVE].tolist() == np.where(
+        counters[ITEM_TYPES].apply(lambda row: all(val == 0 for val in row), axis=1), TERM_INACTIVE,
+        TERM_ACTIVE).tolist()
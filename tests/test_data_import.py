@@ -0,0 +1,41 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("qel_simulation")
+
+from qrpm.analysis.dataImport import ImporterQEL
+
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    path = str(tmp_path / "log.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE "values" ("ocel_id" TEXT, "count" INTEGER, "share" REAL, "note" TEXT, '
+                       '"number" INTEGER)')
+    # the first chunks have no values in the count, share and note columns
+    rows = [(f"e{i}", None if i < 5 else i, None if i < 5 else i / 2, None if i < 5 else "note", i) for i in range(12)]
+    connection.executemany('INSERT INTO "values" VALUES (?, ?, ?, ?, ?)', rows)
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.mark.parametrize("chunksize", [2, 5, 100])
+def test_chunked_read_equals_read_at_once(sqlite_file, chunksize):
+    with sqlite3.connect(sqlite_file) as connection:
+        expected = pd.read_sql_query('SELECT * FROM "values"', connection).set_index("ocel_id")
+
+    with ImporterQEL(sqlite_file, chunksize=chunksize) as importer:
+        df = importer.get_table_from_sqlite("values")
+
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_projection(sqlite_file):
+    with ImporterQEL(sqlite_file, chunksize=2, table_columns={"values": ["count", "note"]}) as importer:
+        df = importer.get_table_from_sqlite("values")
+
+    assert list(df.columns) == ["count", "note"]
+    assert df["count"].dtype == "float64"
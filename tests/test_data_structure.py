@@ -0,0 +1,64 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("qel_simulation")
+
+import qrpm.app.dataStructure as dataStructure
+from qrpm.analysis.categoricalEncoding import decode_categoricals
+from qrpm.analysis.objectQuantities import determine_object_quantity
+from qrpm.analysis.quantityState import determine_quantity_state_qop
+from qrpm.app.session_store import SessionStore
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_TIME, TERM_OBJECT, TERM_OBJECT_TYPE, TERM_COLLECTION, \
+    TERM_QTY_EVENTS, TERM_QTY_ACTIVITIES, TERM_QTY_OBJECTS, TERM_QTY_OBJECT_TYPES, TERM_ACTIVE_QOP, TERM_ITEM_TYPES, \
+    TERM_QUANTITY_RELATIONS, TERM_INITIAL_ILVL, TERM_E2O, TERM_QUANTITY_OPERATIONS, TERM_EVENT_DATA, TERM_OBJECT_DATA, TERM_ALL
+
+
+@pytest.fixture(autouse=True)
+def session_store(monkeypatch):
+    monkeypatch.setattr(dataStructure, "SESSION_STORE", SessionStore())
+
+
+def log_without_quantities() -> (dict, dict):
+    events = pd.DataFrame({TERM_EVENT: ["e0", "e1"], TERM_ACTIVITY: ["place", "pay"],
+                           TERM_TIME: pd.to_datetime(["2024-01-01", "2024-01-02"])})
+    objects = pd.DataFrame({TERM_OBJECT: ["o0"], TERM_OBJECT_TYPE: ["order"]})
+    e2o = pd.DataFrame({TERM_EVENT: ["e0", "e1"], TERM_OBJECT: ["o0", "o0"], TERM_OBJECT_TYPE: ["order", "order"]})
+    qop = pd.DataFrame(columns=[TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION])
+    overview = {TERM_EVENT: 2, TERM_QTY_EVENTS: 0, TERM_ACTIVITY: ["place", "pay"], TERM_QTY_ACTIVITIES: [],
+                TERM_OBJECT: 1, TERM_QTY_OBJECTS: 0, TERM_OBJECT_TYPE: ["order"], TERM_QTY_OBJECT_TYPES: [],
+                TERM_ACTIVE_QOP: 0, TERM_COLLECTION: [], TERM_ITEM_TYPES: [], TERM_QUANTITY_RELATIONS: [],
+                TERM_INITIAL_ILVL: {}}
+
+    return overview, {TERM_E2O: e2o, TERM_QUANTITY_OPERATIONS: qop, TERM_EVENT_DATA: events, TERM_OBJECT_DATA: objects}
+
+
+def test_appending_quantity_operations_to_a_log_without_quantities():
+    overview, frames = log_without_quantities()
+    overview_json, state_json = dataStructure.create_stores_from_frames(overview, frames)
+    events_new = pd.DataFrame({TERM_EVENT: ["e2", "e3", "e4"], TERM_ACTIVITY: ["pick", "pick", "ship"],
+                               TERM_TIME: pd.to_datetime(["2024-01-03", "2024-01-04", "2024-01-05"])})
+    objects_new = pd.DataFrame({TERM_OBJECT: ["o0", "i0"], TERM_OBJECT_TYPE: ["order", "item"]})
+    e2o_new = pd.DataFrame({TERM_EVENT: ["e2", "e3", "e4", "e4"], TERM_OBJECT: ["i0", "i0", "o0", "i0"],
+                            TERM_OBJECT_TYPE: ["item", "item", "order", "item"]})
+    qop_new = pd.DataFrame({TERM_EVENT: ["e2", "e3", "e4"], TERM_ACTIVITY: ["pick", "pick", "ship"],
+                            TERM_COLLECTION: ["stock", "stock", "stock"], TERM_TIME: events_new[TERM_TIME],
+                            "widget": [-2.0, -1.0, np.nan]})
+
+    extended_json = dataStructure.append_to_initial_stores(overview_json, events_new=events_new,
+                                                           objects_new=objects_new, e2o_new=e2o_new, qop_new=qop_new)
+
+    extended = json.loads(extended_json)
+    events, objects, e2o, qop, ilvl, oqty = [
+        decode_categoricals(df) for df in dataStructure.get_raw_data_dataframes(extended_json)]
+    assert extended[TERM_EVENT] == 5
+    assert extended[TERM_COLLECTION] == ["stock"]
+    assert extended[TERM_ITEM_TYPES] == ["widget"]
+    assert len(events) == 5 and len(e2o) == 6 and len(objects) == 2
+    pd.testing.assert_frame_equal(qop.reset_index(drop=True), qop_new, check_dtype=False)
+    pd.testing.assert_frame_equal(ilvl, determine_quantity_state_qop(qop=qop_new, initial_item_level={}),
+                                  check_dtype=False)
+    pd.testing.assert_frame_equal(oqty, determine_object_quantity(qop=qop_new, e2o=e2o_new, object_types=TERM_ALL),
+                                  check_dtype=False)
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import qrpm.analysis.derivedDataCache as derivedDataCache
+from qrpm.analysis.derivedDataCache import DerivedDataCache, result_size, memoize_derived_data, DERIVED_DATA_CACHE, \
+    register_frame_key, registered_frame_key
+from qrpm.app.session_store import SessionStore
+
+
+def large_figure(n_points: int = 10000) -> go.Figure:
+    x = np.arange(n_points)
+    fig = go.Figure([go.Scatter(x=x, y=x * 2.0)])
+    fig.update_layout(title="Item Levels")
+    return fig
+
+
+def test_result_size_of_data_frames_and_tuples():
+    df = pd.DataFrame({"a": np.arange(1000, dtype=np.int64), "b": np.ones(1000)})
+
+    assert result_size(df) == df.memory_usage(index=True).sum()
+    assert result_size((df, df["a"])) == result_size(df) + df["a"].memory_usage(index=True)
+
+
+def test_result_size_of_figures_counts_trace_data():
+    fig = large_figure(n_points=10000)
+
+    # x (int64) and y (float64) of all points
+    assert result_size(fig) >= 2 * 8 * 10000
+    assert result_size(fig) < 2 * len(fig.to_json())
+
+
+def test_figures_count_towards_byte_bound():
+    fig_size = result_size(large_figure())
+    cache = DerivedDataCache(max_entries=100, max_bytes=2 * fig_size + fig_size // 2)
+
+    for key in ["a", "b", "c"]:
+        cache.put(key, large_figure())
+
+    assert len(cache) == 2
+    assert cache.size == 2 * fig_size
+    assert not cache.get("a")[0]
+    assert cache.get("c")[0]
+
+
+def test_figures_larger_than_bound_are_not_cached():
+    cache = DerivedDataCache(max_bytes=result_size(large_figure()) - 1)
+    cache.put("a", large_figure())
+
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_cached_figures_are_not_changed_by_callers():
+    cache = DerivedDataCache()
+    fig = large_figure()
+    cache.put("a", fig)
+    fig.update_layout(title="Changed before hit")
+
+    found, hit = cache.get("a")
+    hit.update_layout(title="Changed after hit")
+    hit.data[0].y[0] = -1
+
+    found, second_hit = cache.get("a")
+    assert found
+    assert second_hit.layout.title.text == "Item Levels"
+    assert second_hit.data[0].y[0] == 0
+    assert isinstance(second_hit, go.Figure)
+
+
+def test_memoized_function_is_computed_once_per_content():
+    calls = []
+
+    @memoize_derived_data
+    def total(df: pd.DataFrame) -> pd.DataFrame:
+        calls.append(1)
+        return df.sum().to_frame()
+
+    DERIVED_DATA_CACHE.clear()
+    df = pd.DataFrame({"a": [1, 2, 3]})
+
+    first = total(df)
+    second = total(df.copy())
+    total(pd.DataFrame({"a": [1, 2, 4]}))
+
+    assert len(calls) == 2
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_frames_with_a_registered_key_are_not_hashed(monkeypatch):
+    calls = []
+
+    @memoize_derived_data
+    def total(df: pd.DataFrame) -> pd.DataFrame:
+        calls.append(1)
+        return df.sum().to_frame()
+
+    DERIVED_DATA_CACHE.clear()
+    store = SessionStore()
+    handle = store.put(pd.DataFrame({"a": [1, 2, 3]}))
+    other_handle = store.put(pd.DataFrame({"a": [1, 2, 4]}))
+
+    def no_hashing(df):
+        raise AssertionError("registered frames must not be hashed")
+
+    monkeypatch.setattr(derivedDataCache, "dataframe_fingerprint", no_hashing)
+    first = total(store.get(handle))
+    second = total(store.get(handle))
+    other = total(store.get(other_handle))
+
+    assert len(calls) == 2
+    pd.testing.assert_frame_equal(first, second)
+    assert other.iloc[0, 0] == 7
+
+
+def test_keys_of_changed_or_collected_frames_are_not_used():
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    register_frame_key(df, "events")
+
+    assert registered_frame_key(df) == "events"
+    assert registered_frame_key(df.copy()) is None
+    df["b"] = 1
+    assert registered_frame_key(df) is None
+
+    register_frame_key(df, "events")
+    del df
+    assert len([key for _, key, _ in derivedDataCache._frame_keys.values() if key == "events"]) == 0
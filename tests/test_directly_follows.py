@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pm4py.algo.discovery.ocel.ocdfg import algorithm as ocdfg_discovery
+from pm4py.objects.ocel.obj import OCEL
+
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_TIME, TERM_OBJECT, TERM_OBJECT_TYPE
+from qrpm.analysis.directlyFollows import directly_follows_graphs, trace_variants, control_flow_fingerprint, \
+    DFG_ACTIVITIES, DFG_START_ACTIVITIES, DFG_END_ACTIVITIES, DFG_EDGES, DFG_DOUBLE_ARCS
+
+OBJECT_TYPES = {"order": 6, "item": 15, "package": 4}
+
+
+@pytest.fixture
+def log() -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(7)
+    n_events = 300
+    events = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(n_events)],
+                           TERM_ACTIVITY: rng.choice(["place", "pick", "pack", "ship", "pay"], n_events),
+                           TERM_TIME: pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.permutation(n_events),
+                                                                                    unit="h")})
+    objects = pd.DataFrame([(f"{object_type}{i}", object_type)
+                            for object_type, n_objects in OBJECT_TYPES.items() for i in range(n_objects)],
+                           columns=[TERM_OBJECT, TERM_OBJECT_TYPE])
+    relations = []
+    for event in events[TERM_EVENT]:
+        for object_type, n_objects in OBJECT_TYPES.items():
+            # events refer to no, a single or several objects of a type
+            n_related = rng.choice([0, 1, 1, 1, 2, 3])
+            relations.extend((event, f"{object_type}{i}")
+                             for i in rng.choice(n_objects, size=n_related, replace=False))
+    e2o = pd.DataFrame(relations, columns=[TERM_EVENT, TERM_OBJECT])
+
+    return events, objects, e2o
+
+
+def pm4py_ocel(events: pd.DataFrame, objects: pd.DataFrame, e2o: pd.DataFrame) -> OCEL:
+    ocel_events = events.rename(columns={TERM_EVENT: "ocel:eid", TERM_ACTIVITY: "ocel:activity",
+                                         TERM_TIME: "ocel:timestamp"}).sort_values("ocel:timestamp", kind="stable")
+    ocel_objects = objects.rename(columns={TERM_OBJECT: "ocel:oid", TERM_OBJECT_TYPE: "ocel:type"})
+    relations = e2o.rename(columns={TERM_EVENT: "ocel:eid", TERM_OBJECT: "ocel:oid"})
+    relations = relations.merge(ocel_objects, on="ocel:oid").merge(ocel_events, on="ocel:eid") \
+        .sort_values("ocel:timestamp", kind="stable")
+
+    return OCEL(events=ocel_events, objects=ocel_objects, relations=relations)
+
+
+def test_directly_follows_graphs_equal_the_ones_of_pm4py(log):
+    events, objects, e2o = log
+
+    dfgs = directly_follows_graphs(events=events, e2o=e2o, objects=objects)
+    ocdfg = ocdfg_discovery.apply(pm4py_ocel(*log), parameters={"compute_edges_performance": False})
+
+    assert set(dfgs) == set(OBJECT_TYPES)
+    for object_type, dfg in dfgs.items():
+        assert dfg[DFG_ACTIVITIES] == {activity: len(related_events) for activity, related_events
+                                       in ocdfg["activities_ot"]["events"][object_type].items()}
+        assert dfg[DFG_START_ACTIVITIES] == {activity: len(starts) for activity, starts
+                                             in ocdfg["start_activities"]["total_objects"][object_type].items()}
+        assert dfg[DFG_END_ACTIVITIES] == {activity: len(ends) for activity, ends
+                                           in ocdfg["end_activities"]["total_objects"][object_type].items()}
+        assert dfg[DFG_EDGES] == {edge: len(couples) for edge, couples
+                                  in ocdfg["edges"]["total_objects"][object_type].items()}
+
+
+def test_object_types_are_taken_from_the_relations_if_they_have_them(log):
+    events, objects, e2o = log
+    typed_e2o = e2o.merge(objects, on=TERM_OBJECT)
+
+    assert directly_follows_graphs(events=events, e2o=typed_e2o) == \
+           directly_follows_graphs(events=events, e2o=e2o, objects=objects)
+    with pytest.raises(ValueError):
+        directly_follows_graphs(events=events, e2o=e2o)
+
+
+def test_variable_arcs_equal_the_ones_of_pm4py(log):
+    modelDiscovery = pytest.importorskip("qrpm.analysis.modelDiscovery")
+    import pm4py
+    events, objects, e2o = log
+
+    dfgs = directly_follows_graphs(events=events, e2o=e2o, objects=objects)
+    ocpn = pm4py.discover_oc_petri_net(pm4py_ocel(*log))
+
+    assert {object_type: dfg[DFG_DOUBLE_ARCS] for object_type, dfg in dfgs.items()} == \
+           ocpn["double_arcs_on_activity"]
+    assert modelDiscovery.discover_ocpn_from_data_tables(events=events, objects=objects, e2o=e2o)[
+               "double_arcs_on_activity"] == ocpn["double_arcs_on_activity"]
+
+
+def test_variable_arcs_of_object_types_only_some_events_of_an_activity_refer_to():
+    events = pd.DataFrame({TERM_EVENT: ["e1", "e2", "e3", "e4", "e5"], TERM_ACTIVITY: ["pack"] * 5,
+                           TERM_TIME: pd.date_range("2024-01-01", periods=5)})
+    e2o = pd.DataFrame({TERM_EVENT: ["e1", "e2", "e3", "e4", "e5"], TERM_OBJECT: ["o1", "o2", "o3", "o4", "i1"],
+                        TERM_OBJECT_TYPE: ["order", "order", "order", "order", "item"]})
+
+    dfgs = directly_follows_graphs(events=events, e2o=e2o)
+
+    # a fifth of the pack events refers to a single item, not only the one referring to items
+    assert dfgs["item"][DFG_DOUBLE_ARCS] == {"pack": True}
+    assert dfgs["order"][DFG_DOUBLE_ARCS] == {"pack": False}
+
+
+def test_trace_variants_are_the_distinct_traces_of_the_objects(log):
+    events, objects, e2o = log
+
+    variants = trace_variants(events=events, e2o=e2o, objects=objects)
+
+    traces = e2o.merge(objects, on=TERM_OBJECT).merge(events, on=TERM_EVENT).sort_values(TERM_TIME, kind="stable")
+    for object_type, traces_of_type in traces.groupby(TERM_OBJECT_TYPE):
+        expected = set(traces_of_type.groupby(TERM_OBJECT)[TERM_ACTIVITY].agg(tuple))
+        assert variants[object_type] == sorted(expected)
+
+
+def test_empty_logs_have_no_graphs_and_variants(log):
+    events, objects, e2o = log
+
+    assert directly_follows_graphs(events=events, e2o=e2o.iloc[:0], objects=objects) == {}
+    assert trace_variants(events=events, e2o=e2o.iloc[:0], objects=objects) == {}
+
+
+def test_fingerprint_ignores_frequencies(log):
+    events, objects, e2o = log
+    dfgs = directly_follows_graphs(events=events, e2o=e2o, objects=objects)
+    doubled = directly_follows_graphs(events=pd.concat([events, events.assign(**{
+        TERM_EVENT: events[TERM_EVENT] + "'", TERM_TIME: events[TERM_TIME] + pd.Timedelta(days=365)})]),
+        e2o=pd.concat([e2o, e2o.assign(**{TERM_EVENT: e2o[TERM_EVENT] + "'"})]), objects=objects)
+
+    assert doubled != dfgs
+    assert control_flow_fingerprint(doubled) == control_flow_fingerprint(dfgs)
+    without_shipping = events[events[TERM_ACTIVITY] != "ship"]
+    assert control_flow_fingerprint(directly_follows_graphs(events=without_shipping, e2o=e2o, objects=objects)) != \
+           control_flow_fingerprint(dfgs)
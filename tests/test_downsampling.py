@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.downsampling import lttb, min_max_envelope, downsample_indices, downsample_series, bin_bars, \
+    DOWNSAMPLING_LTTB, DOWNSAMPLING_MIN_MAX, BINNING_SUM, BINNING_LAST
+
+
+def chart_data(number_of_series: int, points_per_series: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "cp": np.repeat([f"cp{i}" for i in range(number_of_series)], points_per_series),
+        "time": np.tile(pd.date_range("2024-01-01", periods=points_per_series, freq="min"), number_of_series),
+        "level": rng.integers(-5, 100, number_of_series * points_per_series).astype(float)
+    }).sample(frac=1, random_state=seed)
+
+
+def naive_lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> list[int]:
+    bucket_size = (len(x) - 2) / (threshold - 2)
+    selected = [0]
+    for bucket in range(threshold - 2):
+        start, end = int(bucket * bucket_size) + 1, int((bucket + 1) * bucket_size) + 1
+        next_start, next_end = end, min(int((bucket + 2) * bucket_size) + 1, len(x) - 1)
+        if bucket == threshold - 3:
+            next_start, next_end = len(x) - 1, len(x)
+        mean_x, mean_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        a = selected[-1]
+        areas = [abs((x[a] - mean_x) * (y[i] - y[a]) - (x[a] - x[i]) * (mean_y - y[a])) for i in range(start, end)]
+        selected.append(start + int(np.argmax(areas)))
+    return selected + [len(x) - 1]
+
+
+def test_lttb_selects_the_points_spanning_the_largest_triangles():
+    rng = np.random.default_rng(1)
+    x = np.arange(1000, dtype=float)
+    y = rng.normal(size=1000).cumsum()
+
+    assert lttb(x, y, 100).tolist() == naive_lttb(x, y, 100)
+    assert lttb(x, y, 1000).tolist() == list(range(1000))
+
+
+def test_min_max_envelope_keeps_stock_outs_and_peaks():
+    y = np.full(10000, 50.0)
+    y[1234], y[8765] = -3, 400
+
+    selected = min_max_envelope(y, 100)
+
+    assert len(selected) <= 100
+    assert {0, 1234, 8765, 9999} <= set(selected)
+    assert np.all(np.diff(selected) > 0)
+
+
+@pytest.mark.parametrize("method", [DOWNSAMPLING_LTTB, DOWNSAMPLING_MIN_MAX])
+@pytest.mark.parametrize("threshold", [2, 3, 4, 5, 99, 100])
+def test_downsampled_series_do_not_exceed_the_threshold(method, threshold):
+    y = np.random.default_rng(2).normal(size=5000)
+    y[::7] = np.nan
+
+    selected = downsample_indices(np.arange(5000), y, threshold, method=method)
+
+    assert 0 < len(selected) <= threshold
+    assert not np.isnan(y[selected]).any()
+    assert np.all(np.diff(selected) > 0)
+
+
+def test_unknown_downsampling_methods_are_rejected():
+    with pytest.raises(ValueError):
+        downsample_indices(np.arange(100), np.zeros(100), 10, method="median")
+
+
+@pytest.mark.parametrize("method", [DOWNSAMPLING_LTTB, DOWNSAMPLING_MIN_MAX])
+@pytest.mark.parametrize("number_of_series, points_per_series", [(1, 100000), (3, 100000), (40, 5000), (200, 1000),
+                                                                  (2000, 10)])
+def test_charts_do_not_exceed_the_maximum_number_of_points(method, number_of_series, points_per_series):
+    data = chart_data(number_of_series, points_per_series)
+
+    downsampled = downsample_series(data, x="time", y="level", series=["cp"], method=method, max_points=5000)
+
+    assert len(downsampled) <= 5000
+    assert downsampled.index.is_unique and downsampled.index.isin(data.index).all()
+    for _, rows in downsampled.groupby("cp"):
+        assert rows["time"].is_monotonic_increasing
+    if number_of_series * 4 <= 5000:
+        # every series keeps its stock-outs and peaks
+        assert downsampled["cp"].nunique() == number_of_series
+        if method == DOWNSAMPLING_MIN_MAX:
+            assert (downsampled.groupby("cp")["level"].min() == data.groupby("cp")["level"].min()).all()
+            assert (downsampled.groupby("cp")["level"].max() == data.groupby("cp")["level"].max()).all()
+
+
+def test_budget_of_short_series_goes_to_long_series():
+    data = pd.concat([chart_data(1, 100), chart_data(1, 100000).assign(cp="long")])
+
+    downsampled = downsample_series(data, x="time", y="level", series=["cp"], max_points=5000)
+
+    assert (downsampled["cp"] == "cp0").sum() == 100
+    assert len(downsampled) > 4900
+
+
+def test_small_charts_are_not_downsampled():
+    data = chart_data(3, 100)
+
+    assert downsample_series(data, x="time", y="level", series=["cp"], max_points=300) is data
+    assert bin_bars(data, x="time", y="level", series=["cp"], max_points=300) is data
+
+
+def test_binned_bars_keep_the_sums_of_all_bars():
+    data = chart_data(40, 5000).assign(activity="pick")
+
+    bars = bin_bars(data, x="time", y="level", series=["cp"], aggregation=BINNING_SUM, max_points=5000)
+
+    assert len(bars) <= 5000
+    assert list(bars.columns) == list(data.columns)
+    assert (bars.groupby("cp")["level"].sum() == data.groupby("cp")["level"].sum()).all()
+    assert (bars["activity"] == "pick").all()
+
+
+def test_binned_bars_show_the_last_value_of_a_bin():
+    data = pd.DataFrame({"time": np.arange(100, dtype=float), "level": np.arange(100, dtype=float),
+                         "activity": ["pick", "pack"] * 50})
+
+    bars = bin_bars(data, x="time", y="level", aggregation=BINNING_LAST, max_points=10)
+
+    assert np.allclose(bars["time"], np.arange(10) * 9.9)
+    assert bars["level"].tolist()[-1] == 99
+    assert np.all(np.diff(bars["level"]) > 0)
+    assert (bars["activity"] == "2 different").all()
+
+
+def test_binned_bars_start_at_timestamps_of_the_time_zone():
+    data = pd.DataFrame({"time": pd.date_range("2024-01-01", periods=1000, freq="h", tz="Europe/Berlin"),
+                         "level": np.ones(1000)})
+
+    bars = bin_bars(data, x="time", y="level", max_points=100)
+
+    assert len(bars) <= 100
+    assert bars["time"].dt.tz is not None
+    assert bars["time"].iloc[0] == data["time"].iloc[0]
+    assert bars["level"].sum() == 1000
+
+
+def test_unknown_binning_aggregations_are_rejected():
+    with pytest.raises(ValueError):
+        bin_bars(chart_data(1, 100), x="time", y="level", aggregation="mean", max_points=10)
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.categoricalEncoding import encode_log_tables
+from qrpm.analysis.eventObjectIndex import EventObjectIndex
+from qrpm.analysis.ocelOperations import e2o_activity_object_type_selection, \
+    e2o_object_type_with_looped_activity_selection, events_with_all_object_types
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_TIME, TERM_OBJECT, TERM_OBJECT_TYPE
+
+ACTIVITIES = ["place", "pick", "pack", "ship", "pay"]
+OBJECT_TYPES = ["order", "item", "delivery"]
+
+
+def random_log(seed: int = 0) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
+    rng = np.random.default_rng(seed)
+    events = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(300)],
+                           TERM_ACTIVITY: rng.choice(ACTIVITIES, 300),
+                           TERM_TIME: pd.date_range("2024-01-01", periods=300, freq="h")})
+    # the last objects are not related to any event
+    objects = pd.DataFrame({TERM_OBJECT: [f"o{i}" for i in range(120)],
+                            TERM_OBJECT_TYPE: rng.choice(OBJECT_TYPES, 120)})
+    e2o = pd.DataFrame({TERM_EVENT: rng.choice(events[TERM_EVENT].iloc[:280], 700),
+                        TERM_OBJECT: rng.choice(objects[TERM_OBJECT].iloc[:110], 700)}).drop_duplicates()
+    e2o = e2o.merge(objects, on=TERM_OBJECT, how="left").sample(frac=1, random_state=seed).reset_index(drop=True)
+    return events, e2o, objects
+
+
+@pytest.fixture(params=[False, True], ids=["strings", "categoricals"])
+def log(request) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame, EventObjectIndex):
+    events, e2o, objects = random_log()
+    if request.param:
+        tables = encode_log_tables({"events": events, "e2o": e2o, "objects": objects})
+        events, e2o, objects = tables["events"], tables["e2o"], tables["objects"]
+    else:
+        pass
+    return events, e2o, objects, EventObjectIndex.from_tables(events=events, e2o=e2o, objects=objects)
+
+
+def rows(mask: pd.Series | np.ndarray) -> list[int]:
+    return np.flatnonzero(np.asarray(mask)).tolist()
+
+
+def test_relations_equal_isin_filters(log):
+    events, e2o, objects, index = log
+    selected_events = events[TERM_EVENT].iloc[::7]
+    selected_objects = objects[TERM_OBJECT].iloc[::5]
+    event_ids, object_ids = index.ids(TERM_EVENT, selected_events), index.ids(TERM_OBJECT, selected_objects)
+
+    assert index.e2o_rows_of_events(event_ids).tolist() == rows(e2o[TERM_EVENT].isin(selected_events))
+    assert index.e2o_rows_of_objects(object_ids).tolist() == rows(e2o[TERM_OBJECT].isin(selected_objects))
+    assert index.e2o_rows_of_events_and_objects(event_ids, object_ids).tolist() == \
+           rows(e2o[TERM_EVENT].isin(selected_events) & e2o[TERM_OBJECT].isin(selected_objects))
+    assert index.objects_of_events(event_ids).tolist() == \
+           index.ids(TERM_OBJECT, e2o.loc[e2o[TERM_EVENT].isin(selected_events), TERM_OBJECT]).tolist()
+    assert index.events_of_objects(object_ids).tolist() == \
+           index.ids(TERM_EVENT, e2o.loc[e2o[TERM_OBJECT].isin(selected_objects), TERM_EVENT]).tolist()
+    assert index.event_rows(event_ids).tolist() == rows(events[TERM_EVENT].isin(selected_events))
+    assert index.object_rows(object_ids).tolist() == rows(objects[TERM_OBJECT].isin(selected_objects))
+
+
+def test_activities_and_object_types_equal_isin_filters(log):
+    events, e2o, objects, index = log
+
+    assert index.events_of_activities(["pick", "ship", "unknown"]).tolist() == \
+           index.ids(TERM_EVENT, events.loc[events[TERM_ACTIVITY].isin(["pick", "ship"]), TERM_EVENT]).tolist()
+    assert index.objects_of_object_types(["item"]).tolist() == \
+           index.ids(TERM_OBJECT, objects.loc[objects[TERM_OBJECT_TYPE] == "item", TERM_OBJECT]).tolist()
+    assert len(index.events_of_activities([])) == 0
+
+
+def test_sublog_filters_equal_baseline_filters(log):
+    events, e2o, objects, index = log
+
+    # objects of a type executing an activity, with all events of these objects
+    expected = e2o_activity_object_type_selection(e2o=e2o, events=events, activity=["pack"], object_type="item")
+    relevant_objects = np.intersect1d(index.objects_of_events(index.events_of_activities(["pack"])),
+                                      index.objects_of_object_types(["item"]))
+    assert index.e2o_rows_of_events(index.events_of_objects(relevant_objects)).tolist() == \
+           rows(e2o.index.isin(expected.index))
+
+    # objects of a type with exactly two executions of an activity
+    expected = e2o_object_type_with_looped_activity_selection(e2o=e2o, events=events, activity="pick",
+                                                              object_type="order", restriction=2)
+    executions = index.object_counts(index.e2o_rows_of_events(index.events_of_activities("pick")))
+    orders = index.objects_of_object_types(["order"])
+    relevant_objects = orders[executions[orders] == 2]
+    assert index.e2o_rows_of_events(index.events_of_objects(relevant_objects)).tolist() == \
+           rows(e2o.index.isin(expected.index))
+
+    # events with objects of all object types
+    expected = events_with_all_object_types(events, e2o, ["order", "delivery"])
+    event_ids = np.intersect1d(index.events_of_objects(index.objects_of_object_types(["order"])),
+                               index.events_of_objects(index.objects_of_object_types(["delivery"])))
+    assert event_ids.tolist() == index.ids(TERM_EVENT, expected[TERM_EVENT]).tolist()
+
+
+def test_index_of_subset_equals_index_of_sublog(log):
+    events, e2o, objects, index = log
+    event_rows = index.event_rows(index.events_of_activities(["pick", "pack"]))
+    e2o_rows = index.e2o_rows_of_events(index.events_of_activities(["pick", "pack"]))
+    object_rows = index.object_rows(index.objects_of_e2o_rows(e2o_rows))
+
+    subset = index.subset(event_rows=event_rows, e2o_rows=e2o_rows, object_rows=object_rows)
+
+    sub_events, sub_e2o, sub_objects = events.iloc[event_rows], e2o.iloc[e2o_rows], objects.iloc[object_rows]
+    selected_objects = sub_objects[TERM_OBJECT].iloc[::3]
+    object_ids = subset.ids(TERM_OBJECT, selected_objects)
+    assert subset.e2o_rows_of_objects(object_ids).tolist() == rows(sub_e2o[TERM_OBJECT].isin(selected_objects))
+    assert subset.events_of_objects(object_ids).tolist() == \
+           subset.ids(TERM_EVENT, sub_e2o.loc[sub_e2o[TERM_OBJECT].isin(selected_objects), TERM_EVENT]).tolist()
+    assert subset.events_of_activities(["pick"]).tolist() == \
+           subset.ids(TERM_EVENT, sub_events.loc[sub_events[TERM_ACTIVITY] == "pick", TERM_EVENT]).tolist()
+    assert subset.object_rows(object_ids).tolist() == rows(sub_objects[TERM_OBJECT].isin(selected_objects))
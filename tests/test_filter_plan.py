@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip("qel_simulation")
+
+import qrpm.app.data_operations.filter_plan as fplan
+from qrpm.GLOBAL import TERM_ALL, TERM_QUANTITY_OPERATIONS
+
+
+def plan(quantity_operations: dict | None = None) -> dict:
+    return {fplan.PLAN_BASE: {TERM_QUANTITY_OPERATIONS: quantity_operations}, fplan.PLAN_STEPS: []}
+
+
+def activities(*selected) -> dict:
+    return fplan.create_step(fplan.FILTER_ACTIVITY, selected_activities=list(selected))
+
+
+def object_types(*selected) -> dict:
+    return fplan.create_step(fplan.FILTER_OBJECT_TYPES, object_types_to_include=list(selected))
+
+
+def collection_points(selected) -> dict:
+    return fplan.create_step(fplan.PROJECTION_COLLECTION_POINTS, selected_collection_points_projection=selected)
+
+
+def test_consecutive_activity_selections_are_intersected():
+    steps = fplan.optimise_steps([activities("a", "b", "c"), activities("b", "c", "d")])
+
+    assert steps == [activities("b", "c")]
+
+
+def test_time_periods_are_merged_to_their_overlap():
+    first = fplan.create_step(fplan.FILTER_TIME_PERIOD, selected_start_date="2024-01-01",
+                              selected_end_date="2024-03-31")
+    second = fplan.create_step(fplan.FILTER_TIME_PERIOD, selected_start_date="2024-02-01",
+                               selected_end_date=None)
+
+    assert fplan.optimise_steps([first, second]) == [
+        fplan.create_step(fplan.FILTER_TIME_PERIOD, selected_start_date="2024-02-01", selected_end_date="2024-03-31")]
+
+
+def test_overlapping_object_type_selections_are_intersected():
+    steps = fplan.optimise_steps([object_types("order", "item"), object_types("item", "delivery")])
+
+    assert steps == [object_types("item")]
+
+
+def test_disjoint_object_type_selections_are_not_merged():
+    # an empty selection of object types keeps all objects, so the steps have to be executed one after the other
+    steps = fplan.optimise_steps([object_types("order"), object_types("delivery")])
+
+    assert steps == [object_types("order"), object_types("delivery")]
+
+
+def test_object_type_selection_without_object_types_is_merged_away():
+    assert fplan.optimise_steps([object_types(), object_types("order")]) == [object_types("order")]
+    assert fplan.optimise_steps([object_types("order"), object_types()]) == [object_types("order")]
+
+
+def test_projections_without_effect_are_removed():
+    steps = fplan.optimise_steps([collection_points(TERM_ALL), activities("a"), collection_points(None)])
+
+    assert steps == [activities("a")]
+
+
+def test_selections_are_executed_before_projections_but_not_before_quantity_selections():
+    active = fplan.create_step(fplan.FILTER_ACTIVE_EVENTS)
+    steps = fplan.optimise_steps([collection_points(["cp1"]), activities("a"), active, activities("b")])
+
+    assert steps == [activities("a"), collection_points(["cp1"]), active, activities("b")]
+
+
+def test_quantity_selections_require_quantity_data():
+    with pytest.raises(ValueError):
+        fplan.add_step(plan(), fplan.create_step(fplan.FILTER_ACTIVE_EVENTS))
+
+    assert fplan.add_step(plan(), activities("a"))[fplan.PLAN_STEPS] == [activities("a")]
+
+
+def test_unknown_filters_are_rejected():
+    with pytest.raises(ValueError):
+        fplan.create_step("unknown filter")
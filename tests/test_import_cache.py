@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from qrpm.app.import_cache import ImportCache, CACHE_OVERVIEW_FILE
+
+
+def log_tables() -> dict[str, pd.DataFrame]:
+    qop = pd.DataFrame({"ocel_id": [f"e{i}" for i in range(100)], "value": np.arange(100, dtype=np.int64),
+                        "share": [0.5, None] * 50})
+    return {"qop": qop, "ilvl": None}
+
+
+def test_read_returns_written_tables(tmp_path):
+    cache = ImportCache(directory=str(tmp_path))
+    assert cache.write("key", frames=log_tables(), overview={"events": 100})
+
+    frames, overview = cache.read("key")
+
+    assert overview == {"events": 100}
+    assert set(frames) == {"qop"}
+    pd.testing.assert_frame_equal(frames["qop"], log_tables()["qop"])
+
+
+def test_numeric_columns_are_not_copied(tmp_path):
+    cache = ImportCache(directory=str(tmp_path))
+    cache.write("key", frames=log_tables(), overview={})
+
+    frames, _ = cache.read("key")
+
+    # views of the memory-mapped file are read-only
+    assert not frames["qop"]["value"].to_numpy().flags.writeable
+
+
+def test_existing_entry_is_a_cache_hit(tmp_path):
+    cache = ImportCache(directory=str(tmp_path))
+    cache.write("key", frames=log_tables(), overview={"writer": 1})
+
+    # a concurrent import of the same file finishing second
+    assert cache.write("key", frames=log_tables(), overview={"writer": 2})
+
+    assert cache.read("key")[1] == {"writer": 1}
+    assert os.listdir(tmp_path) == ["key"]
+
+
+def test_incomplete_entry_is_replaced(tmp_path):
+    cache = ImportCache(directory=str(tmp_path))
+    cache.write("key", frames=log_tables(), overview={"writer": 1})
+    os.remove(os.path.join(cache.path("key"), CACHE_OVERVIEW_FILE))
+
+    assert not cache.contains("key")
+    assert cache.write("key", frames=log_tables(), overview={"writer": 2})
+    assert cache.read("key")[1] == {"writer": 2}
+
+
+def test_least_recently_used_logs_are_pruned(tmp_path):
+    cache = ImportCache(directory=str(tmp_path), max_entries=2)
+
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.write(key, frames=log_tables(), overview={})
+        os.utime(cache.path(key), (i, i))
+
+    assert sorted(os.listdir(tmp_path)) == ["b", "c"]
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.itemLevelIndex import ItemLevelIndex
+from qrpm.GLOBAL import TERM_EVENT, TERM_COLLECTION, TERM_TIME
+
+
+@pytest.fixture
+def ilvl() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = 400
+    ilvl = pd.DataFrame({TERM_EVENT: [f"e{i // 2}" for i in range(rows)],
+                         TERM_COLLECTION: rng.choice(["cp0", "cp1", "cp2"], rows),
+                         TERM_TIME: pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 5000, rows),
+                                                                                 unit="min"),
+                         "a": rng.integers(-3, 10, rows).astype(float),
+                         "b": rng.integers(-3, 10, rows).astype(float)})
+    ilvl.loc[rng.random(rows) < 0.1, "a"] = np.nan
+    ilvl.loc[rng.random(rows) < 0.1, "b"] = np.nan
+    return ilvl
+
+
+def events_by_mask(ilvl: pd.DataFrame, collection_point: str, item_types: list[str], minimum: float | None,
+                   maximum: float | None) -> list[str]:
+    in_range = pd.Series(False, index=ilvl.index)
+    for item_type in item_types:
+        levels = ilvl[item_type]
+        in_range |= levels.notna() & (True if minimum is None else levels >= minimum) & \
+                    (True if maximum is None else levels <= maximum)
+    return sorted(set(ilvl.loc[(ilvl[TERM_COLLECTION] == collection_point) & in_range, TERM_EVENT]))
+
+
+@pytest.mark.parametrize("minimum, maximum", [(0, 5), (2, 2), (None, 0), (4, None), (6, 1), (20, None)])
+@pytest.mark.parametrize("item_types", [["a"], ["b"], ["a", "b"], ["missing"]])
+def test_events_in_range_equal_boolean_mask(ilvl, item_types, minimum, maximum):
+    index = ItemLevelIndex(ilvl)
+
+    for cp in ["cp0", "cp1", "cp2"]:
+        events = index.events_in_range(cp, item_types, minimum, maximum)
+        expected = events_by_mask(ilvl, cp, [t for t in item_types if t in ilvl.columns], minimum, maximum)
+
+        assert sorted(events) == expected
+
+
+def test_events_in_range_without_bounds_include_missing_levels(ilvl):
+    index = ItemLevelIndex(ilvl)
+
+    events = index.events_in_range("cp0", "a")
+
+    assert sorted(events) == sorted(set(ilvl.loc[ilvl[TERM_COLLECTION] == "cp0", TERM_EVENT]))
+    assert len(index.events_in_range("unknown", "a", 0, 5)) == 0
+
+
+def test_rows_in_period_are_time_ordered_rows_of_collection_point(ilvl):
+    index = ItemLevelIndex(ilvl)
+    start, end = pd.Timestamp("2024-01-02"), pd.Timestamp("2024-01-03 06:00")
+
+    rows = index.rows_in_period("cp1", start, end)
+
+    mask = (ilvl[TERM_COLLECTION] == "cp1") & (ilvl[TERM_TIME] >= start) & (ilvl[TERM_TIME] <= end)
+    assert sorted(rows) == list(np.flatnonzero(mask))
+    assert ilvl[TERM_TIME].iloc[rows].is_monotonic_increasing
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.itemLevelIndex import ItemLevelIndex
+from qrpm.analysis.itemLevelResampling import resample_item_levels, select_granularity
+from qrpm.GLOBAL import TERM_EVENT, TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES, TERM_HOURLY, TERM_DAILY, \
+    TERM_WEEKLY, TERM_MINIMUM, TERM_MAXIMUM, TERM_LAST, TERM_TIME_WEIGHTED_MEAN
+
+
+@pytest.fixture
+def ilvl() -> pd.DataFrame:
+    # post-event, x is 4 from 00:30 to 01:15, 1 until 02:00 and 3 until 12:00 of the next day (2024-01-01 is a Monday)
+    return pd.DataFrame({TERM_EVENT: ["e1", "e2", "e3", "e4"],
+                         TERM_COLLECTION: ["cp", "cp", "cp", "cp"],
+                         TERM_TIME: pd.to_datetime(["2024-01-01 01:15", "2024-01-01 00:30", "2024-01-02 12:00",
+                                                    "2024-01-01 02:00"]),
+                         "x": [1, 4, 0, 3]})
+
+
+def aggregations(resampled: pd.DataFrame, time: str) -> list[float]:
+    row = resampled.set_index(TERM_TIME).loc[pd.Timestamp(time)]
+    return [row[TERM_MINIMUM], row[TERM_MAXIMUM], row[TERM_LAST], row[TERM_TIME_WEIGHTED_MEAN]]
+
+
+def test_hourly_resampling_of_post_event_item_levels(ilvl):
+    resampled = resample_item_levels(ilvl, TERM_HOURLY, post_event=True)
+
+    # one period per hour from 00:00 until 12:00 of the next day
+    assert len(resampled) == 24 + 13
+    assert (resampled[TERM_ITEM_TYPES] == "x").all()
+    assert aggregations(resampled, "2024-01-01 00:00") == [4, 4, 4, 4]
+    assert aggregations(resampled, "2024-01-01 01:00") == [1, 4, 1, (15 * 4 + 45 * 1) / 60]
+    assert aggregations(resampled, "2024-01-01 07:00") == [3, 3, 3, 3]
+    # the last item level holds for no time, the period only has its last item level
+    assert aggregations(resampled, "2024-01-02 12:00") == [0, 0, 0, 0]
+
+
+def test_daily_and_weekly_resampling_of_post_event_item_levels(ilvl):
+    daily = resample_item_levels(ilvl, TERM_DAILY, post_event=True)
+
+    assert daily[TERM_TIME].tolist() == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-02")]
+    assert aggregations(daily, "2024-01-01")[:3] == [1, 4, 3]
+    assert np.isclose(aggregations(daily, "2024-01-01")[3], (45 * 4 + 45 * 1 + 22 * 60 * 3) / (45 + 45 + 22 * 60))
+    assert aggregations(daily, "2024-01-02") == [0, 3, 0, 3]
+
+    weekly = resample_item_levels(ilvl, TERM_WEEKLY, post_event=True)
+
+    assert weekly[TERM_TIME].tolist() == [pd.Timestamp("2024-01-01")]
+    assert aggregations(weekly, "2024-01-01")[:3] == [0, 4, 0]
+    assert np.isclose(aggregations(weekly, "2024-01-01")[3], (45 * 4 + 45 * 1 + 34 * 60 * 3) / (45 + 45 + 34 * 60))
+
+
+def test_daily_resampling_of_pre_event_item_levels(ilvl):
+    # pre-event, x is 1 from 00:30 to 01:15, 3 until 02:00 and 0 until 12:00 of the next day
+    daily = resample_item_levels(ilvl, TERM_DAILY, post_event=False)
+
+    assert aggregations(daily, "2024-01-01")[:3] == [0, 4, 0]
+    assert np.isclose(aggregations(daily, "2024-01-01")[3], (45 * 1 + 45 * 3 + 22 * 60 * 0) / (45 + 45 + 22 * 60))
+    assert aggregations(daily, "2024-01-02") == [0, 0, 0, 0]
+
+
+def test_resampling_keeps_time_zone():
+    ilvl = pd.DataFrame({TERM_EVENT: ["e1", "e2"], TERM_COLLECTION: ["cp", "cp"],
+                         TERM_TIME: pd.to_datetime(["2024-01-01 23:30", "2024-01-02 00:30"]).tz_localize(
+                             "Europe/Berlin"),
+                         "x": [1, 2]})
+
+    daily = resample_item_levels(ilvl, TERM_DAILY, post_event=True)
+
+    assert daily[TERM_TIME].tolist() == [pd.Timestamp("2024-01-01", tz="Europe/Berlin"),
+                                         pd.Timestamp("2024-01-02", tz="Europe/Berlin")]
+    with pytest.raises(ValueError):
+        resample_item_levels(ilvl, "monthly")
+
+
+def test_select_granularity_keeps_number_of_points():
+    start = pd.Timestamp("2024-01-01").value
+    end = pd.Timestamp("2024-01-03").value
+
+    assert select_granularity(start, end, max_points=100) == TERM_HOURLY
+    assert select_granularity(start, end, number_of_series=3, max_points=100) == TERM_DAILY
+    assert select_granularity(start, end, max_points=1) == TERM_WEEKLY
+
+
+@pytest.mark.parametrize("granularity", [TERM_HOURLY, TERM_DAILY])
+@pytest.mark.parametrize("post_event", [True, False])
+def test_resampled_item_levels_of_time_window_equal_complete_resampling(granularity, post_event):
+    rng = np.random.default_rng(0)
+    rows = 500
+    ilvl = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(rows)],
+                         TERM_COLLECTION: rng.choice(["cp0", "cp1"], rows),
+                         TERM_TIME: pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 14 * 24 * 60, rows),
+                                                                                 unit="min"),
+                         "a": rng.integers(0, 10, rows).astype(float),
+                         "b": rng.integers(0, 10, rows).astype(float)})
+    index = ItemLevelIndex(ilvl)
+    start, end = pd.Timestamp("2024-01-04 05:20"), pd.Timestamp("2024-01-09 17:45")
+
+    complete = resample_item_levels(ilvl[ilvl[TERM_COLLECTION] == "cp0"], granularity, post_event=post_event)
+    pd.testing.assert_frame_equal(index.resampled_item_levels("cp0", granularity, post_event), complete)
+
+    window = index.resampled_item_levels("cp0", granularity, post_event, start=start, end=end)
+    first, last = start.floor("h" if granularity == TERM_HOURLY else "D"), end
+    in_window = lambda frame: frame[(frame[TERM_TIME] >= first) & (frame[TERM_TIME] <= last)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(in_window(window), in_window(complete))
+    # zooming within the periods of the window reuses the resampled item levels
+    assert index.resampled_item_levels("cp0", granularity, post_event, start=start + pd.Timedelta(minutes=5),
+                                       end=end) is window
@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+
+import pytest
+
+from qrpm.app.job_manager import JobManager, JOB_STATE, JOB_PROGRESS, JOB_MESSAGE, JOB_DONE, JOB_FAILED, \
+    JOB_CANCELLED, JOB_QUEUED, JOB_RUNNING, JOB_FILE_TTL
+
+
+def wait(manager: JobManager, job_id: str, timeout: float = 5.0) -> dict:
+    """Status of a job once it is finished."""
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)
+        if status is not None and status[JOB_STATE] not in {JOB_QUEUED, JOB_RUNNING}:
+            return status
+        else:
+            time.sleep(0.01)
+    raise TimeoutError(f"Job {job_id} did not finish.")
+
+
+def blocked_job(started: threading.Event, release: threading.Event, result=None):
+    """Job function that reports its progress until it is released."""
+
+    def function(progress=None):
+        progress(0.5, "Waiting")
+        started.set()
+        while not release.wait(0.01):
+            progress(0.5)
+        progress(0.9, "Released")
+        return result
+
+    return function
+
+
+def test_jobs_report_progress_and_return_their_result():
+    manager = JobManager()
+
+    def function(value, progress=None):
+        progress(0.5, "Halfway")
+        return value * 2
+
+    job_id = manager.submit(function, 21)
+
+    status = wait(manager, job_id)
+    assert status[JOB_STATE] == JOB_DONE and status[JOB_PROGRESS] == 1.0
+    assert status[JOB_MESSAGE] == "Halfway"
+    assert manager.result(job_id) == 42
+
+
+def test_jobs_with_the_same_key_share_their_execution():
+    manager = JobManager()
+    started, release = threading.Event(), threading.Event()
+
+    job_id = manager.submit(blocked_job(started, release, result="net"), key="log")
+    started.wait(5)
+    assert manager.submit(blocked_job(started, release), key="log") == job_id
+    release.set()
+    wait(manager, job_id)
+
+    # the cached result is returned for later jobs, unless the result is not cached
+    assert manager.submit(blocked_job(started, release), key="log") == job_id
+    uncached_id = manager.submit(lambda progress=None: "other", key="uncached", cache_result=False)
+    wait(manager, uncached_id)
+    assert manager.submit(lambda progress=None: "other", key="uncached", cache_result=False) != uncached_id
+
+
+def test_cancelled_jobs_end_at_their_next_progress_report():
+    manager = JobManager()
+    started, release = threading.Event(), threading.Event()
+    job_id = manager.submit(blocked_job(started, release), key="log")
+    started.wait(5)
+
+    manager.cancel(job_id)
+
+    assert wait(manager, job_id)[JOB_STATE] == JOB_CANCELLED
+    assert manager.result(job_id) is None
+    # the key of a cancelled job starts a new job
+    assert manager.submit(lambda progress=None: None, key="log") != job_id
+
+
+def test_failing_jobs_are_marked_failed():
+    manager = JobManager()
+
+    def function(progress=None):
+        raise ValueError("broken log")
+
+    job_id = manager.submit(function, key="log")
+
+    status = wait(manager, job_id)
+    assert status[JOB_STATE] == JOB_FAILED
+    assert "broken log" in status[JOB_MESSAGE]
+    assert manager.result(job_id) is None
+    assert manager.submit(function, key="log") != job_id
+
+
+def test_least_recently_used_finished_jobs_are_dropped():
+    manager = JobManager(max_finished=2)
+    job_ids = []
+    for value in range(4):
+        job_ids.append(manager.submit(lambda progress=None, value=value: value, key=str(value)))
+        wait(manager, job_ids[-1])
+
+    # jobs are pruned when a job is submitted
+    manager.submit(lambda progress=None: None)
+
+    assert manager.status(job_ids[0]) is None and manager.status(job_ids[1]) is None
+    assert manager.result(job_ids[3]) == 3
+
+
+def test_jobs_are_polled_and_cancelled_by_other_processes(tmp_path):
+    manager = JobManager(directory=str(tmp_path))
+    other_process = JobManager(directory=str(tmp_path))
+    started, release = threading.Event(), threading.Event()
+
+    done_id = manager.submit(lambda progress=None: ["overview", {"state": True}])
+    wait(manager, done_id)
+    assert other_process.status(done_id)[JOB_STATE] == JOB_DONE
+    assert other_process.result(done_id) == ["overview", {"state": True}]
+
+    job_id = manager.submit(blocked_job(started, release))
+    started.wait(5)
+    assert other_process.status(job_id)[JOB_STATE] == JOB_RUNNING
+    assert other_process.result(job_id) is None
+    other_process.cancel(job_id)
+
+    assert wait(other_process, job_id)[JOB_STATE] == JOB_CANCELLED
+    assert other_process.status("../job") is None
+
+
+def test_results_other_processes_cannot_read_fail_the_job(tmp_path):
+    manager = JobManager(directory=str(tmp_path))
+
+    job_id = manager.submit(lambda progress=None: object())
+
+    assert wait(manager, job_id)[JOB_STATE] == JOB_FAILED
+    assert JobManager(directory=str(tmp_path)).status(job_id)[JOB_STATE] == JOB_FAILED
+
+
+def test_files_of_old_jobs_are_removed(tmp_path):
+    manager = JobManager(directory=str(tmp_path))
+    job_id = manager.submit(lambda progress=None: None)
+    wait(manager, job_id)
+    old = time.time() - JOB_FILE_TTL - 1
+    os.utime(tmp_path / f"{job_id}.json", (old, old))
+
+    wait(manager, manager.submit(lambda progress=None: None))
+
+    assert not os.path.exists(tmp_path / f"{job_id}.json")
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.objectQuantities import determine_object_quantity, append_object_quantity
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION, TERM_OBJECT, TERM_OBJECT_TYPE, \
+    TERM_COMBINED_INSTANCES
+
+COMBINATION = [TERM_OBJECT, TERM_ACTIVITY, TERM_COLLECTION]
+
+
+@pytest.fixture
+def log() -> (pd.DataFrame, pd.DataFrame):
+    rng = np.random.default_rng(1)
+    n_events = 50
+    qop = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(n_events) for _ in range(2)],
+                        TERM_ACTIVITY: [activity for activity in rng.choice(["a", "b"], n_events) for _ in range(2)],
+                        TERM_COLLECTION: ["cp0", "cp1"] * n_events})
+    qop["x"] = pd.array(rng.integers(-3, 4, len(qop)), dtype="Int64")
+    qop.loc[::7, "x"] = pd.NA
+    qop["y"] = rng.integers(-3, 4, len(qop)).astype(np.int64)
+    qop["z"] = rng.random(len(qop))
+    e2o = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in rng.integers(0, n_events, 120)],
+                        TERM_OBJECT: [f"o{i}" for i in rng.integers(0, 15, 120)],
+                        TERM_OBJECT_TYPE: "order"}).drop_duplicates()
+    return qop, e2o
+
+
+def expected_object_quantity(qop: pd.DataFrame, e2o: pd.DataFrame) -> pd.DataFrame:
+    extended = qop.merge(e2o[[TERM_EVENT, TERM_OBJECT]], on=TERM_EVENT, how="inner")
+    grouped = extended.groupby(COMBINATION)
+    expected = grouped[[column for column in qop.columns if column not in {TERM_EVENT, *COMBINATION}]].sum()
+    expected[TERM_COMBINED_INSTANCES] = grouped.size().astype(np.int64)
+    return expected.reset_index().sort_values(COMBINATION).reset_index(drop=True)
+
+
+def test_object_quantity_equals_grouping_of_relations(log):
+    qop, e2o = log
+    oqty = determine_object_quantity(qop=qop, e2o=e2o, object_types={"order"}, chunk_size=40)
+
+    pd.testing.assert_frame_equal(oqty[COMBINATION + ["x", "y", "z", TERM_COMBINED_INSTANCES]],
+                                  expected_object_quantity(qop, e2o), check_exact=False)
+
+
+def test_integer_dtypes_are_kept(log):
+    qop, e2o = log
+    oqty = determine_object_quantity(qop=qop, e2o=e2o)
+
+    assert oqty["x"].dtype == pd.Int64Dtype()
+    assert oqty["y"].dtype == np.int64
+    assert oqty["z"].dtype == np.float64
+
+
+def test_missing_collection_points_are_not_aggregated(log):
+    qop, e2o = log
+    qop[TERM_COLLECTION] = qop[TERM_COLLECTION].astype(object)
+    qop.loc[::3, TERM_COLLECTION] = np.nan
+
+    oqty = determine_object_quantity(qop=qop, e2o=e2o)
+
+    assert oqty[TERM_COLLECTION].notna().all()
+    pd.testing.assert_frame_equal(oqty[COMBINATION + ["x", "y", "z", TERM_COMBINED_INSTANCES]],
+                                  expected_object_quantity(qop, e2o), check_exact=False)
+
+
+def test_appended_object_quantities_equal_the_object_quantities_of_the_extended_log(log):
+    qop, e2o = log
+    known_events = {f"e{i}" for i in range(30)}
+    known, appended = qop[qop[TERM_EVENT].isin(known_events)], qop[~qop[TERM_EVENT].isin(known_events)].copy()
+    # the appended events add an item type, a collection point and objects
+    appended["w"] = 1.0
+    appended.loc[appended.index[::5], TERM_COLLECTION] = "cp2"
+    e2o_appended = pd.concat([e2o[~e2o[TERM_EVENT].isin(known_events)],
+                              pd.DataFrame({TERM_EVENT: appended[TERM_EVENT].iloc[::6], TERM_OBJECT: "new",
+                                            TERM_OBJECT_TYPE: "order"})]).drop_duplicates()
+    oqty = determine_object_quantity(qop=known, e2o=e2o[e2o[TERM_EVENT].isin(known_events)])
+
+    extended = append_object_quantity(oqty=oqty, qop_new=appended, e2o_new=e2o_appended)
+
+    expected = expected_object_quantity(pd.concat([known, appended], ignore_index=True),
+                                        pd.concat([e2o, e2o_appended]).drop_duplicates())
+    pd.testing.assert_frame_equal(extended[COMBINATION + ["x", "y", "z", "w", TERM_COMBINED_INSTANCES]],
+                                  expected[COMBINATION + ["x", "y", "z", "w", TERM_COMBINED_INSTANCES]],
+                                  check_exact=False, check_dtype=False)
+
+
+def test_appending_to_a_log_without_object_quantities_determines_the_object_quantities(log):
+    qop, e2o = log
+
+    pd.testing.assert_frame_equal(append_object_quantity(oqty=None, qop_new=qop, e2o_new=e2o),
+                                  determine_object_quantity(qop=qop, e2o=e2o))
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("qel_simulation")
+
+import qrpm.analysis.quantityState as quantityState
+from qrpm.analysis.quantityState import determine_quantity_states, determine_quantity_state_cp, \
+    determine_quantity_state_qop, append_quantity_states
+from qrpm.GLOBAL import TERM_EVENT, TERM_ACTIVITY, TERM_COLLECTION, TERM_TIME
+
+ITEM_TYPES = ["a", "b", "c"]
+INITIAL_ITEM_LEVEL = {"cp0": {"a": 5, "z": 3}, "cp1": {"b": 2}, "cp2": {}}
+
+
+@pytest.fixture
+def qop() -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    n_operations = 300
+    qop = pd.DataFrame({TERM_EVENT: [f"e{i}" for i in range(n_operations)],
+                        TERM_ACTIVITY: rng.choice(["pick", "pack"], n_operations),
+                        TERM_COLLECTION: rng.choice(["cp0", "cp1", "cp2"], n_operations),
+                        # few distinct timestamps, so that operations of a collection point happen at the same time
+                        TERM_TIME: pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n_operations),
+                                                                                 unit="h")})
+    for item_type in ITEM_TYPES:
+        qop[item_type] = rng.integers(-5, 6, n_operations).astype(float)
+        qop.loc[rng.random(n_operations) < 0.2, item_type] = np.nan
+
+    return qop
+
+
+def test_parallel_item_levels_equal_serial_item_levels(qop, monkeypatch):
+    monkeypatch.setattr(quantityState, "MIN_PARALLEL_ROWS", 0)
+    calls = []
+    parallel_item_levels = quantityState.parallel_item_levels
+    monkeypatch.setattr(quantityState, "parallel_item_levels",
+                        lambda *args, **kwargs: calls.append(kwargs) or parallel_item_levels(*args, **kwargs))
+
+    serial = determine_quantity_states(qop=qop, initial_item_level=INITIAL_ITEM_LEVEL)
+    parallel = determine_quantity_states(qop=qop, initial_item_level=INITIAL_ITEM_LEVEL, workers=2)
+
+    assert calls == [{"workers": 2}]
+
+    for serial_ilvl, parallel_ilvl in zip(serial, parallel):
+        pd.testing.assert_frame_equal(parallel_ilvl, serial_ilvl)
+
+
+def baseline_item_levels(qop: pd.DataFrame, post_event: bool) -> pd.DataFrame:
+    """Item levels of all collection points determined one collection point at a time."""
+
+    # item types only known from the initial item levels need a column, else the baseline continues them with NaN
+    qop = qop.assign(z=0.0)
+    item_levels = []
+    for cp in sorted(qop[TERM_COLLECTION].unique()):
+        ilvl = determine_quantity_state_cp(qop.copy(), cp, INITIAL_ITEM_LEVEL[cp], post_event=post_event)
+        item_levels.append(ilvl[ilvl[TERM_EVENT] != "init"] if post_event else ilvl)
+
+    return pd.concat(item_levels, ignore_index=True).reindex(columns=list(qop.columns)).fillna({
+        item_type: 0.0 for item_type in ITEM_TYPES + ["z"]})
+
+
+@pytest.mark.parametrize("post_event", [False, True])
+def test_item_levels_equal_the_ones_determined_per_collection_point(qop, post_event):
+    item_levels = determine_quantity_states(qop=qop, initial_item_level=INITIAL_ITEM_LEVEL)[int(post_event)]
+    # missing changes are no changes (the baseline would not count them, but continue the levels with NaN)
+    expected = baseline_item_levels(qop.fillna({item_type: 0.0 for item_type in ITEM_TYPES}), post_event)
+
+    assert list(item_levels.columns) == list(qop.columns) + ["z"]
+    assert len(item_levels) == len(qop)
+    assert item_levels[TERM_TIME].is_monotonic_increasing
+
+    # the order of operations at the same time is arbitrary in the baseline, so the levels are compared before the
+    # first (pre-event) or after the last (post-event) operation of a collection point at a time
+    group = [TERM_COLLECTION, TERM_TIME]
+    aggregation = "last" if post_event else "first"
+    pd.testing.assert_frame_equal(item_levels.groupby(group)[ITEM_TYPES + ["z"]].agg(aggregation),
+                                  expected.groupby(group)[ITEM_TYPES + ["z"]].agg(aggregation))
+
+
+def test_item_levels_change_by_the_quantity_operations(qop):
+    pre_event, post_event = determine_quantity_states(qop=qop, initial_item_level=INITIAL_ITEM_LEVEL)
+
+    pd.testing.assert_frame_equal(pre_event[[TERM_EVENT, TERM_COLLECTION]], post_event[[TERM_EVENT, TERM_COLLECTION]])
+    changes = qop.set_index(TERM_EVENT).loc[post_event[TERM_EVENT], ITEM_TYPES].fillna(0).to_numpy()
+    np.testing.assert_array_equal(post_event[ITEM_TYPES].to_numpy() - pre_event[ITEM_TYPES].to_numpy(), changes)
+
+    # levels continue from the last operation of the collection point before
+    for cp, levels in pre_event.groupby(TERM_COLLECTION, sort=False):
+        following = post_event.loc[levels.index[:-1], ITEM_TYPES].to_numpy()
+        np.testing.assert_array_equal(levels[ITEM_TYPES].to_numpy()[1:], following)
+        assert levels["z"].eq(INITIAL_ITEM_LEVEL[cp].get("z", 0)).all()
+
+
+def split_by_time(qop: pd.DataFrame) -> (pd.DataFrame, pd.DataFrame):
+    """Known and appended quantity operations; the appended ones add an item type and a collection point."""
+
+    split = qop[TERM_TIME].quantile(0.6)
+    known, appended = qop[qop[TERM_TIME] <= split], qop[qop[TERM_TIME] > split].copy()
+    appended["d"] = np.arange(len(appended)) % 3 - 1.0
+    appended.loc[appended.index[::4], TERM_COLLECTION] = "cp3"
+
+    return known, appended
+
+
+def test_appended_item_levels_equal_the_item_levels_of_the_extended_log(qop):
+    known, appended = split_by_time(qop)
+    ilvl = determine_quantity_state_qop(qop=known, initial_item_level=INITIAL_ITEM_LEVEL)
+
+    extended = append_quantity_states(ilvl=ilvl, qop=known, qop_new=appended, initial_item_level=INITIAL_ITEM_LEVEL)
+
+    expected = determine_quantity_state_qop(qop=pd.concat([known, appended], ignore_index=True),
+                                            initial_item_level=INITIAL_ITEM_LEVEL)
+    order = [TERM_EVENT, TERM_COLLECTION]
+    assert set(extended.columns) == set(expected.columns)
+    pd.testing.assert_frame_equal(extended[expected.columns].sort_values(order).reset_index(drop=True),
+                                  expected.sort_values(order).reset_index(drop=True))
+
+
+def test_appending_to_a_log_without_item_levels_determines_the_item_levels(qop):
+    appended = append_quantity_states(ilvl=None, qop=None, qop_new=qop, initial_item_level=INITIAL_ITEM_LEVEL)
+
+    pd.testing.assert_frame_equal(appended, determine_quantity_state_qop(qop=qop, initial_item_level=INITIAL_ITEM_LEVEL))
+
+
+def test_appended_quantity_operations_must_not_be_earlier_than_the_known_ones(qop):
+    known, appended = split_by_time(qop)
+    ilvl = determine_quantity_state_qop(qop=appended, initial_item_level=INITIAL_ITEM_LEVEL)
+
+    with pytest.raises(ValueError):
+        append_quantity_states(ilvl=ilvl, qop=appended, qop_new=known, initial_item_level=INITIAL_ITEM_LEVEL)
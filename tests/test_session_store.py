@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.app.session_manager import SessionManager
+from qrpm.app.session_store import SessionStore, STORE_FORMAT_PICKLE, is_handle, dataframe_to_buffer
+
+
+def frame(rows: int = 1000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"event": [f"e{i}" for i in range(rows)], "value": rng.random(rows)})
+
+
+def frame_size(rows: int = 1000) -> int:
+    return len(dataframe_to_buffer(frame(rows))[0])
+
+
+def session_files(manager: SessionManager, session_id: str) -> list[str]:
+    return [name for name in os.listdir(manager.path(session_id)) if not name.startswith(".")]
+
+
+def test_stored_frames_are_returned(tmp_path):
+    store = SessionStore(session_manager=SessionManager(directory=str(tmp_path)))
+    session_id = store.create_session()
+
+    handle = store.put(frame(), session_id=session_id, name="events")
+
+    assert is_handle(handle)
+    pd.testing.assert_frame_equal(store.get(handle), frame())
+
+
+def test_frames_arrow_cannot_represent_are_pickled():
+    df = pd.DataFrame({"mixed": [1, "a", 2.5]})
+
+    assert dataframe_to_buffer(df)[1] == STORE_FORMAT_PICKLE
+    store = SessionStore()
+    pd.testing.assert_frame_equal(store.get(store.put(df)), df)
+
+
+def test_other_processes_read_frames_from_the_session_directory(tmp_path):
+    manager = SessionManager(directory=str(tmp_path))
+    store = SessionStore(session_manager=manager)
+    other_process = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+
+    handle = store.put(frame(), session_id=session_id)
+
+    pd.testing.assert_frame_equal(other_process.get(handle), frame())
+
+
+def test_session_stays_within_its_quota(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), quota=4 * frame_size() + frame_size() // 2)
+    store = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+
+    handles = [store.put(frame(seed=i), session_id=session_id) for i in range(50)]
+
+    assert manager.size(session_id) <= manager.quota
+    assert len(session_files(manager, session_id)) == 4
+    pd.testing.assert_frame_equal(store.get(handles[-1]), frame(seed=49))
+    # the least recently used versions are dropped with their files
+    with pytest.raises(KeyError):
+        SessionStore(session_manager=manager).get(handles[0])
+
+
+def test_evicted_frames_are_read_from_the_session_directory(tmp_path):
+    manager = SessionManager(directory=str(tmp_path))
+    store = SessionStore(max_bytes=2 * frame_size() + frame_size() // 2, session_manager=manager)
+    session_id = store.create_session()
+
+    handles = [store.put(frame(seed=i), session_id=session_id) for i in range(10)]
+
+    assert store.size <= store.max_bytes
+    assert len(session_files(manager, session_id)) == 10
+    for i, handle in enumerate(handles):
+        pd.testing.assert_frame_equal(store.get(handle), frame(seed=i))
+
+
+def test_frames_of_other_sessions_remain_available_after_eviction(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), quota=20 * frame_size())
+    store = SessionStore(max_bytes=3 * frame_size() + frame_size() // 2, session_manager=manager)
+    first_session = store.create_session()
+    first_handles = {name: store.put(frame(seed=i), session_id=first_session, name=name, pinned=True)
+                     for i, name in enumerate(["events", "objects", "e2o"])}
+
+    second_session = store.create_session()
+    for i in range(10):
+        store.put(frame(rows=3000, seed=i), session_id=second_session, name="events", pinned=True)
+
+    for i, name in enumerate(["events", "objects", "e2o"]):
+        pd.testing.assert_frame_equal(store.get(first_handles[name]), frame(seed=i))
+
+
+def test_quota_only_removes_superseded_versions(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), quota=5 * frame_size() + frame_size() // 2)
+    store = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+    log = {name: store.put(frame(seed=i), session_id=session_id, name=name, pinned=True)
+           for i, name in enumerate(["events", "e2o"])}
+
+    # sublogs of the same names supersede each other, but not the pinned frames of the full log
+    sublogs = [{name: store.put(frame(seed=10 * i + j), session_id=session_id, name=name)
+                for j, name in enumerate(["events", "e2o"])} for i in range(1, 6)]
+
+    assert manager.size(session_id) <= manager.quota
+    for i, name in enumerate(["events", "e2o"]):
+        pd.testing.assert_frame_equal(SessionStore(session_manager=manager).get(log[name]), frame(seed=i))
+        pd.testing.assert_frame_equal(SessionStore(session_manager=manager).get(sublogs[-1][name]),
+                                      frame(seed=50 + i))
+    with pytest.raises(KeyError):
+        SessionStore(session_manager=manager).get(sublogs[0]["events"])
+
+    # a new full log supersedes the pinned frames
+    appended = store.put(frame(seed=99), session_id=session_id, name="events", pinned=True)
+    store.put(frame(seed=98), session_id=session_id, name="e2o", pinned=True)
+    pd.testing.assert_frame_equal(SessionStore(session_manager=manager).get(appended), frame(seed=99))
+    with pytest.raises(KeyError):
+        SessionStore(session_manager=manager).get(log["events"])
+
+
+def test_pinned_frames_exceeding_the_quota_are_rejected(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), quota=2 * frame_size() + frame_size() // 2)
+    store = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+    store.put(frame(seed=0), session_id=session_id, name="events", pinned=True)
+    store.put(frame(seed=1), session_id=session_id, name="e2o", pinned=True)
+
+    with pytest.raises(ValueError):
+        store.put(frame(seed=2), session_id=session_id, name="qop", pinned=True)
+
+
+def test_frames_larger_than_the_quota_are_rejected(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), quota=frame_size() // 2)
+    store = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+
+    with pytest.raises(ValueError):
+        store.put(frame(), session_id=session_id)
+
+
+def test_dropped_sessions_are_removed(tmp_path):
+    manager = SessionManager(directory=str(tmp_path))
+    store = SessionStore(session_manager=manager)
+    session_id = store.create_session()
+    handle = store.put(frame(), session_id=session_id)
+
+    store.drop_session(session_id)
+
+    assert not manager.exists(session_id)
+    assert store.size == 0
+    with pytest.raises(KeyError):
+        store.get(handle)
+
+
+def test_expired_sessions_are_removed_when_a_session_is_created(tmp_path):
+    manager = SessionManager(directory=str(tmp_path), ttl=60)
+    store = SessionStore(session_manager=manager)
+    expired = store.create_session()
+    store.put(frame(), session_id=expired)
+    os.utime(manager.path(expired), (0, 0))
+
+    active = store.create_session()
+
+    assert not manager.exists(expired)
+    assert manager.exists(active)
+    assert store.size == 0
+
+
+def test_session_ids_and_file_names_cannot_leave_the_session_directory(tmp_path):
+    manager = SessionManager(directory=str(tmp_path))
+
+    with pytest.raises(ValueError):
+        manager.path("../other")
+    with pytest.raises(ValueError):
+        manager.file_path(manager.create_session(), "../file")
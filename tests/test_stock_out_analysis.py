@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from qrpm.analysis.stockOutAnalysis import stock_out_statistics
+from qrpm.GLOBAL import TERM_EVENT, TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES, TERM_STOCK_OUTS, \
+    TERM_STOCK_OUT_DURATION, TERM_OBSERVED_DURATION, TERM_TIME_WEIGHTED_MEAN, TERM_FIRST_STOCK_OUT, TERM_LAST_STOCK_OUT
+
+
+def test_stock_out_statistics_of_post_event_item_levels():
+    ilvl = pd.DataFrame({TERM_EVENT: ["e1", "e2", "e3", "e4", "e5"],
+                         TERM_COLLECTION: ["cp", "cp", "cp", "cp", "other"],
+                         TERM_TIME: pd.to_datetime(["2024-01-01 00:00", "2024-01-01 01:00", "2024-01-01 03:00",
+                                                    "2024-01-01 04:00", "2024-01-01 00:00"]),
+                         "x": [2, 0, 1, 0, 5],
+                         "y": [1, 1, 1, 1, 0]})
+
+    stats = stock_out_statistics(ilvl, post_event=True).set_index([TERM_COLLECTION, TERM_ITEM_TYPES])
+
+    x = stats.loc[("cp", "x")]
+    assert x[TERM_STOCK_OUTS] == 2
+    # x is 0 from 01:00 to 03:00, the last item level holds for no observed time
+    assert x[TERM_STOCK_OUT_DURATION] == pd.Timedelta(hours=2)
+    assert x[TERM_OBSERVED_DURATION] == pd.Timedelta(hours=4)
+    assert np.isclose(x[TERM_TIME_WEIGHTED_MEAN], (2 * 1 + 0 * 2 + 1 * 1) / 4)
+    assert x[TERM_FIRST_STOCK_OUT] == pd.Timestamp("2024-01-01 01:00")
+    assert x[TERM_LAST_STOCK_OUT] == pd.Timestamp("2024-01-01 04:00")
+
+    y = stats.loc[("cp", "y")]
+    assert y[TERM_STOCK_OUTS] == 0
+    assert y[TERM_STOCK_OUT_DURATION] == pd.Timedelta(0)
+    assert pd.isna(y[TERM_FIRST_STOCK_OUT])
+
+
+def test_stock_out_statistics_keep_time_zone():
+    ilvl = pd.DataFrame({TERM_EVENT: ["e1", "e2"], TERM_COLLECTION: ["cp", "cp"],
+                         TERM_TIME: pd.date_range("2024-03-31 00:00", periods=2, freq="2h", tz="Europe/Berlin"),
+                         "x": [1, 0]})
+
+    stats = stock_out_statistics(ilvl, post_event=True)
+
+    assert stats.loc[0, TERM_FIRST_STOCK_OUT] == ilvl.loc[1, TERM_TIME]
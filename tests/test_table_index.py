@@ -0,0 +1,139 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.tableIndex import TableIndex, parse_filter_query
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = 250
+    df = pd.DataFrame({"Activity": rng.choice(["pick", "Pack", "ship"], rows),
+                       "Collection": pd.Categorical(rng.choice(["cp0", "cp1"], rows)),
+                       "Level": rng.integers(-5, 5, rows).astype(float),
+                       "Time": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 5 * 24, rows), unit="h")})
+    df.loc[rng.random(rows) < 0.1, "Level"] = np.nan
+    df.loc[rng.random(rows) < 0.05, "Activity"] = None
+    return df
+
+
+def page_rows(index: TableIndex, page_current: int, page_size: int, sort_by=None, filter_query=None) -> list:
+    data, page_count = index.page(page_current, page_size, sort_by=sort_by, filter_query=filter_query)
+    return [record["row"] for record in data]
+
+
+def test_parse_filter_query():
+    parts = parse_filter_query('{Activity} icontains "PI" && {Level} >= 2 && {Time} datestartswith 2024-01-02 && '
+                               '{Level} s!= 1 && {Activity} is blank && {Activity} eq \'a \\\' b\' && garbage')
+
+    assert parts == [("Activity", "contains", "PI", False), ("Level", "ge", "2", True),
+                     ("Time", "datestartswith", "2024-01-02", True), ("Level", "ne", "1", True),
+                     ("Activity", "is blank", "", True), ("Activity", "eq", "a ' b", True)]
+    assert parse_filter_query(None) == []
+    assert parse_filter_query("") == []
+
+
+def test_pages_cover_sorted_table(df):
+    index = TableIndex(df.assign(row=np.arange(len(df))))
+    sort_by = [{"column_id": "Collection", "direction": "asc"}, {"column_id": "Level", "direction": "desc"}]
+
+    # ascending collection point, descending level with missing levels last, ties in table order
+    expected = sorted(range(len(df)), key=lambda i: (df["Collection"][i], np.isnan(df["Level"][i]),
+                                                     -np.nan_to_num(df["Level"][i]), i))
+    pages = [page_rows(index, page, 40, sort_by=sort_by) for page in range(7)]
+
+    assert sum(pages, []) == expected
+    assert [len(page) for page in pages] == [40] * 6 + [10]
+    assert index.page(0, 40, sort_by=sort_by)[1] == 7
+    # pages beyond the last page show the last page
+    assert page_rows(index, 20, 40, sort_by=sort_by) == pages[-1]
+    assert page_rows(index, None, 40) == list(range(40))
+
+
+@pytest.mark.parametrize("filter_query, expected", [
+    ("{Level} = 2", lambda df: df["Level"] == 2),
+    ("{Level} eq 2", lambda df: df["Level"] == 2),
+    ("{Level} != 2", lambda df: df["Level"].notna() & (df["Level"] != 2)),
+    ("{Level} < 0", lambda df: df["Level"] < 0),
+    ("{Level} <= 0", lambda df: df["Level"] <= 0),
+    ("{Level} > 0", lambda df: df["Level"] > 0),
+    ("{Level} ge 0", lambda df: df["Level"] >= 0),
+    ("{Level} is blank", lambda df: df["Level"].isna()),
+    ("{Activity} is blank", lambda df: df["Activity"].isna()),
+    ("{Activity} contains ack", lambda df: df["Activity"].str.contains("ack").eq(True)),
+    ('{Activity} icontains "PA"', lambda df: df["Activity"].str.lower().str.contains("pa").eq(True)),
+    ("{Activity} scontains pa", lambda df: df["Activity"].str.contains("pa").eq(True)),
+    ("{Activity} = pick", lambda df: df["Activity"] == "pick"),
+    ("{Activity} ieq PACK", lambda df: df["Activity"] == "Pack"),
+    ("{Collection} = cp1", lambda df: df["Collection"] == "cp1"),
+    ("{Time} datestartswith 2024-01-03", lambda df: df["Time"].dt.date == pd.Timestamp("2024-01-03").date()),
+    ("{Time} >= 2024-01-04", lambda df: df["Time"] >= pd.Timestamp("2024-01-04")),
+    ("{Level} > 0 && {Collection} = cp0", lambda df: (df["Level"] > 0) & (df["Collection"] == "cp0"))])
+def test_filter_operators_equal_boolean_mask(df, filter_query, expected):
+    index = TableIndex(df.assign(row=np.arange(len(df))))
+
+    assert page_rows(index, 0, len(df), filter_query=filter_query) == list(np.flatnonzero(expected(df)))
+
+
+def test_sorting_and_filtering_combined(df):
+    index = TableIndex(df.assign(row=np.arange(len(df))))
+    sort_by = [{"column_id": "Time", "direction": "desc"}]
+
+    rows = page_rows(index, 0, len(df), sort_by=sort_by, filter_query="{Activity} = ship")
+
+    selected = df[df["Activity"] == "ship"]
+    assert rows == list(selected.sort_values("Time", ascending=False, kind="stable").index)
+
+
+@pytest.mark.parametrize("filter_query", ["{Level} > many", "{Time} > yesterday-ish"])
+def test_values_of_wrong_type_match_nothing(df, filter_query):
+    index = TableIndex(df)
+
+    data, page_count = index.page(0, 10, filter_query=filter_query)
+
+    assert data == []
+    assert page_count == 1
+
+
+@pytest.mark.parametrize("filter_query", ["{Unknown} = 1", "Level > 1", "{Level} ~ 1", "&&", "{Level}"])
+def test_bad_filter_queries_and_sorts_are_ignored(df, filter_query):
+    index = TableIndex(df.assign(row=np.arange(len(df))))
+
+    assert page_rows(index, 0, 10, sort_by=[{"column_id": "Unknown", "direction": "asc"}],
+                       filter_query=filter_query) == list(range(10))
+    with pytest.raises(ValueError):
+        index.page(0, 0)
+
+
+def test_page_decodes_categoricals_and_types_columns(df):
+    index = TableIndex(df)
+
+    data, page_count = index.page(0, 5)
+
+    assert all(isinstance(record["Collection"], str) for record in data)
+    assert index.columns == [{"name": "Activity", "id": "Activity"}, {"name": "Collection", "id": "Collection"},
+                             {"name": "Level", "id": "Level", "type": "numeric"},
+                             {"name": "Time", "id": "Time", "type": "datetime"}]
+
+
+def test_create_data_table_page_of_stored_frame(df, monkeypatch):
+    pytest.importorskip("qel_simulation")
+    import qrpm.app.dataStructure as dataStructure
+    import qrpm.app.operations as operations
+    from qrpm.app.session_store import SessionStore
+    monkeypatch.setattr(dataStructure, "SESSION_STORE", SessionStore())
+
+    df_json = json.dumps(dataStructure.store_dataframe(df.assign(row=np.arange(len(df)))))
+    sort_by = [{"column_id": "Level", "direction": "asc"}]
+
+    data, columns, page_count = operations.create_data_table_page(df_json, 1, 10, sort_by, "{Collection} = cp0")
+
+    expected = df[df["Collection"] == "cp0"].sort_values("Level", kind="stable", na_position="last")
+    assert [record["row"] for record in data] == list(expected.index[10:20])
+    assert page_count == -(-len(expected) // 10)
+    assert [column["id"] for column in columns] == list(df.columns) + ["row"]
+    # the index is kept with the stored frame
+    assert dataStructure.get_table_index(df_json) is dataStructure.get_table_index(df_json)
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from qrpm.analysis.timeWeightedStatistics import weighted_quantiles, time_weighted_statistics, row_durations, \
+    time_in_state, quantile_name
+from qrpm.GLOBAL import TERM_EVENT, TERM_COLLECTION, TERM_TIME, TERM_ITEM_TYPES, TERM_OBSERVED_DURATION, \
+    TERM_TIME_WEIGHTED_MEAN, TERM_TIME_WEIGHTED_STD, TERM_STOCK_OUT_SHARE, TERM_VALUE, TERM_DURATION, TERM_SHARE
+
+
+@pytest.fixture
+def ilvl() -> pd.DataFrame:
+    # x is 2, 0, 1 and 3 at 00:00, 01:00, 03:00 and 04:00; rows of the other collection point are shuffled in
+    return pd.DataFrame({TERM_EVENT: ["e1", "e2", "e3", "e4", "e5", "e6"],
+                         TERM_COLLECTION: ["cp", "other", "cp", "cp", "other", "cp"],
+                         TERM_TIME: pd.to_datetime(["2024-01-01 03:00", "2024-01-01 00:00", "2024-01-01 00:00",
+                                                    "2024-01-01 04:00", "2024-01-01 05:00", "2024-01-01 01:00"]),
+                         "x": [1, 7, 2, 3, 7, 0],
+                         "y": [1, 5, 1, 1, 5, np.nan]})
+
+
+def test_weighted_quantiles_equal_quantiles_of_repeated_values():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, (200, 3)).astype(float)
+    values[rng.random((200, 3)) < 0.1] = np.nan
+    weights = rng.integers(0, 5, 200).astype(float)
+    quantiles = [0.1, 0.25, 0.5, 0.9, 1.0]
+
+    result = weighted_quantiles(values, weights, quantiles)
+
+    for column in range(values.shape[1]):
+        observed = ~np.isnan(values[:, column])
+        repeated = np.repeat(values[observed, column], weights[observed].astype(int))
+        expected = np.quantile(repeated, quantiles, method="inverted_cdf")
+        assert np.array_equal(result[:, column], expected)
+
+
+def test_weighted_quantiles_without_weight_are_missing():
+    result = weighted_quantiles(np.array([[1.0, np.nan], [2.0, np.nan]]), np.array([0.0, 1.0]), [0.5])
+
+    assert np.isnan(result[0, 1])
+    assert result[0, 0] == 2.0
+    assert np.isnan(weighted_quantiles(np.empty((0, 2)), np.empty(0), [0.5])).all()
+
+
+@pytest.mark.parametrize("post_event, mean, variance, quantiles, stock_out_share", [
+    # post-event: 2 holds for 1h, 0 for 2h, 1 for 1h and 3 for no time
+    (True, (2 * 1 + 0 * 2 + 1 * 1) / 4, (1 * 1.25 ** 2 + 2 * 0.75 ** 2 + 1 * 0.25 ** 2) / 4, [0, 0, 1], 2 / 4),
+    # pre-event: 2 holds for no time, 0 for 1h, 1 for 2h and 3 for 1h
+    (False, (0 * 1 + 1 * 2 + 3 * 1) / 4, (1 * 1.25 ** 2 + 2 * 0.25 ** 2 + 1 * 1.75 ** 2) / 4, [0, 1, 1], 1 / 4)])
+def test_time_weighted_statistics_of_step_function(ilvl, post_event, mean, variance, quantiles, stock_out_share):
+    stats = time_weighted_statistics(ilvl, post_event=post_event).set_index([TERM_COLLECTION, TERM_ITEM_TYPES])
+
+    x = stats.loc[("cp", "x")]
+    assert x[TERM_OBSERVED_DURATION] == pd.Timedelta(hours=4)
+    assert np.isclose(x[TERM_TIME_WEIGHTED_MEAN], mean)
+    assert np.isclose(x[TERM_TIME_WEIGHTED_STD], np.sqrt(variance))
+    assert [x[quantile_name(q)] for q in (0.25, 0.5, 0.75)] == quantiles
+    assert np.isclose(x[TERM_STOCK_OUT_SHARE], stock_out_share)
+
+    # the missing item level of y is not observed
+    y = stats.loc[("cp", "y")]
+    assert y[TERM_OBSERVED_DURATION] == (pd.Timedelta(hours=2) if post_event else pd.Timedelta(hours=3))
+    assert y[TERM_TIME_WEIGHTED_MEAN] == 1
+    assert y[TERM_TIME_WEIGHTED_STD] == 0
+    assert y[TERM_STOCK_OUT_SHARE] == 0
+
+    other = stats.loc[("other", "x")]
+    assert other[TERM_OBSERVED_DURATION] == pd.Timedelta(hours=5)
+    assert other[TERM_TIME_WEIGHTED_MEAN] == 7
+
+
+def test_time_weighted_statistics_with_precomputed_durations(ilvl):
+    durations = row_durations(ilvl, post_event=True)
+
+    assert durations.tolist() == [3600e9, 5 * 3600e9, 3600e9, 0.0, 0.0, 2 * 3600e9]
+    pd.testing.assert_frame_equal(time_weighted_statistics(ilvl, durations=durations),
+                                  time_weighted_statistics(ilvl, post_event=True))
+
+
+def test_time_in_state_of_step_function(ilvl):
+    states = time_in_state(ilvl, "cp", "x", post_event=True)
+
+    assert states[TERM_VALUE].tolist() == [0, 1, 2, 3]
+    assert states[TERM_DURATION].tolist() == [pd.Timedelta(hours=h) for h in (2, 1, 1, 0)]
+    assert np.allclose(states[TERM_SHARE], [0.5, 0.25, 0.25, 0])